@@ -17,12 +17,17 @@ from dolfinimport import *
 from cbcbeat.cardiacmodels import CardiacModel
 from cbcbeat.cellmodels import *
 from cbcbeat.markerwisefield import *
+from cbcbeat.stimulus import *
 
 # Solver imports
 from cbcbeat.splittingsolver import BasicSplittingSolver
 from cbcbeat.splittingsolver import SplittingSolver
 from cbcbeat.cellsolver import BasicSingleCellSolver, SingleCellSolver
 from cbcbeat.cellsolver import BasicCardiacODESolver, CardiacODESolver
+from cbcbeat.cellsolver import EnsembleSingleCellSolver
+from cbcbeat.prepacing import SingleCellPrePacer, prepace
+from cbcbeat.arrayodesolver import ArrayODESolver
+from cbcbeat.statearray import StateArray
 from cbcbeat.bidomainsolver import BasicBidomainSolver
 from cbcbeat.bidomainsolver import BidomainSolver
 from cbcbeat.monodomainsolver import BasicMonodomainSolver
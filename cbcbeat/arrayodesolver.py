@@ -0,0 +1,741 @@
+"""This module contains a vectorised solver for the systems of ODEs
+given by cardiac cell models. The solver advances the states of all
+nodes at once by acting on NumPy arrays, see
+:py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`.
+"""
+
+__all__ = ["ArrayODESolver"]
+
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import numpy
+from ufl.algorithms import extract_coefficients
+from ufl.algorithms.signature import compute_expression_signature
+from ufl.domain import extract_domains
+
+from cbcbeat.dolfinimport import Parameters, GenericFunction, error, warning
+from cbcbeat.ufl2numpy import CellModelKernels
+from cbcbeat.kernelcache import kernel_cache
+
+class ArrayODESolver(object):
+    """A vectorised solver for systems of ODEs typically encountered
+    in cardiac applications of the form: find a scalar :math:`v` and a
+    vector :math:`s` at each node such that
+
+    .. math::
+
+      v_t = - I_{ion}(v, s) + I_s
+
+      s_t = F(v, s)
+
+    The right-hand side of the cell model is lowered into NumPy array
+    kernels (see :py:class:`~cbcbeat.ufl2numpy.CellModelKernels`) and
+    all nodes are advanced at once. The states are given as arrays of
+    shape (num_states + 1, N) with the membrane potential in row 0
+    and one column per node.
+
+    The supported schemes are "ForwardEuler", "RL1", "GRL1",
+    "BackwardEuler" and "Theta". The latter two are implicit: the
+    theta-scheme evaluates the right-hand side at the states
+    theta*y(t1) + (1 - theta)*y(t0) and the time t0 + theta*dt, with
+    theta given by the parameter "theta" (theta = 1 is the backward
+    Euler scheme). The nonlinear system of each node is solved by a
+    Newton iteration, starting from the states at t0, with the
+    Jacobian of the cell model if available, and a finite difference
+    approximation of the Jacobian otherwise. Statistics of the Newton
+    iterations of the last step are available as
+    :py:attr:`newton_statistics`.
+
+    If the parameter "use_lookup_table" is True, the subexpressions
+    depending on the membrane potential only (such as the rate
+    functions of the gating variables) are tabulated on the grid given
+    by the "lookup_table" parameters and interpolated in each step. Use
+    :py:meth:`lookup_table_accuracy` to choose the grid spacing.
+
+    If the parameter "use_model_kernels" is True and the cell model
+    provides a NumPy kernel of its right-hand side (generated by
+    :py:mod:`~cbcbeat.gotran2numpy`), the right-hand side is evaluated
+    by that kernel, with the stimulus added to the membrane potential,
+    unless the lookup table is used. Likewise, the RL1 steps are taken
+    by the Rush-Larsen kernel of the cell model, if the membrane
+    potential is advanced by forward Euler. The GRL1 scheme evaluates
+    the right-hand side together with the diagonal of the Jacobian,
+    and uses the lowered kernels throughout.
+
+    If the parameter "use_kernel_cache" is True, the generated kernels
+    are stored in (and loaded from) the persistent kernel cache shared
+    by all processes, see :py:class:`~cbcbeat.kernelcache.KernelCache`.
+
+    The nodes are advanced in chunks of "chunk_size" nodes. If the
+    parameter "num_threads" is larger than 1 (or 0, for the number of
+    processors), the chunks are advanced concurrently by a pool of
+    threads acting on the shared state array: NumPy releases the
+    global interpreter lock in its array operations. The pool is
+    terminated by :py:meth:`close` (or when the solver is deleted).
+
+    If the parameter "use_multirate" is True, each node takes its own
+    number of substeps within a step, a power of two up to
+    2**maximum_level, chosen by the "multirate" parameters: either
+    such that the change of the membrane potential in each substep,
+    estimated by its time derivative, is less than the given voltage
+    increment ("voltage_increment"), or such that the local error,
+    estimated by step doubling, is within the tolerances ("error").
+    Statistics of the substeps of the last step are available as
+    :py:attr:`substep_statistics`.
+
+    If the parameter "use_activity_mask" is True, nodes at a stable
+    rest state are not advanced: a node is marked as quiescent after a
+    step if the right-hand side of all states is small relative to the
+    states (see the "activity_mask" parameters), it is not stimulated
+    and none of its neighbours (see :py:meth:`set_neighbours`) are
+    active. A quiescent node is woken when its potential has been
+    moved by more than the wake threshold from its resting potential
+    (typically by the PDE step) or when it is stimulated. Statistics
+    of the last step are available as :py:attr:`activity_statistics`.
+
+    *Arguments*
+      model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`)
+        The cardiac cell model
+      time (:py:class:`dolfin.Constant`)
+        A constant holding the current time
+      scheme (string)
+        The name of the time stepping scheme
+      I_s (:py:class:`dolfin.GenericFunction`, optional)
+        A typically time-dependent external stimulus. NB: it is
+        assumed that the time dependence of I_s is encoded via the
+        'time' Constant.
+      params (:py:class:`dolfin.Parameters`, optional)
+        Solver parameters
+    """
+
+    schemes = ("ForwardEuler", "BackwardEuler", "Theta", "RL1", "GRL1")
+
+    def __init__(self, model, time, scheme, I_s=None, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        if scheme not in self.schemes:
+            error("The scheme %s is not supported by the ArrayODESolver, "
+                  "expecting one of %s" % (scheme, ", ".join(self.schemes)))
+
+        # Store input
+        self._model = model
+        self.substep_statistics = {}
+        self.activity_statistics = {}
+        self.newton_statistics = {}
+        self._newton_iterations = []
+        self._quiescent = None
+        self._edges = None
+        self._pool = None
+        self._pool_size = None
+        self._time = time
+        self._scheme = scheme
+
+        # Lower the cell model into array kernels
+        self._I_s = I_s
+        lut = self.parameters["lookup_table"]
+        grid = None
+        if self.parameters["use_lookup_table"]:
+            grid = (lut["minimum"], lut["maximum"], lut["step"])
+        (key, sources) = (None, None)
+        if self.parameters["use_kernel_cache"]:
+            cache = kernel_cache()
+            key = cache.key(model, scheme, grid, lut["tolerance"],
+                            _stimulus_signature(I_s))
+            sources = cache.get(key)
+        self._kernels = CellModelKernels(model, time, I_s, lookup_table=grid,
+                                         lookup_table_tolerance=lut["tolerance"],
+                                         sources=sources)
+
+        # The rows advanced by the Rush-Larsen formula
+        if scheme == "RL1":
+            self._rl_rows = numpy.array(self._kernels.linear, dtype=int)
+        elif scheme == "GRL1":
+            self._rl_rows = numpy.array(self._kernels.nonlinear, dtype=int)
+        else:
+            self._rl_rows = numpy.array([], dtype=int)
+
+        # Store the kernels (including the one of the scheme) in the
+        # kernel cache
+        if key is not None and not self._kernels.loaded:
+            if len(self._rl_rows):
+                self._kernels.diagonal_kernel(self._rl_rows)
+            if scheme in ("BackwardEuler", "Theta"):
+                self._kernels.jacobian_kernel()
+            kernel_cache().set(key, self._kernels.sources())
+
+        # Evaluate the right-hand side by the kernel of the cell model
+        # if available
+        self._model_parameters = None
+        if self.parameters["use_model_kernels"] and grid is None:
+            self._model_parameters = self._map_model_parameters()
+
+        # Take the RL1 steps by the kernel of the cell model if
+        # available and the membrane potential is advanced by forward
+        # Euler (such that the stimulus can be added)
+        self._model_rush_larsen = (
+            scheme == "RL1" and self._model_parameters is not None and
+            callable(getattr(self._model, "rush_larsen_step", None)) and
+            0 not in self._kernels.linear)
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = Parameters("ArrayODESolver")
+        params.add("chunk_size", 4096)
+        params.add("use_kernel_cache", True)
+        params.add("use_model_kernels", True)
+        params.add("num_threads", 1)
+        params.add("theta", 0.5)
+        params.add("newton_absolute_tolerance", 1.e-12)
+        params.add("newton_relative_tolerance", 1.e-10)
+        params.add("maximum_newton_iterations", 30)
+
+        # Voltage lookup table (in mV)
+        params.add("use_lookup_table", False)
+        lut = Parameters("lookup_table")
+        lut.add("minimum", -150.0)
+        lut.add("maximum", 100.0)
+        lut.add("step", 0.01)
+        lut.add("tolerance", 1.e-4)
+        params.add(lut)
+
+        # Multirate substepping
+        params.add("use_multirate", False)
+        multirate = Parameters("multirate")
+        multirate.add("criterion", "voltage_increment")
+        multirate.add("maximum_level", 4)
+        multirate.add("maximum_voltage_increment", 1.0)
+        multirate.add("absolute_tolerance", 1.e-3)
+        multirate.add("relative_tolerance", 1.e-3)
+        params.add(multirate)
+
+        # Activity mask (rest tolerance in 1/ms, wake threshold in mV)
+        params.add("use_activity_mask", False)
+        activity_mask = Parameters("activity_mask")
+        activity_mask.add("rest_tolerance", 1.e-4)
+        activity_mask.add("wake_threshold", 0.5)
+        params.add(activity_mask)
+        return params
+
+    @property
+    def kernels(self):
+        "The array kernels (:py:class:`~cbcbeat.ufl2numpy.CellModelKernels`)."
+        return self._kernels
+
+    @property
+    def uses_model_kernels(self):
+        """True if the right-hand side (and the RL1 steps, if
+        applicable) is evaluated by the NumPy kernels of the cell
+        model."""
+        return self._model_parameters is not None
+
+    def lookup_table_accuracy(self, y, t=0.0, evaluate=None):
+        """Report the accuracy of the lookup table against the exact
+        kernels: the interpolation errors of the tabulated expressions
+        at the midpoints of the grid and the errors of the right-hand
+        side at the given states.
+
+        *Arguments*
+          y (:py:class:`numpy.ndarray`)
+            States, an array of shape (num_states + 1, N)
+          t (float, optional)
+            The time
+          evaluate (callable, optional)
+            A function returning the values (an array of length N) of
+            a given spatially varying coefficient at the nodes
+
+        *Returns*
+          report (dict)
+            The maximal absolute and relative errors of the tabulated
+            expressions ("table_absolute_error", "table_relative_error")
+            and of the right-hand side, per state
+            ("rhs_absolute_error", "rhs_relative_error")
+        """
+        lut = self._kernels.lookup_table
+        if lut is None:
+            error("The lookup table is not enabled, "
+                  "set use_lookup_table to True")
+
+        # Exact kernels, without the lookup table
+        exact = CellModelKernels(self._model, self._time, self._I_s)
+
+        c = self._coefficient_values(t, evaluate)
+        (table_absolute, table_relative) = lut.accuracy(c)
+        f = numpy.empty_like(y)
+        f_exact = numpy.empty_like(y)
+        with numpy.errstate(divide="ignore", invalid="ignore",
+                            over="ignore", under="ignore"):
+            self._kernels.rhs(y, t, c, f)
+            exact.rhs(y, t, c, f_exact)
+            rhs_absolute = numpy.abs(f - f_exact)
+            rhs_relative = rhs_absolute/numpy.abs(f_exact)
+        rhs_relative[f_exact == 0] = 0.0
+
+        return {"table_absolute_error": table_absolute,
+                "table_relative_error": table_relative,
+                "rhs_absolute_error": rhs_absolute.max(axis=1),
+                "rhs_relative_error": rhs_relative.max(axis=1)}
+
+    def _map_model_parameters(self):
+        """Return the parameters of the cell model, in the order
+        expected by its right-hand side kernel, as pairs of the index
+        of the coefficient of the kernels giving the value (or None)
+        and the (constant) value. Return None if the cell model has no
+        such kernel or a parameter cannot be evaluated."""
+        if not callable(getattr(self._model, "rhs", None)):
+            return None
+        parameters = []
+        for value in self._model.parameters().values():
+            indices = [i for (i, c) in enumerate(self._kernels.coefficients)
+                       if c is value]
+            if indices:
+                parameters.append((indices[0], None))
+                continue
+            try:
+                parameters.append((None, float(value)))
+            except (TypeError, ValueError, RuntimeError):
+                return None
+        return parameters
+
+    def _rhs_kernel(self, y, t, c, out):
+        """Evaluate the right-hand side for the states y (into out), by
+        the kernel of the cell model if available."""
+        if self._model_parameters is not None:
+            self._model_rhs(y, t, c, out)
+        else:
+            self._kernels.rhs(y, t, c, out)
+
+    def _model_arguments(self, c):
+        "Return the parameters of the kernels of the cell model."
+        return [value if i is None else c[i]
+                for (i, value) in self._model_parameters]
+
+    def _stimulus(self, y, t, c):
+        "Return the stimulus at the nodes, or None if there is none."
+        if self._kernels.stimulus is None:
+            return None
+        I_s = numpy.empty((1, y.shape[1]))
+        self._kernels.stimulus(y, t, c, I_s)
+        return I_s[0]
+
+    def _model_rhs(self, y, t, c, out):
+        """Evaluate the right-hand side for the states y (into out) by
+        the kernel of the cell model and add the stimulus."""
+        self._model.rhs(y, self._model_arguments(c), t, out)
+        I_s = self._stimulus(y, t, c)
+        if I_s is not None:
+            out[0] += I_s
+
+    def _model_rush_larsen_step(self, y, t, dt, c):
+        """Take a Rush-Larsen (RL1) step for the states y by the kernel
+        of the cell model and add the stimulus to the membrane
+        potential."""
+        I_s = self._stimulus(y, t, c)
+        self._model.rush_larsen_step(y, self._model_arguments(c), t, dt)
+        if I_s is not None:
+            y[0] += dt*I_s
+
+    def _coefficient_values(self, t, evaluate):
+        """Return the values of the coefficients of the kernels at time
+        t, spatially varying coefficients are evaluated at the nodes by
+        evaluate."""
+        self._time.assign(t)
+        values = []
+        for c in self._kernels.coefficients:
+            if self._kernels.is_constant(c):
+                values.append(float(c))
+            elif evaluate is None:
+                error("Unable to evaluate the spatially varying "
+                      "coefficient %r" % c)
+            else:
+                values.append(evaluate(c))
+        return values
+
+    def advance(self, y, interval, evaluate=None):
+        """Advance the states y from t0 to t1 (in place).
+
+        *Arguments*
+          y (:py:class:`numpy.ndarray`)
+            The states, an array of shape (num_states + 1, N)
+          interval (:py:class:`tuple`)
+            The time interval (t0, t1) for the step
+          evaluate (callable, optional)
+            A function returning the values (an array of length N) of
+            a given spatially varying coefficient at the nodes
+        """
+        (t0, t1) = interval
+
+        # Cache the coefficient values at the (sub)step times
+        cache = {}
+        def coefficients(t):
+            if t not in cache:
+                cache[t] = self._coefficient_values(t, evaluate)
+            return cache[t]
+
+        self._newton_iterations = []
+        with numpy.errstate(divide="ignore", invalid="ignore",
+                            over="ignore", under="ignore"):
+            if self.parameters["use_activity_mask"]:
+                self._advance_active(y, t0, t1, coefficients)
+            else:
+                self._advance(y, t0, t1, coefficients)
+
+        if self._scheme in ("BackwardEuler", "Theta"):
+            self._update_newton_statistics()
+        self._time.assign(t1)
+
+    def _theta(self):
+        """Return the theta of the scheme, the (relative) time within a
+        step at which the right-hand side is evaluated."""
+        if self._scheme == "BackwardEuler":
+            return 1.0
+        if self._scheme == "Theta":
+            return self.parameters["theta"]
+        return 0.0
+
+    def _update_newton_statistics(self):
+        "Update the statistics of the Newton iterations of the last step."
+        iterations = numpy.concatenate([numpy.zeros(0, dtype=int)] +
+                                       self._newton_iterations)
+        (values, counts) = numpy.unique(iterations, return_counts=True)
+        self.newton_statistics = {
+            "nodes_per_iterations": dict((int(value), int(count)) for
+                                         (value, count) in zip(values, counts)),
+            "total_iterations": int(iterations.sum()),
+            "maximum_iterations": int(iterations.max())
+            if len(iterations) else 0,
+            "mean_iterations": float(iterations.mean())
+            if len(iterations) else 0.0}
+
+    def set_neighbours(self, edges):
+        """Set the pairs of neighbouring nodes used by the activity
+        mask: nodes next to active nodes are kept active.
+
+        *Arguments*
+          edges (:py:class:`numpy.ndarray`)
+            The pairs of neighbouring nodes, an array of shape (M, 2)
+        """
+        edges = numpy.asarray(edges, dtype=int).reshape(-1, 2)
+        self._edges = (edges[:, 0], edges[:, 1])
+
+    def _advance(self, y, t0, t1, coefficients):
+        "Advance the states y from t0 to t1 (in place)."
+        if self.parameters["use_multirate"]:
+            self._advance_multirate(y, t0, t1, coefficients)
+        else:
+            self._advance_nodes(y, None, t0, t1, 1, coefficients)
+
+    def _advance_active(self, y, t0, t1, coefficients):
+        """Advance the states y of the active nodes from t0 to t1 (in
+        place) and update the mask of quiescent nodes."""
+        params = self.parameters["activity_mask"]
+        num_nodes = y.shape[1]
+        if self._quiescent is None or len(self._quiescent) != num_nodes:
+            self._quiescent = numpy.zeros(num_nodes, dtype=bool)
+            self._resting_potential = numpy.zeros(num_nodes)
+        quiescent = self._quiescent
+
+        def restrict(values, nodes):
+            return [value if numpy.isscalar(value) else value[nodes]
+                    for value in values]
+
+        # Wake the quiescent nodes whose potential has been moved (by
+        # the PDE step) or which are stimulated
+        quiescent &= (numpy.abs(y[0] - self._resting_potential)
+                      <= params["wake_threshold"])
+        if self._kernels.stimulus is not None and quiescent.any():
+            nodes = numpy.flatnonzero(quiescent)
+            I_s = numpy.empty((1, len(nodes)))
+            for t in (t0, t1):
+                self._kernels.stimulus(y[:, nodes], t,
+                                       restrict(coefficients(t), nodes), I_s)
+                quiescent[nodes[I_s[0] != 0]] = False
+
+        # Advance the active nodes
+        active = numpy.flatnonzero(~quiescent)
+        cache = {}
+        def active_coefficients(t):
+            if t not in cache:
+                cache[t] = restrict(coefficients(t), active)
+            return cache[t]
+        y_a = y[:, active]
+        self._advance(y_a, t0, t1, active_coefficients)
+        y[:, active] = y_a
+
+        # Active nodes with a (relatively) small right-hand side are at
+        # rest, unless next to nodes that are not
+        f = self._rhs(y_a, t1, active_coefficients(t1))
+        at_rest = quiescent.copy()
+        at_rest[active] = numpy.all(numpy.abs(f) <= params["rest_tolerance"]*
+                                    (1.0 + numpy.abs(y_a)), axis=0)
+        if self._edges is not None:
+            (i, j) = self._edges
+            near = numpy.zeros(num_nodes, dtype=bool)
+            near[j[~at_rest[i]]] = True
+            near[i[~at_rest[j]]] = True
+            at_rest &= ~near
+
+        resting = at_rest & ~quiescent
+        self._resting_potential[resting] = y[0, resting]
+        self._quiescent = at_rest
+        self.activity_statistics = {"active_nodes": len(active),
+                                    "quiescent_nodes": int(at_rest.sum()),
+                                    "total_nodes": num_nodes}
+
+    def _advance_nodes(self, y, nodes, t0, t1, num_substeps, coefficients):
+        """Advance the states y of the given nodes (None for all nodes)
+        from t0 to t1 by a number of substeps (in place)."""
+        dt = (t1 - t0)/float(num_substeps)
+
+        # Explicit schemes evaluate the right-hand side at the start of
+        # each substep, implicit at the end (or within, for theta < 1)
+        substeps = []
+        for k in range(num_substeps):
+            t = t0 + (k + self._theta())*dt
+            values = coefficients(t)
+            if nodes is not None:
+                values = [value if numpy.isscalar(value) else value[nodes]
+                          for value in values]
+            substeps.append((t, values))
+
+        # Advance the nodes in chunks (to limit the size of
+        # temporaries), each chunk through all substeps
+        def advance_chunk(chunk):
+            for (t, values) in substeps:
+                c = [value if numpy.isscalar(value) else value[chunk]
+                     for value in values]
+                iterations = self._step(y[:, chunk], t, dt, c)
+                if iterations is not None:
+                    self._newton_iterations.append(iterations)
+        self._map_chunks(advance_chunk, y.shape[1])
+
+    def _map_chunks(self, function, num_nodes):
+        """Call function for each chunk (slice) of the nodes, using a
+        pool of threads if the parameter num_threads is not 1."""
+        chunk_size = max(self.parameters["chunk_size"], 1)
+        chunks = [slice(start, min(start + chunk_size, num_nodes))
+                  for start in range(0, num_nodes, chunk_size)]
+
+        def call(chunk):
+            # NB: The floating point error handling is thread-local
+            with numpy.errstate(divide="ignore", invalid="ignore",
+                                over="ignore", under="ignore"):
+                function(chunk)
+
+        num_threads = self.parameters["num_threads"]
+        if num_threads <= 0:
+            num_threads = multiprocessing.cpu_count()
+        if num_threads == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                call(chunk)
+            return
+
+        if self._pool is None or self._pool_size != num_threads:
+            if self._pool is not None:
+                self._pool.close()
+            self._pool = ThreadPool(num_threads)
+            self._pool_size = num_threads
+        self._pool.map(call, chunks)
+
+    def close(self):
+        """Terminate the pool of threads (if any), it is created again
+        when needed."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+        self._pool = None
+        self._pool_size = None
+
+    def __del__(self):
+        # NB: The solver holds no reference cycles, the pool is closed
+        # when the solver is deleted
+        if getattr(self, "_pool", None) is not None:
+            self.close()
+
+    def _advance_multirate(self, y, t0, t1, coefficients):
+        """Advance the states y from t0 to t1 (in place), letting each
+        node take its own number of substeps, 2**level, with the level
+        chosen by the multirate criterion."""
+        params = self.parameters["multirate"]
+        maximum_level = params["maximum_level"]
+        criterion = params["criterion"]
+        dt = t1 - t0
+
+        if criterion == "voltage_increment":
+            # Limit the change of v per substep, estimated by dv/dt
+            t = t0 + self._theta()*dt
+            ratio = (numpy.abs(self._rhs(y, t, coefficients(t))[0])*dt/
+                     params["maximum_voltage_increment"])
+            results = {}
+
+        elif criterion == "error":
+            # Estimate the error by step doubling. For the first order
+            # schemes, the error of n substeps is about E/n, where E
+            # is the error of a single step, and the difference of one
+            # and two substeps is E/2. So n substeps are within the
+            # tolerance for n >= 2*estimate
+            results = {0: y.copy(), 1: y.copy()}
+            self._advance_nodes(results[0], None, t0, t1, 1, coefficients)
+            self._advance_nodes(results[1], None, t0, t1, 2, coefficients)
+            scale = (params["absolute_tolerance"] +
+                     params["relative_tolerance"]*numpy.abs(results[1]))
+            estimate = numpy.max(numpy.abs(results[1] - results[0])/scale,
+                                 axis=0)
+            ratio = 2.0*estimate
+        else:
+            error("Unknown multirate criterion %s" % criterion)
+
+        # Nodes with non-finite estimates take the maximal number of
+        # substeps
+        ratio[~numpy.isfinite(ratio)] = 2**maximum_level
+        levels = numpy.ceil(numpy.log2(numpy.maximum(ratio, 1.0)))
+        levels = numpy.minimum(levels, maximum_level).astype(int)
+
+        nodes_per_level = {}
+        for level in numpy.unique(levels):
+            nodes = numpy.flatnonzero(levels == level)
+            nodes_per_level[2**level] = len(nodes)
+            if level in results:
+                y[:, nodes] = results[level][:, nodes]
+            else:
+                y_l = y[:, nodes]
+                self._advance_nodes(y_l, nodes, t0, t1, 2**level,
+                                    coefficients)
+                y[:, nodes] = y_l
+
+        substeps = 2**levels
+        self.substep_statistics = {"nodes_per_substeps": nodes_per_level,
+                                   "total_substeps": int(substeps.sum()),
+                                   "maximum_substeps": int(substeps.max())
+                                   if len(substeps) else 0,
+                                   "mean_substeps": float(substeps.mean())
+                                   if len(substeps) else 0.0}
+
+    def _rhs(self, y, t, values):
+        "Evaluate the right-hand side for the states y (in chunks)."
+        f = numpy.empty_like(y)
+        def rhs_chunk(chunk):
+            c = [value if numpy.isscalar(value) else value[chunk]
+                 for value in values]
+            self._rhs_kernel(y[:, chunk], t, c, f[:, chunk])
+        self._map_chunks(rhs_chunk, y.shape[1])
+        return f
+
+    def _step(self, y, t, dt, c):
+        """Take a single step with the scheme for the states y (in
+        place), and return the number of Newton iterations of each
+        node for the implicit schemes."""
+        if self._scheme in ("BackwardEuler", "Theta"):
+            return self._theta_step(y, t, dt, c, self._theta())
+        elif len(self._rl_rows):
+            self._rush_larsen_step(y, t, dt, c)
+        else:
+            self._forward_euler_step(y, t, dt, c)
+
+    def _forward_euler_step(self, y, t, dt, c):
+        "Take a forward Euler step for the states y."
+        f = numpy.empty_like(y)
+        self._rhs_kernel(y, t, c, f)
+        y += dt*f
+
+    def _rush_larsen_step(self, y, t, dt, c):
+        """Take a (generalized) Rush-Larsen step for the states y: the
+        rows in self._rl_rows are advanced by the exponential formula
+        using the diagonal of the Jacobian, the remaining rows by a
+        forward Euler step."""
+        if self._model_rush_larsen:
+            self._model_rush_larsen_step(y, t, dt, c)
+            return
+        rows = self._rl_rows
+        f = numpy.empty_like(y)
+        b = numpy.empty((len(rows), y.shape[1]))
+        self._kernels.diagonal_kernel(rows)(y, t, c, f, b)
+
+        # Fall back to forward Euler for vanishing linear terms
+        f_rows = f[rows]
+        increment = numpy.where(numpy.abs(b) < 1.e-8, dt*f_rows,
+                                f_rows/b*numpy.expm1(dt*b))
+        y_rows = y[rows] + increment
+        y += dt*f
+        y[rows] = y_rows
+
+    def _jacobian(self, y, t, c, f):
+        """Return the Jacobian of the right-hand side at y (with values
+        f) as an array of shape (N, num_states + 1, num_states + 1),
+        from the cell model if available and by finite differences
+        otherwise."""
+        (m, num_nodes) = y.shape
+        kernel = self._kernels.jacobian_kernel()
+        if kernel is not None:
+            J = numpy.zeros((m, m, num_nodes))
+            kernel(y, t, c, J)
+            return J.transpose(2, 0, 1)
+
+        J = numpy.empty((num_nodes, m, m))
+        y_h = y.copy()
+        f_h = numpy.empty_like(y)
+        for j in range(m):
+            h = numpy.sqrt(numpy.finfo(float).eps)*numpy.maximum(
+                numpy.abs(y[j]), 1.0)
+            y_h[j] = y[j] + h
+            self._rhs_kernel(y_h, t, c, f_h)
+            J[:, :, j] = ((f_h - f)/h).T
+            y_h[j] = y[j]
+        return J
+
+    def _theta_step(self, y, t, dt, c, theta):
+        """Take a theta-scheme step for the states y, solving the
+        nonlinear system of each node by a Newton iteration, and return
+        the number of iterations of each node."""
+        (m, num_nodes) = y.shape
+        y0 = y.copy()
+        identity = numpy.eye(m)
+        atol = self.parameters["newton_absolute_tolerance"]
+        rtol = self.parameters["newton_relative_tolerance"]
+        iterations = numpy.zeros(num_nodes, dtype=int)
+
+        # Iterate on the nodes that have not converged yet
+        active = numpy.arange(num_nodes)
+        for iteration in range(self.parameters["maximum_newton_iterations"]):
+            y_a = y[:, active]
+            c_a = [value if numpy.isscalar(value) else value[active]
+                   for value in c]
+            y_theta = theta*y_a + (1.0 - theta)*y0[:, active]
+            f = numpy.empty_like(y_a)
+            self._rhs_kernel(y_theta, t, c_a, f)
+            G = y_a - y0[:, active] - dt*f
+            A = identity - theta*dt*self._jacobian(y_theta, t, c_a, f)
+            dy = numpy.linalg.solve(A, G.T[:, :, None])[:, :, 0].T
+            y_a -= dy
+            y[:, active] = y_a
+            iterations[active] += 1
+
+            converged = numpy.all(numpy.abs(dy) <= atol + rtol*numpy.abs(y_a),
+                                  axis=0)
+            active = active[~converged]
+            if not len(active):
+                break
+        else:
+            warning("Newton iteration did not converge for %d nodes"
+                    % len(active))
+        return iterations
+
+def _stimulus_signature(I_s):
+    """Return a signature of the stimulus I_s for the kernel cache: the
+    type of a function (evaluated at run time), or a signature of the
+    structure of a UFL expression (with renumbered coefficients)."""
+    if I_s is None:
+        return None
+    if isinstance(I_s, GenericFunction):
+        return type(I_s).__name__
+    terminals = extract_coefficients(I_s) + extract_domains(I_s)
+    renumbering = dict((c, i) for (i, c) in enumerate(terminals))
+    return compute_expression_signature(I_s, renumbering)
@@ -33,9 +33,13 @@ for u.
 
 __all__ = ["BasicBidomainSolver", "BidomainSolver"]
 
+import numpy
+import ufl
 from dolfinimport import *
 from cbcbeat.markerwisefield import *
-from cbcbeat.utils import end_of_time, annotate_kwargs
+from cbcbeat.utils import end_of_time, annotate_kwargs, split_linear_rhs, \
+    OperatorCache, AffineOperator, PreconditionerReusePolicy, \
+    InitialGuessExtrapolator, KrylovRecycler
 
 class BasicBidomainSolver(object):
     """This solver is based on a theta-scheme discretization in time
@@ -139,6 +143,13 @@ class BasicBidomainSolver(object):
         # Figure out whether we should annotate or not
         self._annotate_kwargs = annotate_kwargs(self.parameters)
 
+        # The time step and theta are updated in each step, the
+        # variational problem and solver are created once (in the
+        # first step)
+        self._k_n = Constant(1.0)
+        self._theta = Constant(self.parameters["theta"])
+        self._solver = None
+
     @property
     def time(self):
         "The internal time of the solver."
@@ -231,8 +242,30 @@ class BasicBidomainSolver(object):
 
         # Extract interval and thus time-step
         (t0, t1) = interval
-        k_n = Constant(t1 - t0)
         theta = self.parameters["theta"]
+        self._k_n.assign(Constant(t1 - t0))
+        self._theta.assign(Constant(theta))
+
+        # Set time
+        t = t0 + theta*(t1 - t0)
+        self.time.assign(t)
+
+        # Set-up solver
+        if self._solver is None:
+            self._solver = self._create_solver()
+        self._solver.parameters.update(
+            self.parameters["linear_variational_solver"])
+        self._solver.solve()
+
+    def _create_solver(self):
+        """Create the linear variational solver for a step, with the
+        time step and theta given by self._k_n and self._theta.
+
+        *Returns*
+          solver (:py:class:`dolfin.LinearVariationalSolver`)
+        """
+        k_n = self._k_n
+        theta = self._theta
 
         # Extract conductivities
         M_i, M_e = self._M_i, self._M_e
@@ -249,10 +282,6 @@ class BasicBidomainSolver(object):
         Dt_v = (v - self.v_)/k_n
         v_mid = theta*v + (1.0 - theta)*self.v_
 
-        # Set time
-        t = t0 + theta*(t1 - t0)
-        self.time.assign(t)
-
         # Define spatial integration domains:
         (dz, rhs) = rhs_with_markerwise_field(self._I_s, self._mesh, w)
 
@@ -277,11 +306,7 @@ class BasicBidomainSolver(object):
         # Define variational problem
         a, L = system(G)
         pde = LinearVariationalProblem(a, L, self.vur)
-
-        # Set-up solver
-        solver = LinearVariationalSolver(pde)
-        solver.parameters.update(self.parameters["linear_variational_solver"])
-        solver.solve()
+        return LinearVariationalSolver(pde)
 
     @staticmethod
     def default_parameters():
@@ -322,6 +347,37 @@ class BidomainSolver(BasicBidomainSolver):
 
         # Mark the timestep as unset
         self._timestep = None
+        self._prec_matrix = None
+
+        # The reuse policy of the preconditioner (if iterative)
+        self.preconditioner_policy = None
+        if self.parameters["linear_solver_type"] == "iterative":
+            self.preconditioner_policy = PreconditionerReusePolicy(
+                self.parameters["preconditioner_reuse"])
+
+        # The initial guess of the iterative solver (unless annotating)
+        self.initial_guess = None
+        if (self.parameters["linear_solver_type"] == "iterative"
+            and not self._annotate_kwargs.get("annotate", False)):
+            self.initial_guess = InitialGuessExtrapolator(
+                self.parameters["initial_guess"])
+
+        # The recycled Krylov space of the iterative solver (if any),
+        # shared by the solvers of all timesteps
+        self.krylov_recycler = None
+        if (self.parameters["linear_solver_type"] == "iterative"
+            and self.parameters["krylov_recycling"]["size"] > 0):
+            self.krylov_recycler = KrylovRecycler(
+                self.parameters["krylov_recycling"])
+
+        # A separable stimulus is added by its preassembled load
+        # vectors (unless annotating)
+        self._stimulus_vectors = None
+        if (isinstance(self._I_s, SeparableStimulus)
+            and not self._annotate_kwargs.get("annotate", False)):
+            debug("Preassembling the load vectors of the stimulus")
+            w = TestFunctions(self.VUR)[0]
+            self._stimulus_vectors = self._I_s.load_vectors(w)
 
     @property
     def linear_solver(self):
@@ -347,40 +403,21 @@ class BidomainSolver(BasicBidomainSolver):
 
             debug("Creating PETSCKrylovSolver with %s and %s" % (alg, prec))
             if prec == "fieldsplit":
-
-                # Argh. DOLFIN won't let you construct a PETScKrylovSolver with fieldsplit. Sigh ..
-                solver = PETScKrylovSolver()
-                # FIXME: work around DOLFIN bug #583. Just deleted this when fixed.
+                solver = self._create_fieldsplit_solver(alg)
+
+            elif prec == "monodomain":
+                # Precondition by AMG on the auxiliary monodomain
+                # operator (see preconditioner_form)
+                if self._prec_matrix is None:
+                    debug("Preassembling the monodomain preconditioner")
+                    self._prec_matrix = assemble(self._prec,
+                                                 **self._annotate_kwargs)
+                amg = self.parameters["monodomain_preconditioner"]["amg"]
+                solver = PETScKrylovSolver(alg, amg)
+                solver.set_operators(self._lhs_matrix, self._prec_matrix)
+                # Still waiting for that bug fix:
                 solver.parameters.convergence_norm_type = "preconditioned"
-                #solver.parameters["preconditioner"]["structure"] = "same" # MER this should be set by user, and is below
                 solver.parameters.update(self.parameters["petsc_krylov_solver"])
-                solver.set_operator(self._lhs_matrix)
-
-                # Initialize the KSP directly:
-                ksp = solver.ksp()
-                ksp.setType(alg)
-                ksp.pc.setType(prec)
-                ksp.setOptionsPrefix("bidomain_") # it's really stupid, solver.set_options_prefix() doesn't work
-
-                # Set various options (by default) for the fieldsplit
-                # approach to solving the bidomain equations.
-
-                # FIXME: This needs a try
-                from petsc4py import PETSc
-
-                # Patrick believes that the fieldsplit index sets
-                # should already be set from the assembled matrix.
-
-                # Now let's set some default options for the solver.
-                opts = PETSc.Options("bidomain_")
-                if "pc_fieldsplit_type"    not in opts: opts["pc_fieldsplit_type"] = "symmetric_multiplicative"
-                if "fieldsplit_0_ksp_type" not in opts: opts["fieldsplit_0_ksp_type"] = "preonly"
-                if "fieldsplit_1_ksp_type" not in opts: opts["fieldsplit_1_ksp_type"] = "preonly"
-                if "fieldsplit_0_pc_type"  not in opts: opts["fieldsplit_0_pc_type"] = "hypre"
-                if "fieldsplit_1_pc_type"  not in opts: opts["fieldsplit_1_pc_type"] = "hypre"
-
-                ksp.setFromOptions()
-                ksp.setUp()
 
             else:
                 solver = PETScKrylovSolver(alg, prec)
@@ -389,6 +426,10 @@ class BidomainSolver(BasicBidomainSolver):
                 solver.parameters.convergence_norm_type = "preconditioned"
                 solver.parameters.update(self.parameters["petsc_krylov_solver"])
 
+            # Deflate the recycled Krylov space (if any)
+            if self.krylov_recycler is not None:
+                self.krylov_recycler.attach(solver)
+
             # Set nullspace if present. We happen to know that the
             # transpose nullspace is the same as the nullspace (easy
             # to prove from matrix structure).
@@ -407,12 +448,120 @@ class BidomainSolver(BasicBidomainSolver):
                     A = as_backend_type(self._lhs_matrix)
                     A.set_nullspace(self.nullspace)
 
+                # The auxiliary operator shares the null space
+                if prec == "monodomain":
+                    P = as_backend_type(self._prec_matrix)
+                    P.set_nullspace(self.nullspace)
+
             update_routine = self._update_krylov_solver
         else:
             error("Unknown linear_solver_type given: %s" % solver_type)
 
         return (solver, update_routine)
 
+    def _create_fieldsplit_solver(self, alg):
+        """Create a Krylov solver with a block (fieldsplit)
+        preconditioner for the (v, u) system. The index sets of the
+        blocks are given by the dofs of the subspaces of VUR, and each
+        block is preconditioned by (by default) AMG, see the
+        "fieldsplit" parameters. The defaults can be overridden by
+        PETSc options with the prefix "bidomain_", such as
+        -bidomain_fieldsplit_u_pc_type.
+
+        If use_avg_u_constraint is True, the Lagrange multiplier of
+        the average constraint on u is put in a block "r" of its own,
+        preconditioned by the identity (its diagonal is zero). As this
+        block is a single dof, the preconditioned operator only differs
+        from the one without the constraint by a low rank term, but
+        the system is indefinite, so a Krylov method for indefinite
+        systems (such as gmres or minres) should be used."""
+        try:
+            from petsc4py import PETSc
+        except ImportError:
+            error("The fieldsplit preconditioner requires petsc4py")
+
+        # DOLFIN won't let you construct a PETScKrylovSolver with
+        # fieldsplit, initialize the KSP directly
+        solver = PETScKrylovSolver()
+        # FIXME: work around DOLFIN bug #583. Just deleted this when fixed.
+        solver.parameters.convergence_norm_type = "preconditioned"
+        solver.parameters.update(self.parameters["petsc_krylov_solver"])
+        solver.set_operator(self._lhs_matrix)
+        ksp = solver.ksp()
+        ksp.setType(alg)
+        ksp.pc.setType("fieldsplit")
+        ksp.setOptionsPrefix("bidomain_") # solver.set_options_prefix() doesn't work
+
+        # Set the index sets of the blocks from the (owned) dofs of the
+        # subspaces
+        comm = as_backend_type(self._lhs_matrix).mat().getComm()
+        names = ("v", "u")
+        if self.parameters["use_avg_u_constraint"]:
+            names += ("r",)
+        fields = []
+        for (i, name) in enumerate(names):
+            dofs = numpy.asarray(self.VUR.sub(i).dofmap().dofs(),
+                                 dtype=PETSc.IntType)
+            fields.append((name, PETSc.IS().createGeneral(dofs, comm=comm)))
+        ksp.pc.setFieldSplitIS(*fields)
+
+        # Set default options for the blocks (unless given)
+        params = self.parameters["fieldsplit"]
+        block_pc = params["block_preconditioner"]
+        if block_pc == "amg":
+            block_pc = ("hypre" if has_krylov_solver_preconditioner("hypre_amg")
+                        else "gamg")
+        defaults = {"pc_fieldsplit_type": params["type"]}
+        for name in ("v", "u"):
+            defaults["fieldsplit_%s_ksp_type" % name] = "preonly"
+            defaults["fieldsplit_%s_pc_type" % name] = block_pc
+            if block_pc == "hypre":
+                defaults["fieldsplit_%s_pc_hypre_type" % name] = "boomeramg"
+        if "r" in names:
+            defaults["fieldsplit_r_ksp_type"] = "preonly"
+            defaults["fieldsplit_r_pc_type"] = "none"
+        opts = PETSc.Options("bidomain_")
+        for (key, value) in defaults.items():
+            if key not in opts:
+                opts[key] = value
+        ksp.setFromOptions()
+        return solver
+
+    def _init_rhs_matrix(self):
+        """Preassemble the matrix of the right-hand side acting on the
+        previous solution, if the right-hand side can be split (see
+        :py:func:`~cbcbeat.utils.split_linear_rhs`)."""
+        self._rhs_matrix = None
+        if (not self.parameters["use_preassembled_rhs"]
+            or self._annotate_kwargs.get("annotate", False)):
+            return
+        split = split_linear_rhs(self._rhs, self.v_, self.time)
+        if split is None:
+            debug("Unable to preassemble the right-hand side matrix")
+            return
+
+        debug("Preassembling the right-hand side matrix")
+        (self._rhs_state, self._rhs_bilinear, self._rhs_source) = split
+        self._rhs_matrix = assemble(self._rhs_bilinear)
+        if self._rhs_source is not None:
+            self._source_vector = Vector(self._mesh.mpi_comm(),
+                                         self._lhs_matrix.size(0))
+            self._lhs_matrix.init_vector(self._source_vector, 0)
+
+    def _assemble_rhs(self, dt):
+        """Assemble the right-hand side vector, by the product of the
+        preassembled matrix with the previous solution if available."""
+        if self._rhs_matrix is None:
+            assemble(self._rhs, tensor=self._rhs_vector,
+                     **self._annotate_kwargs)
+        else:
+            self._rhs_matrix.mult(self._rhs_state.vector(), self._rhs_vector)
+            if self._rhs_source is not None:
+                assemble(self._rhs_source, tensor=self._source_vector)
+                self._rhs_vector.axpy(1.0, self._source_vector)
+        if self._stimulus_vectors is not None:
+            self._I_s.apply(self._rhs_vector, self._stimulus_vectors, dt)
+
     @property
     def nullspace(self):
         if self._nullspace_basis is None:
@@ -447,7 +596,41 @@ class BidomainSolver(BasicBidomainSolver):
         # solver is invoked)
         params.add("algorithm", "cg")
         params.add("preconditioner", "petsc_amg")
-        #params.add("preconditioner", "fieldsplit") # This seg faults
+
+        # Set the choices of the block preconditioner (used if the
+        # fieldsplit preconditioner is invoked)
+        fieldsplit = Parameters("fieldsplit")
+        fieldsplit.add("type", "symmetric_multiplicative")
+        fieldsplit.add("block_preconditioner", "amg")
+        params.add(fieldsplit)
+
+        # Set the AMG of the monodomain preconditioner (used if the
+        # monodomain preconditioner is invoked)
+        monodomain = Parameters("monodomain_preconditioner")
+        monodomain.add("amg", "petsc_amg")
+        params.add(monodomain)
+
+        # Evaluate the right-hand side by a preassembled matrix if
+        # possible
+        params.add("use_preassembled_rhs", True)
+
+        # Cache the operators of the most recently used timesteps, and
+        # update operators from their cached timestep independent
+        # matrices if possible
+        params.add(OperatorCache.default_parameters())
+        params.add("update_operators_by_axpy", True)
+
+        # Reuse the preconditioner of the iterative solver according
+        # to its convergence history
+        params.add(PreconditionerReusePolicy.default_parameters())
+
+        # Form the initial guess of the iterative solver from the
+        # solutions of the previous timesteps
+        params.add(InitialGuessExtrapolator.default_parameters())
+
+        # Recycle the Krylov space of the iterative solver across
+        # timesteps (if the size of the recycled space is nonzero)
+        params.add(KrylovRecycler.default_parameters())
 
         # Add default parameters from both LU and Krylov solvers
         params.add(LUSolver.default_parameters())
@@ -492,7 +675,8 @@ class BidomainSolver(BasicBidomainSolver):
              (w, q) = TestFunctions(self.VUR)
 
         # Set-up measure and rhs from stimulus
-        (dz, rhs) = rhs_with_markerwise_field(self._I_s, self._mesh, w)
+        I_s = None if self._stimulus_vectors is not None else self._I_s
+        (dz, rhs) = rhs_with_markerwise_field(I_s, self._mesh, w)
 
         # Set-up variational problem
         Dt_v_k_n = (v - self.v_)
@@ -516,6 +700,43 @@ class BidomainSolver(BasicBidomainSolver):
         (a, L) = system(G)
         return (a, L)
 
+    def preconditioner_form(self, k_n):
+        """Create the bilinear form of the auxiliary operator of the
+        monodomain preconditioner: the block diagonal operator with
+        the monodomain approximation of the Schur complement of the
+        potential block (with the harmonic mean of the conductivities
+        M_i (M_i + M_e)^{-1} M_e) for v and the elliptic operator for
+        u. The Lagrange multiplier of the average constraint on u (if
+        any) is preconditioned by the identity.
+
+        *Arguments*
+          k_n (:py:class:`ufl.Expr` or float)
+            The time step
+
+        *Returns*
+          prec (:py:class:`ufl.Form`)
+        """
+        theta = self.parameters["theta"]
+        M_i = self._M_i
+        M_e = self._M_e
+        if ufl.shape(M_i) == () and ufl.shape(M_e) == ():
+            M = M_i*M_e/(M_i + M_e)
+        else:
+            M = M_i*inv(M_i + M_e)*M_e
+
+        if self.parameters["use_avg_u_constraint"]:
+            (v, u, l) = TrialFunctions(self.VUR)
+            (w, q, lamda) = TestFunctions(self.VUR)
+            prec = l*lamda*dx()
+        else:
+            (v, u) = TrialFunctions(self.VUR)
+            (w, q) = TestFunctions(self.VUR)
+            prec = 0
+
+        prec += (v*w + theta*k_n*inner(M*grad(v), grad(w))
+                 + k_n*inner((M_i + M_e)*grad(u), grad(q)))*dx()
+        return prec
+
     def step(self, interval):
         """
         Solve on the given time step (t0, t1).
@@ -543,6 +764,7 @@ class BidomainSolver(BasicBidomainSolver):
         if self._timestep is None:
             self._timestep = Constant(dt)
             (self._lhs, self._rhs) = self.variational_forms(self._timestep)
+            self._prec = self.preconditioner_form(self._timestep)
 
             # Preassemble left-hand side and initialize right-hand side vector
             debug("Preassembling bidomain matrix (and initializing vector)")
@@ -550,18 +772,127 @@ class BidomainSolver(BasicBidomainSolver):
             self._rhs_vector = Vector(self._mesh.mpi_comm(), self._lhs_matrix.size(0))
             self._lhs_matrix.init_vector(self._rhs_vector, 0)
 
+            # Preassemble the matrix of the right-hand side acting on
+            # the previous solution
+            self._init_rhs_matrix()
+
             # Create linear solver (based on parameter choices)
             self._linear_solver, self._update_solver = self._create_linear_solver()
+
+            # Cache the operators of each timestep, and the timestep
+            # independent matrices of the operators (created when the
+            # timestep first changes)
+            self._operator_cache = OperatorCache(
+                self.parameters["operator_cache"])
+            self._affine_operators = {}
+            self._cache_operators(dt)
         else:
             timestep_unchanged = (abs(dt - float(self._timestep)) < 1.e-12)
             self._update_solver(timestep_unchanged, dt)
 
         # Assemble right-hand-side
-        assemble(self._rhs, tensor=self._rhs_vector, **self._annotate_kwargs)
+        self._assemble_rhs(dt)
+
+        # Solve problem (reusing the preconditioner according to its
+        # reuse policy)
+        policy = self.preconditioner_policy
+        if policy is not None:
+            self.linear_solver.set_reuse_preconditioner(policy.reuse())
+        guess = self.initial_guess
+        if guess is not None and guess.active():
+            self.linear_solver.parameters["nonzero_initial_guess"] = True
+            guess.guess(t1, self.vur.vector(), self._lhs_matrix,
+                        self._rhs_vector)
+        iterations = self.linear_solver.solve(self.vur.vector(),
+                                              self._rhs_vector,
+                                              **self._annotate_kwargs)
+        if policy is not None:
+            policy.update(iterations)
+        if guess is not None:
+            guess.update(t1, self.vur.vector())
+        if self.krylov_recycler is not None:
+            self.krylov_recycler.update()
+
+    def _cache_operators(self, dt):
+        "Store the current operators in the operator cache."
+        self._operator_cache.set(dt, {"lhs": self._lhs_matrix,
+                                      "prec": self._prec_matrix,
+                                      "rhs": self._rhs_matrix,
+                                      "solver": self._linear_solver})
+
+    def _assemble_operator(self, name, form, dt, tensor=None):
+        """Assemble the matrix of the given timestep dependent bilinear
+        form for the timestep dt (in place if tensor is given). If
+        possible, the matrix is formed from the cached timestep
+        independent matrices of the form by a sparse AXPY (see
+        :py:class:`~cbcbeat.utils.AffineOperator`) instead."""
+        if name not in self._affine_operators:
+            self._affine_operators[name] = None
+            if (self.parameters["update_operators_by_axpy"]
+                and not self._annotate_kwargs.get("annotate", False)
+                and AffineOperator.split(form, self._timestep) is not None):
+                self._affine_operators[name] = AffineOperator(form,
+                                                              self._timestep)
+
+        operator = self._affine_operators[name]
+        if operator is not None:
+            return operator.assemble(dt, tensor=tensor)
+        if tensor is None:
+            return assemble(form, **self._annotate_kwargs)
+        return assemble(form, tensor=tensor, **self._annotate_kwargs)
+
+    def _update_operators(self, dt):
+        """Update the operators (matrices and linear solver) to the
+        timestep dt: restore them from the operator cache if
+        available, otherwise assemble them. If the operator cache
+        holds a single timestep only, the matrices of the linear
+        solver are updated in place, otherwise new matrices and a new
+        linear solver are created.
 
-        # Solve problem
-        self.linear_solver.solve(self.vur.vector(), self._rhs_vector,
-                                 **self._annotate_kwargs)
+        *Returns*
+          in_place (bool)
+            Whether the matrices of the linear solver were updated in
+            place
+        """
+        if dolfin_adjoint and self.parameters["enable_adjoint"]:
+            raise ValueError("dolfin-adjoint doesn't support changing timestep (yet)")
+
+        # Update stored timestep
+        # FIXME: dolfin_adjoint still can't annotate constant assignment.
+        self._timestep.assign(Constant(dt))#, annotate=annotate)
+
+        entry = self._operator_cache.get(dt)
+        if entry is not None:
+            debug("Reusing the cached operators of timestep %g" % dt)
+            self._lhs_matrix = entry["lhs"]
+            self._prec_matrix = entry["prec"]
+            self._rhs_matrix = entry["rhs"]
+            self._linear_solver = entry["solver"]
+            in_place = False
+        else:
+            # Assemble matrices
+            in_place = self._operator_cache.parameters["maximum_size"] <= 1
+            tensor = lambda A: A if in_place else None
+            self._lhs_matrix = self._assemble_operator(
+                "lhs", self._lhs, dt, tensor(self._lhs_matrix))
+            if self._rhs_matrix is not None:
+                self._rhs_matrix = self._assemble_operator(
+                    "rhs", self._rhs_bilinear, dt, tensor(self._rhs_matrix))
+            if self._prec_matrix is not None:
+                self._prec_matrix = self._assemble_operator(
+                    "prec", self._prec, dt, tensor(self._prec_matrix))
+
+            # The linear solver notices that its matrices have
+            # changed, otherwise make new linear solver
+            if not in_place:
+                (self._linear_solver, dummy) = self._create_linear_solver()
+            self._cache_operators(dt)
+
+        # Deflate the recycled Krylov space (if any) with the current
+        # operator, also if the preconditioner is reused
+        if self.krylov_recycler is not None:
+            self.krylov_recycler.attach(self._linear_solver)
+        return in_place
 
     def _update_lu_solver(self, timestep_unchanged, dt):
         """Helper function for updating an LUSolver depending on
@@ -571,42 +902,23 @@ class BidomainSolver(BasicBidomainSolver):
         # changes in timestep
         if timestep_unchanged:
             debug("Timestep is unchanged, reusing LU factorization")
+            self.linear_solver.parameters["reuse_factorization"] = True
         else:
             debug("Timestep has changed, updating LU factorization")
-            if dolfin_adjoint and self.parameters["enable_adjoint"]:
-                raise ValueError("dolfin-adjoint doesn't support changing timestep (yet)")
-
-            # Update stored timestep
-            # FIXME: dolfin_adjoint still can't annotate constant assignment.
-            self._timestep.assign(Constant(dt))#, annotate=annotate)
-
-            # Reassemble matrix
-            assemble(self._lhs, tensor=self._lhs_matrix,
-                     **self._annotate_kwargs)
-
-            (self._linear_solver, dummy) = self._create_linear_solver()
+            in_place = self._update_operators(dt)
+            self.linear_solver.parameters["reuse_factorization"] = \
+                not in_place
 
     def _update_krylov_solver(self, timestep_unchanged, dt):
         """Helper function for updating a KrylovSolver depending on
         whether timestep has changed."""
 
-        # Update reuse of preconditioner parameter in accordance with
-        # changes in timestep
         if timestep_unchanged:
             debug("Timestep is unchanged, reusing preconditioner")
         else:
             debug("Timestep has changed, updating preconditioner")
-            if dolfin_adjoint and self.parameters["enable_adjoint"]:
-                raise ValueError("dolfin-adjoint doesn't support changing timestep (yet)")
-
-            # Update stored timestep
-            self._timestep.assign(Constant(dt))#, annotate=annotate)
-
-            # Reassemble matrix
-            assemble(self._lhs, tensor=self._lhs_matrix, **self._annotate_kwargs)
-
-            # Make new Krylov solver
-            (self._linear_solver, dummy) = self._create_linear_solver()
+            self._update_operators(dt)
+            self.preconditioner_policy.operator_changed()
 
         # Set nonzero initial guess if it indeed is nonzero
         if (self.vur.vector().norm("l2") > 1.e-12):
@@ -1,10 +1,10 @@
-
 """This module contains a Beeler_reuter_1977 cardiac cell model
 
 The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -55,6 +55,39 @@ class Beeler_reuter_1977(CardiacCellModel):
         """
         Original gotran transmembrane current dV/dt
         """
+        return self._I_and_F(v, s, time)[0]
+
+    def I(self, v, s, time=None):
+        """
+        Transmembrane current
+
+           I = -dV/dt
+
+        """
+        return -self._I(v, s, time)
+
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
 
         # Assign states
@@ -74,106 +107,385 @@ class Beeler_reuter_1977(CardiacCellModel):
 
         # Init return args
         current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*7
+
+        # Parameter-only expressions
+        _p0 = -E_Na
+        _p1 = IstimPulseDuration + IstimStart
+        _p2 = 1.0/C
+
+        # Expressions depending on the states
+        F_expressions[6] = 0.031158410986342627*(1 -\
+            x1)*ufl.exp(0.08264462809917356*V)/(1 +\
+            17.41170806332765*ufl.exp(0.05714285714285714*V)) -\
+            0.0003916464405623223*ufl.exp(-0.05998800239952009*V)*x1/(1 +\
+            ufl.exp(-4/5 - V/25))
+        cse_0 = 0.04*V
+        cse_1 = ufl.exp(-cse_0)
+        cse_2 = ufl.exp(cse_0)
+        F_expressions[4] = 0.095*(1 - d)*ufl.exp(1/20 - V/100)/(1 +\
+            1.4332881385696572*ufl.exp(-0.07199424046076314*V)) -\
+            0.07*d*ufl.exp(-44/59 - V/59)/(1 + ufl.exp(11/5 + V/20))
+        F_expressions[5] = 0.012*(1 - f)*ufl.exp(-28/125 - V/125)/(1 +\
+            66.5465065250986*ufl.exp(0.14992503748125938*V)) -\
+            0.0065*ufl.exp(-3/5 - V/50)*f/(1 + ufl.exp(-6 - V/5))
+        cse_3 = g_s*(82.3 + 13.0287*ufl.ln(0.001*Cai) + V)*d*f
+        F_expressions[3] = 7.000000000000001e-06 - 0.07*Cai - 0.01*cse_3
+        cse_4 = 0.2*V
+        current[0] = _p2*(-cse_3 - (_p0 + V)*(g_Nac + g_Na*(m*m*m)*h*j) -\
+            0.0035*(4.6000000000000005 + cse_4)/(1 -\
+            0.39851904108451414*cse_1) - 0.0035*(-4 +\
+            119.85640018958804*cse_2)/(8.331137487687693*cse_2 +\
+            69.4078518387552*ufl.exp(0.08*V)) - 0.0019727757115328517*(-1 +\
+            21.75840239619708*cse_2)*cse_1*x1 +\
+            ufl.conditional(ufl.And(ufl.ge(time, IstimStart), ufl.le(time,\
+            _p1)), IstimAmplitude, 0))
+        cse_5 = ufl.exp(-0.1*V)
+        F_expressions[0] = -0.7095526727489909*ufl.exp(-0.056*V)*m + (1 -\
+            m)*(-47 - V)/(-1 + 0.009095277101695816*cse_5)
+        cse_6 = ufl.exp(-0.25*V)
+        F_expressions[1] = 5.497962438709065e-10*(1 - h)*cse_6 - 1.7*h/(1 +\
+            0.1580253208896478*ufl.exp(-0.082*V))
+        F_expressions[2] = -0.3*j/(1 + 0.040762203978366204*cse_5) +\
+            1.8690473007222892e-10*(1 - j)*cse_6/(1 +\
+            1.6788275299956603e-07*ufl.exp(-cse_4))
+
+        # Return results
+        return current[0], dolfin.as_vector(F_expressions)
+
+    def jacobian(self, v, s, time=None):
+        """
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
+        """
+        time = time if time else Constant(0.0)
+
+        # Assign states
+        V = v
+        assert(len(s) == 7)
+        m, h, j, Cai, d, f, x1 = s
+
+        # Assign parameters
+        E_Na = self._parameters["E_Na"]
+        g_Na = self._parameters["g_Na"]
+        g_Nac = self._parameters["g_Nac"]
+        g_s = self._parameters["g_s"]
+        C = self._parameters["C"]
+
+        # Init return args
+        jacobian = [ufl.zero()]*64
+
+        # Parameter-only expressions
+        cse_0 = 1.0/C
+        _p0 = -0.0019727757115328517*cse_0
+        _p1 = -g_Nac
+        _p2 = -E_Na
+        _p3 = -cse_0
+        _p4 = g_Na*cse_0
+        _p5 = -13.0287*cse_0
+        _p6 = g_s*cse_0
+        _p7 = 0.01*g_s
+
+        # Expressions depending on the states
+        cse_1 = g_s*d*f
+        jacobian[32] = -0.01*cse_1
+        cse_2 = (m*m*m)
+        cse_3 = g_Na*cse_2*h
+        cse_4 = 0.04*V
+        cse_5 = ufl.exp(-cse_4)
+        cse_6 = 1 - 0.39851904108451414*cse_5
+        cse_7 = ufl.exp(cse_4)
+        cse_8 = (-1 + 21.75840239619708*cse_7)*cse_5
+        jacobian[7] = _p0*cse_8
+        cse_9 = ufl.exp(0.08*V)
+        cse_10 = 8.331137487687693*cse_7 + 69.4078518387552*cse_9
+        cse_11 = 0.2*V
+        jacobian[0] = (_p1 - cse_1 - 0.0017169779107590322*x1 -\
+            0.0007000000000000001/cse_6 - cse_3*j +\
+            7.891102846131407e-05*cse_8*x1 -\
+            0.016779896026542326*cse_7/cse_10 +\
+            5.5792665751831976e-05*(4.6000000000000005 +\
+            cse_11)*cse_5/(cse_6*cse_6) - 0.0035*(-4 +\
+            119.85640018958804*cse_7)*(-0.3332454995075077*cse_7 -\
+            5.552628147100417*cse_9)/(cse_10*cse_10))*cse_0
+        cse_12 = _p2 + V
+        jacobian[3] = _p3*cse_12*cse_3
+        cse_13 = _p4*cse_12*j
+        jacobian[1] = -3*(m*m)*cse_13*h
+        jacobian[2] = -cse_13*cse_2
+        cse_14 = g_s*d*f/Cai
+        jacobian[4] = _p5*cse_14
+        jacobian[36] = -0.07 - 0.13028700000000001*cse_14
+        cse_15 = 82.3 + 13.0287*ufl.ln(0.001*Cai) + V
+        cse_16 = _p6*cse_15
+        jacobian[5] = -cse_16*f
+        jacobian[6] = -cse_16*d
+        cse_17 = ufl.exp(-0.056*V)
+        cse_18 = 1 - m
+        cse_19 = ufl.exp(-0.1*V)
+        cse_20 = -1 + 0.009095277101695816*cse_19
+        cse_21 = 1.0/cse_20
+        cse_22 = -47 - V
+        jacobian[8] = -cse_18*cse_21 + 0.03973494967394349*cse_17*m +\
+            0.0009095277101695816*cse_18*cse_19*cse_22/(cse_20*cse_20)
+        jacobian[9] = -0.7095526727489909*cse_17 - cse_21*cse_22
+        cse_23 = ufl.exp(-0.25*V)
+        cse_24 = ufl.exp(-0.082*V)
+        cse_25 = 1 + 0.1580253208896478*cse_24
+        jacobian[16] = -1.3744906096772661e-10*(1 - h)*cse_23 -\
+            0.022028729732016906*cse_24*h/(cse_25*cse_25)
+        jacobian[18] = -5.497962438709065e-10*cse_23 - 1.7/cse_25
+        cse_26 = 1 + 0.040762203978366204*cse_19
+        cse_27 = 1 + 1.6788275299956603e-07*ufl.exp(-cse_11)
+        cse_28 = cse_23/cse_27
+        jacobian[24] = -(4.672618251805723e-11 -\
+            4.672618251805723e-11*j)*cse_28 + 6.275616126633314e-18*(1 -\
+            j)*ufl.exp(-0.45*V)/(cse_27*cse_27) -\
+            0.001222866119350986*cse_19*j/(cse_26*cse_26)
+        jacobian[27] = -1.8690473007222892e-10*cse_28 - 0.3/cse_26
+        cse_29 = _p7*cse_15
+        jacobian[37] = -cse_29*f
+        jacobian[38] = -cse_29*d
+        cse_30 = ufl.exp(-44/59 - V/59)
+        cse_31 = ufl.exp(11/5 + V/20)
+        cse_32 = 1 + cse_31
+        cse_33 = cse_30/cse_32
+        cse_34 = ufl.exp(1/20 - V/100)
+        cse_35 = ufl.exp(-0.07199424046076314*V)
+        cse_36 = 1 + 1.4332881385696572*cse_35
+        cse_37 = cse_34/cse_36
+        jacobian[40] = -(0.00095 - 0.00095*d)*cse_37 +\
+            0.0011864406779661019*cse_33*d + 0.009802906635285633*(1 -\
+            d)*cse_34*cse_35/(cse_36*cse_36) +\
+            0.0035000000000000005*cse_30*cse_31*d/(cse_32*cse_32)
+        jacobian[45] = -0.07*cse_33 - 0.095*cse_37
+        cse_38 = ufl.exp(-3/5 - V/50)
+        cse_39 = ufl.exp(-6 - V/5)
+        cse_40 = 1 + cse_39
+        cse_41 = cse_38/cse_40
+        cse_42 = ufl.exp(-28/125 - V/125)
+        cse_43 = ufl.exp(0.14992503748125938*V)
+        cse_44 = 1 + 66.5465065250986*cse_43
+        cse_45 = cse_42/cse_44
+        jacobian[48] = -(9.6e-05 - 9.6e-05*f)*cse_45 + 0.00013*cse_41*f -\
+            0.0013*cse_38*cse_39*f/(cse_40*cse_40) - 0.11972384982026733*(1 -\
+            f)*cse_42*cse_43/(cse_44*cse_44)
+        jacobian[54] = -0.012*cse_45 - 0.0065*cse_41
+        cse_46 = ufl.exp(-0.05998800239952009*V)
+        cse_47 = ufl.exp(-4/5 - V/25)
+        cse_48 = 1 + cse_47
+        cse_49 = cse_46/cse_48
+        cse_50 = 1 + 17.41170806332765*ufl.exp(0.05714285714285714*V)
+        cse_51 = ufl.exp(0.08264462809917356*V)/cse_50
+        jacobian[56] = (0.0025750752881274898 -\
+            0.0025750752881274898*x1)*cse_51 +\
+            2.3494087616216093e-05*cse_49*x1 - 0.031001208903507358*(1 -\
+            x1)*ufl.exp(0.1397874852420307*V)/(cse_50*cse_50) -\
+            1.5665857622492893e-05*cse_46*cse_47*x1/(cse_48*cse_48)
+        jacobian[63] = -0.0003916464405623223*cse_49 -\
+            0.031158410986342627*cse_51
+
+        # Return results
+        return ufl.as_matrix([jacobian[8*i:8*(i + 1)] for i in range(8)])
+
+    def num_states(self):
+        return 7
+
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 8)
+        V, m, h, j, Cai, d, f, x1 = states
+
+        # Assign parameters
+        assert(len(parameters) == 10)
+        E_Na = parameters[0]
+        g_Na = parameters[1]
+        g_Nac = parameters[2]
+        g_s = parameters[3]
+        IstimAmplitude = parameters[4]
+        IstimPulseDuration = parameters[7]
+        IstimStart = parameters[8]
+        C = parameters[9]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
 
         # Expressions for the Sodium current component
         i_Na = (g_Nac + g_Na*(m*m*m)*h*j)*(-E_Na + V)
 
+        # Expressions for the Sodium current m gate component
+        alpha_m = (-47 - V)/(-1 + 0.009095277101695816*numpy.exp(-0.1*V))
+        beta_m = 0.7095526727489909*numpy.exp(-0.056*V)
+        dy[1] = (1 - m)*alpha_m - beta_m*m
+
+        # Expressions for the Sodium current h gate component
+        alpha_h = 5.497962438709065e-10*numpy.exp(-0.25*V)
+        beta_h = 1.7/(1 + 0.1580253208896478*numpy.exp(-0.082*V))
+        dy[2] = (1 - h)*alpha_h - beta_h*h
+
+        # Expressions for the Sodium current j gate component
+        alpha_j = 1.8690473007222892e-10*numpy.exp(-0.25*V)/(1 +\
+            1.6788275299956603e-07*numpy.exp(-0.2*V))
+        beta_j = 0.3/(1 + 0.040762203978366204*numpy.exp(-0.1*V))
+        dy[3] = (1 - j)*alpha_j - beta_j*j
+
         # Expressions for the Slow inward current component
-        E_s = -82.3 - 13.0287*ufl.ln(0.001*Cai)
+        E_s = -82.3 - 13.0287*numpy.log(0.001*Cai)
         i_s = g_s*(-E_s + V)*d*f
+        dy[4] = 7.000000000000001e-06 - 0.07*Cai - 0.01*i_s
+
+        # Expressions for the Slow inward current d gate component
+        alpha_d = 0.095*numpy.exp(1/20 - V/100)/(1 +\
+            1.4332881385696572*numpy.exp(-0.07199424046076314*V))
+        beta_d = 0.07*numpy.exp(-44/59 - V/59)/(1 + numpy.exp(11/5 + V/20))
+        dy[5] = (1 - d)*alpha_d - beta_d*d
+
+        # Expressions for the Slow inward current f gate component
+        alpha_f = 0.012*numpy.exp(-28/125 - V/125)/(1 +\
+            66.5465065250986*numpy.exp(0.14992503748125938*V))
+        beta_f = 0.0065*numpy.exp(-3/5 - V/50)/(1 + numpy.exp(-6 - V/5))
+        dy[6] = (1 - f)*alpha_f - beta_f*f
 
         # Expressions for the Time dependent outward current component
-        i_x1 = 0.00197277571153*(-1 +\
-            21.7584023962*ufl.exp(0.04*V))*ufl.exp(-0.04*V)*x1
+        i_x1 = 0.0019727757115328517*(-1 +\
+            21.75840239619708*numpy.exp(0.04*V))*numpy.exp(-0.04*V)*x1
+
+        # Expressions for the Time dependent outward current x1 gate component
+        alpha_x1 = 0.031158410986342627*numpy.exp(0.08264462809917356*V)/(1 +\
+            17.41170806332765*numpy.exp(0.05714285714285714*V))
+        beta_x1 = 0.0003916464405623223*numpy.exp(-0.05998800239952009*V)/(1 +\
+            numpy.exp(-4/5 - V/25))
+        dy[7] = (1 - x1)*alpha_x1 - beta_x1*x1
 
         # Expressions for the Time independent outward current component
-        i_K1 = 0.0035*(-4 +\
-            119.85640019*ufl.exp(0.04*V))/(8.33113748769*ufl.exp(0.04*V) +\
-            69.4078518388*ufl.exp(0.08*V)) + 0.0035*(4.6 + 0.2*V)/(1 -\
-            0.398519041085*ufl.exp(-0.04*V))
+        i_K1 = 0.0035*(4.6000000000000005 + 0.2*V)/(1 -\
+            0.39851904108451414*numpy.exp(-0.04*V)) + 0.0035*(-4 +\
+            119.85640018958804*numpy.exp(0.04*V))/(8.331137487687693*numpy.exp(0.04*V)\
+            + 69.4078518387552*numpy.exp(0.08*V))
 
         # Expressions for the Stimulus protocol component
-        Istim = ufl.conditional(ufl.And(ufl.ge(time, IstimStart),\
-            ufl.le(time, IstimPulseDuration + IstimStart)), IstimAmplitude,\
-            0)
+        Istim = numpy.where(numpy.logical_and((time >= IstimStart), (time <=\
+            IstimPulseDuration + IstimStart)), IstimAmplitude, 0)
 
         # Expressions for the Membrane component
-        current[0] = (-i_K1 + Istim - i_Na - i_x1 - i_s)/C
+        dy[0] = (-i_K1 - i_Na - i_s - i_x1 + Istim)/C
 
         # Return results
-        return current[0]
-
-    def I(self, v, s, time=None):
-        """
-        Transmembrane current
-
-           I = -dV/dt
-
-        """
-        return -self._I(v, s, time)
+        return dy
 
-    def F(self, v, s, time=None):
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
         """
-        Right hand side for ODE system
+        Advance the states (in place) by a Rush-Larsen step of length dt
         """
-        time = time if time else Constant(0.0)
-
         # Assign states
-        V = v
-        assert(len(s) == 7)
-        m, h, j, Cai, d, f, x1 = s
+        assert(len(states) == 8)
+        V, m, h, j, Cai, d, f, x1 = states
 
         # Assign parameters
-        g_s = self._parameters["g_s"]
+        assert(len(parameters) == 10)
+        E_Na = parameters[0]
+        g_Na = parameters[1]
+        g_Nac = parameters[2]
+        g_s = parameters[3]
+        IstimAmplitude = parameters[4]
+        IstimPulseDuration = parameters[7]
+        IstimStart = parameters[8]
+        C = parameters[9]
 
         # Init return args
-        F_expressions = [ufl.zero()]*7
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((6,) + numpy.shape(states)[1:])
+
+        # Expressions for the Sodium current component
+        i_Na = (g_Nac + g_Na*(m*m*m)*h*j)*(-E_Na + V)
 
         # Expressions for the Sodium current m gate component
-        alpha_m = (-47 - V)/(-1 + 0.0090952771017*ufl.exp(-0.1*V))
-        beta_m = 0.709552672749*ufl.exp(-0.056*V)
-        F_expressions[0] = -beta_m*m + (1 - m)*alpha_m
+        alpha_m = (-47 - V)/(-1 + 0.009095277101695816*numpy.exp(-0.1*V))
+        beta_m = 0.7095526727489909*numpy.exp(-0.056*V)
+        dy[1] = (1 - m)*alpha_m - beta_m*m
+        linearized[0] = -0.7095526727489909*numpy.exp(-0.056*V) - (-47 -\
+            V)/(-1 + 0.009095277101695816*numpy.exp(-0.1*V))
 
         # Expressions for the Sodium current h gate component
-        alpha_h = 5.49796243871e-10*ufl.exp(-0.25*V)
-        beta_h = 1.7/(1 + 0.15802532089*ufl.exp(-0.082*V))
-        F_expressions[1] = (1 - h)*alpha_h - beta_h*h
+        alpha_h = 5.497962438709065e-10*numpy.exp(-0.25*V)
+        beta_h = 1.7/(1 + 0.1580253208896478*numpy.exp(-0.082*V))
+        dy[2] = (1 - h)*alpha_h - beta_h*h
+        linearized[1] = -5.497962438709065e-10*numpy.exp(-0.25*V) - 1.7/(1 +\
+            0.1580253208896478*numpy.exp(-0.082*V))
 
         # Expressions for the Sodium current j gate component
-        alpha_j = 1.86904730072e-10*ufl.exp(-0.25*V)/(1 +\
-            1.67882753e-07*ufl.exp(-0.2*V))
-        beta_j = 0.3/(1 + 0.0407622039784*ufl.exp(-0.1*V))
-        F_expressions[2] = (1 - j)*alpha_j - beta_j*j
+        alpha_j = 1.8690473007222892e-10*numpy.exp(-0.25*V)/(1 +\
+            1.6788275299956603e-07*numpy.exp(-0.2*V))
+        beta_j = 0.3/(1 + 0.040762203978366204*numpy.exp(-0.1*V))
+        dy[3] = (1 - j)*alpha_j - beta_j*j
+        linearized[2] = -0.3/(1 + 0.040762203978366204*numpy.exp(-0.1*V)) -\
+            1.8690473007222892e-10*numpy.exp(-0.25*V)/(1 +\
+            1.6788275299956603e-07*numpy.exp(-0.2*V))
 
         # Expressions for the Slow inward current component
-        E_s = -82.3 - 13.0287*ufl.ln(0.001*Cai)
+        E_s = -82.3 - 13.0287*numpy.log(0.001*Cai)
         i_s = g_s*(-E_s + V)*d*f
-        F_expressions[3] = 7e-06 - 0.07*Cai - 0.01*i_s
+        dy[4] = 7.000000000000001e-06 - 0.07*Cai - 0.01*i_s
 
         # Expressions for the Slow inward current d gate component
-        alpha_d = 0.095*ufl.exp(1/20 - V/100)/(1 +\
-            1.43328813857*ufl.exp(-0.0719942404608*V))
-        beta_d = 0.07*ufl.exp(-44/59 - V/59)/(1 + ufl.exp(11/5 + V/20))
-        F_expressions[4] = -beta_d*d + (1 - d)*alpha_d
+        alpha_d = 0.095*numpy.exp(1/20 - V/100)/(1 +\
+            1.4332881385696572*numpy.exp(-0.07199424046076314*V))
+        beta_d = 0.07*numpy.exp(-44/59 - V/59)/(1 + numpy.exp(11/5 + V/20))
+        dy[5] = (1 - d)*alpha_d - beta_d*d
+        linearized[3] = -0.07*numpy.exp(-44/59 - V/59)/(1 + numpy.exp(11/5 +\
+            V/20)) - 0.095*numpy.exp(1/20 - V/100)/(1 +\
+            1.4332881385696572*numpy.exp(-0.07199424046076314*V))
 
         # Expressions for the Slow inward current f gate component
-        alpha_f = 0.012*ufl.exp(-28/125 - V/125)/(1 +\
-            66.5465065251*ufl.exp(0.149925037481*V))
-        beta_f = 0.0065*ufl.exp(-3/5 - V/50)/(1 + ufl.exp(-6 - V/5))
-        F_expressions[5] = (1 - f)*alpha_f - beta_f*f
+        alpha_f = 0.012*numpy.exp(-28/125 - V/125)/(1 +\
+            66.5465065250986*numpy.exp(0.14992503748125938*V))
+        beta_f = 0.0065*numpy.exp(-3/5 - V/50)/(1 + numpy.exp(-6 - V/5))
+        dy[6] = (1 - f)*alpha_f - beta_f*f
+        linearized[4] = -0.012*numpy.exp(-28/125 - V/125)/(1 +\
+            66.5465065250986*numpy.exp(0.14992503748125938*V)) -\
+            0.0065*numpy.exp(-3/5 - V/50)/(1 + numpy.exp(-6 - V/5))
+
+        # Expressions for the Time dependent outward current component
+        i_x1 = 0.0019727757115328517*(-1 +\
+            21.75840239619708*numpy.exp(0.04*V))*numpy.exp(-0.04*V)*x1
 
         # Expressions for the Time dependent outward current x1 gate component
-        alpha_x1 = 0.0311584109863*ufl.exp(0.0826446280992*V)/(1 +\
-            17.4117080633*ufl.exp(0.0571428571429*V))
-        beta_x1 = 0.000391646440562*ufl.exp(-0.0599880023995*V)/(1 +\
-            ufl.exp(-4/5 - V/25))
-        F_expressions[6] = (1 - x1)*alpha_x1 - beta_x1*x1
+        alpha_x1 = 0.031158410986342627*numpy.exp(0.08264462809917356*V)/(1 +\
+            17.41170806332765*numpy.exp(0.05714285714285714*V))
+        beta_x1 = 0.0003916464405623223*numpy.exp(-0.05998800239952009*V)/(1 +\
+            numpy.exp(-4/5 - V/25))
+        dy[7] = (1 - x1)*alpha_x1 - beta_x1*x1
+        linearized[5] =\
+            -0.0003916464405623223*numpy.exp(-0.05998800239952009*V)/(1 +\
+            numpy.exp(-4/5 - V/25)) -\
+            0.031158410986342627*numpy.exp(0.08264462809917356*V)/(1 +\
+            17.41170806332765*numpy.exp(0.05714285714285714*V))
 
-        # Return results
-        return dolfin.as_vector(F_expressions)
+        # Expressions for the Time independent outward current component
+        i_K1 = 0.0035*(4.6000000000000005 + 0.2*V)/(1 -\
+            0.39851904108451414*numpy.exp(-0.04*V)) + 0.0035*(-4 +\
+            119.85640018958804*numpy.exp(0.04*V))/(8.331137487687693*numpy.exp(0.04*V)\
+            + 69.4078518387552*numpy.exp(0.08*V))
 
-    def num_states(self):
-        return 7
+        # Expressions for the Stimulus protocol component
+        Istim = numpy.where(numpy.logical_and((time >= IstimStart), (time <=\
+            IstimPulseDuration + IstimStart)), IstimAmplitude, 0)
+        dy[0] = (-i_K1 - i_Na - i_s - i_x1 + Istim)/C
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1, 2, 3, 5, 6, 7]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
 
     def __str__(self):
         return 'Beeler_reuter_1977 cardiac cell model'
@@ -133,6 +133,12 @@ class CardiacCellModel:
         "Return the ionic current."
         error("Must define I = I(v, s)")
 
+    def jacobian(self, v, s, time=None):
+        """Return the Jacobian of the right-hand side (-I, F) with
+        respect to (v, s), or None if not available (the Jacobian is
+        then derived automatically)."""
+        return None
+
     def num_states(self):
         """Return number of state variables (in addition to the
         membrane potential)."""
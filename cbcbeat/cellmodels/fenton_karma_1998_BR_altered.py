@@ -1,10 +1,10 @@
-
 """This module contains a Fenton_karma_1998_BR_altered cardiac cell model
 
 The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -61,6 +61,39 @@ class Fenton_karma_1998_BR_altered(CardiacCellModel):
         """
         Original gotran transmembrane current dV/dt
         """
+        return self._I_and_F(v, s, time)[0]
+
+    def I(self, v, s, time=None):
+        """
+        Transmembrane current
+
+           I = -dV/dt
+
+        """
+        return -self._I(v, s, time)
+
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
 
         # Assign states
@@ -70,95 +103,269 @@ class Fenton_karma_1998_BR_altered(CardiacCellModel):
 
         # Assign parameters
         u_c = self._parameters["u_c"]
+        u_v = self._parameters["u_v"]
         g_fi_max = self._parameters["g_fi_max"]
+        tau_v1_minus = self._parameters["tau_v1_minus"]
+        tau_v2_minus = self._parameters["tau_v2_minus"]
+        tau_v_plus = self._parameters["tau_v_plus"]
         tau_0 = self._parameters["tau_0"]
         tau_r = self._parameters["tau_r"]
         k = self._parameters["k"]
         tau_si = self._parameters["tau_si"]
         u_csi = self._parameters["u_csi"]
+        tau_w_minus = self._parameters["tau_w_minus"]
+        tau_w_plus = self._parameters["tau_w_plus"]
         Cm = self._parameters["Cm"]
         V_0 = self._parameters["V_0"]
         V_fi = self._parameters["V_fi"]
 
         # Init return args
         current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*2
+
+        # Parameter-only expressions
+        cse_0 = -V_0
+        _p0 = 1.0/(V_fi + cse_0)
+        _p1 = 1.0/tau_w_minus
+        _p2 = -1/tau_w_plus
+        _p3 = 1.0/tau_r
+        _p4 = 1.0/tau_0
+        _p5 = -u_csi
+        _p6 = -1/(2*tau_si)
+        _p7 = -u_c
+        _p8 = -g_fi_max/Cm
+        _p9 = V_0 - V_fi
+        _p10 = -1/tau_v_plus
+
+        # Expressions depending on the states
+        cse_1 = _p0*(V + cse_0)
+        cse_2 = 1 - ufl.conditional(ufl.lt(cse_1, u_c), 0, 1)
+        F_expressions[1] = _p1*(1 - w)*cse_2 +\
+            _p2*ufl.conditional(ufl.lt(cse_1, u_c), 0, 1)*w
+        cse_3 = ufl.conditional(ufl.lt(cse_1, u_c), 0, 1)*v
+        current[0] = _p9*(_p3*ufl.conditional(ufl.lt(cse_1, u_c), 0, 1) +\
+            _p4*cse_1*cse_2 + _p6*(1 + ufl.tanh(k*(_p5 + cse_1)))*w + _p8*(1 -\
+            cse_1)*(_p7 + cse_1)*cse_3)
+        F_expressions[0] = _p10*cse_3 + (1 -\
+            v)*cse_2/(tau_v1_minus*ufl.conditional(ufl.lt(cse_1, u_v), 0, 1)\
+            + tau_v2_minus*(1 - ufl.conditional(ufl.lt(cse_1, u_v), 0, 1)))
+
+        # Return results
+        return current[0], dolfin.as_vector(F_expressions)
+
+    def jacobian(self, v, s, time=None):
+        """
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
+        """
+        time = time if time else Constant(0.0)
+
+        # Assign states
+        V = v
+        assert(len(s) == 2)
+        v, w = s
+
+        # Assign parameters
+        u_c = self._parameters["u_c"]
+        u_v = self._parameters["u_v"]
+        g_fi_max = self._parameters["g_fi_max"]
+        tau_v1_minus = self._parameters["tau_v1_minus"]
+        tau_v2_minus = self._parameters["tau_v2_minus"]
+        tau_v_plus = self._parameters["tau_v_plus"]
+        tau_0 = self._parameters["tau_0"]
+        k = self._parameters["k"]
+        tau_si = self._parameters["tau_si"]
+        u_csi = self._parameters["u_csi"]
+        tau_w_minus = self._parameters["tau_w_minus"]
+        tau_w_plus = self._parameters["tau_w_plus"]
+        Cm = self._parameters["Cm"]
+        V_0 = self._parameters["V_0"]
+        V_fi = self._parameters["V_fi"]
+
+        # Init return args
+        jacobian = [ufl.zero()]*9
+
+        # Parameter-only expressions
+        cse_0 = V_0 - V_fi
+        cse_1 = -V_0
+        cse_2 = 1.0/(V_fi + cse_1)
+        cse_5 = 1/(2*tau_si)
+        cse_8 = 1.0/Cm
+        _p0 = -1/tau_w_minus
+        _p1 = -1/tau_w_plus
+        _p2 = -u_csi
+        _p3 = -cse_0*cse_5
+        _p4 = g_fi_max*cse_2*cse_8
+        _p5 = -u_c
+        _p6 = cse_2/tau_0
+        _p7 = -k*cse_2*cse_5
+        _p8 = -g_fi_max*cse_0*cse_8
+        _p9 = -1/tau_v_plus
+
+        # Expressions depending on the states
+        cse_3 = (V + cse_1)*cse_2
+        cse_4 = 1 - ufl.conditional(ufl.lt(cse_3, u_c), 0, 1)
+        jacobian[8] = _p0*cse_4 + _p1*ufl.conditional(ufl.lt(cse_3, u_c), 0, 1)
+        cse_6 = ufl.tanh(k*(_p2 + cse_3))
+        jacobian[2] = _p3*(1 + cse_6)
+        cse_7 = 1 - cse_3
+        cse_9 = _p4*ufl.conditional(ufl.lt(cse_3, u_c), 0, 1)*v
+        cse_10 = _p5 + cse_3
+        jacobian[0] = (_p6*cse_4 + cse_10*cse_9 - cse_7*cse_9 + _p7*(1 -\
+            (cse_6*cse_6))*w)*cse_0
+        jacobian[1] = _p8*ufl.conditional(ufl.lt(cse_3, u_c), 0,\
+            1)*cse_10*cse_7
+        jacobian[4] = _p9*ufl.conditional(ufl.lt(cse_3, u_c), 0, 1) -\
+            cse_4/(tau_v1_minus*ufl.conditional(ufl.lt(cse_3, u_v), 0, 1) +\
+            tau_v2_minus*(1 - ufl.conditional(ufl.lt(cse_3, u_v), 0, 1)))
+
+        # Return results
+        return ufl.as_matrix([jacobian[3*i:3*(i + 1)] for i in range(3)])
+
+    def num_states(self):
+        return 2
+
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 3)
+        V, v, w = states
+
+        # Assign parameters
+        assert(len(parameters) == 21)
+        u_c = parameters[0]
+        u_v = parameters[1]
+        g_fi_max = parameters[2]
+        tau_v1_minus = parameters[3]
+        tau_v2_minus = parameters[4]
+        tau_v_plus = parameters[5]
+        tau_0 = parameters[6]
+        tau_r = parameters[7]
+        k = parameters[8]
+        tau_si = parameters[9]
+        u_csi = parameters[10]
+        tau_w_minus = parameters[11]
+        tau_w_plus = parameters[12]
+        Cm = parameters[18]
+        V_0 = parameters[19]
+        V_fi = parameters[20]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
 
         # Expressions for the p component
-        p = ufl.conditional(ufl.lt((-V_0 + V)/(V_fi - V_0), u_c), 0, 1)
+        p = numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c), 0, 1)
+
+        # Expressions for the q component
+        q = numpy.where(((-V_0 + V)/(V_fi - V_0) < u_v), 0, 1)
 
         # Expressions for the Fast inward current component
         tau_d = Cm/g_fi_max
         J_fi = -(1 - (-V_0 + V)/(V_fi - V_0))*(-u_c + (-V_0 + V)/(V_fi -\
             V_0))*p*v/tau_d
 
+        # Expressions for the v gate component
+        tau_v_minus = tau_v1_minus*q + tau_v2_minus*(1 - q)
+        dy[1] = (1 - p)*(1 - v)/tau_v_minus - p*v/tau_v_plus
+
         # Expressions for the Slow outward current component
         J_so = p/tau_r + (1 - p)*(-V_0 + V)/(tau_0*(V_fi - V_0))
 
         # Expressions for the Slow inward current component
-        J_si = -(1 + ufl.tanh(k*(-u_csi + (-V_0 + V)/(V_fi -\
+        J_si = -(1 + numpy.tanh(k*(-u_csi + (-V_0 + V)/(V_fi -\
             V_0))))*w/(2*tau_si)
 
+        # Expressions for the w gate component
+        dy[2] = (1 - p)*(1 - w)/tau_w_minus - p*w/tau_w_plus
+
         # Expressions for the Stimulus protocol component
         J_stim = 0
 
         # Expressions for the Membrane component
-        current[0] = (V_0 - V_fi)*(J_stim + J_fi + J_si + J_so)
+        dy[0] = (V_0 - V_fi)*(J_stim + J_fi + J_si + J_so)
 
         # Return results
-        return current[0]
-
-    def I(self, v, s, time=None):
-        """
-        Transmembrane current
+        return dy
 
-           I = -dV/dt
-
-        """
-        return -self._I(v, s, time)
-
-    def F(self, v, s, time=None):
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
         """
-        Right hand side for ODE system
+        Advance the states (in place) by a Rush-Larsen step of length dt
         """
-        time = time if time else Constant(0.0)
-
         # Assign states
-        V = v
-        assert(len(s) == 2)
-        v, w = s
+        assert(len(states) == 3)
+        V, v, w = states
 
         # Assign parameters
-        u_c = self._parameters["u_c"]
-        u_v = self._parameters["u_v"]
-        tau_v1_minus = self._parameters["tau_v1_minus"]
-        tau_v2_minus = self._parameters["tau_v2_minus"]
-        tau_v_plus = self._parameters["tau_v_plus"]
-        tau_w_minus = self._parameters["tau_w_minus"]
-        tau_w_plus = self._parameters["tau_w_plus"]
-        V_0 = self._parameters["V_0"]
-        V_fi = self._parameters["V_fi"]
+        assert(len(parameters) == 21)
+        u_c = parameters[0]
+        u_v = parameters[1]
+        g_fi_max = parameters[2]
+        tau_v1_minus = parameters[3]
+        tau_v2_minus = parameters[4]
+        tau_v_plus = parameters[5]
+        tau_0 = parameters[6]
+        tau_r = parameters[7]
+        k = parameters[8]
+        tau_si = parameters[9]
+        u_csi = parameters[10]
+        tau_w_minus = parameters[11]
+        tau_w_plus = parameters[12]
+        Cm = parameters[18]
+        V_0 = parameters[19]
+        V_fi = parameters[20]
 
         # Init return args
-        F_expressions = [ufl.zero()]*2
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((2,) + numpy.shape(states)[1:])
 
         # Expressions for the p component
-        p = ufl.conditional(ufl.lt((-V_0 + V)/(V_fi - V_0), u_c), 0, 1)
+        p = numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c), 0, 1)
 
         # Expressions for the q component
-        q = ufl.conditional(ufl.lt((-V_0 + V)/(V_fi - V_0), u_v), 0, 1)
+        q = numpy.where(((-V_0 + V)/(V_fi - V_0) < u_v), 0, 1)
+
+        # Expressions for the Fast inward current component
+        tau_d = Cm/g_fi_max
+        J_fi = -(1 - (-V_0 + V)/(V_fi - V_0))*(-u_c + (-V_0 + V)/(V_fi -\
+            V_0))*p*v/tau_d
 
         # Expressions for the v gate component
         tau_v_minus = tau_v1_minus*q + tau_v2_minus*(1 - q)
-        F_expressions[0] = (1 - p)*(1 - v)/tau_v_minus - p*v/tau_v_plus
+        dy[1] = (1 - p)*(1 - v)/tau_v_minus - p*v/tau_v_plus
+        linearized[0] = -numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c), 0,\
+            1)/tau_v_plus - (1 - numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c),\
+            0, 1))/(tau_v1_minus*numpy.where(((-V_0 + V)/(V_fi - V_0) < u_v),\
+            0, 1) + tau_v2_minus*(1 - numpy.where(((-V_0 + V)/(V_fi - V_0) <\
+            u_v), 0, 1)))
 
-        # Expressions for the w gate component
-        F_expressions[1] = (1 - p)*(1 - w)/tau_w_minus - p*w/tau_w_plus
+        # Expressions for the Slow outward current component
+        J_so = p/tau_r + (1 - p)*(-V_0 + V)/(tau_0*(V_fi - V_0))
 
-        # Return results
-        return dolfin.as_vector(F_expressions)
+        # Expressions for the Slow inward current component
+        J_si = -(1 + numpy.tanh(k*(-u_csi + (-V_0 + V)/(V_fi -\
+            V_0))))*w/(2*tau_si)
+        dy[2] = (1 - p)*(1 - w)/tau_w_minus - p*w/tau_w_plus
+        linearized[1] = -(1 - numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c), 0,\
+            1))/tau_w_minus - numpy.where(((-V_0 + V)/(V_fi - V_0) < u_c), 0,\
+            1)/tau_w_plus
 
-    def num_states(self):
-        return 2
+        # Expressions for the Stimulus protocol component
+        J_stim = 0
+        dy[0] = (V_0 - V_fi)*(J_stim + J_fi + J_si + J_so)
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1, 2]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
 
     def __str__(self):
         return 'Fenton_karma_1998_BR_altered cardiac cell model'
@@ -1,19 +1,16 @@
-
 """This module contains a Fitzhughnagumo cardiac cell model
 
-The module was autogenerated from a gotran form file
+The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
 from cbcbeat.cellmodels import CardiacCellModel
 
 class Fitzhughnagumo(CardiacCellModel):
-    """
-NOT_IMPLEMENTED
-    """
     def __init__(self, params=None, init_conditions=None):
         """
         Create cardiac cell model
@@ -49,61 +46,212 @@ NOT_IMPLEMENTED
                           ("s", 0.0)])
         return ic
 
+    def _I(self, v, s, time):
+        """
+        Original gotran transmembrane current dV/dt
+        """
+        return self._I_and_F(v, s, time)[0]
+
     def I(self, v, s, time=None):
         """
         Transmembrane current
+
+           I = -dV/dt
+
         """
-        # Imports
-        # No imports for now
+        return -self._I(v, s, time)
 
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
+
         # Assign states
-        _is_vector = False
 
         # Assign parameters
         a = self._parameters["a"]
-        stim_start = self._parameters["stim_start"]
-        stim_amplitude = self._parameters["stim_amplitude"]
+        b = self._parameters["b"]
         c_1 = self._parameters["c_1"]
         c_2 = self._parameters["c_2"]
-        v_rest = self._parameters["v_rest"]
+        c_3 = self._parameters["c_3"]
+        stim_amplitude = self._parameters["stim_amplitude"]
         stim_duration = self._parameters["stim_duration"]
+        stim_start = self._parameters["stim_start"]
         v_peak = self._parameters["v_peak"]
+        v_rest = self._parameters["v_rest"]
 
-        current = -(v - v_rest)*(v_peak - v)*(-(v_peak - v_rest)*a + v -\
-            v_rest)*c_1/((v_peak - v_rest)*(v_peak - v_rest)) + (v -\
-            v_rest)*c_2*s/(v_peak - v_rest) - (1.0 - 1.0/(1.0 +\
-            ufl.exp(-5.0*stim_start + 5.0*time)))*stim_amplitude/(1.0 +\
-            ufl.exp(-5.0*stim_start + 5.0*time - 5.0*stim_duration))
+        # Init return args
+        current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*1
 
-        return current
+        # Parameter-only expressions
+        cse_0 = -v_rest
+        cse_2 = v_peak + cse_0
+        _p0 = -c_3
+        _p1 = -5.0*stim_start
+        _p2 = -5.0*stim_duration
+        _p3 = -c_2/cse_2
+        _p4 = -a*cse_2
+        _p5 = c_1/(cse_2*cse_2)
 
-    def F(self, v, s, time=None):
+        # Expressions depending on the states
+        cse_1 = cse_0 + v
+        F_expressions[0] = b*(_p0*s + cse_1)
+        cse_3 = _p1 + 5.0*time
+        current[0] = _p3*cse_1*s + stim_amplitude*(1 - 1/(1 +\
+            ufl.exp(cse_3)))/(1 + ufl.exp(_p2 + cse_3)) + _p5*(_p4 +\
+            cse_1)*(v_peak - v)*cse_1
+
+        # Return results
+        return current[0], F_expressions[0]
+
+    def jacobian(self, v, s, time=None):
         """
-        Right hand side for ODE system
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
         """
-        # Imports
-        # No imports for now
-
         time = time if time else Constant(0.0)
+
         # Assign states
-        _is_vector = False
 
         # Assign parameters
-        c_3 = self._parameters["c_3"]
-        b = self._parameters["b"]
+        a = self._parameters["a"]
+        c_1 = self._parameters["c_1"]
+        c_2 = self._parameters["c_2"]
+        v_peak = self._parameters["v_peak"]
         v_rest = self._parameters["v_rest"]
 
-        F_expressions = [\
+        # Init return args
+        jacobian = [ufl.zero()]*4
 
-            # Derivative for state s
-            (-c_3*s + v - v_rest)*b,
-            ]
+        # Parameter-only expressions
+        cse_0 = -v_rest
+        cse_1 = v_peak + cse_0
+        cse_2 = c_2/cse_1
+        cse_4 = 1.0/(cse_1*cse_1)
+        _p0 = -cse_2
+        _p1 = c_1*cse_4
+        _p2 = -a*cse_1
+        _p3 = -c_1*cse_4
 
-        return as_vector(F_expressions) if _is_vector else F_expressions[0]
+        # Expressions depending on the states
+        cse_3 = cse_0 + v
+        jacobian[1] = _p0*cse_3
+        cse_5 = _p1*(v_peak - v)
+        cse_6 = _p2 + cse_3
+        jacobian[0] = _p0*s + cse_3*cse_5 + cse_5*cse_6 + _p3*cse_3*cse_6
+
+        # Return results
+        return ufl.as_matrix([jacobian[2*i:2*(i + 1)] for i in range(2)])
 
     def num_states(self):
         return 1
 
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 2)
+        v, s = states
+
+        # Assign parameters
+        assert(len(parameters) == 11)
+        a = parameters[0]
+        b = parameters[1]
+        c_1 = parameters[2]
+        c_2 = parameters[3]
+        c_3 = parameters[4]
+        stim_amplitude = parameters[5]
+        stim_duration = parameters[6]
+        stim_start = parameters[8]
+        v_peak = parameters[9]
+        v_rest = parameters[10]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
+
+        # Expressions for the fitzhughnagumo component
+        v_amp = v_peak - v_rest
+        v_th = v_rest + a*v_amp
+        I = -c_2*(-v_rest + v)*s/v_amp + c_1*(v_peak - v)*(-v_rest +\
+            v)*(-v_th + v)/(v_amp*v_amp)
+        i_Stim = stim_amplitude*(1 - 1/(1 + numpy.exp(5.0*time -\
+            5.0*stim_start)))/(1 + numpy.exp(5.0*time - 5.0*stim_duration -\
+            5.0*stim_start))
+        dy[0] = I + i_Stim
+        dy[1] = b*(-v_rest - c_3*s + v)
+
+        # Return results
+        return dy
+
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
+        """
+        Advance the states (in place) by a Rush-Larsen step of length dt
+        """
+        # Assign states
+        assert(len(states) == 2)
+        v, s = states
+
+        # Assign parameters
+        assert(len(parameters) == 11)
+        a = parameters[0]
+        b = parameters[1]
+        c_1 = parameters[2]
+        c_2 = parameters[3]
+        c_3 = parameters[4]
+        stim_amplitude = parameters[5]
+        stim_duration = parameters[6]
+        stim_start = parameters[8]
+        v_peak = parameters[9]
+        v_rest = parameters[10]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((1,) + numpy.shape(states)[1:])
+
+        # Expressions for the fitzhughnagumo component
+        v_amp = v_peak - v_rest
+        v_th = v_rest + a*v_amp
+        I = -c_2*(-v_rest + v)*s/v_amp + c_1*(v_peak - v)*(-v_rest +\
+            v)*(-v_th + v)/(v_amp*v_amp)
+        i_Stim = stim_amplitude*(1 - 1/(1 + numpy.exp(5.0*time -\
+            5.0*stim_start)))/(1 + numpy.exp(5.0*time - 5.0*stim_duration -\
+            5.0*stim_start))
+        dy[0] = I + i_Stim
+        dy[1] = b*(-v_rest - c_3*s + v)
+        linearized[0] = -b*c_3
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
+
     def __str__(self):
         return 'Fitzhughnagumo cardiac cell model'
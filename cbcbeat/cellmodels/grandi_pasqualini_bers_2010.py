@@ -1,10 +1,10 @@
-
 """This module contains a Grandi_pasqualini_bers_2010 cardiac cell model
 
 The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -183,6 +183,39 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         """
         Original gotran transmembrane current dV/dt
         """
+        return self._I_and_F(v, s, time)[0]
+
+    def I(self, v, s, time=None):
+        """
+        Transmembrane current
+
+           I = -dV/dt
+
+        """
+        return -self._I(v, s, time)
+
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
 
         # Assign states
@@ -196,6 +229,8 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         # Assign parameters
         Fjunc = self._parameters["Fjunc"]
         Fjunc_CaL = self._parameters["Fjunc_CaL"]
+        cellLength = self._parameters["cellLength"]
+        cellRadius = self._parameters["cellRadius"]
         GNa = self._parameters["GNa"]
         GNaB = self._parameters["GNaB"]
         IbarNaK = self._parameters["IbarNaK"]
@@ -224,182 +259,398 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         KmPCa = self._parameters["KmPCa"]
         Q10SLCaP = self._parameters["Q10SLCaP"]
         GCaB = self._parameters["GCaB"]
+        Kmf = self._parameters["Kmf"]
+        Kmr = self._parameters["Kmr"]
+        MaxSR = self._parameters["MaxSR"]
+        MinSR = self._parameters["MinSR"]
+        Q10SRCaP = self._parameters["Q10SRCaP"]
+        Vmax_SRCaP = self._parameters["Vmax_SRCaP"]
+        ec50SR = self._parameters["ec50SR"]
+        hillSRCaP = self._parameters["hillSRCaP"]
+        kiCa = self._parameters["kiCa"]
+        kim = self._parameters["kim"]
+        koCa = self._parameters["koCa"]
+        kom = self._parameters["kom"]
+        ks = self._parameters["ks"]
+        Bmax_Naj = self._parameters["Bmax_Naj"]
+        Bmax_Nasl = self._parameters["Bmax_Nasl"]
+        koff_na = self._parameters["koff_na"]
+        kon_na = self._parameters["kon_na"]
+        Bmax_CaM = self._parameters["Bmax_CaM"]
+        Bmax_SR = self._parameters["Bmax_SR"]
+        Bmax_TnChigh = self._parameters["Bmax_TnChigh"]
+        Bmax_TnClow = self._parameters["Bmax_TnClow"]
+        Bmax_myosin = self._parameters["Bmax_myosin"]
+        koff_cam = self._parameters["koff_cam"]
+        koff_myoca = self._parameters["koff_myoca"]
+        koff_myomg = self._parameters["koff_myomg"]
+        koff_sr = self._parameters["koff_sr"]
+        koff_tnchca = self._parameters["koff_tnchca"]
+        koff_tnchmg = self._parameters["koff_tnchmg"]
+        koff_tncl = self._parameters["koff_tncl"]
+        kon_cam = self._parameters["kon_cam"]
+        kon_myoca = self._parameters["kon_myoca"]
+        kon_myomg = self._parameters["kon_myomg"]
+        kon_sr = self._parameters["kon_sr"]
+        kon_tnchca = self._parameters["kon_tnchca"]
+        kon_tnchmg = self._parameters["kon_tnchmg"]
+        kon_tncl = self._parameters["kon_tncl"]
+        Bmax_SLhighj0 = self._parameters["Bmax_SLhighj0"]
+        Bmax_SLhighsl0 = self._parameters["Bmax_SLhighsl0"]
+        Bmax_SLlowj0 = self._parameters["Bmax_SLlowj0"]
+        Bmax_SLlowsl0 = self._parameters["Bmax_SLlowsl0"]
+        koff_slh = self._parameters["koff_slh"]
+        koff_sll = self._parameters["koff_sll"]
+        kon_slh = self._parameters["kon_slh"]
+        kon_sll = self._parameters["kon_sll"]
+        Bmax_Csqn0 = self._parameters["Bmax_Csqn0"]
+        J_ca_juncsl = self._parameters["J_ca_juncsl"]
+        J_ca_slmyo = self._parameters["J_ca_slmyo"]
+        koff_csqn = self._parameters["koff_csqn"]
+        kon_csqn = self._parameters["kon_csqn"]
+        J_na_juncsl = self._parameters["J_na_juncsl"]
+        J_na_slmyo = self._parameters["J_na_slmyo"]
         Nao = self._parameters["Nao"]
         Ko = self._parameters["Ko"]
         Cao = self._parameters["Cao"]
         Cli = self._parameters["Cli"]
         Clo = self._parameters["Clo"]
+        Mgi = self._parameters["Mgi"]
+        Cmem = self._parameters["Cmem"]
         Frdy = self._parameters["Frdy"]
         R = self._parameters["R"]
         Temp = self._parameters["Temp"]
 
         # Init return args
         current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*38
 
-        # Expressions for the Geometry component
-        Fsl = 1 - Fjunc
-        Fsl_CaL = 1 - Fjunc_CaL
-
-        # Expressions for the Reversal potentials component
-        FoRT = Frdy/(R*Temp)
-        ena_junc = ufl.ln(Nao/Na_j)/FoRT
-        ena_sl = ufl.ln(Nao/Na_sl)/FoRT
-        ek = ufl.ln(Ko/K_i)/FoRT
-        eca_junc = ufl.ln(Cao/Ca_j)/(2*FoRT)
-        eca_sl = ufl.ln(Cao/Ca_sl)/(2*FoRT)
-        ecl = ufl.ln(Cli/Clo)/FoRT
-        Qpow = -31 + Temp/10
-
-        # Expressions for the I_Na component
-        I_Na_junc = Fjunc*GNa*(m*m*m)*(-ena_junc + V_m)*h*j
-        I_Na_sl = GNa*(m*m*m)*(-ena_sl + V_m)*Fsl*h*j
-
-        # Expressions for the I_NaBK component
-        I_nabk_junc = Fjunc*GNaB*(-ena_junc + V_m)
-        I_nabk_sl = GNaB*(-ena_sl + V_m)*Fsl
-
-        # Expressions for the I_NaK component
-        sigma = -1/7 + ufl.exp(0.0148588410104*Nao)/7
-        fnak = 1.0/(1 + 0.1245*ufl.exp(-0.1*FoRT*V_m) +\
-            0.0365*ufl.exp(-FoRT*V_m)*sigma)
-        I_nak_junc = Fjunc*IbarNaK*Ko*fnak/((1 + ufl.elem_pow(KmNaip,\
-            4)/ufl.elem_pow(Na_j, 4))*(KmKo + Ko))
-        I_nak_sl = IbarNaK*Ko*Fsl*fnak/((1 + ufl.elem_pow(KmNaip,\
-            4)/ufl.elem_pow(Na_sl, 4))*(KmKo + Ko))
-        I_nak = I_nak_junc + I_nak_sl
-
-        # Expressions for the I_Kr component
-        gkr = 0.0150616019019*ufl.sqrt(Ko)
-        rkr = 1.0/(1 + ufl.exp(37/12 + V_m/24))
-        I_kr = (-ek + V_m)*gkr*rkr*x_kr
-
-        # Expressions for the I_Kp component
-        kp_kp = 1.0/(1 + 1786.47556538*ufl.exp(-0.167224080268*V_m))
-        I_kp_junc = Fjunc*gkp*(-ek + V_m)*kp_kp
-        I_kp_sl = gkp*(-ek + V_m)*Fsl*kp_kp
-        I_kp = I_kp_sl + I_kp_junc
-
-        # Expressions for the I_Ks component
-        eks = ufl.ln((Nao*pNaK + Ko)/(pNaK*Na_i + K_i))/FoRT
-        gks_junc = 0.0035
-        gks_sl = 0.0035
-        I_ks_junc = Fjunc*gks_junc*(x_ks*x_ks)*(-eks + V_m)
-        I_ks_sl = gks_sl*(x_ks*x_ks)*(-eks + V_m)*Fsl
-        I_ks = I_ks_sl + I_ks_junc
-
-        # Expressions for the I_to component
-        GtoSlow = ufl.conditional(ufl.eq(epi, 1), 0.0156, 0.037596)
-        GtoFast = ufl.conditional(ufl.eq(epi, 1), 0.1144, 0.001404)
-        I_tos = (-ek + V_m)*GtoSlow*x_to_s*y_to_s
-        I_tof = (-ek + V_m)*GtoFast*x_to_f*y_to_f
-        I_to = I_tos + I_tof
-
-        # Expressions for the I_Ki component
-        aki = 1.02/(1 + 7.35454251046e-07*ufl.exp(0.2385*V_m - 0.2385*ek))
-        bki = (0.762624006506*ufl.exp(0.08032*V_m - 0.08032*ek) +\
-            1.15340563519e-16*ufl.exp(0.06175*V_m - 0.06175*ek))/(1 +\
-            0.0867722941577*ufl.exp(-0.5143*V_m + 0.5143*ek))
-        kiss = aki/(aki + bki)
-        I_ki = 0.150616019019*ufl.sqrt(Ko)*(-ek + V_m)*kiss
-
-        # Expressions for the I_ClCa component
-        I_ClCa_junc = Fjunc*GClCa*(-ecl + V_m)/(1 + KdClCa/Ca_j)
-        I_ClCa_sl = GClCa*(-ecl + V_m)*Fsl/(1 + KdClCa/Ca_sl)
-        I_ClCa = I_ClCa_sl + I_ClCa_junc
-        I_Clbk = GClB*(-ecl + V_m)
-
-        # Expressions for the I_Ca component
-        fcaCaMSL = 0
-        fcaCaj = 0
-        ibarca_j = 4*Frdy*pCa*(-0.341*Cao +\
-            0.341*Ca_j*ufl.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
-            ufl.exp(2*FoRT*V_m))
-        ibarca_sl = 4*Frdy*pCa*(-0.341*Cao +\
-            0.341*Ca_sl*ufl.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
-            ufl.exp(2*FoRT*V_m))
-        ibark = Frdy*pK*(-0.75*Ko + 0.75*K_i*ufl.exp(FoRT*V_m))*FoRT*V_m/(-1 +\
-            ufl.exp(FoRT*V_m))
-        ibarna_j = Frdy*pNa*(-0.75*Nao +\
-            0.75*Na_j*ufl.exp(FoRT*V_m))*FoRT*V_m/(-1 + ufl.exp(FoRT*V_m))
-        ibarna_sl = Frdy*pNa*(0.75*Na_sl*ufl.exp(FoRT*V_m) -\
-            0.75*Nao)*FoRT*V_m/(-1 + ufl.exp(FoRT*V_m))
-        I_Ca_junc = 0.45*Fjunc_CaL*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bj +\
-            fcaCaj)*d*f*ibarca_j
-        I_Ca_sl = 0.45*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bsl +\
-            fcaCaMSL)*Fsl_CaL*d*f*ibarca_sl
-        I_CaK = 0.45*ufl.elem_pow(Q10CaL, Qpow)*(Fjunc_CaL*(1 - f_Ca_Bj +\
-            fcaCaj) + (1 - f_Ca_Bsl + fcaCaMSL)*Fsl_CaL)*d*f*ibark
-        I_CaNa_junc = 0.45*Fjunc_CaL*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bj\
-            + fcaCaj)*d*f*ibarna_j
-        I_CaNa_sl = 0.45*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bsl +\
-            fcaCaMSL)*Fsl_CaL*d*f*ibarna_sl
-
-        # Expressions for the I_NCX component
-        Ka_junc = 1.0/(1 + (Kdact*Kdact)/(Ca_j*Ca_j))
-        Ka_sl = 1.0/(1 + (Kdact*Kdact)/(Ca_sl*Ca_sl))
-        s1_junc = Cao*(Na_j*Na_j*Na_j)*ufl.exp(nu*FoRT*V_m)
-        s1_sl = Cao*(Na_sl*Na_sl*Na_sl)*ufl.exp(nu*FoRT*V_m)
-        s2_junc = (Nao*Nao*Nao)*Ca_j*ufl.exp((-1 + nu)*FoRT*V_m)
-        s3_junc = KmCao*(Na_j*Na_j*Na_j) + (Nao*Nao*Nao)*Ca_j +\
-            Cao*(Na_j*Na_j*Na_j) + KmCai*(Nao*Nao*Nao)*(1 +\
-            (Na_j*Na_j*Na_j)/(KmNai*KmNai*KmNai)) + (KmNao*KmNao*KmNao)*(1 +\
-            Ca_j/KmCai)*Ca_j
-        s2_sl = (Nao*Nao*Nao)*Ca_sl*ufl.exp((-1 + nu)*FoRT*V_m)
-        s3_sl = KmCai*(Nao*Nao*Nao)*(1 +\
-            (Na_sl*Na_sl*Na_sl)/(KmNai*KmNai*KmNai)) + (Nao*Nao*Nao)*Ca_sl +\
-            (KmNao*KmNao*KmNao)*(1 + Ca_sl/KmCai)*Ca_sl +\
-            Cao*(Na_sl*Na_sl*Na_sl) + KmCao*(Na_sl*Na_sl*Na_sl)
-        I_ncx_junc = Fjunc*IbarNCX*ufl.elem_pow(Q10NCX, Qpow)*(-s2_junc +\
-            s1_junc)*Ka_junc/((1 + ksat*ufl.exp((-1 + nu)*FoRT*V_m))*s3_junc)
-        I_ncx_sl = IbarNCX*ufl.elem_pow(Q10NCX, Qpow)*(-s2_sl +\
-            s1_sl)*Fsl*Ka_sl/((1 + ksat*ufl.exp((-1 + nu)*FoRT*V_m))*s3_sl)
-
-        # Expressions for the I_PCa component
-        I_pca_junc = Fjunc*IbarSLCaP*ufl.elem_pow(Q10SLCaP,\
-            Qpow)*ufl.elem_pow(Ca_j, 1.6)/(ufl.elem_pow(Ca_j, 1.6) +\
-            ufl.elem_pow(KmPCa, 1.6))
-        I_pca_sl = IbarSLCaP*ufl.elem_pow(Q10SLCaP, Qpow)*ufl.elem_pow(Ca_sl,\
-            1.6)*Fsl/(ufl.elem_pow(Ca_sl, 1.6) + ufl.elem_pow(KmPCa, 1.6))
-
-        # Expressions for the I_CaBK component
-        I_cabk_junc = Fjunc*GCaB*(-eca_junc + V_m)
-        I_cabk_sl = GCaB*(-eca_sl + V_m)*Fsl
-
-        # Expressions for the Na Concentrations component
-        I_Na_tot_junc = 3*I_nak_junc + 3*I_ncx_junc + I_CaNa_junc + I_Na_junc\
-            + I_nabk_junc
-        I_Na_tot_sl = I_Na_sl + I_nabk_sl + 3*I_nak_sl + I_CaNa_sl + 3*I_ncx_sl
-
-        # Expressions for the K Concentration component
-        I_K_tot = -2*I_nak + I_ks + I_CaK + I_kr + I_kp + I_ki + I_to
-
-        # Expressions for the Ca Concentrations component
-        I_Ca_tot_junc = I_pca_junc + I_cabk_junc + I_Ca_junc - 2*I_ncx_junc
-        I_Ca_tot_sl = -2*I_ncx_sl + I_pca_sl + I_cabk_sl + I_Ca_sl
+        # Parameter-only expressions
+        cse_0 = 1.0/Frdy
+        cse_1 = R*Temp*cse_0
+        cse_3 = R*Temp*cse_0/2
+        cse_8 = 1 - Fjunc
+        cse_13 = -31 + Temp/10
+        cse_14 = Q10SLCaP**cse_13
+        cse_15 = IbarSLCaP*cse_14
+        cse_17 = KmPCa**1.6
+        cse_29 = 1.0/(KmKo + Ko)
+        cse_30 = (KmNaip*KmNaip*KmNaip*KmNaip)
+        cse_33 = 1.0/R
+        cse_34 = 1.0/Temp
+        cse_35 = Frdy*cse_33*cse_34
+        cse_41 = (Frdy*Frdy)
+        cse_43 = Q10CaL**cse_13
+        cse_44 = -0.75*Nao
+        cse_49 = -0.341*Cao
+        cse_52 = 1 - Fjunc_CaL
+        cse_57 = Q10NCX**cse_13
+        cse_58 = (Kdact*Kdact)
+        cse_66 = (Nao*Nao*Nao)
+        cse_69 = (KmNao*KmNao*KmNao)
+        cse_70 = 1.0/KmCai
+        cse_71 = KmCai*cse_66
+        cse_72 = 1.0/(KmNai*KmNai*KmNai)
+        cse_131 = 1.0/ufl.pi
+        cse_132 = 1.0/cellLength
+        cse_133 = 1.0/(cellRadius*cellRadius)
+        cse_134 = J_na_slmyo*cse_131*cse_132*cse_133
+        cse_135 = J_na_juncsl*cse_131*cse_132*cse_133
+        cse_136 = Cmem*cse_131*cse_0*cse_132*cse_133
+        cse_138 = J_ca_slmyo*cse_131*cse_132*cse_133
+        cse_139 = J_ca_juncsl*cse_131*cse_132*cse_133
+        _p0 = -cse_1*ufl.ln(Cli/Clo)
+        _p1 = -cse_3
+        _p2 = -cse_1
+        _p3 = Ko + Nao*pNaK
+        _p4 = (ufl.sqrt(Ko))
+        _p5 = -cse_35
+        _p6 = -0.005214285714285714 +\
+            0.005214285714285714*ufl.exp(0.01485884101040119*Nao)
+        _p7 = cse_33*cse_34*cse_41*cse_43*cse_52
+        _p8 = -1 + nu
+        _p9 = -Fjunc
+        _p10 = -GClB
+        _p11 = -GNaB
+        _p12 = -cse_8
+        _p13 = -Fjunc*GCaB
+        _p14 = -GCaB*cse_8
+        _p15 = -Fjunc*cse_15
+        _p16 = -ufl.conditional(ufl.eq(epi, 1), 0.1144, 0.0014039999999999999)
+        _p17 = -ufl.conditional(ufl.eq(epi, 1), 0.0156, 0.037596)
+        _p18 = -cse_15*cse_8
+        _p19 = -0.45*pNa
+        _p20 = -1.8*pCa
+        _p21 = -Fjunc*IbarNaK*Ko*cse_29
+        _p22 = -IbarNaK*Ko*cse_29*cse_8
+        _p23 = -Fjunc*IbarNCX*cse_57
+        _p24 = -IbarNCX*cse_57*cse_8
+        _p25 = -0.75*Ko
+        _p26 = -0.45*pK*cse_33*cse_34*cse_41*cse_43
+        _p27 = -0.45*Fjunc_CaL*pNa*cse_33*cse_34*cse_41*cse_43
+        _p28 = -1.8*Fjunc_CaL*pCa*cse_33*cse_34*cse_41*cse_43
+        _p29 = MinSR - MaxSR
+        _p30 = -kom
+        _p31 = Mgi*kon_myomg
+        _p32 = Mgi*kon_tnchmg
+        _p33 = 1205.9369202226344*Bmax_SLhighj0
+        _p34 = 32.50000000000001*Bmax_SLhighsl0
+        _p35 = 1205.9369202226344*Bmax_SLlowj0
+        _p36 = 32.50000000000001*Bmax_SLlowsl0
+        _p37 = 18.57142857142857*Bmax_Csqn0
+        _p38 = 1.0/Kmf
+        _p39 = 1.0/Kmr
+        _p40 = Vmax_SRCaP*Q10SRCaP**cse_13
+        _p41 = 1.8552875695732833e+18*Fjunc*GNaB
+        _p42 = 5.565862708719849e+18*Fjunc*IbarNaK*Ko*cse_29
+        _p43 = 1.8552875695732833e+18*Fjunc*GNa
+        _p44 = 5.565862708719849e+18*Fjunc*IbarNCX*cse_57
+        _p45 = 8.348794063079775e+17*Fjunc_CaL*pNa*cse_33*cse_34*cse_41*cse_43
+        _p46 = -cse_136
+        _p47 = 5e+16*GNaB*cse_8
+        _p48 = 5e+16*GNa*cse_8
+        _p49 = 1.5e+17*IbarNaK*Ko*cse_29*cse_8
+        _p50 = 1.5e+17*IbarNCX*cse_57*cse_8
+        _p51 = 2.25e+16*pNa*cse_33*cse_34*cse_41*cse_43*cse_52
+        _p52 = 9.276437847866417e+17*Fjunc*GCaB
+        _p53 = 9.276437847866417e+17*Fjunc*IbarSLCaP*cse_14
+        _p54 = -1.8552875695732833e+18*Fjunc*IbarNCX*cse_57
+        _p55 = 1.669758812615955e+18*Fjunc_CaL*pCa*cse_33*cse_34*cse_41*cse_43
+        _p56 = 2.5e+16*GCaB*cse_8
+        _p57 = 2.5e+16*IbarSLCaP*cse_14*cse_8
+        _p58 = -5e+16*IbarNCX*cse_57*cse_8
+        _p59 = 4.5e+16*pCa*cse_33*cse_34*cse_41*cse_43*cse_52
 
-        # Expressions for the Membrane potential component
-        i_Stim = 0
-        I_Na_tot = I_Na_tot_junc + I_Na_tot_sl
-        I_Cl_tot = I_Clbk + I_ClCa
-        I_Ca_tot = I_Ca_tot_junc + I_Ca_tot_sl
-        I_tot = I_Na_tot + I_K_tot + I_Cl_tot + I_Ca_tot
-        current[0] = -I_tot - i_Stim
+        # Expressions depending on the states
+        cse_2 = _p0 + V_m
+        cse_4 = 1.0/Ca_j
+        cse_5 = _p1*ufl.ln(Cao*cse_4) + V_m
+        cse_6 = _p2*ufl.ln(Nao/Na_j) + V_m
+        cse_7 = Fjunc*cse_6
+        cse_9 = 1.0/Ca_sl
+        cse_10 = _p1*ufl.ln(Cao*cse_9) + V_m
+        cse_11 = _p2*ufl.ln(Nao/Na_sl) + V_m
+        cse_12 = cse_11*cse_8
+        cse_16 = ufl.elem_pow(Ca_j, 1.6)
+        cse_18 = 1.0/(cse_16 + cse_17)
+        cse_19 = ufl.elem_pow(Ca_sl, 1.6)
+        cse_20 = 1.0/(cse_17 + cse_19)
+        F_expressions[2] = (1.0/((1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V_m))*(1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V_m))) -\
+            m)/(0.1292*ufl.exp(-((2.9465894465894467 +\
+            0.06435006435006435*V_m)*(2.9465894465894467 +\
+            0.06435006435006435*V_m))) +\
+            0.06487*ufl.exp(-((-0.09434663536776214 +\
+            0.019561815336463225*V_m)*(-0.09434663536776214 +\
+            0.019561815336463225*V_m))))
+        cse_21 = (m*m*m)
+        cse_22 = GNa*cse_21*h*j
+        cse_23 = GClCa*cse_2
+        cse_24 = cse_1*ufl.ln(Ko/K_i)
+        cse_25 = -cse_24 + V_m
+        cse_26 = gkp*cse_25/(1 +\
+            1786.4755653786237*ufl.exp(-0.16722408026755853*V_m))
+        F_expressions[4] = (0.00100999899000101 +\
+            0.0008499549630018197*ufl.exp(-0.0708215297450425*V_m))*(1.0/(1 +\
+            0.7659283383646487*ufl.exp(-0.07017543859649122*V_m)) - x_ks)
+        cse_27 = 0.0035*(x_ks*x_ks)*(_p2*ufl.ln(_p3/(pNaK*Na_i + K_i)) + V_m)
+        cse_28 = _p4*cse_25
+        cse_31 = 1.0/(1 + cse_30/(Na_j*Na_j*Na_j*Na_j))
+        cse_32 = 0.1*V_m
+        cse_36 = V_m*cse_35
+        cse_37 = 1.0/(1 + 0.1245*ufl.exp(_p5*cse_32) + _p6*ufl.exp(-cse_36))
+        cse_38 = 1.0/(1 + cse_30/(Na_sl*Na_sl*Na_sl*Na_sl))
+        cse_39 = ufl.exp(cse_36)
+        cse_40 = 1.0/(-1 + cse_39)
+        cse_42 = 1 - f_Ca_Bj
+        F_expressions[11] = -0.0119*f_Ca_Bj + 1.7*Ca_j*cse_42
+        cse_45 = 0.75*cse_39
+        cse_46 = Na_j*cse_45 + cse_44
+        cse_47 = ufl.exp(2*cse_36)
+        cse_48 = 1.0/(-1 + cse_47)
+        cse_50 = 0.341*cse_47
+        cse_51 = Ca_j*cse_50 + cse_49
+        cse_53 = 1 - f_Ca_Bsl
+        F_expressions[12] = -0.0119*f_Ca_Bsl + 1.7*Ca_sl*cse_53
+        cse_54 = _p7*V_m*cse_53*d*f
+        cse_55 = Na_sl*cse_45 + cse_44
+        cse_56 = Ca_sl*cse_50 + cse_49
+        cse_59 = (Ca_j*Ca_j)
+        cse_60 = 1.0/(1 + cse_58/cse_59)
+        cse_61 = ufl.exp(_p8*cse_36)
+        cse_62 = 1.0/(1 + ksat*cse_61)
+        cse_63 = (Na_j*Na_j*Na_j)
+        cse_64 = Cao*cse_63
+        cse_65 = ufl.exp(nu*cse_36)
+        cse_67 = Ca_j*cse_66
+        cse_68 = cse_64*cse_65 - cse_61*cse_67
+        cse_73 = 1.0/(KmCao*cse_63 + (1 + cse_63*cse_72)*cse_71 + (1 +\
+            Ca_j*cse_70)*Ca_j*cse_69 + cse_64 + cse_67)
+        cse_74 = 1.0/(1 + cse_58/(Ca_sl*Ca_sl))
+        cse_75 = (Na_sl*Na_sl*Na_sl)
+        cse_76 = Cao*cse_75
+        cse_77 = Ca_sl*cse_66
+        cse_78 = cse_65*cse_76 - cse_61*cse_77
+        cse_79 = 1.0/(KmCao*cse_75 + (1 + cse_72*cse_75)*cse_71 + (1 +\
+            Ca_sl*cse_70)*Ca_sl*cse_69 + cse_76 + cse_77)
+        cse_80 = 1.0/(1 + 7.35454251046446e-07*ufl.exp(0.2385*V_m -\
+            0.2385*cse_24))
+        current[0] = _p10*cse_2 + _p11*cse_12 + _p11*cse_7 + _p12*cse_26 +\
+            _p12*cse_27 + _p13*cse_5 + _p14*cse_10 + _p9*cse_26 + _p9*cse_27 -\
+            cse_12*cse_22 - cse_22*cse_7 + _p12*cse_23/(1 + KdClCa*cse_9) +\
+            _p15*cse_16*cse_18 + _p18*cse_19*cse_20 + _p21*cse_31*cse_37 +\
+            _p22*cse_37*cse_38 + _p9*cse_23/(1 + KdClCa*cse_4) -\
+            0.015061601901917732*cse_28*x_kr/(1 + ufl.exp(37/12 + V_m/24)) -\
+            0.15362833939956086*cse_28*cse_80/(1.02*cse_80 +\
+            (0.7626240065063081*ufl.exp(0.08032*V_m - 0.08032*cse_24) +\
+            1.1534056351865558e-16*ufl.exp(0.06175*V_m - 0.06175*cse_24))/(1 +\
+            0.08677229415769332*ufl.exp(0.5143*cse_24 - 0.5143*V_m))) +\
+            _p16*cse_25*x_to_f*y_to_f + _p17*cse_25*x_to_s*y_to_s +\
+            _p19*cse_40*cse_54*cse_55 + _p20*cse_48*cse_54*cse_56 +\
+            _p23*cse_60*cse_62*cse_68*cse_73 +\
+            _p24*cse_62*cse_74*cse_78*cse_79 + _p26*(_p25 +\
+            K_i*cse_45)*(Fjunc_CaL*cse_42 + cse_52*cse_53)*V_m*cse_40*d*f +\
+            _p27*V_m*cse_40*cse_42*cse_46*d*f +\
+            _p28*V_m*cse_42*cse_48*cse_51*d*f
+        cse_81 = 1.0/((1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V_m))*(1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V_m)))
+        F_expressions[0] = (-h + cse_81)*(ufl.conditional(ufl.ge(V_m, -40),\
+            0, 4.4312679295805147e-07*ufl.exp(-0.14705882352941177*V_m)) +\
+            ufl.conditional(ufl.ge(V_m, -40), 0.77/(0.13 +\
+            0.049758141083938695*ufl.exp(-0.0900900900900901*V_m)),\
+            310000.0*ufl.exp(0.3485*V_m) + 2.7*ufl.exp(0.079*V_m)))
+        F_expressions[1] = (-j + cse_81)*(ufl.conditional(ufl.ge(V_m, -40),\
+            0, (37.78 + V_m)*(-25428.0*ufl.exp(0.2444*V_m) -\
+            6.948e-06*ufl.exp(-0.04391*V_m))/(1 +\
+            50262745825.95399*ufl.exp(0.311*V_m))) +\
+            ufl.conditional(ufl.ge(V_m, -40), 0.6*ufl.exp(0.057*V_m)/(1 +\
+            0.040762203978366204*ufl.exp(-cse_32)),\
+            0.02424*ufl.exp(-0.01052*V_m)/(1 +\
+            0.003960868339904256*ufl.exp(-0.1378*V_m))))
+        cse_82 = V_m/5
+        cse_83 = V_m/20
+        cse_84 = V_m/9
+        F_expressions[3] = (1.0/(1 + ufl.exp(-2 - cse_82)) - x_kr)/(230/(1 +\
+            ufl.exp(2 + cse_83)) + 3300/((1 + ufl.exp(-22/9 - cse_84))*(1 +\
+            ufl.exp(11/9 + cse_84))))
+        F_expressions[10] = (0.02 + 0.0197*ufl.exp(-((0.48865000000000003 +\
+            0.0337*V_m)*(0.48865000000000003 + 0.0337*V_m))))*(1.0/(1 +\
+            ufl.exp(35/9 + cse_84)) - f + 0.6/(1 + ufl.exp(5/2 - cse_83)))
+        cse_85 = 1.0/(1 + ufl.exp(19/13 - V_m/13))
+        F_expressions[5] = (-x_to_f + cse_85)/(0.5 + 8.5*ufl.exp(-((9/10 +\
+            V_m/50)*(9/10 + V_m/50))))
+        F_expressions[6] = (-x_to_s + cse_85)/(0.5 + 9/(1 + ufl.exp(1/5 +\
+            V_m/15)))
+        cse_86 = 1.0/(1 + 49.40244910553019*ufl.exp(cse_82))
+        F_expressions[7] = (-y_to_f + cse_86)/(7 + 85*ufl.exp(-((40 +\
+            V_m)*(40 + V_m))/220))
+        F_expressions[8] = (-y_to_s + cse_86)/(30 + 800/(1 + ufl.exp(6 +\
+            V_m/10)))
+        cse_87 = ufl.exp(-5/6 - V_m/6)
+        cse_88 = 1 + cse_87
+        F_expressions[9] = (0.17500000000000002 + 0.035*V_m)*(1.0/cse_88 -\
+            d)*cse_88/(1 - cse_87)
+        cse_89 = kim*Ry_Ri
+        cse_90 = MaxSR + _p29/(1 +\
+            ((ec50SR/Ca_sr)*(ec50SR/Ca_sr)*ufl.sqrt(ec50SR/Ca_sr)))
+        cse_91 = kiCa*Ca_j*cse_90
+        cse_92 = Ry_Ro*cse_91
+        cse_93 = 1 - Ry_Ri - Ry_Ro - Ry_Rr
+        cse_94 = koCa*cse_59/cse_90
+        F_expressions[13] = -cse_89 + _p30*Ry_Ri + cse_93*cse_94 + cse_92
+        cse_95 = kom*Ry_Ro
+        cse_96 = Ry_Rr*cse_94
+        F_expressions[14] = -cse_92 - cse_95 + cse_89 + cse_96
+        F_expressions[15] = -cse_96 + kim*cse_93 - Ry_Rr*cse_91 + cse_95
+        cse_97 = koff_na*Na_Bj
+        cse_98 = kon_na*(Bmax_Naj - Na_Bj)*Na_j
+        F_expressions[16] = -cse_97 + cse_98
+        cse_99 = koff_na*Na_Bsl
+        cse_100 = kon_na*(Bmax_Nasl - Na_Bsl)*Na_sl
+        F_expressions[17] = -cse_99 + cse_100
+        cse_101 = koff_cam*CaM
+        cse_102 = kon_cam*(Bmax_CaM - CaM)*Ca_i
+        F_expressions[18] = -cse_101 + cse_102
+        cse_103 = koff_myoca*Myo_c
+        cse_104 = Bmax_myosin - Myo_c - Myo_m
+        cse_105 = kon_myoca*Ca_i*cse_104
+        F_expressions[19] = -cse_103 + cse_105
+        cse_106 = koff_myomg*Myo_m
+        cse_107 = _p31*cse_104
+        F_expressions[20] = -cse_106 + cse_107
+        cse_108 = koff_sr*SRB
+        cse_109 = kon_sr*(Bmax_SR - SRB)*Ca_i
+        F_expressions[21] = -cse_108 + cse_109
+        cse_110 = koff_tnchca*Tn_CHc
+        cse_111 = Bmax_TnChigh - Tn_CHc - Tn_CHm
+        cse_112 = kon_tnchca*Ca_i*cse_111
+        F_expressions[22] = -cse_110 + cse_112
+        cse_113 = koff_tnchmg*Tn_CHm
+        cse_114 = _p32*cse_111
+        F_expressions[23] = -cse_113 + cse_114
+        cse_115 = koff_tncl*Tn_CL
+        cse_116 = kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i
+        F_expressions[24] = -cse_115 + cse_116
+        cse_117 = koff_slh*SLH_j
+        cse_118 = kon_slh*(_p33 - SLH_j)*Ca_j
+        F_expressions[25] = -cse_117 + cse_118
+        cse_119 = koff_slh*SLH_sl
+        cse_120 = kon_slh*(_p34 - SLH_sl)*Ca_sl
+        F_expressions[26] = -cse_119 + cse_120
+        cse_121 = koff_sll*SLL_j
+        cse_122 = kon_sll*(_p35 - SLL_j)*Ca_j
+        F_expressions[27] = -cse_121 + cse_122
+        cse_123 = koff_sll*SLL_sl
+        cse_124 = kon_sll*(_p36 - SLL_sl)*Ca_sl
+        F_expressions[28] = -cse_123 + cse_124
+        cse_125 = koff_csqn*Csqn_b
+        cse_126 = ks*(-Ca_j + Ca_sr)*Ry_Ro
+        cse_127 = kon_csqn*(_p37 - Csqn_b)*Ca_sr
+        F_expressions[30] = -cse_125 + cse_127
+        cse_128 = ufl.elem_pow(_p38*Ca_i, hillSRCaP)
+        cse_129 = ufl.elem_pow(_p39*Ca_sr, hillSRCaP)
+        cse_130 = _p40*(-cse_129 + cse_128)/(1 + cse_128 + cse_129)
+        F_expressions[29] = -cse_126 - cse_127 + 9.931999999999999e-05*Ca_j -\
+            9.931999999999999e-05*Ca_sr + cse_125 + cse_130
+        F_expressions[31] = (1538461538461538.2*Na_sl -\
+            1538461538461538.2*Na_i)*cse_134
+        F_expressions[32] = -cse_98 + _p46*(_p41*cse_6 + _p42*cse_31*cse_37 +\
+            _p43*cse_21*cse_6*h*j + _p44*cse_60*cse_62*cse_68*cse_73 +\
+            _p45*V_m*cse_40*cse_42*cse_46*d*f) +\
+            (1.8552875695732833e+18*Na_sl -\
+            1.8552875695732833e+18*Na_j)*cse_135 + cse_97
+        cse_137 = -5e+16*Na_sl
+        F_expressions[33] = -cse_100 + _p46*(_p47*cse_11 + _p49*cse_37*cse_38 +\
+            _p48*cse_11*cse_21*h*j + _p50*cse_62*cse_74*cse_78*cse_79 +\
+            _p51*V_m*cse_40*cse_53*cse_55*d*f) + (5e+16*Na_i +\
+            cse_137)*cse_134 + (5e+16*Na_j + cse_137)*cse_135 + cse_99
+        F_expressions[35] = -cse_102 - cse_105 - cse_107 - cse_109 - cse_112 -\
+            cse_114 - cse_116 - 0.05384615384615385*cse_130 +\
+            (1538461538461538.2*Ca_sl - 1538461538461538.2*Ca_i)*cse_138 +\
+            cse_101 + cse_103 + cse_106 + cse_108 + cse_110 + cse_113 +\
+            cse_115
+        F_expressions[36] = -cse_118 - cse_122 + 0.006449350649350649*Ca_sr +\
+            64.93506493506493*cse_126 - 0.006449350649350649*Ca_j +\
+            _p46*(_p52*cse_5 + _p53*cse_16*cse_18 +\
+            _p54*cse_60*cse_62*cse_68*cse_73 +\
+            _p55*V_m*cse_42*cse_48*cse_51*d*f) +\
+            (1.8552875695732833e+18*Ca_sl -\
+            1.8552875695732833e+18*Ca_j)*cse_139 + cse_117 + cse_121
+        cse_140 = -5e+16*Ca_sl
+        F_expressions[37] = -cse_120 - cse_124 + _p46*(_p56*cse_10 +\
+            _p57*cse_19*cse_20 + _p58*cse_62*cse_74*cse_78*cse_79 +\
+            _p59*V_m*cse_48*cse_53*cse_56*d*f) + (5e+16*Ca_i +\
+            cse_140)*cse_138 + (5e+16*Ca_j + cse_140)*cse_139 + cse_119 +\
+            cse_123
 
         # Return results
-        return current[0]
-
-    def I(self, v, s, time=None):
-        """
-        Transmembrane current
-
-           I = -dV/dt
+        return current[0], dolfin.as_vector(F_expressions)
 
+    def jacobian(self, v, s, time=None):
         """
-        return -self._I(v, s, time)
-
-    def F(self, v, s, time=None):
-        """
-        Right hand side for ODE system
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
         """
         time = time if time else Constant(0.0)
 
@@ -421,8 +672,15 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         IbarNaK = self._parameters["IbarNaK"]
         KmKo = self._parameters["KmKo"]
         KmNaip = self._parameters["KmNaip"]
+        gkp = self._parameters["gkp"]
+        pNaK = self._parameters["pNaK"]
+        epi = self._parameters["epi"]
+        GClB = self._parameters["GClB"]
+        GClCa = self._parameters["GClCa"]
+        KdClCa = self._parameters["KdClCa"]
         Q10CaL = self._parameters["Q10CaL"]
         pCa = self._parameters["pCa"]
+        pK = self._parameters["pK"]
         pNa = self._parameters["pNa"]
         IbarNCX = self._parameters["IbarNCX"]
         Kdact = self._parameters["Kdact"]
@@ -491,6 +749,8 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         Nao = self._parameters["Nao"]
         Ko = self._parameters["Ko"]
         Cao = self._parameters["Cao"]
+        Cli = self._parameters["Cli"]
+        Clo = self._parameters["Clo"]
         Mgi = self._parameters["Mgi"]
         Cmem = self._parameters["Cmem"]
         Frdy = self._parameters["Frdy"]
@@ -498,54 +758,966 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         Temp = self._parameters["Temp"]
 
         # Init return args
-        F_expressions = [ufl.zero()]*38
+        jacobian = [ufl.zero()]*1521
+
+        # Parameter-only expressions
+        cse_0 = Fjunc*GCaB
+        cse_1 = Fjunc*GNaB
+        cse_4 = 1 - Fjunc
+        cse_5 = GCaB*cse_4
+        cse_6 = GNaB*cse_4
+        cse_21 = (ufl.sqrt(Ko))
+        cse_27 = 1.0/Frdy
+        cse_28 = R*Temp*cse_27
+        cse_35 = 1.0/R
+        cse_36 = 1.0/Temp
+        cse_37 = Frdy*cse_35*cse_36
+        cse_40 = (Frdy*Frdy*Frdy)
+        cse_41 = 1.0/(R*R)
+        cse_42 = 1.0/(Temp*Temp)
+        cse_43 = -31 + Temp/10
+        cse_44 = Q10CaL**cse_43
+        cse_52 = (Frdy*Frdy)
+        cse_53 = -0.75*Nao
+        cse_57 = 1 - Fjunc_CaL
+        cse_61 = -0.6138*Cao
+        cse_78 = -0.341*Cao
+        cse_86 = 1.0/(KmKo + Ko)
+        cse_87 = (KmNaip*KmNaip*KmNaip*KmNaip)
+        cse_110 = Q10NCX**cse_43
+        cse_111 = (Kdact*Kdact)
+        cse_116 = -1 + nu
+        cse_122 = (Nao*Nao*Nao)
+        cse_124 = (KmNao*KmNao*KmNao)
+        cse_125 = 1.0/KmCai
+        cse_128 = KmCai*cse_122
+        cse_129 = 1.0/(KmNai*KmNai*KmNai)
+        cse_132 = Frdy*nu*cse_35*cse_36
+        cse_135 = Frdy*cse_116*cse_35*cse_36
+        cse_154 = IbarNCX*cse_110
+        cse_186 = 0.45*Fjunc_CaL
+        cse_197 = 3*Cao
+        cse_200 = 3*KmCao
+        cse_201 = 3*KmCai*cse_122*cse_129
+        cse_214 = R*Temp*cse_27/2
+        cse_216 = Q10SLCaP**cse_43
+        cse_217 = 1.6*Fjunc*IbarSLCaP*cse_216
+        cse_218 = KmPCa**1.6
+        cse_227 = -cse_122
+        cse_231 = 1.6*IbarSLCaP*cse_216*cse_4
+        cse_320 = -kom
+        cse_321 = -kim
+        cse_322 = MaxSR - MinSR
+        cse_344 = -koff_na
+        cse_354 = Mgi*kon_myomg
+        cse_355 = -cse_354
+        cse_361 = Mgi*kon_tnchmg
+        cse_362 = -cse_361
+        cse_365 = -koff_slh
+        cse_370 = -koff_sll
+        cse_380 = Q10SRCaP**cse_43
+        cse_391 = 1.0/ufl.pi
+        cse_392 = 1.0/cellLength
+        cse_393 = 1.0/(cellRadius*cellRadius)
+        cse_394 = J_na_slmyo*cse_391*cse_392*cse_393
+        cse_395 = 1538461538461538.2*cse_394
+        cse_396 = 1.8552875695732833e+18*Cmem*cse_391*cse_27*cse_392*cse_393
+        cse_400 = J_na_juncsl*cse_391*cse_392*cse_393
+        cse_401 = 1.8552875695732833e+18*cse_400
+        cse_403 = 5e+16*Cmem*cse_391*cse_27*cse_392*cse_393
+        cse_407 = 5e+16*cse_394
+        cse_408 = 5e+16*cse_400
+        cse_412 = J_ca_slmyo*cse_391*cse_392*cse_393
+        cse_413 = 1538461538461538.2*cse_412
+        cse_414 = 9.276437847866417e+17*Cmem*cse_391*cse_27*cse_392*cse_393
+        cse_417 = J_ca_juncsl*cse_391*cse_392*cse_393
+        cse_418 = 1.8552875695732833e+18*cse_417
+        cse_419 = 2.5e+16*Cmem*cse_391*cse_27*cse_392*cse_393
+        cse_421 = 5e+16*cse_412
+        cse_422 = 5e+16*cse_417
+        _p0 = ufl.conditional(ufl.eq(epi, 1), 0.0156, 0.037596)
+        _p1 = ufl.conditional(ufl.eq(epi, 1), 0.1144, 0.0014039999999999999)
+        _p2 = 0.015061601901917732*cse_21
+        _p3 = 298.741733340907*gkp
+        _p4 = 0.3375*Fjunc_CaL*pNa*cse_40*cse_41*cse_42*cse_44
+        _p5 = 1.2276*Fjunc_CaL*pCa*cse_40*cse_41*cse_42*cse_44
+        _p6 = 0.45*Fjunc_CaL*pNa*cse_35*cse_36*cse_44*cse_52
+        _p7 = 0.3375*cse_57
+        _p8 = pNa*cse_40*cse_41*cse_42*cse_44
+        _p9 = Fjunc_CaL*pCa*cse_35*cse_36*cse_44*cse_52
+        _p10 = 1.2276*pCa*cse_40*cse_41*cse_42*cse_44
+        _p11 = cse_35*cse_36*cse_44*cse_52*cse_57
+        _p12 = 0.45*pNa
+        _p13 = 0.3375*pK
+        _p14 = 0.45*pNa*cse_40*cse_41*cse_42*cse_44
+        _p15 = -0.75*Ko
+        _p16 = 0.45*pK
+        _p17 = 3.6*pCa*cse_40*cse_41*cse_42*cse_44
+        _p18 = -cse_37
+        _p19 = -0.005214285714285714 +\
+            0.005214285714285714*ufl.exp(0.01485884101040119*Nao)
+        _p20 = 0.012450000000000001*cse_37
+        _p21 = Fjunc*IbarNaK*Ko*cse_86
+        _p22 = IbarNaK*Ko*cse_4*cse_86
+        _p23 = 0.15362833939956086*cse_21
+        _p24 = -cse_135
+        _p25 = Fjunc*IbarNCX*cse_110
+        _p26 = IbarNCX*cse_110*cse_4
+        _p27 = Fjunc*IbarNCX*ksat*cse_110*cse_135
+        _p28 = Frdy*ksat*cse_116*cse_154*cse_35*cse_36*cse_4
+        _p29 = -Fjunc
+        _p30 = -cse_4
+        _p31 = -Fjunc*GClCa
+        _p32 = -GClCa*cse_4
+        _p33 = -cse_35*cse_36*cse_44*cse_52
+        _p34 = cse_40*cse_41*cse_42*cse_44
+        _p35 = -cse_40*cse_41*cse_42*cse_44
+        _p36 = -GClB - cse_0 - cse_1 - cse_5 - cse_6
+        _p37 = -cse_28
+        _p38 = Fjunc*GNa
+        _p39 = 3*GNa
+        _p40 = Ko + Nao*pNaK
+        _p41 = cse_35*cse_36*cse_44*cse_52
+        _p42 = 0.45*pNa*cse_57
+        _p43 = -Fjunc_CaL*pCa
+        _p44 = -cse_35*cse_36*cse_44*cse_52*cse_57
+        _p45 = -Fjunc_CaL*pCa*cse_35*cse_36*cse_44*cse_52
+        _p46 = pK*cse_35*cse_36*cse_44*cse_52
+        _p47 = pNa*cse_186*cse_35*cse_36*cse_44*cse_52
+        _p48 = 0.45 - cse_186
+        _p49 = pCa*cse_35*cse_36*cse_44*cse_52*cse_57
+        _p50 = 0.45*pNa*cse_35*cse_36*cse_44*cse_52*cse_57
+        _p51 = 0.0035*Fjunc*cse_28
+        _p52 = 0.0035*cse_28*cse_4
+        _p53 = -pNaK
+        _p54 = R*Temp*cse_27
+        _p55 = pNa*cse_35*cse_36*cse_44*cse_52
+        _p56 = 0.3375*Fjunc_CaL
+        _p57 = Fjunc*IbarNaK*Ko*cse_86*cse_87
+        _p58 = -cse_200
+        _p59 = -cse_201
+        _p60 = -Fjunc*IbarNCX*cse_110
+        _p61 = IbarNaK*Ko*cse_4*cse_86*cse_87
+        _p62 = cse_154*cse_4
+        _p63 = -IbarNCX*cse_110*cse_4
+        _p64 = Fjunc*GCaB*cse_214
+        _p65 = -cse_28*ufl.ln(Cli/Clo)
+        _p66 = 0.6138*pCa*cse_35*cse_36*cse_44*cse_52
+        _p67 = Fjunc*IbarNCX*cse_110*cse_122
+        _p68 = Fjunc*IbarNCX*cse_110*cse_111
+        _p69 = -cse_124
+        _p70 = Fjunc*cse_154
+        _p71 = GCaB*cse_214*cse_4
+        _p72 = IbarNCX*cse_110*cse_122*cse_4
+        _p73 = IbarNCX*cse_110*cse_111*cse_4
+        _p74 = kom + cse_321
+        _p75 = -cse_322
+        _p76 = 2.5*kiCa*cse_322
+        _p77 = 2.5*koCa*cse_322
+        _p78 = 2*koCa
+        _p79 = -koff_cam
+        _p80 = -koff_myoca
+        _p81 = -koff_myomg + cse_355
+        _p82 = -koff_sr
+        _p83 = -koff_tnchca
+        _p84 = -koff_tnchmg + cse_362
+        _p85 = -koff_tncl
+        _p86 = 1205.9369202226344*Bmax_SLhighj0
+        _p87 = 32.50000000000001*Bmax_SLhighsl0
+        _p88 = 1205.9369202226344*Bmax_SLlowj0
+        _p89 = 32.50000000000001*Bmax_SLlowsl0
+        _p90 = 18.57142857142857*Bmax_Csqn0
+        _p91 = 1.0/Kmr
+        _p92 = 1.0/Kmf
+        _p93 = Vmax_SRCaP*hillSRCaP*cse_380
+        _p94 = -koff_csqn
+        _p95 =\
+            2.25e+16*Cmem*Frdy*cse_391*pNa*cse_35*cse_36*cse_392*cse_393*cse_44*cse_57
+        _p96 =\
+            4.5e+16*Cmem*Frdy*cse_391*pCa*cse_35*cse_36*cse_392*cse_393*cse_44*cse_57
+        _p97 = -cse_395
+        _p98 = -cse_396
+        _p99 = Cmem*GNa*cse_391*cse_27*cse_392*cse_393
+        _p100 = -5.565862708719849e+18*Fjunc
+        _p101 = -1.5e+17*cse_4
+        _p102 =\
+            8.348794063079775e+17*Cmem*Fjunc_CaL*Frdy*cse_391*pNa*cse_35*cse_36*cse_392*cse_393*cse_44
+        _p103 =\
+            Cmem*Fjunc_CaL*Frdy*cse_391*cse_35*cse_36*cse_392*cse_393*cse_44
+        _p104 = 8.348794063079775e+17*pNa
+        _p105 = 1.669758812615955e+18*pCa
+        _p106 = Cao*Fjunc*IbarNCX*cse_110
+        _p107 = -cse_401
+        _p108 = -cse_403
+        _p109 = Cmem*Frdy*cse_391*cse_35*cse_36*cse_392*cse_393*cse_44
+        _p110 = 2.25e+16*pNa*cse_57
+        _p111 = Cao*IbarNCX*cse_110*cse_4
+        _p112 = -cse_407 - cse_408
+        _p113 = -cse_413
+        _p114 = -cse_414
+        _p115 = 1.669758812615955e+18*Fjunc_CaL*pCa
+        _p116 = -0.006449350649350649 - cse_418
+        _p117 = -cse_419
+        _p118 = 4.5e+16*pCa*cse_57
+        _p119 = -cse_421 - cse_422
+
+        # Expressions depending on the states
+        cse_2 = (x_ks*x_ks)
+        cse_3 = 0.0035*cse_2
+        cse_7 = (m*m*m)
+        cse_8 = GNa*cse_7*h*j
+        cse_9 = Fjunc*cse_8
+        jacobian[480] = -0.0119 - 1.7*Ca_j
+        cse_10 = 1.0/Ca_j
+        cse_11 = 1 + KdClCa*cse_10
+        cse_12 = ufl.exp(-0.16722408026755853*V_m)
+        cse_13 = 1 + 1786.4755653786237*cse_12
+        cse_14 = gkp/cse_13
+        cse_15 = Fjunc*cse_14
+        cse_16 = _p0*x_to_s*y_to_s
+        cse_17 = _p1*x_to_f*y_to_f
+        cse_18 = cse_4*cse_8
+        jacobian[520] = -0.0119 - 1.7*Ca_sl
+        cse_19 = 1.0/Ca_sl
+        cse_20 = 1 + KdClCa*cse_19
+        cse_22 = ufl.exp(37/12 + V_m/24)
+        cse_23 = 1 + cse_22
+        cse_24 = 1.0/cse_23
+        cse_25 = _p2*cse_24*x_kr
+        cse_26 = cse_14*cse_4
+        cse_29 = 1.0/K_i
+        cse_30 = cse_28*ufl.ln(Ko*cse_29)
+        cse_31 = -cse_30 + V_m
+        cse_32 = _p3*cse_12*cse_31/(cse_13*cse_13)
+        cse_33 = cse_21*cse_31
+        jacobian[4] = -0.015061601901917732*cse_24*cse_33
+        jacobian[505] = 1.7 - 1.7*f_Ca_Bj
+        cse_34 = 1 - f_Ca_Bj
+        cse_38 = V_m*cse_37
+        cse_39 = ufl.exp(cse_38)
+        cse_45 = -1 + cse_39
+        cse_46 = 1.0/cse_45
+        cse_47 = _p4*Na_j*V_m*cse_34*cse_39*cse_46*d*f
+        cse_48 = ufl.exp(2*cse_38)
+        cse_49 = -1 + cse_48
+        cse_50 = 1.0/cse_49
+        cse_51 = _p5*Ca_j*V_m*cse_34*cse_48*cse_50*d*f
+        cse_54 = 0.75*cse_39
+        cse_55 = Na_j*cse_54 + cse_53
+        cse_56 = _p6*cse_34*cse_46*cse_55*d*f
+        jacobian[545] = 1.7 - 1.7*f_Ca_Bsl
+        cse_58 = 1 - f_Ca_Bsl
+        cse_59 = _p7*cse_39*cse_58
+        cse_60 = _p8*Na_sl*V_m*cse_46*cse_59*d*f
+        cse_62 = 0.6138*Ca_j*cse_48 + cse_61
+        cse_63 = _p9*cse_34*cse_50*cse_62*d*f
+        cse_64 = cse_48*cse_57*cse_58
+        cse_65 = _p10*Ca_sl*V_m*cse_50*cse_64*d*f
+        cse_66 = _p11*cse_58*d*f
+        cse_67 = Na_sl*cse_54 + cse_53
+        cse_68 = _p12*cse_46*cse_66*cse_67
+        cse_69 = 0.6138*Ca_sl*cse_48 + cse_61
+        cse_70 = pCa*cse_50*cse_66*cse_69
+        cse_71 = Fjunc_CaL*cse_34 + cse_57*cse_58
+        cse_72 = _p13*cse_39*cse_71
+        cse_73 = 1.0/(cse_45*cse_45)
+        cse_74 = _p14*V_m*cse_39*cse_73*d*f
+        cse_75 = Fjunc_CaL*cse_34*cse_55*cse_74
+        cse_76 = _p15 + K_i*cse_54
+        cse_77 = _p16*cse_71*cse_76
+        cse_79 = 0.341*cse_48
+        cse_80 = Ca_j*cse_79 + cse_78
+        cse_81 = _p17*V_m*d*f/(cse_49*cse_49)
+        cse_82 = Fjunc_CaL*cse_34*cse_48*cse_80*cse_81
+        cse_83 = cse_57*cse_58*cse_67*cse_74
+        cse_84 = Ca_sl*cse_79 + cse_78
+        cse_85 = cse_48*cse_57*cse_58*cse_81*cse_84
+        cse_88 = 1 + cse_87/(Na_j*Na_j*Na_j*Na_j)
+        cse_89 = 0.1*V_m
+        cse_90 = ufl.exp(_p18*cse_89)
+        cse_91 = _p19*ufl.exp(-cse_38)
+        cse_92 = 1 + 0.1245*cse_90 + cse_91
+        cse_93 = 1.0/(cse_92*cse_92)
+        cse_94 = _p20*cse_90 + cse_37*cse_91
+        cse_95 = _p21*cse_93*cse_94/cse_88
+        cse_96 = 1 + cse_87/(Na_sl*Na_sl*Na_sl*Na_sl)
+        cse_97 = _p22*cse_93*cse_94/cse_96
+        cse_98 = ufl.exp(0.2385*V_m - 0.2385*cse_30)
+        cse_99 = 1 + 7.35454251046446e-07*cse_98
+        cse_100 = 1.0/cse_99
+        cse_101 = ufl.exp(0.5143*cse_30 - 0.5143*V_m)
+        cse_102 = 1 + 0.08677229415769332*cse_101
+        cse_103 = 1.0/cse_102
+        cse_104 = ufl.exp(0.06175*V_m - 0.06175*cse_30)
+        cse_105 = ufl.exp(0.08032*V_m - 0.08032*cse_30)
+        cse_106 = 0.7626240065063081*cse_105 + 1.1534056351865558e-16*cse_104
+        cse_107 = 1.02*cse_100 + cse_103*cse_106
+        cse_108 = 1.0/cse_107
+        cse_109 = _p23*cse_100*cse_108
+        cse_112 = (Ca_j*Ca_j)
+        cse_113 = 1.0/cse_112
+        cse_114 = 1 + cse_111*cse_113
+        cse_115 = 1.0/cse_114
+        cse_117 = ufl.exp(cse_116*cse_38)
+        cse_118 = 1 + ksat*cse_117
+        cse_119 = 1.0/cse_118
+        cse_120 = (Na_j*Na_j*Na_j)
+        cse_121 = Cao*cse_120
+        cse_123 = Ca_j*cse_122
+        cse_126 = Ca_j*cse_125
+        cse_127 = (1 + cse_126)*cse_124
+        cse_130 = KmCao*cse_120 + (1 + cse_120*cse_129)*cse_128 +\
+            Ca_j*cse_127 + cse_121 + cse_123
+        cse_131 = 1.0/cse_130
+        cse_133 = ufl.exp(nu*cse_38)
+        cse_134 = cse_121*cse_133
+        cse_136 = cse_117*cse_123
+        cse_137 = _p25*(_p24*cse_136 + cse_132*cse_134)*cse_115*cse_119*cse_131
+        cse_138 = 1.0/(Ca_sl*Ca_sl)
+        cse_139 = 1 + cse_111*cse_138
+        cse_140 = 1.0/cse_139
+        cse_141 = (Na_sl*Na_sl*Na_sl)
+        cse_142 = Cao*cse_141
+        cse_143 = Ca_sl*cse_122
+        cse_144 = Ca_sl*cse_125
+        cse_145 = (1 + cse_144)*cse_124
+        cse_146 = KmCao*cse_141 + (1 + cse_129*cse_141)*cse_128 +\
+            Ca_sl*cse_145 + cse_142 + cse_143
+        cse_147 = 1.0/cse_146
+        cse_148 = cse_133*cse_142
+        cse_149 = cse_117*cse_143
+        cse_150 = _p26*(_p24*cse_149 + cse_132*cse_148)*cse_119*cse_140*cse_147
+        cse_151 = 1.0/(cse_118*cse_118)
+        cse_152 = -cse_136 + cse_134
+        cse_153 = _p27*cse_115*cse_117*cse_131*cse_151*cse_152
+        cse_155 = -cse_149 + cse_148
+        cse_156 = _p28*cse_117*cse_140*cse_147*cse_151*cse_155
+        cse_157 = 1.0/(cse_99*cse_99)
+        cse_158 = 2.6947307747288258e-08*cse_108*cse_157*cse_33*cse_98
+        cse_159 = _p23*cse_100*cse_31/(cse_107*cse_107)
+        cse_160 = 1.7891395565206892e-07*cse_157*cse_98
+        cse_161 = 7.122279797276982e-18*cse_104
+        cse_162 = 0.06125396020258667*cse_105
+        cse_163 = 0.04462699088530167*cse_101*cse_106/(cse_102*cse_102)
+        jacobian[0] = _p36 - cse_109 - cse_137 - cse_15 - cse_150 - cse_16 -\
+            cse_17 - cse_18 - cse_25 - cse_26 - cse_47 - cse_51 - cse_56 -\
+            cse_60 - cse_63 - cse_65 - cse_68 - cse_70 - cse_9 - cse_95 -\
+            cse_97 + _p29*cse_3 + _p29*cse_32 + _p30*cse_3 + _p30*cse_32 +\
+            _p31/cse_11 + _p32/cse_20 - (-cse_163 - (cse_161 +\
+            cse_162)*cse_103 + cse_160)*cse_159 +\
+            0.0006275667459132388*cse_22*cse_33*x_kr/(cse_23*cse_23) +\
+            _p33*cse_46*cse_77*d*f + _p34*V_m*cse_39*cse_73*cse_77*d*f +\
+            _p35*K_i*V_m*cse_46*cse_72*d*f + cse_153 + cse_156 + cse_158 +\
+            cse_75 + cse_82 + cse_83 + cse_85
+        cse_164 = 1.0/Na_j
+        cse_165 = _p37*ufl.ln(Nao*cse_164) + V_m
+        cse_166 = _p38*cse_165*cse_7
+        cse_167 = cse_166*j
+        cse_168 = 1.0/Na_sl
+        cse_169 = _p37*ufl.ln(Nao*cse_168) + V_m
+        cse_170 = cse_169*cse_4*cse_7
+        cse_171 = GNa*cse_170*j
+        jacobian[1] = -cse_167 - cse_171
+        cse_172 = cse_166*h
+        cse_173 = GNa*cse_170*h
+        jacobian[2] = -cse_172 - cse_173
+        cse_174 = (m*m)
+        cse_175 = _p39*cse_174*h*j
+        jacobian[3] = _p29*cse_165*cse_175 + _p30*cse_169*cse_175
+        cse_176 = 1.0/(pNaK*Na_i + K_i)
+        cse_177 = 0.007*(_p37*ufl.ln(_p40*cse_176) + V_m)*x_ks
+        jacobian[5] = _p29*cse_177 + _p30*cse_177
+        cse_178 = _p1*cse_31
+        jacobian[6] = -cse_178*y_to_f
+        jacobian[8] = -cse_178*x_to_f
+        cse_179 = _p0*cse_31
+        jacobian[7] = -cse_179*y_to_s
+        jacobian[9] = -cse_179*x_to_s
+        cse_180 = _p6*V_m*cse_34*cse_46*cse_55
+        cse_181 = _p41*f
+        cse_182 = _p42*V_m*cse_46*cse_58*cse_67
+        cse_183 = pCa*V_m*cse_50*cse_69
+        cse_184 = _p16*V_m*cse_46*cse_71*cse_76
+        jacobian[10] = -cse_180*f - cse_181*cse_182 - cse_181*cse_184 +\
+            _p44*cse_183*cse_58*f + _p43*V_m*cse_181*cse_34*cse_50*cse_62
+        cse_185 = _p41*d
+        jacobian[11] = -cse_180*d - cse_182*cse_185 - cse_184*cse_185 +\
+            _p44*cse_183*cse_58*d + _p45*V_m*cse_34*cse_50*cse_62*d
+        cse_187 = _p46*V_m*cse_46*cse_76*d*f
+        jacobian[12] = cse_186*cse_187 + _p47*V_m*cse_46*cse_55*d*f +\
+            _p9*V_m*cse_50*cse_62*d*f
+        jacobian[13] = _p48*cse_187 + _p49*V_m*cse_50*cse_69*d*f +\
+            _p50*V_m*cse_46*cse_67*d*f
+        cse_188 = _p51*cse_176*cse_2
+        cse_189 = _p52*cse_176*cse_2
+        jacobian[32] = _p53*cse_188 + _p53*cse_189
+        cse_190 = _p54*cse_164
+        cse_191 = cse_1*cse_190
+        cse_192 = cse_190*cse_9
+        cse_193 = _p55*V_m*cse_46*d*f
+        cse_194 = _p56*cse_193*cse_34*cse_39
+        cse_195 = 1.0/cse_92
+        cse_196 = _p57*cse_195/((Na_j*Na_j*Na_j*Na_j*Na_j)*(cse_88*cse_88))
+        cse_198 = (Na_j*Na_j)
+        cse_199 = cse_197*cse_198
+        cse_202 = 1.0/(cse_130*cse_130)
+        cse_203 = _p25*(-cse_199 + _p58*cse_198 +\
+            _p59*cse_198)*cse_115*cse_119*cse_152*cse_202
+        jacobian[33] = -cse_191 - cse_192 - cse_194 - cse_203 - 4*cse_196 +\
+            _p60*cse_115*cse_119*cse_131*cse_133*cse_199
+        cse_204 = _p54*cse_168
+        cse_205 = cse_204*cse_6
+        cse_206 = cse_18*cse_204
+        cse_207 = cse_193*cse_59
+        cse_208 =\
+            _p61*cse_195/((Na_sl*Na_sl*Na_sl*Na_sl*Na_sl)*(cse_96*cse_96))
+        cse_209 = (Na_sl*Na_sl)
+        cse_210 = cse_197*cse_209
+        cse_211 = 1.0/(cse_146*cse_146)
+        cse_212 = _p62*(-cse_210 + _p58*cse_209 +\
+            _p59*cse_209)*cse_119*cse_140*cse_155*cse_211
+        jacobian[34] = -cse_205 - cse_206 - cse_207 - cse_212 - 4*cse_208 +\
+            _p63*cse_119*cse_133*cse_140*cse_147*cse_210
+        cse_213 = _p54*cse_29
+        jacobian[35] = -cse_188 - cse_189 + cse_158*cse_213 -\
+            (cse_160*cse_213 - (cse_161*cse_213 + cse_162*cse_213)*cse_103 -\
+            cse_163*cse_213)*cse_159 - cse_109*cse_213 - cse_15*cse_213 -\
+            cse_16*cse_213 - cse_17*cse_213 - cse_213*cse_25 - cse_213*cse_26 +\
+            _p33*V_m*cse_46*cse_72*d*f
+        cse_215 = _p64*cse_10
+        cse_219 = ufl.elem_pow(Ca_j, 1.6) + cse_218
+        cse_220 = ufl.elem_pow(Ca_j, 2.2)*cse_217/(cse_219*cse_219)
+        cse_221 = ufl.elem_pow(Ca_j, 0.6000000000000001)*cse_217/cse_219
+        cse_222 = KdClCa*(_p65 + V_m)
+        cse_223 = _p66*V_m*cse_50*d*f
+        cse_224 = Fjunc_CaL*cse_223*cse_34*cse_48
+        cse_225 = _p67*cse_115*cse_117*cse_119*cse_131
+        cse_226 =\
+            _p68*cse_119*cse_131*cse_152/((Ca_j*Ca_j*Ca_j)*(cse_114*cse_114))
+        cse_228 = _p70*(-cse_127 + _p69*cse_126 +\
+            cse_227)*cse_115*cse_119*cse_152*cse_202
+        jacobian[37] = -cse_215 - cse_221 - cse_224 - cse_228 - 2*cse_226 +\
+            _p31*cse_113*cse_222/(cse_11*cse_11) + cse_220 + cse_225
+        cse_229 = _p71*cse_19
+        cse_230 = ufl.elem_pow(Ca_sl, 1.6) + cse_218
+        cse_232 = ufl.elem_pow(Ca_sl, 2.2)*cse_231/(cse_230*cse_230)
+        cse_233 = ufl.elem_pow(Ca_sl, 0.6000000000000001)*cse_231/cse_230
+        cse_234 = cse_223*cse_64
+        cse_235 = _p72*cse_117*cse_119*cse_140*cse_147
+        cse_236 =\
+            _p73*cse_119*cse_147*cse_155/((Ca_sl*Ca_sl*Ca_sl)*(cse_139*cse_139))
+        cse_237 = _p62*(-cse_145 + _p69*cse_144 +\
+            cse_227)*cse_119*cse_140*cse_155*cse_211
+        jacobian[38] = -cse_229 - cse_233 - cse_234 - cse_237 - 2*cse_236 +\
+            _p32*cse_138*cse_222/(cse_20*cse_20) + cse_232 + cse_235
+        cse_238 = ufl.exp(0.13458950201884254*V_m)
+        cse_239 = 1 + 15212.593285654404*cse_238
+        cse_240 = 4094.9107094628275*cse_238/(cse_239*cse_239*cse_239)
+        cse_241 = ufl.exp(-0.14705882352941177*V_m)
+        cse_242 = ufl.exp(-0.0900900900900901*V_m)
+        cse_243 = 0.13 + 0.049758141083938695*cse_242
+        cse_244 = ufl.exp(0.079*V_m)
+        cse_245 = ufl.exp(0.3485*V_m)
+        jacobian[40] = -ufl.conditional(ufl.ge(V_m, -40), 0,\
+            4.4312679295805147e-07*cse_241) - ufl.conditional(ufl.ge(V_m,\
+            -40), 0.77/cse_243, 310000.0*cse_245 + 2.7*cse_244)
+        cse_246 = 1.0/(cse_239*cse_239)
+        jacobian[39] = (-h + cse_246)*(ufl.conditional(ufl.ge(V_m, -40), 0,\
+            -6.516570484677227e-08*cse_241) + ufl.conditional(ufl.ge(V_m,\
+            -40), 0.003451690867984937*cse_242/(cse_243*cse_243),\
+            108034.99999999999*cse_245 + 0.21330000000000002*cse_244)) -\
+            (ufl.conditional(ufl.ge(V_m, -40), 0,\
+            4.4312679295805147e-07*cse_241) + ufl.conditional(ufl.ge(V_m,\
+            -40), 0.77/cse_243, 310000.0*cse_245 + 2.7*cse_244))*cse_240
+        cse_247 = 37.78 + V_m
+        cse_248 = ufl.exp(0.311*V_m)
+        cse_249 = 1 + 50262745825.95399*cse_248
+        cse_250 = 1.0/cse_249
+        cse_251 = ufl.exp(-0.04391*V_m)
+        cse_252 = ufl.exp(0.2444*V_m)
+        cse_253 = -25428.0*cse_252 - 6.948e-06*cse_251
+        cse_254 = cse_250*cse_253
+        cse_255 = 1 + 0.040762203978366204*ufl.exp(-cse_89)
+        cse_256 = ufl.exp(0.057*V_m)/cse_255
+        cse_257 = 1 + 0.003960868339904256*ufl.exp(-0.1378*V_m)
+        cse_258 = ufl.exp(-0.01052*V_m)/cse_257
+        jacobian[78] = (-j + cse_246)*(ufl.conditional(ufl.ge(V_m, -40), 0,\
+            (3.0508668e-07*cse_251 -\
+            6214.6032000000005*cse_252)*cse_247*cse_250 -\
+            15631713951.87169*cse_247*cse_248*cse_253/(cse_249*cse_249) +\
+            cse_254) + ufl.conditional(ufl.ge(V_m, -40), 0.0342*cse_256 +\
+            0.002445732238701972*ufl.exp(-0.043000000000000003*V_m)/(cse_255*cse_255),\
+            -0.00025500480000000003*cse_258 +\
+            1.323037761146867e-05*ufl.exp(-0.14832*V_m)/(cse_257*cse_257))) -\
+            (ufl.conditional(ufl.ge(V_m, -40), 0, cse_247*cse_254) +\
+            ufl.conditional(ufl.ge(V_m, -40), 0.6*cse_256,\
+            0.02424*cse_258))*cse_240
+        jacobian[80] = -ufl.conditional(ufl.ge(V_m, -40), 0, cse_247*cse_254)\
+            - ufl.conditional(ufl.ge(V_m, -40), 0.6*cse_256, 0.02424*cse_258)
+        cse_259 = ufl.exp(-0.1107419712070875*V_m)
+        cse_260 = 1 + 0.0018422115811651339*cse_259
+        cse_261 = 0.06487*ufl.exp(-((-0.09434663536776214 +\
+            0.019561815336463225*V_m)*(-0.09434663536776214 +\
+            0.019561815336463225*V_m)))
+        cse_262 = 0.1292*ufl.exp(-((2.9465894465894467 +\
+            0.06435006435006435*V_m)*(2.9465894465894467 +\
+            0.06435006435006435*V_m)))
+        cse_263 = cse_261 + cse_262
+        cse_264 = 1.0/cse_263
+        jacobian[117] = (1.0/(cse_260*cse_260) - m)*(-(0.0036911829173615863 -\
+            0.0007653292385157756*V_m)*cse_261 - (-0.3792264410025028 -\
+            0.008281861563714845*V_m)*cse_262)/(cse_263*cse_263) +\
+            0.0004080202837575048*cse_259*cse_264/(cse_260*cse_260*cse_260)
+        jacobian[120] = -cse_264
+        cse_265 = V_m/5
+        cse_266 = ufl.exp(-2 - cse_265)
+        cse_267 = 1 + cse_266
+        cse_268 = V_m/20
+        cse_269 = ufl.exp(2 + cse_268)
+        cse_270 = 1 + cse_269
+        cse_271 = V_m/9
+        cse_272 = ufl.exp(-22/9 - cse_271)
+        cse_273 = 1 + cse_272
+        cse_274 = 1.0/cse_273
+        cse_275 = ufl.exp(11/9 + cse_271)
+        cse_276 = 1 + cse_275
+        cse_277 = 1.0/cse_276
+        cse_278 = 230/cse_270 + 3300*cse_274*cse_277
+        cse_279 = 1.0/cse_278
+        jacobian[156] = (1.0/cse_267 -\
+            x_kr)*(23*cse_269/(2*(cse_270*cse_270)) -\
+            1100*cse_272*cse_277/(3*(cse_273*cse_273)) +\
+            1100*cse_274*cse_275/(3*(cse_276*cse_276)))/(cse_278*cse_278) +\
+            cse_266*cse_279/(5*(cse_267*cse_267))
+        jacobian[160] = -cse_279
+        cse_280 = ufl.exp(-0.0708215297450425*V_m)
+        cse_281 = ufl.exp(-0.07017543859649122*V_m)
+        cse_282 = 1 + 0.7659283383646487*cse_281
+        cse_283 = 0.0008499549630018197*cse_280
+        jacobian[195] = -6.0195110694179865e-05*(1.0/cse_282 - x_ks)*cse_280 +\
+            0.053749357078220955*(0.00100999899000101 +\
+            cse_283)*cse_281/(cse_282*cse_282)
+        jacobian[200] = -0.00100999899000101 - cse_283
+        cse_284 = 8.5*ufl.exp(-((9/10 + V_m/50)*(9/10 + V_m/50)))
+        cse_285 = 0.5 + cse_284
+        cse_286 = 1.0/cse_285
+        jacobian[240] = -cse_286
+        cse_287 = ufl.exp(19/13 - V_m/13)
+        cse_288 = 1 + cse_287
+        cse_289 = cse_287/(13*(cse_288*cse_288))
+        cse_290 = 1.0/cse_288
+        jacobian[234] = cse_286*cse_289 - (-9/250 - V_m/1250)*(-x_to_f +\
+            cse_290)*cse_284/(cse_285*cse_285)
+        cse_291 = ufl.exp(1/5 + V_m/15)
+        cse_292 = 1 + cse_291
+        cse_293 = 0.5 + 9/cse_292
+        cse_294 = 1.0/cse_293
+        jacobian[273] = cse_289*cse_294 + 3*(-x_to_s +\
+            cse_290)*cse_291/(5*(cse_292*cse_292)*(cse_293*cse_293))
+        jacobian[280] = -cse_294
+        cse_295 = 85*ufl.exp(-((40 + V_m)*(40 + V_m))/220)
+        cse_296 = 7 + cse_295
+        cse_297 = 1.0/cse_296
+        jacobian[320] = -cse_297
+        cse_298 = ufl.exp(cse_265)
+        cse_299 = 1 + 49.40244910553019*cse_298
+        cse_300 = 9.880489821106039*cse_298/(cse_299*cse_299)
+        cse_301 = 1.0/cse_299
+        jacobian[312] = -cse_297*cse_300 - (-4/11 - V_m/110)*(-y_to_f +\
+            cse_301)*cse_295/(cse_296*cse_296)
+        cse_302 = ufl.exp(6 + V_m/10)
+        cse_303 = 1 + cse_302
+        cse_304 = 30 + 800/cse_303
+        cse_305 = 1.0/cse_304
+        jacobian[351] = -cse_300*cse_305 + 80*(-y_to_s +\
+            cse_301)*cse_302/((cse_303*cse_303)*(cse_304*cse_304))
+        jacobian[360] = -cse_305
+        cse_306 = ufl.exp(-5/6 - V_m/6)
+        cse_307 = 1 + cse_306
+        cse_308 = 1.0/cse_307
+        cse_309 = 0.17500000000000002 + 0.035*V_m
+        cse_310 = 1 - cse_306
+        cse_311 = 1.0/cse_310
+        jacobian[400] = -cse_307*cse_309*cse_311
+        cse_312 = cse_306*cse_309*cse_311/6
+        cse_313 = -d + cse_308
+        cse_314 = cse_307*cse_313
+        jacobian[390] = cse_308*cse_312 - cse_312*cse_313 +\
+            0.035*cse_311*cse_314 -\
+            cse_306*cse_309*cse_314/(6*(cse_310*cse_310))
+        cse_315 = 0.0197*ufl.exp(-((0.48865000000000003 +\
+            0.0337*V_m)*(0.48865000000000003 + 0.0337*V_m)))
+        jacobian[440] = -0.02 - cse_315
+        cse_316 = ufl.exp(35/9 + cse_271)
+        cse_317 = 1 + cse_316
+        cse_318 = ufl.exp(5/2 - cse_268)
+        cse_319 = 1 + cse_318
+        jacobian[429] = (0.02 + cse_315)*(-cse_316/(9*(cse_317*cse_317)) +\
+            0.03*cse_318/(cse_319*cse_319)) + (-0.03293501 -\
+            0.00227138*V_m)*(1.0/cse_317 - f + 0.6/cse_319)*cse_315
+        jacobian[638] = cse_321
+        jacobian[639] = _p74
+        cse_323 = 1.0/Ca_sr
+        cse_324 = ((ec50SR*cse_323)*(ec50SR*cse_323)*ufl.sqrt(ec50SR*cse_323))
+        cse_325 = 1 + cse_324
+        cse_326 = MaxSR + _p75/cse_325
+        cse_327 = 1.0/cse_326
+        cse_328 = koCa*cse_112*cse_327
+        jacobian[601] = cse_328
+        cse_329 = -cse_328
+        jacobian[562] = cse_329
+        cse_330 = cse_321 + cse_329
+        jacobian[560] = cse_320 + cse_330
+        cse_331 = kiCa*cse_326
+        cse_332 = Ca_j*cse_331
+        jacobian[561] = cse_329 + cse_332
+        cse_333 = 1.0/(cse_325*cse_325)
+        cse_334 = _p76*cse_323*cse_324*cse_333
+        cse_335 = Ca_j*Ry_Ro*cse_334
+        cse_336 = 1 - Ry_Ri - Ry_Ro - Ry_Rr
+        cse_337 = _p77*cse_112*cse_323*cse_324*cse_333/(cse_326*cse_326)
+        jacobian[576] = -cse_335 + cse_336*cse_337
+        cse_338 = Ry_Ro*cse_331
+        cse_339 = _p78*cse_327
+        jacobian[583] = Ca_j*cse_336*cse_339 + cse_338
+        cse_340 = -cse_332
+        jacobian[600] = cse_320 + cse_340
+        jacobian[640] = cse_330 + cse_340
+        cse_341 = Ry_Rr*cse_337
+        jacobian[615] = cse_335 + cse_341
+        cse_342 = Ca_j*Ry_Rr
+        jacobian[654] = -cse_341 + cse_334*cse_342
+        cse_343 = cse_339*cse_342
+        jacobian[622] = -cse_338 + cse_343
+        jacobian[661] = -cse_343 - Ry_Rr*cse_331
+        cse_345 = kon_na*Na_j
+        jacobian[680] = -cse_345 + cse_344
+        jacobian[1304] = koff_na + cse_345
+        cse_346 = kon_na*(Bmax_Naj - Na_Bj)
+        jacobian[696] = cse_346
+        cse_347 = kon_na*Na_sl
+        jacobian[720] = -cse_347 + cse_344
+        jacobian[1344] = koff_na + cse_347
+        cse_348 = kon_na*(Bmax_Nasl - Na_Bsl)
+        jacobian[736] = cse_348
+        cse_349 = kon_cam*Ca_i
+        jacobian[760] = _p79 - cse_349
+        jacobian[1423] = koff_cam + cse_349
+        cse_350 = kon_cam*(Bmax_CaM - CaM)
+        jacobian[777] = cse_350
+        cse_351 = kon_myoca*Ca_i
+        cse_352 = -cse_351
+        jacobian[800] = _p80 + cse_352
+        jacobian[801] = cse_352
+        cse_353 = kon_myoca*(Bmax_myosin - Myo_c - Myo_m)
+        jacobian[816] = cse_353
+        jacobian[839] = cse_355
+        jacobian[840] = _p81
+        cse_356 = kon_sr*Ca_i
+        jacobian[880] = _p82 - cse_356
+        jacobian[1426] = koff_sr + cse_356
+        cse_357 = kon_sr*(Bmax_SR - SRB)
+        jacobian[894] = cse_357
+        cse_358 = kon_tnchca*Ca_i
+        cse_359 = -cse_358
+        jacobian[920] = _p83 + cse_359
+        jacobian[921] = cse_359
+        cse_360 = kon_tnchca*(Bmax_TnChigh - Tn_CHc - Tn_CHm)
+        jacobian[933] = cse_360
+        jacobian[959] = cse_362
+        jacobian[960] = _p84
+        cse_363 = kon_tncl*Ca_i
+        jacobian[1000] = _p85 - cse_363
+        jacobian[1429] = koff_tncl + cse_363
+        cse_364 = kon_tncl*(Bmax_TnClow - Tn_CL)
+        jacobian[1011] = cse_364
+        cse_366 = kon_slh*Ca_j
+        jacobian[1040] = -cse_366 + cse_365
+        jacobian[1469] = koff_slh + cse_366
+        cse_367 = kon_slh*(_p86 - SLH_j)
+        jacobian[1051] = cse_367
+        cse_368 = kon_slh*Ca_sl
+        jacobian[1080] = -cse_368 + cse_365
+        jacobian[1509] = koff_slh + cse_368
+        cse_369 = kon_slh*(_p87 - SLH_sl)
+        jacobian[1091] = cse_369
+        cse_371 = kon_sll*Ca_j
+        jacobian[1120] = -cse_371 + cse_370
+        jacobian[1471] = koff_sll + cse_371
+        cse_372 = kon_sll*(_p88 - SLL_j)
+        jacobian[1129] = cse_372
+        cse_373 = kon_sll*Ca_sl
+        jacobian[1160] = -cse_373 + cse_370
+        jacobian[1511] = koff_sll + cse_373
+        cse_374 = kon_sll*(_p89 - SLL_sl)
+        jacobian[1169] = cse_374
+        cse_375 = ks*(-Ca_j + Ca_sr)
+        jacobian[1185] = -cse_375
+        jacobian[1458] = 64.93506493506493*cse_375
+        cse_376 = ks*Ry_Ro
+        jacobian[1207] = 9.931999999999999e-05 + cse_376
+        cse_377 = kon_csqn*(_p90 - Csqn_b)
+        jacobian[1239] = cse_377
+        cse_378 = ufl.elem_pow(_p91*Ca_sr, hillSRCaP)
+        cse_379 = cse_323*cse_378
+        cse_381 = ufl.elem_pow(_p92*Ca_i, hillSRCaP)
+        cse_382 = 1 + cse_378 + cse_381
+        cse_383 = _p93/cse_382
+        cse_384 = cse_379*cse_383
+        cse_385 = _p93*(-cse_378 + cse_381)/(cse_382*cse_382)
+        cse_386 = cse_379*cse_385
+        jacobian[1200] = -9.931999999999999e-05 - cse_376 - cse_377 - cse_384 -\
+            cse_386
+        jacobian[1434] = 0.05384615384615385*cse_384 +\
+            0.05384615384615385*cse_386
+        cse_387 = kon_csqn*Ca_sr
+        jacobian[1201] = koff_csqn + cse_387
+        jacobian[1240] = _p94 - cse_387
+        cse_388 = cse_381/Ca_i
+        cse_389 = cse_383*cse_388
+        cse_390 = cse_385*cse_388
+        jacobian[1206] = -cse_390 + cse_389
+        jacobian[1339] = _p95*V_m*cse_46*cse_67*d*f
+        jacobian[1495] = _p96*V_m*cse_50*cse_84*d*f
+        jacobian[1280] = _p97
+        jacobian[1282] = cse_395
+        jacobian[1287] = _p98*(-cse_75 - 3*cse_153 + 3*cse_137 + 3*cse_95 +\
+            cse_1 + cse_47 + cse_56 + cse_9)
+        jacobian[1288] = _p98*cse_167
+        jacobian[1289] = _p98*cse_172
+        jacobian[1324] = _p98*(-3*cse_225 + 3*cse_228 + 6*cse_226)
+        cse_397 = _p99*cse_174*h*j
+        jacobian[1290] = _p100*cse_165*cse_397
+        jacobian[1329] = _p101*cse_169*cse_397
+        cse_398 = _p102*V_m*cse_34*cse_46*cse_55
+        jacobian[1297] = -cse_398*f
+        jacobian[1298] = -cse_398*d
+        cse_399 = _p103*V_m*d*f
+        jacobian[1299] = _p104*cse_399*cse_46*cse_55
+        jacobian[1455] = _p105*cse_399*cse_50*cse_80
+        jacobian[1321] = cse_401
+        cse_402 = _p106*cse_115*cse_119*cse_131*cse_133*cse_198
+        jacobian[1320] = _p107 - cse_346 + _p98*(3*cse_203 + 9*cse_402 +\
+            12*cse_196 + cse_191 + cse_192 + cse_194)
+        jacobian[1326] = _p108*(-cse_83 - 3*cse_156 + 3*cse_150 + 3*cse_97 +\
+            cse_18 + cse_6 + cse_60 + cse_68)
+        jacobian[1327] = _p108*cse_171
+        jacobian[1328] = _p108*cse_173
+        jacobian[1364] = _p108*(-3*cse_235 + 3*cse_237 + 6*cse_236)
+        cse_404 = _p109*V_m*f
+        cse_405 = _p110*cse_46*cse_58*cse_67
+        jacobian[1336] = -cse_404*cse_405
+        cse_406 = _p109*V_m*d
+        jacobian[1337] = -cse_405*cse_406
+        jacobian[1358] = cse_407
+        jacobian[1359] = cse_408
+        cse_409 = _p111*cse_119*cse_133*cse_140*cse_147*cse_209
+        jacobian[1360] = _p112 - cse_348 + _p108*(3*cse_212 + 9*cse_409 +\
+            12*cse_208 + cse_205 + cse_206 + cse_207)
+        cse_410 = cse_351 + cse_354
+        jacobian[1424] = koff_myoca + cse_410
+        jacobian[1425] = koff_myomg + cse_410
+        cse_411 = cse_358 + cse_361
+        jacobian[1427] = koff_tnchca + cse_411
+        jacobian[1428] = koff_tnchmg + cse_411
+        jacobian[1440] = _p113 - cse_350 - cse_353 - cse_357 - cse_360 -\
+            cse_364 + 0.05384615384615385*cse_390 -\
+            0.05384615384615385*cse_389
+        jacobian[1442] = cse_413
+        jacobian[1443] = _p114*(-cse_82 - 2*cse_137 + 2*cse_153 + cse_0 +\
+            cse_51 + cse_63)
+        jacobian[1476] = _p114*(-6*cse_402 - 2*cse_203)
+        cse_415 = _p115*cse_34*cse_50*cse_80
+        jacobian[1453] = -cse_404*cse_415
+        jacobian[1454] = -cse_406*cse_415
+        cse_416 = 64.93506493506493*cse_376
+        jacobian[1473] = 0.006449350649350649 + cse_416
+        jacobian[1480] = _p116 - cse_367 - cse_372 - cse_416 +\
+            _p114*(-cse_220 - 4*cse_226 - 2*cse_228 + 2*cse_225 + cse_215 +\
+            cse_221 + cse_224)
+        jacobian[1481] = cse_418
+        jacobian[1482] = _p117*(-cse_85 - 2*cse_150 + 2*cse_156 + cse_5 +\
+            cse_65 + cse_70)
+        jacobian[1516] = _p117*(-6*cse_409 - 2*cse_212)
+        cse_420 = _p118*cse_50*cse_58*cse_84
+        jacobian[1492] = -cse_404*cse_420
+        jacobian[1493] = -cse_406*cse_420
+        jacobian[1518] = cse_421
+        jacobian[1519] = cse_422
+        jacobian[1520] = _p119 - cse_369 - cse_374 + _p117*(-cse_232 -\
+            4*cse_236 - 2*cse_237 + 2*cse_235 + cse_229 + cse_233 + cse_234)
+
+        # Return results
+        return ufl.as_matrix([jacobian[39*i:39*(i + 1)] for i in range(39)])
+
+    def num_states(self):
+        return 38
+
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 39)
+        V_m, h, j, m, x_kr, x_ks, x_to_f, x_to_s, y_to_f, y_to_s, d, f,\
+            f_Ca_Bj, f_Ca_Bsl, Ry_Ri, Ry_Ro, Ry_Rr, Na_Bj, Na_Bsl, CaM,\
+            Myo_c, Myo_m, SRB, Tn_CHc, Tn_CHm, Tn_CL, SLH_j, SLH_sl, SLL_j,\
+            SLL_sl, Ca_sr, Csqn_b, Na_i, Na_j, Na_sl, K_i, Ca_i, Ca_j, Ca_sl\
+            = states
+
+        # Assign parameters
+        assert(len(parameters) == 107)
+        Fjunc = parameters[0]
+        Fjunc_CaL = parameters[1]
+        cellLength = parameters[2]
+        cellRadius = parameters[3]
+        GNa = parameters[8]
+        GNaB = parameters[9]
+        IbarNaK = parameters[10]
+        KmKo = parameters[11]
+        KmNaip = parameters[12]
+        gkp = parameters[15]
+        pNaK = parameters[16]
+        epi = parameters[17]
+        GClB = parameters[18]
+        GClCa = parameters[19]
+        KdClCa = parameters[20]
+        Q10CaL = parameters[21]
+        pCa = parameters[22]
+        pK = parameters[23]
+        pNa = parameters[24]
+        IbarNCX = parameters[25]
+        Kdact = parameters[26]
+        KmCai = parameters[27]
+        KmCao = parameters[28]
+        KmNai = parameters[29]
+        KmNao = parameters[30]
+        Q10NCX = parameters[31]
+        ksat = parameters[32]
+        nu = parameters[33]
+        IbarSLCaP = parameters[34]
+        KmPCa = parameters[35]
+        Q10SLCaP = parameters[36]
+        GCaB = parameters[37]
+        Kmf = parameters[38]
+        Kmr = parameters[39]
+        MaxSR = parameters[40]
+        MinSR = parameters[41]
+        Q10SRCaP = parameters[42]
+        Vmax_SRCaP = parameters[43]
+        ec50SR = parameters[44]
+        hillSRCaP = parameters[45]
+        kiCa = parameters[46]
+        kim = parameters[47]
+        koCa = parameters[48]
+        kom = parameters[49]
+        ks = parameters[50]
+        Bmax_Naj = parameters[51]
+        Bmax_Nasl = parameters[52]
+        koff_na = parameters[53]
+        kon_na = parameters[54]
+        Bmax_CaM = parameters[55]
+        Bmax_SR = parameters[56]
+        Bmax_TnChigh = parameters[57]
+        Bmax_TnClow = parameters[58]
+        Bmax_myosin = parameters[59]
+        koff_cam = parameters[60]
+        koff_myoca = parameters[61]
+        koff_myomg = parameters[62]
+        koff_sr = parameters[63]
+        koff_tnchca = parameters[64]
+        koff_tnchmg = parameters[65]
+        koff_tncl = parameters[66]
+        kon_cam = parameters[67]
+        kon_myoca = parameters[68]
+        kon_myomg = parameters[69]
+        kon_sr = parameters[70]
+        kon_tnchca = parameters[71]
+        kon_tnchmg = parameters[72]
+        kon_tncl = parameters[73]
+        Bmax_SLhighj0 = parameters[74]
+        Bmax_SLhighsl0 = parameters[75]
+        Bmax_SLlowj0 = parameters[76]
+        Bmax_SLlowsl0 = parameters[77]
+        koff_slh = parameters[78]
+        koff_sll = parameters[79]
+        kon_slh = parameters[80]
+        kon_sll = parameters[81]
+        Bmax_Csqn0 = parameters[82]
+        J_ca_juncsl = parameters[85]
+        J_ca_slmyo = parameters[86]
+        koff_csqn = parameters[87]
+        kon_csqn = parameters[88]
+        J_na_juncsl = parameters[91]
+        J_na_slmyo = parameters[92]
+        Nao = parameters[93]
+        Ko = parameters[94]
+        Cao = parameters[95]
+        Cli = parameters[96]
+        Clo = parameters[97]
+        Mgi = parameters[98]
+        Cmem = parameters[99]
+        Frdy = parameters[100]
+        R = parameters[101]
+        Temp = parameters[102]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
 
         # Expressions for the Geometry component
-        Vcell = 1e-15*ufl.pi*cellLength*(cellRadius*cellRadius)
+        Vcell = 1e-15*numpy.pi*cellLength*(cellRadius*cellRadius)
         Vmyo = 0.65*Vcell
         Vsr = 0.035*Vcell
         Vsl = 0.02*Vcell
-        Vjunc = 0.000539*Vcell
+        Vjunc = 0.0005390000000000001*Vcell
         Fsl = 1 - Fjunc
         Fsl_CaL = 1 - Fjunc_CaL
 
         # Expressions for the Reversal potentials component
         FoRT = Frdy/(R*Temp)
-        ena_junc = ufl.ln(Nao/Na_j)/FoRT
-        ena_sl = ufl.ln(Nao/Na_sl)/FoRT
-        eca_junc = ufl.ln(Cao/Ca_j)/(2*FoRT)
-        eca_sl = ufl.ln(Cao/Ca_sl)/(2*FoRT)
+        ena_junc = numpy.log(Nao/Na_j)/FoRT
+        ena_sl = numpy.log(Nao/Na_sl)/FoRT
+        ek = numpy.log(Ko/K_i)/FoRT
+        eca_junc = numpy.log(Cao/Ca_j)/(2*FoRT)
+        eca_sl = numpy.log(Cao/Ca_sl)/(2*FoRT)
+        ecl = numpy.log(Cli/Clo)/FoRT
         Qpow = -31 + Temp/10
 
         # Expressions for the I_Na component
-        mss = 1.0/((1 + 0.00184221158117*ufl.exp(-0.110741971207*V_m))*(1 +\
-            0.00184221158117*ufl.exp(-0.110741971207*V_m)))
-        taum = 0.1292*ufl.exp(-((2.94658944659 +\
-            0.0643500643501*V_m)*(2.94658944659 + 0.0643500643501*V_m))) +\
-            0.06487*ufl.exp(-((-0.0943466353678 +\
-            0.0195618153365*V_m)*(-0.0943466353678 + 0.0195618153365*V_m)))
-        ah = ufl.conditional(ufl.ge(V_m, -40), 0,\
-            4.43126792958e-07*ufl.exp(-0.147058823529*V_m))
-        bh = ufl.conditional(ufl.ge(V_m, -40), 0.77/(0.13 +\
-            0.0497581410839*ufl.exp(-0.0900900900901*V_m)),\
-            310000.0*ufl.exp(0.3485*V_m) + 2.7*ufl.exp(0.079*V_m))
-        tauh = 1.0/(bh + ah)
-        hss = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V_m))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V_m)))
-        aj = ufl.conditional(ufl.ge(V_m, -40), 0, (37.78 +\
-            V_m)*(-25428.0*ufl.exp(0.2444*V_m) -\
-            6.948e-06*ufl.exp(-0.04391*V_m))/(1 +\
-            50262745826.0*ufl.exp(0.311*V_m)))
-        bj = ufl.conditional(ufl.ge(V_m, -40), 0.6*ufl.exp(0.057*V_m)/(1 +\
-            0.0407622039784*ufl.exp(-0.1*V_m)),\
-            0.02424*ufl.exp(-0.01052*V_m)/(1 +\
-            0.0039608683399*ufl.exp(-0.1378*V_m)))
-        tauj = 1.0/(bj + aj)
-        jss = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V_m))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V_m)))
-        F_expressions[2] = (-m + mss)/taum
-        F_expressions[0] = (hss - h)/tauh
-        F_expressions[1] = (-j + jss)/tauj
+        mss = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V_m))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V_m)))
+        taum = 0.1292*numpy.exp(-((2.9465894465894467 +\
+            0.06435006435006435*V_m)*(2.9465894465894467 +\
+            0.06435006435006435*V_m))) +\
+            0.06487*numpy.exp(-((-0.09434663536776214 +\
+            0.019561815336463225*V_m)*(-0.09434663536776214 +\
+            0.019561815336463225*V_m)))
+        ah = numpy.where((V_m >= -40), 0,\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V_m))
+        bh = numpy.where((V_m >= -40), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V_m)),\
+            310000.0*numpy.exp(0.3485*V_m) + 2.7*numpy.exp(0.079*V_m))
+        tauh = 1.0/(ah + bh)
+        hss = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m)))
+        aj = numpy.where((V_m >= -40), 0, (37.78 +\
+            V_m)*(-25428.0*numpy.exp(0.2444*V_m) -\
+            6.948e-06*numpy.exp(-0.04391*V_m))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V_m)))
+        bj = numpy.where((V_m >= -40), 0.6*numpy.exp(0.057*V_m)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V_m)),\
+            0.02424*numpy.exp(-0.01052*V_m)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V_m)))
+        tauj = 1.0/(aj + bj)
+        jss = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m)))
+        dy[3] = (-m + mss)/taum
+        dy[1] = (-h + hss)/tauh
+        dy[2] = (-j + jss)/tauj
         I_Na_junc = Fjunc*GNa*(m*m*m)*(-ena_junc + V_m)*h*j
         I_Na_sl = GNa*(m*m*m)*(-ena_sl + V_m)*Fsl*h*j
 
@@ -554,198 +1726,723 @@ class Grandi_pasqualini_bers_2010(CardiacCellModel):
         I_nabk_sl = GNaB*(-ena_sl + V_m)*Fsl
 
         # Expressions for the I_NaK component
-        sigma = -1/7 + ufl.exp(0.0148588410104*Nao)/7
-        fnak = 1.0/(1 + 0.1245*ufl.exp(-0.1*FoRT*V_m) +\
-            0.0365*ufl.exp(-FoRT*V_m)*sigma)
-        I_nak_junc = Fjunc*IbarNaK*Ko*fnak/((1 + ufl.elem_pow(KmNaip,\
-            4)/ufl.elem_pow(Na_j, 4))*(KmKo + Ko))
-        I_nak_sl = IbarNaK*Ko*Fsl*fnak/((1 + ufl.elem_pow(KmNaip,\
-            4)/ufl.elem_pow(Na_sl, 4))*(KmKo + Ko))
+        sigma = -1/7 + numpy.exp(0.01485884101040119*Nao)/7
+        fnak = 1.0/(1 + 0.1245*numpy.exp(-0.1*FoRT*V_m) +\
+            0.0365*numpy.exp(-FoRT*V_m)*sigma)
+        I_nak_junc = Fjunc*IbarNaK*Ko*fnak/((1 + numpy.power(KmNaip,\
+            4)/numpy.power(Na_j, 4))*(KmKo + Ko))
+        I_nak_sl = IbarNaK*Ko*Fsl*fnak/((1 + numpy.power(KmNaip,\
+            4)/numpy.power(Na_sl, 4))*(KmKo + Ko))
+        I_nak = I_nak_junc + I_nak_sl
 
         # Expressions for the I_Kr component
-        xrss = 1.0/(1 + ufl.exp(-2 - V_m/5))
-        tauxr = 230/(1 + ufl.exp(2 + V_m/20)) + 3300/((1 + ufl.exp(-22/9 -\
-            V_m/9))*(1 + ufl.exp(11/9 + V_m/9)))
-        F_expressions[3] = (-x_kr + xrss)/tauxr
+        gkr = 0.015061601901917732*numpy.sqrt(Ko)
+        xrss = 1.0/(1 + numpy.exp(-2 - V_m/5))
+        tauxr = 230/(1 + numpy.exp(2 + V_m/20)) + 3300/((1 + numpy.exp(-22/9 -\
+            V_m/9))*(1 + numpy.exp(11/9 + V_m/9)))
+        dy[4] = (-x_kr + xrss)/tauxr
+        rkr = 1.0/(1 + numpy.exp(37/12 + V_m/24))
+        I_kr = (-ek + V_m)*gkr*rkr*x_kr
+
+        # Expressions for the I_Kp component
+        kp_kp = 1.0/(1 +\
+            1786.4755653786237*numpy.exp(-0.16722408026755853*V_m))
+        I_kp_junc = Fjunc*gkp*(-ek + V_m)*kp_kp
+        I_kp_sl = gkp*(-ek + V_m)*Fsl*kp_kp
+        I_kp = I_kp_junc + I_kp_sl
 
         # Expressions for the I_Ks component
-        xsss = 1.0/(1 + 0.765928338365*ufl.exp(-0.0701754385965*V_m))
-        tauxs = 990.1/(1 + 0.841540408868*ufl.exp(-0.070821529745*V_m))
-        F_expressions[4] = (-x_ks + xsss)/tauxs
+        eks = numpy.log((Ko + Nao*pNaK)/(pNaK*Na_i + K_i))/FoRT
+        gks_junc = 0.0035
+        gks_sl = 0.0035
+        xsss = 1.0/(1 + 0.7659283383646487*numpy.exp(-0.07017543859649122*V_m))
+        tauxs = 990.1/(1 +\
+            0.8415404088681017*numpy.exp(-0.0708215297450425*V_m))
+        dy[5] = (-x_ks + xsss)/tauxs
+        I_ks_junc = Fjunc*gks_junc*(x_ks*x_ks)*(-eks + V_m)
+        I_ks_sl = gks_sl*(x_ks*x_ks)*(-eks + V_m)*Fsl
+        I_ks = I_ks_junc + I_ks_sl
 
         # Expressions for the I_to component
-        xtoss = 1.0/(1 + ufl.exp(19/13 - V_m/13))
-        ytoss = 1.0/(1 + 49.4024491055*ufl.exp(V_m/5))
-        tauxtos = 0.5 + 9/(1 + ufl.exp(1/5 + V_m/15))
-        tauytos = 30 + 800/(1 + ufl.exp(6 + V_m/10))
-        F_expressions[6] = (-x_to_s + xtoss)/tauxtos
-        F_expressions[8] = (ytoss - y_to_s)/tauytos
-        tauxtof = 0.5 + 8.5*ufl.exp(-((9/10 + V_m/50)*(9/10 + V_m/50)))
-        tauytof = 7 + 85*ufl.exp(-((40 + V_m)*(40 + V_m))/220)
-        F_expressions[5] = (xtoss - x_to_f)/tauxtof
-        F_expressions[7] = (ytoss - y_to_f)/tauytof
+        GtoSlow = numpy.where((epi == 1), 0.0156, 0.037596)
+        GtoFast = numpy.where((epi == 1), 0.1144, 0.0014039999999999999)
+        xtoss = 1.0/(1 + numpy.exp(19/13 - V_m/13))
+        ytoss = 1.0/(1 + 49.40244910553019*numpy.exp(V_m/5))
+        tauxtos = 0.5 + 9/(1 + numpy.exp(1/5 + V_m/15))
+        tauytos = 30 + 800/(1 + numpy.exp(6 + V_m/10))
+        dy[7] = (-x_to_s + xtoss)/tauxtos
+        dy[9] = (-y_to_s + ytoss)/tauytos
+        I_tos = (-ek + V_m)*GtoSlow*x_to_s*y_to_s
+        tauxtof = 0.5 + 8.5*numpy.exp(-((9/10 + V_m/50)*(9/10 + V_m/50)))
+        tauytof = 7 + 85*numpy.exp(-((40 + V_m)*(40 + V_m))/220)
+        dy[6] = (-x_to_f + xtoss)/tauxtof
+        dy[8] = (-y_to_f + ytoss)/tauytof
+        I_tof = (-ek + V_m)*GtoFast*x_to_f*y_to_f
+        I_to = I_tof + I_tos
+
+        # Expressions for the I_Ki component
+        aki = 1.02/(1 + 7.35454251046446e-07*numpy.exp(0.2385*V_m - 0.2385*ek))
+        bki = (0.7626240065063081*numpy.exp(0.08032*V_m - 0.08032*ek) +\
+            1.1534056351865558e-16*numpy.exp(0.06175*V_m - 0.06175*ek))/(1 +\
+            0.08677229415769332*numpy.exp(0.5143*ek - 0.5143*V_m))
+        kiss = aki/(aki + bki)
+        I_ki = 0.15061601901917732*numpy.sqrt(Ko)*(-ek + V_m)*kiss
+
+        # Expressions for the I_ClCa component
+        I_ClCa_junc = Fjunc*GClCa*(-ecl + V_m)/(1 + KdClCa/Ca_j)
+        I_ClCa_sl = GClCa*(-ecl + V_m)*Fsl/(1 + KdClCa/Ca_sl)
+        I_ClCa = I_ClCa_junc + I_ClCa_sl
+        I_Clbk = GClB*(-ecl + V_m)
 
         # Expressions for the I_Ca component
-        fss = 0.6/(1 + ufl.exp(5/2 - V_m/20)) + 1.0/(1 + ufl.exp(35/9 + V_m/9))
-        dss = 1.0/(1 + ufl.exp(-5/6 - V_m/6))
-        taud = (1 - ufl.exp(-5/6 - V_m/6))*dss/(0.175 + 0.035*V_m)
-        tauf = 1.0/(0.02 + 0.0197*ufl.exp(-((0.48865 + 0.0337*V_m)*(0.48865 +\
-            0.0337*V_m))))
-        F_expressions[9] = (-d + dss)/taud
-        F_expressions[10] = (fss - f)/tauf
-        F_expressions[11] = 1.7*(1 - f_Ca_Bj)*Ca_j - 0.0119*f_Ca_Bj
-        F_expressions[12] = -0.0119*f_Ca_Bsl + 1.7*(1 - f_Ca_Bsl)*Ca_sl
+        fss = 1.0/(1 + numpy.exp(35/9 + V_m/9)) + 0.6/(1 + numpy.exp(5/2 -\
+            V_m/20))
+        dss = 1.0/(1 + numpy.exp(-5/6 - V_m/6))
+        taud = (1 - numpy.exp(-5/6 - V_m/6))*dss/(0.17500000000000002 +\
+            0.035*V_m)
+        tauf = 1.0/(0.02 + 0.0197*numpy.exp(-((0.48865000000000003 +\
+            0.0337*V_m)*(0.48865000000000003 + 0.0337*V_m))))
+        dy[10] = (-d + dss)/taud
+        dy[11] = (-f + fss)/tauf
+        dy[12] = -0.0119*f_Ca_Bj + 1.7*(1 - f_Ca_Bj)*Ca_j
+        dy[13] = -0.0119*f_Ca_Bsl + 1.7*(1 - f_Ca_Bsl)*Ca_sl
         fcaCaMSL = 0
         fcaCaj = 0
         ibarca_j = 4*Frdy*pCa*(-0.341*Cao +\
-            0.341*Ca_j*ufl.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
-            ufl.exp(2*FoRT*V_m))
+            0.341*Ca_j*numpy.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(2*FoRT*V_m))
         ibarca_sl = 4*Frdy*pCa*(-0.341*Cao +\
-            0.341*Ca_sl*ufl.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
-            ufl.exp(2*FoRT*V_m))
+            0.341*Ca_sl*numpy.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(2*FoRT*V_m))
+        ibark = Frdy*pK*(-0.75*Ko +\
+            0.75*K_i*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 + numpy.exp(FoRT*V_m))
         ibarna_j = Frdy*pNa*(-0.75*Nao +\
-            0.75*Na_j*ufl.exp(FoRT*V_m))*FoRT*V_m/(-1 + ufl.exp(FoRT*V_m))
-        ibarna_sl = Frdy*pNa*(0.75*Na_sl*ufl.exp(FoRT*V_m) -\
-            0.75*Nao)*FoRT*V_m/(-1 + ufl.exp(FoRT*V_m))
-        I_Ca_junc = 0.45*Fjunc_CaL*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bj +\
-            fcaCaj)*d*f*ibarca_j
-        I_Ca_sl = 0.45*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bsl +\
-            fcaCaMSL)*Fsl_CaL*d*f*ibarca_sl
-        I_CaNa_junc = 0.45*Fjunc_CaL*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bj\
-            + fcaCaj)*d*f*ibarna_j
-        I_CaNa_sl = 0.45*ufl.elem_pow(Q10CaL, Qpow)*(1 - f_Ca_Bsl +\
-            fcaCaMSL)*Fsl_CaL*d*f*ibarna_sl
+            0.75*Na_j*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(FoRT*V_m))
+        ibarna_sl = Frdy*pNa*(-0.75*Nao +\
+            0.75*Na_sl*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(FoRT*V_m))
+        I_Ca_junc = 0.45*Fjunc_CaL*numpy.power(Q10CaL, Qpow)*(1 + fcaCaj -\
+            f_Ca_Bj)*d*f*ibarca_j
+        I_Ca_sl = 0.45*numpy.power(Q10CaL, Qpow)*(1 + fcaCaMSL -\
+            f_Ca_Bsl)*Fsl_CaL*d*f*ibarca_sl
+        I_CaK = 0.45*numpy.power(Q10CaL, Qpow)*(Fjunc_CaL*(1 + fcaCaj -\
+            f_Ca_Bj) + (1 + fcaCaMSL - f_Ca_Bsl)*Fsl_CaL)*d*f*ibark
+        I_CaNa_junc = 0.45*Fjunc_CaL*numpy.power(Q10CaL, Qpow)*(1 + fcaCaj -\
+            f_Ca_Bj)*d*f*ibarna_j
+        I_CaNa_sl = 0.45*numpy.power(Q10CaL, Qpow)*(1 + fcaCaMSL -\
+            f_Ca_Bsl)*Fsl_CaL*d*f*ibarna_sl
 
         # Expressions for the I_NCX component
         Ka_junc = 1.0/(1 + (Kdact*Kdact)/(Ca_j*Ca_j))
         Ka_sl = 1.0/(1 + (Kdact*Kdact)/(Ca_sl*Ca_sl))
-        s1_junc = Cao*(Na_j*Na_j*Na_j)*ufl.exp(nu*FoRT*V_m)
-        s1_sl = Cao*(Na_sl*Na_sl*Na_sl)*ufl.exp(nu*FoRT*V_m)
-        s2_junc = (Nao*Nao*Nao)*Ca_j*ufl.exp((-1 + nu)*FoRT*V_m)
-        s3_junc = KmCao*(Na_j*Na_j*Na_j) + (Nao*Nao*Nao)*Ca_j +\
-            Cao*(Na_j*Na_j*Na_j) + KmCai*(Nao*Nao*Nao)*(1 +\
+        s1_junc = Cao*(Na_j*Na_j*Na_j)*numpy.exp(nu*FoRT*V_m)
+        s1_sl = Cao*(Na_sl*Na_sl*Na_sl)*numpy.exp(nu*FoRT*V_m)
+        s2_junc = (Nao*Nao*Nao)*Ca_j*numpy.exp((-1 + nu)*FoRT*V_m)
+        s3_junc = Cao*(Na_j*Na_j*Na_j) + KmCao*(Na_j*Na_j*Na_j) +\
+            (Nao*Nao*Nao)*Ca_j + KmCai*(Nao*Nao*Nao)*(1 +\
             (Na_j*Na_j*Na_j)/(KmNai*KmNai*KmNai)) + (KmNao*KmNao*KmNao)*(1 +\
             Ca_j/KmCai)*Ca_j
-        s2_sl = (Nao*Nao*Nao)*Ca_sl*ufl.exp((-1 + nu)*FoRT*V_m)
-        s3_sl = KmCai*(Nao*Nao*Nao)*(1 +\
-            (Na_sl*Na_sl*Na_sl)/(KmNai*KmNai*KmNai)) + (Nao*Nao*Nao)*Ca_sl +\
-            (KmNao*KmNao*KmNao)*(1 + Ca_sl/KmCai)*Ca_sl +\
-            Cao*(Na_sl*Na_sl*Na_sl) + KmCao*(Na_sl*Na_sl*Na_sl)
-        I_ncx_junc = Fjunc*IbarNCX*ufl.elem_pow(Q10NCX, Qpow)*(-s2_junc +\
-            s1_junc)*Ka_junc/((1 + ksat*ufl.exp((-1 + nu)*FoRT*V_m))*s3_junc)
-        I_ncx_sl = IbarNCX*ufl.elem_pow(Q10NCX, Qpow)*(-s2_sl +\
-            s1_sl)*Fsl*Ka_sl/((1 + ksat*ufl.exp((-1 + nu)*FoRT*V_m))*s3_sl)
+        s2_sl = (Nao*Nao*Nao)*Ca_sl*numpy.exp((-1 + nu)*FoRT*V_m)
+        s3_sl = Cao*(Na_sl*Na_sl*Na_sl) + KmCao*(Na_sl*Na_sl*Na_sl) +\
+            (Nao*Nao*Nao)*Ca_sl + KmCai*(Nao*Nao*Nao)*(1 +\
+            (Na_sl*Na_sl*Na_sl)/(KmNai*KmNai*KmNai)) + (KmNao*KmNao*KmNao)*(1 +\
+            Ca_sl/KmCai)*Ca_sl
+        I_ncx_junc = Fjunc*IbarNCX*numpy.power(Q10NCX, Qpow)*(-s2_junc +\
+            s1_junc)*Ka_junc/((1 + ksat*numpy.exp((-1 +\
+            nu)*FoRT*V_m))*s3_junc)
+        I_ncx_sl = IbarNCX*numpy.power(Q10NCX, Qpow)*(-s2_sl +\
+            s1_sl)*Fsl*Ka_sl/((1 + ksat*numpy.exp((-1 + nu)*FoRT*V_m))*s3_sl)
 
         # Expressions for the I_PCa component
-        I_pca_junc = Fjunc*IbarSLCaP*ufl.elem_pow(Q10SLCaP,\
-            Qpow)*ufl.elem_pow(Ca_j, 1.6)/(ufl.elem_pow(Ca_j, 1.6) +\
-            ufl.elem_pow(KmPCa, 1.6))
-        I_pca_sl = IbarSLCaP*ufl.elem_pow(Q10SLCaP, Qpow)*ufl.elem_pow(Ca_sl,\
-            1.6)*Fsl/(ufl.elem_pow(Ca_sl, 1.6) + ufl.elem_pow(KmPCa, 1.6))
+        I_pca_junc = Fjunc*IbarSLCaP*numpy.power(Q10SLCaP,\
+            Qpow)*numpy.power(Ca_j, 1.6)/(numpy.power(KmPCa, 1.6) +\
+            numpy.power(Ca_j, 1.6))
+        I_pca_sl = IbarSLCaP*numpy.power(Q10SLCaP, Qpow)*numpy.power(Ca_sl,\
+            1.6)*Fsl/(numpy.power(KmPCa, 1.6) + numpy.power(Ca_sl, 1.6))
 
         # Expressions for the I_CaBK component
         I_cabk_junc = Fjunc*GCaB*(-eca_junc + V_m)
         I_cabk_sl = GCaB*(-eca_sl + V_m)*Fsl
 
         # Expressions for the SR Fluxes component
-        kCaSR = MaxSR - (-MinSR + MaxSR)/(1 + ufl.elem_pow(ec50SR/Ca_sr, 2.5))
+        kCaSR = MaxSR - (MaxSR - MinSR)/(1 + numpy.power(ec50SR/Ca_sr, 2.5))
         koSRCa = koCa/kCaSR
         kiSRCa = kiCa*kCaSR
-        RI = 1 - Ry_Ro - Ry_Ri - Ry_Rr
-        F_expressions[15] = -(Ca_j*Ca_j)*Ry_Rr*koSRCa + kom*Ry_Ro + kim*RI -\
+        RI = 1 - Ry_Ri - Ry_Ro - Ry_Rr
+        dy[16] = kim*RI + kom*Ry_Ro - (Ca_j*Ca_j)*Ry_Rr*koSRCa -\
             Ca_j*Ry_Rr*kiSRCa
-        F_expressions[14] = -kom*Ry_Ro - Ca_j*Ry_Ro*kiSRCa + kim*Ry_Ri +\
-            (Ca_j*Ca_j)*Ry_Rr*koSRCa
-        F_expressions[13] = -kim*Ry_Ri + Ca_j*Ry_Ro*kiSRCa - kom*Ry_Ri +\
-            (Ca_j*Ca_j)*RI*koSRCa
-        J_SRCarel = ks*(Ca_sr - Ca_j)*Ry_Ro
-        J_serca = Vmax_SRCaP*ufl.elem_pow(Q10SRCaP,\
-            Qpow)*(-ufl.elem_pow(Ca_sr/Kmr, hillSRCaP) +\
-            ufl.elem_pow(Ca_i/Kmf, hillSRCaP))/(1 + ufl.elem_pow(Ca_sr/Kmr,\
-            hillSRCaP) + ufl.elem_pow(Ca_i/Kmf, hillSRCaP))
+        dy[15] = kim*Ry_Ri - kom*Ry_Ro + (Ca_j*Ca_j)*Ry_Rr*koSRCa -\
+            Ca_j*Ry_Ro*kiSRCa
+        dy[14] = -kim*Ry_Ri - kom*Ry_Ri + (Ca_j*Ca_j)*RI*koSRCa +\
+            Ca_j*Ry_Ro*kiSRCa
+        J_SRCarel = ks*(-Ca_j + Ca_sr)*Ry_Ro
+        J_serca = Vmax_SRCaP*numpy.power(Q10SRCaP,\
+            Qpow)*(numpy.power(Ca_i/Kmf, hillSRCaP) - numpy.power(Ca_sr/Kmr,\
+            hillSRCaP))/(1 + numpy.power(Ca_i/Kmf, hillSRCaP) +\
+            numpy.power(Ca_sr/Kmr, hillSRCaP))
         J_SRleak = 5.348e-06*Ca_sr - 5.348e-06*Ca_j
 
         # Expressions for the Na Buffers component
-        F_expressions[16] = -koff_na*Na_Bj + kon_na*(-Na_Bj + Bmax_Naj)*Na_j
-        F_expressions[17] = kon_na*(-Na_Bsl + Bmax_Nasl)*Na_sl - koff_na*Na_Bsl
+        dy[17] = -koff_na*Na_Bj + kon_na*(Bmax_Naj - Na_Bj)*Na_j
+        dy[18] = -koff_na*Na_Bsl + kon_na*(Bmax_Nasl - Na_Bsl)*Na_sl
 
         # Expressions for the Cytosolic Ca Buffers component
-        F_expressions[24] = kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i -\
-            koff_tncl*Tn_CL
-        F_expressions[22] = -koff_tnchca*Tn_CHc + kon_tnchca*(-Tn_CHc +\
-            Bmax_TnChigh - Tn_CHm)*Ca_i
-        F_expressions[23] = Mgi*kon_tnchmg*(-Tn_CHc + Bmax_TnChigh - Tn_CHm)\
-            - koff_tnchmg*Tn_CHm
-        F_expressions[18] = kon_cam*(-CaM + Bmax_CaM)*Ca_i - koff_cam*CaM
-        F_expressions[19] = -koff_myoca*Myo_c + kon_myoca*(-Myo_c +\
-            Bmax_myosin - Myo_m)*Ca_i
-        F_expressions[20] = Mgi*kon_myomg*(-Myo_c + Bmax_myosin - Myo_m) -\
-            koff_myomg*Myo_m
-        F_expressions[21] = kon_sr*(Bmax_SR - SRB)*Ca_i - koff_sr*SRB
-        J_CaB_cytosol = -koff_tnchca*Tn_CHc - koff_myoca*Myo_c +\
-            Mgi*kon_myomg*(-Myo_c + Bmax_myosin - Myo_m) +\
-            Mgi*kon_tnchmg*(-Tn_CHc + Bmax_TnChigh - Tn_CHm) -\
-            koff_tnchmg*Tn_CHm + kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i +\
-            kon_sr*(Bmax_SR - SRB)*Ca_i - koff_myomg*Myo_m + kon_cam*(-CaM +\
-            Bmax_CaM)*Ca_i - koff_cam*CaM - koff_tncl*Tn_CL +\
-            kon_myoca*(-Myo_c + Bmax_myosin - Myo_m)*Ca_i +\
-            kon_tnchca*(-Tn_CHc + Bmax_TnChigh - Tn_CHm)*Ca_i - koff_sr*SRB
+        dy[25] = -koff_tncl*Tn_CL + kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i
+        dy[23] = -koff_tnchca*Tn_CHc + kon_tnchca*(Bmax_TnChigh - Tn_CHc -\
+            Tn_CHm)*Ca_i
+        dy[24] = -koff_tnchmg*Tn_CHm + Mgi*kon_tnchmg*(Bmax_TnChigh - Tn_CHc\
+            - Tn_CHm)
+        dy[19] = -koff_cam*CaM + kon_cam*(Bmax_CaM - CaM)*Ca_i
+        dy[20] = -koff_myoca*Myo_c + kon_myoca*(Bmax_myosin - Myo_c -\
+            Myo_m)*Ca_i
+        dy[21] = -koff_myomg*Myo_m + Mgi*kon_myomg*(Bmax_myosin - Myo_c -\
+            Myo_m)
+        dy[22] = -koff_sr*SRB + kon_sr*(Bmax_SR - SRB)*Ca_i
+        J_CaB_cytosol = -koff_cam*CaM - koff_myoca*Myo_c - koff_myomg*Myo_m -\
+            koff_sr*SRB - koff_tnchca*Tn_CHc - koff_tnchmg*Tn_CHm -\
+            koff_tncl*Tn_CL + Mgi*kon_myomg*(Bmax_myosin - Myo_c - Myo_m) +\
+            Mgi*kon_tnchmg*(Bmax_TnChigh - Tn_CHc - Tn_CHm) +\
+            kon_cam*(Bmax_CaM - CaM)*Ca_i + kon_myoca*(Bmax_myosin - Myo_c -\
+            Myo_m)*Ca_i + kon_sr*(Bmax_SR - SRB)*Ca_i +\
+            kon_tnchca*(Bmax_TnChigh - Tn_CHc - Tn_CHm)*Ca_i +\
+            kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i
 
         # Expressions for the Junctional and SL Ca Buffers component
         Bmax_SLlowsl = Bmax_SLlowsl0*Vmyo/Vsl
         Bmax_SLlowj = Bmax_SLlowj0*Vmyo/Vjunc
         Bmax_SLhighsl = Bmax_SLhighsl0*Vmyo/Vsl
         Bmax_SLhighj = Bmax_SLhighj0*Vmyo/Vjunc
-        F_expressions[27] = kon_sll*(Bmax_SLlowj - SLL_j)*Ca_j - koff_sll*SLL_j
-        F_expressions[28] = kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl -\
-            koff_sll*SLL_sl
-        F_expressions[25] = kon_slh*(Bmax_SLhighj - SLH_j)*Ca_j -\
-            koff_slh*SLH_j
-        F_expressions[26] = kon_slh*(-SLH_sl + Bmax_SLhighsl)*Ca_sl -\
-            koff_slh*SLH_sl
-        J_CaB_junction = kon_slh*(Bmax_SLhighj - SLH_j)*Ca_j +\
-            kon_sll*(Bmax_SLlowj - SLL_j)*Ca_j - koff_slh*SLH_j -\
-            koff_sll*SLL_j
-        J_CaB_sl = kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl + kon_slh*(-SLH_sl\
-            + Bmax_SLhighsl)*Ca_sl - koff_sll*SLL_sl - koff_slh*SLH_sl
+        dy[28] = -koff_sll*SLL_j + kon_sll*(-SLL_j + Bmax_SLlowj)*Ca_j
+        dy[29] = -koff_sll*SLL_sl + kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl
+        dy[26] = -koff_slh*SLH_j + kon_slh*(-SLH_j + Bmax_SLhighj)*Ca_j
+        dy[27] = -koff_slh*SLH_sl + kon_slh*(-SLH_sl + Bmax_SLhighsl)*Ca_sl
+        J_CaB_junction = -koff_slh*SLH_j - koff_sll*SLL_j + kon_slh*(-SLH_j +\
+            Bmax_SLhighj)*Ca_j + kon_sll*(-SLL_j + Bmax_SLlowj)*Ca_j
+        J_CaB_sl = -koff_slh*SLH_sl - koff_sll*SLL_sl + kon_slh*(-SLH_sl +\
+            Bmax_SLhighsl)*Ca_sl + kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl
 
         # Expressions for the SR Ca Concentrations component
         Bmax_Csqn = Bmax_Csqn0*Vmyo/Vsr
-        F_expressions[30] = -koff_csqn*Csqn_b + kon_csqn*(Bmax_Csqn -\
-            Csqn_b)*Ca_sr
-        F_expressions[29] = -kon_csqn*(Bmax_Csqn - Csqn_b)*Ca_sr -\
-            J_SRleak*Vmyo/Vsr + koff_csqn*Csqn_b - J_SRCarel + J_serca
+        dy[31] = -koff_csqn*Csqn_b + kon_csqn*(-Csqn_b + Bmax_Csqn)*Ca_sr
+        dy[30] = -J_SRCarel + koff_csqn*Csqn_b - kon_csqn*(-Csqn_b +\
+            Bmax_Csqn)*Ca_sr - J_SRleak*Vmyo/Vsr + J_serca
 
         # Expressions for the Na Concentrations component
         I_Na_tot_junc = 3*I_nak_junc + 3*I_ncx_junc + I_CaNa_junc + I_Na_junc\
             + I_nabk_junc
-        I_Na_tot_sl = I_Na_sl + I_nabk_sl + 3*I_nak_sl + I_CaNa_sl + 3*I_ncx_sl
-        F_expressions[32] = -Cmem*I_Na_tot_junc/(Frdy*Vjunc) +\
-            J_na_juncsl*(Na_sl - Na_j)/Vjunc - F_expressions[16]
-        F_expressions[33] = -F_expressions[17] + J_na_slmyo*(-Na_sl +\
-            Na_i)/Vsl + J_na_juncsl*(-Na_sl + Na_j)/Vsl -\
-            Cmem*I_Na_tot_sl/(Frdy*Vsl)
-        F_expressions[31] = J_na_slmyo*(Na_sl - Na_i)/Vmyo
+        I_Na_tot_sl = 3*I_nak_sl + 3*I_ncx_sl + I_CaNa_sl + I_Na_sl + I_nabk_sl
+        dy[33] = -dy[17] + J_na_juncsl*(-Na_j + Na_sl)/Vjunc -\
+            Cmem*I_Na_tot_junc/(Frdy*Vjunc)
+        dy[34] = -dy[18] + J_na_juncsl*(-Na_sl + Na_j)/Vsl +\
+            J_na_slmyo*(-Na_sl + Na_i)/Vsl - Cmem*I_Na_tot_sl/(Frdy*Vsl)
+        dy[32] = J_na_slmyo*(-Na_i + Na_sl)/Vmyo
 
         # Expressions for the K Concentration component
-        F_expressions[34] = Constant(0.0)
+        I_K_tot = -2*I_nak + I_CaK + I_ki + I_kp + I_kr + I_ks + I_to
+        dy[35] = 0
 
         # Expressions for the Ca Concentrations component
-        I_Ca_tot_junc = I_pca_junc + I_cabk_junc + I_Ca_junc - 2*I_ncx_junc
-        I_Ca_tot_sl = -2*I_ncx_sl + I_pca_sl + I_cabk_sl + I_Ca_sl
-        F_expressions[36] = J_ca_juncsl*(Ca_sl - Ca_j)/Vjunc +\
-            J_SRCarel*Vsr/Vjunc - J_CaB_junction -\
-            Cmem*I_Ca_tot_junc/(2*Frdy*Vjunc) + J_SRleak*Vmyo/Vjunc
-        F_expressions[37] = -J_CaB_sl + J_ca_juncsl*(Ca_j - Ca_sl)/Vsl -\
-            Cmem*I_Ca_tot_sl/(2*Frdy*Vsl) + J_ca_slmyo*(Ca_i - Ca_sl)/Vsl
-        F_expressions[35] = -J_CaB_cytosol + J_ca_slmyo*(Ca_sl - Ca_i)/Vmyo -\
+        I_Ca_tot_junc = -2*I_ncx_junc + I_Ca_junc + I_cabk_junc + I_pca_junc
+        I_Ca_tot_sl = -2*I_ncx_sl + I_Ca_sl + I_cabk_sl + I_pca_sl
+        dy[37] = -J_CaB_junction + J_ca_juncsl*(-Ca_j + Ca_sl)/Vjunc +\
+            J_SRCarel*Vsr/Vjunc + J_SRleak*Vmyo/Vjunc -\
+            Cmem*I_Ca_tot_junc/(2*Frdy*Vjunc)
+        dy[38] = -J_CaB_sl + J_ca_juncsl*(-Ca_sl + Ca_j)/Vsl +\
+            J_ca_slmyo*(-Ca_sl + Ca_i)/Vsl - Cmem*I_Ca_tot_sl/(2*Frdy*Vsl)
+        dy[36] = -J_CaB_cytosol + J_ca_slmyo*(-Ca_i + Ca_sl)/Vmyo -\
             J_serca*Vsr/Vmyo
 
+        # Expressions for the Membrane potential component
+        i_Stim = 0
+        I_Na_tot = I_Na_tot_junc + I_Na_tot_sl
+        I_Cl_tot = I_ClCa + I_Clbk
+        I_Ca_tot = I_Ca_tot_junc + I_Ca_tot_sl
+        I_tot = I_Ca_tot + I_Cl_tot + I_K_tot + I_Na_tot
+        dy[0] = -i_Stim - I_tot
+
         # Return results
-        return dolfin.as_vector(F_expressions)
+        return dy
 
-    def num_states(self):
-        return 38
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
+        """
+        Advance the states (in place) by a Rush-Larsen step of length dt
+        """
+        # Assign states
+        assert(len(states) == 39)
+        V_m, h, j, m, x_kr, x_ks, x_to_f, x_to_s, y_to_f, y_to_s, d, f,\
+            f_Ca_Bj, f_Ca_Bsl, Ry_Ri, Ry_Ro, Ry_Rr, Na_Bj, Na_Bsl, CaM,\
+            Myo_c, Myo_m, SRB, Tn_CHc, Tn_CHm, Tn_CL, SLH_j, SLH_sl, SLL_j,\
+            SLL_sl, Ca_sr, Csqn_b, Na_i, Na_j, Na_sl, K_i, Ca_i, Ca_j, Ca_sl\
+            = states
+
+        # Assign parameters
+        assert(len(parameters) == 107)
+        Fjunc = parameters[0]
+        Fjunc_CaL = parameters[1]
+        cellLength = parameters[2]
+        cellRadius = parameters[3]
+        GNa = parameters[8]
+        GNaB = parameters[9]
+        IbarNaK = parameters[10]
+        KmKo = parameters[11]
+        KmNaip = parameters[12]
+        gkp = parameters[15]
+        pNaK = parameters[16]
+        epi = parameters[17]
+        GClB = parameters[18]
+        GClCa = parameters[19]
+        KdClCa = parameters[20]
+        Q10CaL = parameters[21]
+        pCa = parameters[22]
+        pK = parameters[23]
+        pNa = parameters[24]
+        IbarNCX = parameters[25]
+        Kdact = parameters[26]
+        KmCai = parameters[27]
+        KmCao = parameters[28]
+        KmNai = parameters[29]
+        KmNao = parameters[30]
+        Q10NCX = parameters[31]
+        ksat = parameters[32]
+        nu = parameters[33]
+        IbarSLCaP = parameters[34]
+        KmPCa = parameters[35]
+        Q10SLCaP = parameters[36]
+        GCaB = parameters[37]
+        Kmf = parameters[38]
+        Kmr = parameters[39]
+        MaxSR = parameters[40]
+        MinSR = parameters[41]
+        Q10SRCaP = parameters[42]
+        Vmax_SRCaP = parameters[43]
+        ec50SR = parameters[44]
+        hillSRCaP = parameters[45]
+        kiCa = parameters[46]
+        kim = parameters[47]
+        koCa = parameters[48]
+        kom = parameters[49]
+        ks = parameters[50]
+        Bmax_Naj = parameters[51]
+        Bmax_Nasl = parameters[52]
+        koff_na = parameters[53]
+        kon_na = parameters[54]
+        Bmax_CaM = parameters[55]
+        Bmax_SR = parameters[56]
+        Bmax_TnChigh = parameters[57]
+        Bmax_TnClow = parameters[58]
+        Bmax_myosin = parameters[59]
+        koff_cam = parameters[60]
+        koff_myoca = parameters[61]
+        koff_myomg = parameters[62]
+        koff_sr = parameters[63]
+        koff_tnchca = parameters[64]
+        koff_tnchmg = parameters[65]
+        koff_tncl = parameters[66]
+        kon_cam = parameters[67]
+        kon_myoca = parameters[68]
+        kon_myomg = parameters[69]
+        kon_sr = parameters[70]
+        kon_tnchca = parameters[71]
+        kon_tnchmg = parameters[72]
+        kon_tncl = parameters[73]
+        Bmax_SLhighj0 = parameters[74]
+        Bmax_SLhighsl0 = parameters[75]
+        Bmax_SLlowj0 = parameters[76]
+        Bmax_SLlowsl0 = parameters[77]
+        koff_slh = parameters[78]
+        koff_sll = parameters[79]
+        kon_slh = parameters[80]
+        kon_sll = parameters[81]
+        Bmax_Csqn0 = parameters[82]
+        J_ca_juncsl = parameters[85]
+        J_ca_slmyo = parameters[86]
+        koff_csqn = parameters[87]
+        kon_csqn = parameters[88]
+        J_na_juncsl = parameters[91]
+        J_na_slmyo = parameters[92]
+        Nao = parameters[93]
+        Ko = parameters[94]
+        Cao = parameters[95]
+        Cli = parameters[96]
+        Clo = parameters[97]
+        Mgi = parameters[98]
+        Cmem = parameters[99]
+        Frdy = parameters[100]
+        R = parameters[101]
+        Temp = parameters[102]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((31,) + numpy.shape(states)[1:])
+
+        # Expressions for the Geometry component
+        Vcell = 1e-15*numpy.pi*cellLength*(cellRadius*cellRadius)
+        Vmyo = 0.65*Vcell
+        Vsr = 0.035*Vcell
+        Vsl = 0.02*Vcell
+        Vjunc = 0.0005390000000000001*Vcell
+        Fsl = 1 - Fjunc
+        Fsl_CaL = 1 - Fjunc_CaL
+
+        # Expressions for the Reversal potentials component
+        FoRT = Frdy/(R*Temp)
+        ena_junc = numpy.log(Nao/Na_j)/FoRT
+        ena_sl = numpy.log(Nao/Na_sl)/FoRT
+        ek = numpy.log(Ko/K_i)/FoRT
+        eca_junc = numpy.log(Cao/Ca_j)/(2*FoRT)
+        eca_sl = numpy.log(Cao/Ca_sl)/(2*FoRT)
+        ecl = numpy.log(Cli/Clo)/FoRT
+        Qpow = -31 + Temp/10
+
+        # Expressions for the I_Na component
+        mss = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V_m))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V_m)))
+        taum = 0.1292*numpy.exp(-((2.9465894465894467 +\
+            0.06435006435006435*V_m)*(2.9465894465894467 +\
+            0.06435006435006435*V_m))) +\
+            0.06487*numpy.exp(-((-0.09434663536776214 +\
+            0.019561815336463225*V_m)*(-0.09434663536776214 +\
+            0.019561815336463225*V_m)))
+        ah = numpy.where((V_m >= -40), 0,\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V_m))
+        bh = numpy.where((V_m >= -40), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V_m)),\
+            310000.0*numpy.exp(0.3485*V_m) + 2.7*numpy.exp(0.079*V_m))
+        tauh = 1.0/(ah + bh)
+        hss = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m)))
+        aj = numpy.where((V_m >= -40), 0, (37.78 +\
+            V_m)*(-25428.0*numpy.exp(0.2444*V_m) -\
+            6.948e-06*numpy.exp(-0.04391*V_m))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V_m)))
+        bj = numpy.where((V_m >= -40), 0.6*numpy.exp(0.057*V_m)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V_m)),\
+            0.02424*numpy.exp(-0.01052*V_m)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V_m)))
+        tauj = 1.0/(aj + bj)
+        jss = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V_m)))
+        dy[3] = (-m + mss)/taum
+        linearized[2] = -1/(0.1292*numpy.exp(-((2.9465894465894467 +\
+            0.06435006435006435*V_m)*(2.9465894465894467 +\
+            0.06435006435006435*V_m))) +\
+            0.06487*numpy.exp(-((-0.09434663536776214 +\
+            0.019561815336463225*V_m)*(-0.09434663536776214 +\
+            0.019561815336463225*V_m))))
+        dy[1] = (-h + hss)/tauh
+        linearized[0] = -numpy.where((V_m >= -40), 0,\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V_m)) -\
+            numpy.where((V_m >= -40), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V_m)),\
+            310000.0*numpy.exp(0.3485*V_m) + 2.7*numpy.exp(0.079*V_m))
+        dy[2] = (-j + jss)/tauj
+        linearized[1] = -numpy.where((V_m >= -40), 0, (37.78 +\
+            V_m)*(-25428.0*numpy.exp(0.2444*V_m) -\
+            6.948e-06*numpy.exp(-0.04391*V_m))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V_m))) - numpy.where((V_m >=\
+            -40), 0.6*numpy.exp(0.057*V_m)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V_m)),\
+            0.02424*numpy.exp(-0.01052*V_m)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V_m)))
+        I_Na_junc = Fjunc*GNa*(m*m*m)*(-ena_junc + V_m)*h*j
+        I_Na_sl = GNa*(m*m*m)*(-ena_sl + V_m)*Fsl*h*j
+
+        # Expressions for the I_NaBK component
+        I_nabk_junc = Fjunc*GNaB*(-ena_junc + V_m)
+        I_nabk_sl = GNaB*(-ena_sl + V_m)*Fsl
+
+        # Expressions for the I_NaK component
+        sigma = -1/7 + numpy.exp(0.01485884101040119*Nao)/7
+        fnak = 1.0/(1 + 0.1245*numpy.exp(-0.1*FoRT*V_m) +\
+            0.0365*numpy.exp(-FoRT*V_m)*sigma)
+        I_nak_junc = Fjunc*IbarNaK*Ko*fnak/((1 + numpy.power(KmNaip,\
+            4)/numpy.power(Na_j, 4))*(KmKo + Ko))
+        I_nak_sl = IbarNaK*Ko*Fsl*fnak/((1 + numpy.power(KmNaip,\
+            4)/numpy.power(Na_sl, 4))*(KmKo + Ko))
+        I_nak = I_nak_junc + I_nak_sl
+
+        # Expressions for the I_Kr component
+        gkr = 0.015061601901917732*numpy.sqrt(Ko)
+        xrss = 1.0/(1 + numpy.exp(-2 - V_m/5))
+        tauxr = 230/(1 + numpy.exp(2 + V_m/20)) + 3300/((1 + numpy.exp(-22/9 -\
+            V_m/9))*(1 + numpy.exp(11/9 + V_m/9)))
+        dy[4] = (-x_kr + xrss)/tauxr
+        linearized[3] = -1/(230/(1 + numpy.exp(2 + V_m/20)) + 3300/((1 +\
+            numpy.exp(-22/9 - V_m/9))*(1 + numpy.exp(11/9 + V_m/9))))
+        rkr = 1.0/(1 + numpy.exp(37/12 + V_m/24))
+        I_kr = (-ek + V_m)*gkr*rkr*x_kr
+
+        # Expressions for the I_Kp component
+        kp_kp = 1.0/(1 +\
+            1786.4755653786237*numpy.exp(-0.16722408026755853*V_m))
+        I_kp_junc = Fjunc*gkp*(-ek + V_m)*kp_kp
+        I_kp_sl = gkp*(-ek + V_m)*Fsl*kp_kp
+        I_kp = I_kp_junc + I_kp_sl
+
+        # Expressions for the I_Ks component
+        eks = numpy.log((Ko + Nao*pNaK)/(pNaK*Na_i + K_i))/FoRT
+        gks_junc = 0.0035
+        gks_sl = 0.0035
+        xsss = 1.0/(1 + 0.7659283383646487*numpy.exp(-0.07017543859649122*V_m))
+        tauxs = 990.1/(1 +\
+            0.8415404088681017*numpy.exp(-0.0708215297450425*V_m))
+        dy[5] = (-x_ks + xsss)/tauxs
+        linearized[4] = -0.00100999899000101 -\
+            0.0008499549630018197*numpy.exp(-0.0708215297450425*V_m)
+        I_ks_junc = Fjunc*gks_junc*(x_ks*x_ks)*(-eks + V_m)
+        I_ks_sl = gks_sl*(x_ks*x_ks)*(-eks + V_m)*Fsl
+        I_ks = I_ks_junc + I_ks_sl
+
+        # Expressions for the I_to component
+        GtoSlow = numpy.where((epi == 1), 0.0156, 0.037596)
+        GtoFast = numpy.where((epi == 1), 0.1144, 0.0014039999999999999)
+        xtoss = 1.0/(1 + numpy.exp(19/13 - V_m/13))
+        ytoss = 1.0/(1 + 49.40244910553019*numpy.exp(V_m/5))
+        tauxtos = 0.5 + 9/(1 + numpy.exp(1/5 + V_m/15))
+        tauytos = 30 + 800/(1 + numpy.exp(6 + V_m/10))
+        dy[7] = (-x_to_s + xtoss)/tauxtos
+        linearized[6] = -1/(0.5 + 9/(1 + numpy.exp(1/5 + V_m/15)))
+        dy[9] = (-y_to_s + ytoss)/tauytos
+        linearized[8] = -1/(30 + 800/(1 + numpy.exp(6 + V_m/10)))
+        I_tos = (-ek + V_m)*GtoSlow*x_to_s*y_to_s
+        tauxtof = 0.5 + 8.5*numpy.exp(-((9/10 + V_m/50)*(9/10 + V_m/50)))
+        tauytof = 7 + 85*numpy.exp(-((40 + V_m)*(40 + V_m))/220)
+        dy[6] = (-x_to_f + xtoss)/tauxtof
+        linearized[5] = -1/(0.5 + 8.5*numpy.exp(-((9/10 + V_m/50)*(9/10 +\
+            V_m/50))))
+        dy[8] = (-y_to_f + ytoss)/tauytof
+        linearized[7] = -1/(7 + 85*numpy.exp(-((40 + V_m)*(40 + V_m))/220))
+        I_tof = (-ek + V_m)*GtoFast*x_to_f*y_to_f
+        I_to = I_tof + I_tos
+
+        # Expressions for the I_Ki component
+        aki = 1.02/(1 + 7.35454251046446e-07*numpy.exp(0.2385*V_m - 0.2385*ek))
+        bki = (0.7626240065063081*numpy.exp(0.08032*V_m - 0.08032*ek) +\
+            1.1534056351865558e-16*numpy.exp(0.06175*V_m - 0.06175*ek))/(1 +\
+            0.08677229415769332*numpy.exp(0.5143*ek - 0.5143*V_m))
+        kiss = aki/(aki + bki)
+        I_ki = 0.15061601901917732*numpy.sqrt(Ko)*(-ek + V_m)*kiss
+
+        # Expressions for the I_ClCa component
+        I_ClCa_junc = Fjunc*GClCa*(-ecl + V_m)/(1 + KdClCa/Ca_j)
+        I_ClCa_sl = GClCa*(-ecl + V_m)*Fsl/(1 + KdClCa/Ca_sl)
+        I_ClCa = I_ClCa_junc + I_ClCa_sl
+        I_Clbk = GClB*(-ecl + V_m)
+
+        # Expressions for the I_Ca component
+        fss = 1.0/(1 + numpy.exp(35/9 + V_m/9)) + 0.6/(1 + numpy.exp(5/2 -\
+            V_m/20))
+        dss = 1.0/(1 + numpy.exp(-5/6 - V_m/6))
+        taud = (1 - numpy.exp(-5/6 - V_m/6))*dss/(0.17500000000000002 +\
+            0.035*V_m)
+        tauf = 1.0/(0.02 + 0.0197*numpy.exp(-((0.48865000000000003 +\
+            0.0337*V_m)*(0.48865000000000003 + 0.0337*V_m))))
+        dy[10] = (-d + dss)/taud
+        linearized[9] = -(1 + numpy.exp(-5/6 - V_m/6))*(0.17500000000000002 +\
+            0.035*V_m)/(1 - numpy.exp(-5/6 - V_m/6))
+        dy[11] = (-f + fss)/tauf
+        linearized[10] = -0.02 - 0.0197*numpy.exp(-((0.48865000000000003 +\
+            0.0337*V_m)*(0.48865000000000003 + 0.0337*V_m)))
+        dy[12] = -0.0119*f_Ca_Bj + 1.7*(1 - f_Ca_Bj)*Ca_j
+        linearized[11] = -0.0119 - 1.7*Ca_j
+        dy[13] = -0.0119*f_Ca_Bsl + 1.7*(1 - f_Ca_Bsl)*Ca_sl
+        linearized[12] = -0.0119 - 1.7*Ca_sl
+        fcaCaMSL = 0
+        fcaCaj = 0
+        ibarca_j = 4*Frdy*pCa*(-0.341*Cao +\
+            0.341*Ca_j*numpy.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(2*FoRT*V_m))
+        ibarca_sl = 4*Frdy*pCa*(-0.341*Cao +\
+            0.341*Ca_sl*numpy.exp(2*FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(2*FoRT*V_m))
+        ibark = Frdy*pK*(-0.75*Ko +\
+            0.75*K_i*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 + numpy.exp(FoRT*V_m))
+        ibarna_j = Frdy*pNa*(-0.75*Nao +\
+            0.75*Na_j*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(FoRT*V_m))
+        ibarna_sl = Frdy*pNa*(-0.75*Nao +\
+            0.75*Na_sl*numpy.exp(FoRT*V_m))*FoRT*V_m/(-1 +\
+            numpy.exp(FoRT*V_m))
+        I_Ca_junc = 0.45*Fjunc_CaL*numpy.power(Q10CaL, Qpow)*(1 + fcaCaj -\
+            f_Ca_Bj)*d*f*ibarca_j
+        I_Ca_sl = 0.45*numpy.power(Q10CaL, Qpow)*(1 + fcaCaMSL -\
+            f_Ca_Bsl)*Fsl_CaL*d*f*ibarca_sl
+        I_CaK = 0.45*numpy.power(Q10CaL, Qpow)*(Fjunc_CaL*(1 + fcaCaj -\
+            f_Ca_Bj) + (1 + fcaCaMSL - f_Ca_Bsl)*Fsl_CaL)*d*f*ibark
+        I_CaNa_junc = 0.45*Fjunc_CaL*numpy.power(Q10CaL, Qpow)*(1 + fcaCaj -\
+            f_Ca_Bj)*d*f*ibarna_j
+        I_CaNa_sl = 0.45*numpy.power(Q10CaL, Qpow)*(1 + fcaCaMSL -\
+            f_Ca_Bsl)*Fsl_CaL*d*f*ibarna_sl
+
+        # Expressions for the I_NCX component
+        Ka_junc = 1.0/(1 + (Kdact*Kdact)/(Ca_j*Ca_j))
+        Ka_sl = 1.0/(1 + (Kdact*Kdact)/(Ca_sl*Ca_sl))
+        s1_junc = Cao*(Na_j*Na_j*Na_j)*numpy.exp(nu*FoRT*V_m)
+        s1_sl = Cao*(Na_sl*Na_sl*Na_sl)*numpy.exp(nu*FoRT*V_m)
+        s2_junc = (Nao*Nao*Nao)*Ca_j*numpy.exp((-1 + nu)*FoRT*V_m)
+        s3_junc = Cao*(Na_j*Na_j*Na_j) + KmCao*(Na_j*Na_j*Na_j) +\
+            (Nao*Nao*Nao)*Ca_j + KmCai*(Nao*Nao*Nao)*(1 +\
+            (Na_j*Na_j*Na_j)/(KmNai*KmNai*KmNai)) + (KmNao*KmNao*KmNao)*(1 +\
+            Ca_j/KmCai)*Ca_j
+        s2_sl = (Nao*Nao*Nao)*Ca_sl*numpy.exp((-1 + nu)*FoRT*V_m)
+        s3_sl = Cao*(Na_sl*Na_sl*Na_sl) + KmCao*(Na_sl*Na_sl*Na_sl) +\
+            (Nao*Nao*Nao)*Ca_sl + KmCai*(Nao*Nao*Nao)*(1 +\
+            (Na_sl*Na_sl*Na_sl)/(KmNai*KmNai*KmNai)) + (KmNao*KmNao*KmNao)*(1 +\
+            Ca_sl/KmCai)*Ca_sl
+        I_ncx_junc = Fjunc*IbarNCX*numpy.power(Q10NCX, Qpow)*(-s2_junc +\
+            s1_junc)*Ka_junc/((1 + ksat*numpy.exp((-1 +\
+            nu)*FoRT*V_m))*s3_junc)
+        I_ncx_sl = IbarNCX*numpy.power(Q10NCX, Qpow)*(-s2_sl +\
+            s1_sl)*Fsl*Ka_sl/((1 + ksat*numpy.exp((-1 + nu)*FoRT*V_m))*s3_sl)
+
+        # Expressions for the I_PCa component
+        I_pca_junc = Fjunc*IbarSLCaP*numpy.power(Q10SLCaP,\
+            Qpow)*numpy.power(Ca_j, 1.6)/(numpy.power(KmPCa, 1.6) +\
+            numpy.power(Ca_j, 1.6))
+        I_pca_sl = IbarSLCaP*numpy.power(Q10SLCaP, Qpow)*numpy.power(Ca_sl,\
+            1.6)*Fsl/(numpy.power(KmPCa, 1.6) + numpy.power(Ca_sl, 1.6))
+
+        # Expressions for the I_CaBK component
+        I_cabk_junc = Fjunc*GCaB*(-eca_junc + V_m)
+        I_cabk_sl = GCaB*(-eca_sl + V_m)*Fsl
+
+        # Expressions for the SR Fluxes component
+        kCaSR = MaxSR - (MaxSR - MinSR)/(1 + numpy.power(ec50SR/Ca_sr, 2.5))
+        koSRCa = koCa/kCaSR
+        kiSRCa = kiCa*kCaSR
+        RI = 1 - Ry_Ri - Ry_Ro - Ry_Rr
+        dy[16] = kim*RI + kom*Ry_Ro - (Ca_j*Ca_j)*Ry_Rr*koSRCa -\
+            Ca_j*Ry_Rr*kiSRCa
+        linearized[15] = -kim - kiCa*(MaxSR - (MaxSR - MinSR)/(1 +\
+            numpy.power(ec50SR/Ca_sr, 2.5)))*Ca_j - koCa*(Ca_j*Ca_j)/(MaxSR -\
+            (MaxSR - MinSR)/(1 + numpy.power(ec50SR/Ca_sr, 2.5)))
+        dy[15] = kim*Ry_Ri - kom*Ry_Ro + (Ca_j*Ca_j)*Ry_Rr*koSRCa -\
+            Ca_j*Ry_Ro*kiSRCa
+        linearized[14] = -kom - kiCa*(MaxSR - (MaxSR - MinSR)/(1 +\
+            numpy.power(ec50SR/Ca_sr, 2.5)))*Ca_j
+        dy[14] = -kim*Ry_Ri - kom*Ry_Ri + (Ca_j*Ca_j)*RI*koSRCa +\
+            Ca_j*Ry_Ro*kiSRCa
+        linearized[13] = -kim - kom - koCa*(Ca_j*Ca_j)/(MaxSR - (MaxSR -\
+            MinSR)/(1 + numpy.power(ec50SR/Ca_sr, 2.5)))
+        J_SRCarel = ks*(-Ca_j + Ca_sr)*Ry_Ro
+        J_serca = Vmax_SRCaP*numpy.power(Q10SRCaP,\
+            Qpow)*(numpy.power(Ca_i/Kmf, hillSRCaP) - numpy.power(Ca_sr/Kmr,\
+            hillSRCaP))/(1 + numpy.power(Ca_i/Kmf, hillSRCaP) +\
+            numpy.power(Ca_sr/Kmr, hillSRCaP))
+        J_SRleak = 5.348e-06*Ca_sr - 5.348e-06*Ca_j
+
+        # Expressions for the Na Buffers component
+        dNa_Bj_dt = -koff_na*Na_Bj + kon_na*(Bmax_Naj - Na_Bj)*Na_j
+        dy[17] = -koff_na*Na_Bj + kon_na*(Bmax_Naj - Na_Bj)*Na_j
+        linearized[16] = -koff_na - kon_na*Na_j
+        dNa_Bsl_dt = -koff_na*Na_Bsl + kon_na*(Bmax_Nasl - Na_Bsl)*Na_sl
+        dy[18] = -koff_na*Na_Bsl + kon_na*(Bmax_Nasl - Na_Bsl)*Na_sl
+        linearized[17] = -koff_na - kon_na*Na_sl
+
+        # Expressions for the Cytosolic Ca Buffers component
+        dy[25] = -koff_tncl*Tn_CL + kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i
+        linearized[24] = -koff_tncl - kon_tncl*Ca_i
+        dy[23] = -koff_tnchca*Tn_CHc + kon_tnchca*(Bmax_TnChigh - Tn_CHc -\
+            Tn_CHm)*Ca_i
+        linearized[22] = -koff_tnchca - kon_tnchca*Ca_i
+        dy[24] = -koff_tnchmg*Tn_CHm + Mgi*kon_tnchmg*(Bmax_TnChigh - Tn_CHc\
+            - Tn_CHm)
+        linearized[23] = -koff_tnchmg - Mgi*kon_tnchmg
+        dy[19] = -koff_cam*CaM + kon_cam*(Bmax_CaM - CaM)*Ca_i
+        linearized[18] = -koff_cam - kon_cam*Ca_i
+        dy[20] = -koff_myoca*Myo_c + kon_myoca*(Bmax_myosin - Myo_c -\
+            Myo_m)*Ca_i
+        linearized[19] = -koff_myoca - kon_myoca*Ca_i
+        dy[21] = -koff_myomg*Myo_m + Mgi*kon_myomg*(Bmax_myosin - Myo_c -\
+            Myo_m)
+        linearized[20] = -koff_myomg - Mgi*kon_myomg
+        dy[22] = -koff_sr*SRB + kon_sr*(Bmax_SR - SRB)*Ca_i
+        linearized[21] = -koff_sr - kon_sr*Ca_i
+        J_CaB_cytosol = -koff_cam*CaM - koff_myoca*Myo_c - koff_myomg*Myo_m -\
+            koff_sr*SRB - koff_tnchca*Tn_CHc - koff_tnchmg*Tn_CHm -\
+            koff_tncl*Tn_CL + Mgi*kon_myomg*(Bmax_myosin - Myo_c - Myo_m) +\
+            Mgi*kon_tnchmg*(Bmax_TnChigh - Tn_CHc - Tn_CHm) +\
+            kon_cam*(Bmax_CaM - CaM)*Ca_i + kon_myoca*(Bmax_myosin - Myo_c -\
+            Myo_m)*Ca_i + kon_sr*(Bmax_SR - SRB)*Ca_i +\
+            kon_tnchca*(Bmax_TnChigh - Tn_CHc - Tn_CHm)*Ca_i +\
+            kon_tncl*(Bmax_TnClow - Tn_CL)*Ca_i
+
+        # Expressions for the Junctional and SL Ca Buffers component
+        Bmax_SLlowsl = Bmax_SLlowsl0*Vmyo/Vsl
+        Bmax_SLlowj = Bmax_SLlowj0*Vmyo/Vjunc
+        Bmax_SLhighsl = Bmax_SLhighsl0*Vmyo/Vsl
+        Bmax_SLhighj = Bmax_SLhighj0*Vmyo/Vjunc
+        dy[28] = -koff_sll*SLL_j + kon_sll*(-SLL_j + Bmax_SLlowj)*Ca_j
+        linearized[27] = -koff_sll - kon_sll*Ca_j
+        dy[29] = -koff_sll*SLL_sl + kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl
+        linearized[28] = -koff_sll - kon_sll*Ca_sl
+        dy[26] = -koff_slh*SLH_j + kon_slh*(-SLH_j + Bmax_SLhighj)*Ca_j
+        linearized[25] = -koff_slh - kon_slh*Ca_j
+        dy[27] = -koff_slh*SLH_sl + kon_slh*(-SLH_sl + Bmax_SLhighsl)*Ca_sl
+        linearized[26] = -koff_slh - kon_slh*Ca_sl
+        J_CaB_junction = -koff_slh*SLH_j - koff_sll*SLL_j + kon_slh*(-SLH_j +\
+            Bmax_SLhighj)*Ca_j + kon_sll*(-SLL_j + Bmax_SLlowj)*Ca_j
+        J_CaB_sl = -koff_slh*SLH_sl - koff_sll*SLL_sl + kon_slh*(-SLH_sl +\
+            Bmax_SLhighsl)*Ca_sl + kon_sll*(-SLL_sl + Bmax_SLlowsl)*Ca_sl
+
+        # Expressions for the SR Ca Concentrations component
+        Bmax_Csqn = Bmax_Csqn0*Vmyo/Vsr
+        dy[31] = -koff_csqn*Csqn_b + kon_csqn*(-Csqn_b + Bmax_Csqn)*Ca_sr
+        linearized[29] = -koff_csqn - kon_csqn*Ca_sr
+        dy[30] = -J_SRCarel + koff_csqn*Csqn_b - kon_csqn*(-Csqn_b +\
+            Bmax_Csqn)*Ca_sr - J_SRleak*Vmyo/Vsr + J_serca
+
+        # Expressions for the Na Concentrations component
+        I_Na_tot_junc = 3*I_nak_junc + 3*I_ncx_junc + I_CaNa_junc + I_Na_junc\
+            + I_nabk_junc
+        I_Na_tot_sl = 3*I_nak_sl + 3*I_ncx_sl + I_CaNa_sl + I_Na_sl + I_nabk_sl
+        dy[33] = -dNa_Bj_dt + J_na_juncsl*(-Na_j + Na_sl)/Vjunc -\
+            Cmem*I_Na_tot_junc/(Frdy*Vjunc)
+        dy[34] = -dNa_Bsl_dt + J_na_juncsl*(-Na_sl + Na_j)/Vsl +\
+            J_na_slmyo*(-Na_sl + Na_i)/Vsl - Cmem*I_Na_tot_sl/(Frdy*Vsl)
+        dy[32] = J_na_slmyo*(-Na_i + Na_sl)/Vmyo
+        linearized[30] =\
+            -1538461538461538.2*J_na_slmyo/(numpy.pi*cellLength*(cellRadius*cellRadius))
+
+        # Expressions for the K Concentration component
+        I_K_tot = -2*I_nak + I_CaK + I_ki + I_kp + I_kr + I_ks + I_to
+        dy[35] = 0
+
+        # Expressions for the Ca Concentrations component
+        I_Ca_tot_junc = -2*I_ncx_junc + I_Ca_junc + I_cabk_junc + I_pca_junc
+        I_Ca_tot_sl = -2*I_ncx_sl + I_Ca_sl + I_cabk_sl + I_pca_sl
+        dy[37] = -J_CaB_junction + J_ca_juncsl*(-Ca_j + Ca_sl)/Vjunc +\
+            J_SRCarel*Vsr/Vjunc + J_SRleak*Vmyo/Vjunc -\
+            Cmem*I_Ca_tot_junc/(2*Frdy*Vjunc)
+        dy[38] = -J_CaB_sl + J_ca_juncsl*(-Ca_sl + Ca_j)/Vsl +\
+            J_ca_slmyo*(-Ca_sl + Ca_i)/Vsl - Cmem*I_Ca_tot_sl/(2*Frdy*Vsl)
+        dy[36] = -J_CaB_cytosol + J_ca_slmyo*(-Ca_i + Ca_sl)/Vmyo -\
+            J_serca*Vsr/Vmyo
+
+        # Expressions for the Membrane potential component
+        i_Stim = 0
+        I_Na_tot = I_Na_tot_junc + I_Na_tot_sl
+        I_Cl_tot = I_ClCa + I_Clbk
+        I_Ca_tot = I_Ca_tot_junc + I_Ca_tot_sl
+        I_tot = I_Ca_tot + I_Cl_tot + I_K_tot + I_Na_tot
+        dy[0] = -i_Stim - I_tot
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17,\
+            18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 31, 32]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
 
     def __str__(self):
         return 'Grandi_pasqualini_bers_2010 cardiac cell model'
@@ -1,10 +1,10 @@
-
 """This module contains a Tentusscher_2004_mcell_cont cardiac cell model
 
 The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -99,6 +99,39 @@ class Tentusscher_2004_mcell_cont(CardiacCellModel):
         """
         Original gotran transmembrane current dV/dt
         """
+        return self._I_and_F(v, s, time)[0]
+
+    def I(self, v, s, time=None):
+        """
+        Transmembrane current
+
+           I = -dV/dt
+
+        """
+        return -self._I(v, s, time)
+
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
 
         # Assign states
@@ -128,11 +161,25 @@ class Tentusscher_2004_mcell_cont(CardiacCellModel):
         K_pCa = self._parameters["K_pCa"]
         g_pCa = self._parameters["g_pCa"]
         g_pK = self._parameters["g_pK"]
+        Buf_c = self._parameters["Buf_c"]
+        Buf_sr = self._parameters["Buf_sr"]
         Ca_o = self._parameters["Ca_o"]
+        K_buf_c = self._parameters["K_buf_c"]
+        K_buf_sr = self._parameters["K_buf_sr"]
+        K_up = self._parameters["K_up"]
+        V_leak = self._parameters["V_leak"]
+        V_sr = self._parameters["V_sr"]
+        Vmax_up = self._parameters["Vmax_up"]
+        a_rel = self._parameters["a_rel"]
+        b_rel = self._parameters["b_rel"]
+        c_rel = self._parameters["c_rel"]
+        tau_g = self._parameters["tau_g"]
         Na_o = self._parameters["Na_o"]
+        Cm = self._parameters["Cm"]
         F = self._parameters["F"]
         R = self._parameters["R"]
         T = self._parameters["T"]
+        V_c = self._parameters["V_c"]
         stim_amplitude = self._parameters["stim_amplitude"]
         stim_duration = self._parameters["stim_duration"]
         stim_start = self._parameters["stim_start"]
@@ -140,82 +187,169 @@ class Tentusscher_2004_mcell_cont(CardiacCellModel):
 
         # Init return args
         current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*16
 
-        # Expressions for the Reversal potentials component
-        E_Na = R*T*ufl.ln(Na_o/Na_i)/F
-        E_K = R*T*ufl.ln(K_o/K_i)/F
-        E_Ks = R*T*ufl.ln((Na_o*P_kna + K_o)/(K_i + P_kna*Na_i))/F
-        E_Ca = 0.5*R*T*ufl.ln(Ca_o/Ca_i)/F
-
-        # Expressions for the Inward rectifier potassium current component
-        alpha_K1 = 0.1/(1 + 6.14421235333e-06*ufl.exp(-0.06*E_K + 0.06*V))
-        beta_K1 = (3.06060402008*ufl.exp(0.0002*V - 0.0002*E_K) +\
-            0.367879441171*ufl.exp(0.1*V - 0.1*E_K))/(1 + ufl.exp(0.5*E_K -\
-            0.5*V))
-        xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
-        i_K1 = 0.430331482912*g_K1*ufl.sqrt(K_o)*(-E_K + V)*xK1_inf
-
-        # Expressions for the Rapid time dependent potassium current component
-        i_Kr = 0.430331482912*g_Kr*ufl.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
-
-        # Expressions for the Slow time dependent potassium current component
-        i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
-
-        # Expressions for the Fast sodium current component
-        i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
-
-        # Expressions for the Sodium background current component
-        i_b_Na = g_bna*(-E_Na + V)
-
-        # Expressions for the L_type Ca current component
-        i_CaL = 4*g_CaL*(F*F)*(Ca_i*ufl.exp(2*F*V/(R*T)) -\
-            0.341*Ca_o)*V*d*f*fCa/(R*T*(-1 + ufl.exp(2*F*V/(R*T))))
-
-        # Expressions for the Calcium background current component
-        i_b_Ca = g_bca*(-E_Ca + V)
-
-        # Expressions for the Transient outward current component
-        i_to = g_to*(-E_K + V)*r*s
-
-        # Expressions for the Sodium potassium pump current component
-        i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
-            0.0353*ufl.exp(-F*V/(R*T)) + 0.1245*ufl.exp(-0.1*F*V/(R*T))))
-
-        # Expressions for the Sodium calcium exchanger current component
-        i_NaCa = K_NaCa*(-alpha*(Na_o*Na_o*Na_o)*Ca_i*ufl.exp(F*(-1 +\
-            gamma)*V/(R*T)) +\
-            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(F*gamma*V/(R*T)))/((1 +\
-            K_sat*ufl.exp(F*(-1 + gamma)*V/(R*T)))*(Km_Ca +\
-            Ca_o)*((Na_o*Na_o*Na_o) + (Km_Nai*Km_Nai*Km_Nai)))
-
-        # Expressions for the Calcium pump current component
-        i_p_Ca = g_pCa*Ca_i/(Ca_i + K_pCa)
-
-        # Expressions for the Potassium pump current component
-        i_p_K = g_pK*(-E_K + V)/(1 + 65.4052157419*ufl.exp(-0.167224080268*V))
-
-        # Expressions for the Membrane component
-        i_Stim = -stim_amplitude*(1 - 1/(1 + ufl.exp(5.0*time -\
-            5.0*stim_start)))/(1 + ufl.exp(5.0*time - 5.0*stim_start -\
-            5.0*stim_duration))
-        current[0] = -i_Ks - i_NaCa - i_CaL - i_b_Na - i_Kr - i_p_Ca - i_to -\
-            i_b_Ca - i_Stim - i_Na - i_p_K - i_NaK - i_K1
+        # Parameter-only expressions
+        cse_1 = 1.0/F
+        cse_2 = R*T*cse_1
+        cse_7 = 1.0/R
+        cse_8 = 1.0/T
+        cse_9 = F*cse_7*cse_8
+        cse_13 = (F*F)
+        cse_17 = (Na_o*Na_o*Na_o)
+        cse_47 = Cm*cse_1/V_c
+        _p0 = -0.5*cse_2
+        _p1 = -cse_2
+        _p2 = -g_bna
+        _p3 = -g_Na
+        _p4 = -cse_9
+        _p5 = K_o*P_NaK/(K_mk + K_o)
+        _p6 = -0.341*Ca_o
+        _p7 = -1 + gamma
+        _p8 = -alpha*cse_17
+        _p9 = K_NaCa/((Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) + cse_17))
+        _p10 = (ufl.sqrt(K_o))
+        _p11 = -5.0*stim_start
+        _p12 = -5.0*stim_duration
+        _p13 = K_o + Na_o*P_kna
+        _p14 = -g_Ks
+        _p15 = -g_pK
+        _p16 = -g_to
+        _p17 = -0.04303314829119352*g_K1
+        _p18 = -0.4303314829119352*g_Kr
+        _p19 = -g_bca
+        _p20 = -g_pCa
+        _p21 = -4*g_CaL*cse_13*cse_7*cse_8
+        _p22 = (K_up*K_up)
+        _p23 = (b_rel*b_rel)
+        _p24 = Buf_sr*K_buf_sr
+        _p25 = V_c/V_sr
+        _p26 = Buf_c*K_buf_c
+        _p27 = g_bca/2
+        _p28 = g_pCa/2
+        _p29 = 2*g_CaL*cse_13*cse_7*cse_8
+        _p30 = -cse_47
+        _p31 = 1.0/tau_g
+
+        # Expressions depending on the states
+        cse_0 = 1.0/(K_pCa + Ca_i)
+        cse_3 = _p0*ufl.ln(Ca_o/Ca_i) + V
+        cse_4 = _p1*ufl.ln(Na_o/Na_i) + V
+        cse_5 = _p2*cse_4
+        cse_6 = _p3*(m*m*m)*cse_4*h*j
+        cse_10 = V*cse_9
+        cse_11 = 0.1*V
+        cse_12 = _p5*Na_i/((K_mNa + Na_i)*(1 + 0.0353*ufl.exp(-cse_10) +\
+            0.1245*ufl.exp(_p4*cse_11)))
+        cse_14 = ufl.exp(2*cse_10)
+        cse_15 = 1.0/(-1 + cse_14)
+        cse_16 = _p6 + Ca_i*cse_14
+        cse_18 = ufl.exp(_p7*cse_10)
+        cse_19 = _p9*(_p8*Ca_i*cse_18 +\
+            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(gamma*cse_10))/(1 + K_sat*cse_18)
+        cse_20 = -cse_19
+        cse_21 = cse_2*ufl.ln(K_o/K_i)
+        cse_22 = -cse_21 + V
+        cse_23 = _p10*cse_22
+        cse_24 = _p11 + 5.0*time
+        cse_25 = 1.0/(1 + 6.14421235332821e-06*ufl.exp(0.06*V - 0.06*cse_21))
+        cse_26 = _p14*(Xs*Xs)*(_p1*ufl.ln(_p13/(P_kna*Na_i + K_i)) + V) +\
+            _p15*cse_22/(1 +\
+            65.40521574193832*ufl.exp(-0.16722408026755853*V)) +\
+            stim_amplitude*(1 - 1/(1 + ufl.exp(cse_24)))/(1 + ufl.exp(_p12 +\
+            cse_24)) + _p16*cse_22*r*s + _p17*cse_23*cse_25/(0.1*cse_25 +\
+            (0.36787944117144233*ufl.exp(-0.1*cse_21 + cse_11) +\
+            3.0606040200802673*ufl.exp(0.0002*V - 0.0002*cse_21))/(1 +\
+            ufl.exp(0.5*cse_21 - 0.5*V))) + _p18*Xr1*Xr2*cse_23
+        current[0] = -cse_12 + _p19*cse_3 + _p20*Ca_i*cse_0 +\
+            _p21*V*cse_15*cse_16*d*f*fCa + cse_20 + cse_26 + cse_5 + cse_6
+        cse_27 = -V/10
+        cse_28 = V/7
+        F_expressions[0] = (1 +\
+            13.581324522578193*ufl.exp(0.08695652173913043*V))*(1 +\
+            ufl.exp(-9/2 + cse_27))*(1.0/(1 + ufl.exp(-26/7 - cse_28)) -\
+            Xr1)/2700
+        F_expressions[7] = (1.0/(1 + ufl.exp(20/7 + cse_28)) - f)/(80 +\
+            165/(1 + ufl.exp(5/2 + cse_27)) + 1125*ufl.exp(-((27 + V)*(27 +\
+            V))/240))
+        cse_29 = V/20
+        cse_30 = -cse_29
+        cse_31 = 1 + ufl.exp(-3 + cse_29)
+        F_expressions[1] = 0.2976190476190476*(1 + ufl.exp(-3 +\
+            cse_30))*(1.0/(1 + ufl.exp(11/3 + V/24)) - Xr2)*cse_31
+        cse_32 = -V/6
+        F_expressions[2] = (ufl.sqrt(1 + ufl.exp(-5/3 + cse_32)))*(1.0/(1 +\
+            ufl.exp(-5/14 - V/14)) - Xs)*cse_31/1100
+        F_expressions[10] = (1.0/(1 + ufl.exp(10/3 + cse_32)) - r)/(0.8 +\
+            9.5*ufl.exp(-((40 + V)*(40 + V))/1800))
+        cse_33 = V/5
+        F_expressions[3] = (1 + ufl.exp(-12 - cse_33))*(1.0/((1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V))) -\
+            m)/(0.1/(1 + ufl.exp(7 + cse_33)) + 0.1/(1 + ufl.exp(-1/4 +\
+            V/200)))
+        F_expressions[6] = (1.0/(1 +\
+            0.513417119032592*ufl.exp(-0.13333333333333333*V)) - d)/(1.0/(1 +\
+            ufl.exp(5/2 + cse_30)) + 1.4*(0.25 + 1.4/(1 + ufl.exp(-35/13 -\
+            V/13)))/(1 + ufl.exp(1 + cse_33)))
+        F_expressions[9] = (1.0/(1 + ufl.exp(4 + cse_33)) - s)/(3 + 5/(1 +\
+            ufl.exp(-4 + cse_33)) + 85*ufl.exp(-((45 + V)*(45 + V))/320))
+        cse_34 = 1.0/((1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V)))
+        cse_35 = 1.0/(1 + 2.3538526683701997e+17*ufl.exp(1.0*V))
+        cse_36 = 1 - cse_35
+        F_expressions[4] = (-h + cse_34)*((310000*ufl.exp(0.3485*V) +\
+            2.7*ufl.exp(0.079*V))*cse_35 + 0.77*cse_36/(0.13 +\
+            0.049758141083938695*ufl.exp(-0.0900900900900901*V)) +\
+            4.4312679295805147e-07*cse_35*ufl.exp(-0.14705882352941177*V))
+        F_expressions[5] = (-j + cse_34)*(0.6*cse_36*ufl.exp(0.057*V)/(1 +\
+            0.040762203978366204*ufl.exp(-cse_11)) +\
+            0.02424*cse_35*ufl.exp(-0.01052*V)/(1 +\
+            0.003960868339904256*ufl.exp(-0.1378*V)) + (37.78 +\
+            V)*(-25428*ufl.exp(0.2444*V) -\
+            6.948e-06*ufl.exp(-0.04391*V))*cse_35/(1 +\
+            50262745825.95399*ufl.exp(0.311*V)))
+        cse_37 = 1.0/(1 +\
+            8.03402376701711e+27*(Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i))
+        cse_38 = -0.9375 + 1250.0*Ca_i
+        cse_39 = 1.0/(1 + ufl.exp(ufl.conditional(ufl.lt(cse_38, 500.0),\
+            cse_38, 500.0)))
+        cse_40 = 10000.0*Ca_i
+        cse_41 = -5.0 + cse_40
+        cse_42 = 1.0/(1 + ufl.exp(ufl.conditional(ufl.lt(cse_41, 500.0),\
+            cse_41, 500.0)))
+        F_expressions[8] = ufl.conditional(ufl.And(ufl.gt(V, -60),\
+            ufl.gt(0.15753424657534246 + 0.0684931506849315*cse_42 +\
+            0.136986301369863*cse_39 + 0.684931506849315*cse_37, fCa)), 0,\
+            0.07876712328767123 - fCa/2 + 0.03424657534246575*cse_42 +\
+            0.0684931506849315*cse_39 + 0.3424657534246575*cse_37)
+        cse_43 = V_leak*(-Ca_i + Ca_SR)
+        cse_44 = Vmax_up/(1 + _p22/(Ca_i*Ca_i))
+        cse_45 = (Ca_SR*Ca_SR)
+        cse_46 = (c_rel + a_rel*cse_45/(_p23 + cse_45))*d*g
+        F_expressions[11] = _p25*(-cse_43 - cse_46 + cse_44)/(1 +\
+            _p24/((K_buf_sr + Ca_SR)*(K_buf_sr + Ca_SR)))
+        F_expressions[12] = (-cse_44 + _p30*(_p27*cse_3 + _p28*Ca_i*cse_0 +\
+            _p29*V*cse_15*cse_16*d*f*fCa + cse_20) + cse_43 + cse_46)/(1 +\
+            _p26/((K_buf_c + Ca_i)*(K_buf_c + Ca_i)))
+        F_expressions[14] = (-3*cse_12 - 3*cse_19 + cse_5 + cse_6)*cse_47
+        F_expressions[15] = (2*cse_12 + cse_26)*cse_47
+        cse_48 = 1.0/(1 + 0.0301973834223185*ufl.exp(cse_40))
+        cse_49 = cse_48/(1 +\
+            5.439910241481018e+20*(Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i))
+        cse_50 = (1 - cse_48)/(1 + 1.9720198874049195e+55*ufl.elem_pow(Ca_i,\
+            16))
+        F_expressions[13] = _p31*(1 - 1.0/((1 + ufl.exp(60 + V))*(1 +\
+            ufl.exp(10.0*cse_49 + 10.0*cse_50 - 10.0*g))))*(-g + cse_49 +\
+            cse_50)
 
         # Return results
-        return current[0]
-
-    def I(self, v, s, time=None):
-        """
-        Transmembrane current
-
-           I = -dV/dt
+        return current[0], dolfin.as_vector(F_expressions)
 
+    def jacobian(self, v, s, time=None):
         """
-        return -self._I(v, s, time)
-
-    def F(self, v, s, time=None):
-        """
-        Right hand side for ODE system
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
         """
         time = time if time else Constant(0.0)
 
@@ -265,131 +399,662 @@ class Tentusscher_2004_mcell_cont(CardiacCellModel):
         R = self._parameters["R"]
         T = self._parameters["T"]
         V_c = self._parameters["V_c"]
-        stim_amplitude = self._parameters["stim_amplitude"]
-        stim_duration = self._parameters["stim_duration"]
-        stim_start = self._parameters["stim_start"]
         K_o = self._parameters["K_o"]
 
         # Init return args
-        F_expressions = [ufl.zero()]*16
+        jacobian = [ufl.zero()]*289
+
+        # Parameter-only expressions
+        cse_0 = -g_bna
+        cse_4 = (F*F*F)
+        cse_5 = 1.0/(R*R)
+        cse_6 = 1.0/(T*T)
+        cse_7 = 1.0/R
+        cse_8 = 1.0/T
+        cse_9 = F*cse_7*cse_8
+        cse_14 = (F*F)
+        cse_19 = 1.0/(K_mk + K_o)
+        cse_27 = 1.0/(Ca_o + Km_Ca)
+        cse_28 = (Na_o*Na_o*Na_o)
+        cse_29 = 1.0/((Km_Nai*Km_Nai*Km_Nai) + cse_28)
+        cse_30 = -1 + gamma
+        cse_36 = F*cse_30*cse_7*cse_8
+        cse_44 = (ufl.sqrt(K_o))
+        cse_49 = 1.0/F
+        cse_50 = R*T*cse_49
+        cse_58 = 0.5*R*T*cse_49
+        cse_227 = 1.0/V_sr
+        cse_228 = Buf_sr*K_buf_sr
+        cse_237 = -V_leak
+        cse_240 = (K_up*K_up)
+        cse_246 = 1.0/V_c
+        cse_247 = Buf_c*K_buf_c
+        cse_253 = Cm*cse_246*cse_49/2
+        cse_254 = 1.0/tau_g
+        cse_279 = Cm*cse_246*cse_49
+        _p0 = -0.341*Ca_o
+        _p1 = 4*g_CaL*cse_14*cse_7*cse_8
+        _p2 = -cse_9
+        _p3 = 0.012450000000000001*cse_9
+        _p4 = K_o*P_NaK*cse_19
+        _p5 = alpha*cse_28
+        _p6 = -cse_36
+        _p7 = F*gamma*cse_7*cse_8
+        _p8 = K_NaCa*cse_27*cse_29
+        _p9 = K_NaCa*K_sat*cse_27*cse_29*cse_36
+        _p10 = 0.4303314829119352*g_Kr*cse_44
+        _p11 = 0.04303314829119352*g_K1*cse_44
+        _p12 = 1.5864288080001357e-08*g_K1*cse_44
+        _p13 = -g_Ks
+        _p14 = -10.937327047146876*g_pK
+        _p15 = 8*cse_4*cse_5*cse_6
+        _p16 = -8*g_CaL*cse_4*cse_5*cse_6
+        _p17 = -g_bca + cse_0
+        _p18 = K_o + Na_o*P_kna
+        _p19 = -cse_50
+        _p20 = 2*g_Ks
+        _p21 = 3*g_Na
+        _p22 = g_bca*cse_58
+        _p23 = K_NaCa*alpha*cse_27*cse_28*cse_29
+        _p24 = R*T*cse_49
+        _p25 = -g_bna
+        _p26 = g_Ks*cse_50
+        _p27 = -P_kna
+        _p28 = Ca_o*K_NaCa*cse_27*cse_29
+        _p29 = -0.5*R*T*cse_49
+        _p30 = V_c*cse_227
+        _p31 = (b_rel*b_rel)
+        _p32 = -2*a_rel
+        _p33 = 2*V_c*cse_227*cse_228
+        _p34 = 2*Vmax_up*cse_240
+        _p35 = 3*Cm*cse_246*cse_49
+        _p36 = -2*Cm*F*cse_246*cse_7*cse_8
+        _p37 = Cm*cse_246*cse_49
+        _p38 = 2*g_CaL*cse_14*cse_7*cse_8
+        _p39 = -4*g_CaL*cse_4*cse_5*cse_6
+        _p40 = 4*g_CaL*cse_4*cse_5*cse_6
+        _p41 = g_bca/2
+        _p42 = 2*Cm*F*g_CaL*cse_246*cse_7*cse_8
+        _p43 = -cse_253
+        _p44 = -cse_58
+        _p45 = -2*K_NaCa*cse_27*cse_29
+        _p46 = 2*cse_247
+        _p47 = 1.0*cse_254
+        _p48 = -cse_279
+
+        # Expressions depending on the states
+        cse_1 = (m*m*m)
+        cse_2 = g_Na*cse_1*h*j
+        cse_3 = -cse_2
+        cse_10 = V*cse_9
+        cse_11 = ufl.exp(2*cse_10)
+        cse_12 = -1 + cse_11
+        cse_13 = 1.0/cse_12
+        cse_15 = _p0 + Ca_i*cse_11
+        cse_16 = _p1*cse_13*cse_15*f*fCa
+        jacobian[7] = -V*cse_16
+        cse_17 = g_CaL*cse_15*f*fCa
+        cse_18 = 1.0/(cse_12*cse_12)
+        cse_20 = K_mNa + Na_i
+        cse_21 = 1.0/cse_20
+        cse_22 = 0.0353*ufl.exp(-cse_10)
+        cse_23 = 0.1*V
+        cse_24 = ufl.exp(_p2*cse_23)
+        cse_25 = 1 + 0.1245*cse_24 + cse_22
+        cse_26 = _p4*(_p3*cse_24 + cse_22*cse_9)*Na_i*cse_21/(cse_25*cse_25)
+        cse_31 = ufl.exp(cse_10*cse_30)
+        cse_32 = 1 + K_sat*cse_31
+        cse_33 = 1.0/cse_32
+        cse_34 = ufl.exp(gamma*cse_10)
+        cse_35 = Ca_o*(Na_i*Na_i*Na_i)*cse_34
+        cse_37 = _p5*Ca_i*cse_31
+        cse_38 = _p8*(_p6*cse_37 + _p7*cse_35)*cse_33
+        cse_39 = -cse_38
+        cse_40 = -cse_37 + cse_35
+        cse_41 = _p9*cse_31*cse_40/(cse_32*cse_32)
+        cse_42 = (Xs*Xs)
+        cse_43 = g_to*r*s
+        cse_45 = _p10*Xr1*Xr2
+        cse_46 = ufl.exp(-0.16722408026755853*V)
+        cse_47 = 1 + 65.40521574193832*cse_46
+        cse_48 = g_pK/cse_47
+        cse_51 = 1.0/K_i
+        cse_52 = ufl.ln(K_o*cse_51)
+        cse_53 = cse_50*cse_52
+        cse_54 = -cse_53 + V
+        cse_55 = ufl.exp(0.06*V - 0.06*cse_53)
+        cse_56 = 1 + 6.14421235332821e-06*cse_55
+        cse_57 = 1.0/cse_56
+        cse_59 = ufl.exp(-0.5*V + cse_52*cse_58)
+        cse_60 = 1 + cse_59
+        cse_61 = 1.0/cse_60
+        cse_62 = ufl.exp(0.0002*V - 0.0002*cse_53)
+        cse_63 = ufl.exp(-0.1*cse_53 + cse_23)
+        cse_64 = 0.36787944117144233*cse_63 + 3.0606040200802673*cse_62
+        cse_65 = 0.1*cse_57 + cse_61*cse_64
+        cse_66 = 1.0/cse_65
+        cse_67 = _p11*cse_57*cse_66
+        cse_68 = 1.0/(cse_56*cse_56)
+        cse_69 = _p12*cse_54*cse_55*cse_66*cse_68
+        cse_70 = _p11*cse_54*cse_57/(cse_65*cse_65)
+        cse_71 = 3.686527411996926e-08*cse_55*cse_68
+        cse_72 = 0.0006121208040160535*cse_62
+        cse_73 = 0.036787944117144235*cse_63
+        cse_74 = cse_59*cse_64/(cse_60*cse_60)
+        cse_75 = -cse_43 - cse_45 - cse_48 - cse_67 + _p13*cse_42 -\
+            (-0.5*cse_74 - (cse_72 + cse_73)*cse_61 + cse_71)*cse_70 +\
+            _p14*cse_46*cse_54/(cse_47*cse_47) + cse_69
+        jacobian[0] = _p17 - cse_26 - cse_16*d +\
+            _p15*V*cse_11*cse_17*cse_18*d + _p16*Ca_i*V*cse_11*cse_13*d*f*fCa\
+            + cse_3 + cse_39 + cse_41 + cse_75
+        cse_76 = _p10*cse_54
+        cse_77 = Xr2*cse_76
+        jacobian[1] = -cse_77
+        cse_78 = Xr1*cse_76
+        jacobian[2] = -cse_78
+        cse_79 = 1.0/(P_kna*Na_i + K_i)
+        cse_80 = _p20*(_p19*ufl.ln(_p18*cse_79) + V)*Xs
+        jacobian[3] = -cse_80
+        cse_81 = 1.0/Na_i
+        cse_82 = _p19*ufl.ln(Na_o*cse_81) + V
+        cse_83 = _p21*(m*m)*cse_82*h*j
+        jacobian[4] = -cse_83
+        cse_84 = g_Na*cse_1*cse_82
+        cse_85 = cse_84*j
+        jacobian[5] = -cse_85
+        cse_86 = cse_84*h
+        jacobian[6] = -cse_86
+        cse_87 = _p1*V*cse_13*cse_15*d
+        jacobian[8] = -cse_87*fCa
+        jacobian[9] = -cse_87*f
+        cse_88 = g_to*cse_54
+        cse_89 = cse_88*r
+        jacobian[10] = -cse_89
+        cse_90 = cse_88*s
+        jacobian[11] = -cse_90
+        cse_91 = K_pCa + Ca_i
+        cse_92 = g_pCa/cse_91
+        cse_93 = g_pCa*Ca_i/(cse_91*cse_91)
+        cse_94 = 1.0/Ca_i
+        cse_95 = _p22*cse_94
+        cse_96 = _p1*V*cse_13*d*f*fCa
+        cse_97 = cse_11*cse_96
+        cse_98 = _p23*cse_31*cse_33
+        jacobian[13] = -cse_92 - cse_95 - cse_97 + cse_93 + cse_98
+        cse_99 = _p24*cse_81
+        cse_100 = _p25*cse_99 - cse_2*cse_99
+        cse_101 = _p26*cse_42*cse_79
+        cse_102 = _p27*cse_101
+        cse_103 = 1.0/cse_25
+        cse_104 = _p4*cse_103*cse_21
+        cse_105 = _p4*Na_i*cse_103/(cse_20*cse_20)
+        cse_106 = _p28*(Na_i*Na_i)*cse_33*cse_34
+        cse_107 = 3*cse_106
+        jacobian[15] = -cse_104 - cse_107 + cse_100 + cse_102 + cse_105
+        cse_108 = _p24*cse_51
+        cse_109 = -cse_101 + cse_108*cse_69 - (cse_108*cse_71 -\
+            (cse_108*cse_72 + cse_108*cse_73)*cse_61 +\
+            _p29*cse_51*cse_74)*cse_70 - cse_108*cse_43 - cse_108*cse_45 -\
+            cse_108*cse_48 - cse_108*cse_67
+        jacobian[16] = cse_109
+        cse_110 = ufl.exp(0.08695652173913043*V)
+        cse_111 = -V/10
+        cse_112 = ufl.exp(-9/2 + cse_111)
+        cse_113 = 1 + cse_112
+        cse_114 = V/7
+        cse_115 = ufl.exp(-26/7 - cse_114)
+        cse_116 = 1 + cse_115
+        cse_117 = 1.0/cse_116 - Xr1
+        cse_118 = 1 + 13.581324522578193*cse_110
+        cse_119 = cse_113*cse_118
+        jacobian[17] = -cse_112*cse_117*cse_118/27000 +\
+            cse_115*cse_119/(18900*(cse_116*cse_116)) +\
+            0.00043740175596065033*cse_110*cse_113*cse_117
+        jacobian[18] = -cse_119/2700
+        cse_120 = V/20
+        cse_121 = ufl.exp(-3 + cse_120)
+        cse_122 = -cse_120
+        cse_123 = ufl.exp(-3 + cse_122)
+        cse_124 = 1 + cse_123
+        cse_125 = ufl.exp(11/3 + V/24)
+        cse_126 = 1 + cse_125
+        cse_127 = 0.014880952380952382/cse_126 - 0.014880952380952382*Xr2
+        cse_128 = 1 + cse_121
+        cse_129 = cse_124*cse_128
+        jacobian[34] = cse_121*cse_124*cse_127 - cse_123*cse_127*cse_128 -\
+            0.01240079365079365*cse_125*cse_129/(cse_126*cse_126)
+        jacobian[36] = -0.2976190476190476*cse_129
+        cse_130 = -V/6
+        cse_131 = ufl.exp(-5/3 + cse_130)
+        cse_132 = (ufl.sqrt(1 + cse_131))
+        cse_133 = ufl.exp(-5/14 - V/14)
+        cse_134 = 1 + cse_133
+        cse_135 = 1.0/cse_134 - Xs
+        cse_136 = cse_128*cse_132
+        jacobian[51] = cse_133*cse_136/(15400*(cse_134*cse_134)) +\
+            cse_121*cse_132*cse_135/22000 -\
+            cse_128*cse_131*cse_135/(13200*cse_132)
+        jacobian[54] = -cse_136/1100
+        cse_137 = V/5
+        cse_138 = ufl.exp(-12 - cse_137)
+        cse_139 = ufl.exp(-0.1107419712070875*V)
+        cse_140 = 1 + 0.0018422115811651339*cse_139
+        cse_141 = 1.0/(cse_140*cse_140) - m
+        cse_142 = ufl.exp(-1/4 + V/200)
+        cse_143 = 1 + cse_142
+        cse_144 = ufl.exp(7 + cse_137)
+        cse_145 = 1 + cse_144
+        cse_146 = 0.1/cse_143 + 0.1/cse_145
+        cse_147 = 1.0/cse_146
+        cse_148 = 1 + cse_138
+        cse_149 = cse_147*cse_148
+        jacobian[68] = -cse_138*cse_141*cse_147/5 +\
+            0.0004080202837575048*cse_139*cse_149/(cse_140*cse_140*cse_140) +\
+            (0.0005*cse_142/(cse_143*cse_143) +\
+            0.020000000000000004*cse_144/(cse_145*cse_145))*cse_141*cse_148/(cse_146*cse_146)
+        jacobian[72] = -cse_149
+        cse_150 = ufl.exp(0.13458950201884254*V)
+        cse_151 = 1 + 15212.593285654404*cse_150
+        cse_152 = 4094.9107094628275*cse_150/(cse_151*cse_151*cse_151)
+        cse_153 = ufl.exp(1.0*V)
+        cse_154 = 1 + 2.3538526683701997e+17*cse_153
+        cse_155 = 1.0/cse_154
+        cse_156 = cse_155*ufl.exp(-0.14705882352941177*V)
+        cse_157 = 4.4312679295805147e-07*cse_156
+        cse_158 = ufl.exp(0.079*V)
+        cse_159 = ufl.exp(0.3485*V)
+        cse_160 = 310000*cse_159 + 2.7*cse_158
+        cse_161 = cse_155*cse_160
+        cse_162 = ufl.exp(-0.0900900900900901*V)
+        cse_163 = 0.13 + 0.049758141083938695*cse_162
+        cse_164 = 1.0/cse_163
+        cse_165 = 1 - cse_155
+        cse_166 = 0.77*cse_164*cse_165
+        jacobian[90] = -cse_157 - cse_161 - cse_166
+        cse_167 = 1.0/(cse_151*cse_151)
+        cse_168 = 1.0/(cse_154*cse_154)
+        cse_169 = 2.3538526683701997e+17*cse_153*cse_168
+        jacobian[85] = (-h + cse_167)*(-6.516570484677227e-08*cse_156 +\
+            (108034.99999999999*cse_159 +\
+            0.21330000000000002*cse_158)*cse_155 - cse_160*cse_169 -\
+            104305518403.06384*cse_168*ufl.exp(0.8529411764705882*V) +\
+            0.003451690867984937*cse_162*cse_165/(cse_163*cse_163) +\
+            1.8124665546450538e+17*cse_153*cse_164*cse_168) - (cse_157 +\
+            cse_161 + cse_166)*cse_152
+        cse_170 = 1 + 0.003960868339904256*ufl.exp(-0.1378*V)
+        cse_171 = 1.0/cse_170
+        cse_172 = cse_155*cse_171*ufl.exp(-0.01052*V)
+        cse_173 = 0.02424*cse_172
+        cse_174 = 1 + 0.040762203978366204*ufl.exp(-cse_23)
+        cse_175 = 1.0/cse_174
+        cse_176 = cse_165*cse_175*ufl.exp(0.057*V)
+        cse_177 = 0.6*cse_176
+        cse_178 = 37.78 + V
+        cse_179 = ufl.exp(0.311*V)
+        cse_180 = 1 + 50262745825.95399*cse_179
+        cse_181 = 1.0/cse_180
+        cse_182 = ufl.exp(-0.04391*V)
+        cse_183 = ufl.exp(0.2444*V)
+        cse_184 = -25428*cse_183 - 6.948e-06*cse_182
+        cse_185 = cse_155*cse_181*cse_184
+        cse_186 = cse_178*cse_185
+        jacobian[108] = -cse_173 - cse_177 - cse_186
+        cse_187 = cse_155*cse_178
+        jacobian[102] = (-j + cse_167)*(0.0342*cse_176 -\
+            0.00025500480000000003*cse_172 + (3.0508668e-07*cse_182 -\
+            6214.6032000000005*cse_183)*cse_181*cse_187 +\
+            1.4123116010221197e+17*cse_168*cse_175*ufl.exp(1.057*V) +\
+            0.002445732238701972*cse_165*ufl.exp(-0.043000000000000003*V)/(cse_174*cse_174)\
+            +\
+            1.323037761146867e-05*cse_155*ufl.exp(-0.14832*V)/(cse_170*cse_170)\
+            - 5705738868129364.0*cse_168*cse_171*ufl.exp(0.98948*V) -\
+            cse_169*cse_178*cse_181*cse_184 -\
+            15631713951.87169*cse_179*cse_184*cse_187/(cse_180*cse_180) +\
+            cse_185) - (cse_173 + cse_177 + cse_186)*cse_152
+        cse_188 = ufl.exp(-0.13333333333333333*V)
+        cse_189 = 1 + 0.513417119032592*cse_188
+        cse_190 = ufl.exp(5/2 + cse_122)
+        cse_191 = 1 + cse_190
+        cse_192 = ufl.exp(1 + cse_137)
+        cse_193 = 1 + cse_192
+        cse_194 = 1.0/cse_193
+        cse_195 = ufl.exp(-35/13 - V/13)
+        cse_196 = 1 + cse_195
+        cse_197 = 0.25 + 1.4/cse_196
+        cse_198 = 1.0/cse_191 + 1.4*cse_194*cse_197
+        cse_199 = 1.0/cse_198
+        jacobian[119] = (1.0/cse_189 - d)*(-cse_190/(20*(cse_191*cse_191)) +\
+            0.27999999999999997*cse_192*cse_197/(cse_193*cse_193) -\
+            0.15076923076923077*cse_194*cse_195/(cse_196*cse_196))/(cse_198*cse_198)\
+            + 0.06845561587101227*cse_188*cse_199/(cse_189*cse_189)
+        jacobian[126] = -cse_199
+        cse_200 = ufl.exp(20/7 + cse_114)
+        cse_201 = 1 + cse_200
+        cse_202 = 1125*ufl.exp(-((27 + V)*(27 + V))/240)
+        cse_203 = ufl.exp(5/2 + cse_111)
+        cse_204 = 1 + cse_203
+        cse_205 = 80 + 165/cse_204 + cse_202
+        cse_206 = 1.0/cse_205
+        jacobian[136] = (1.0/cse_201 - f)*(-(-9/40 - V/120)*cse_202 -\
+            33*cse_203/(2*(cse_204*cse_204)))/(cse_205*cse_205) -\
+            cse_200*cse_206/(7*(cse_201*cse_201))
+        jacobian[144] = -cse_206
+        cse_207 = 1 +\
+            8.03402376701711e+27*(Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i)
+        cse_208 = -0.9375 + 1250.0*Ca_i
+        cse_209 = ufl.exp(ufl.conditional(ufl.lt(cse_208, 500.0), cse_208,\
+            500.0))
+        cse_210 = 1 + cse_209
+        cse_211 = 10000.0*Ca_i
+        cse_212 = -5.0 + cse_211
+        cse_213 = ufl.exp(ufl.conditional(ufl.lt(cse_212, 500.0), cse_212,\
+            500.0))
+        cse_214 = 1 + cse_213
+        jacobian[162] = ufl.conditional(ufl.And(ufl.gt(V, -60),\
+            ufl.gt(0.15753424657534246 + 0.0684931506849315/cse_214 +\
+            0.136986301369863/cse_210 + 0.684931506849315/cse_207, fCa)), 0,\
+            -1/2)
+        jacobian[166] = ufl.conditional(ufl.And(ufl.gt(V, -60),\
+            ufl.gt(0.15753424657534246 + 0.0684931506849315/cse_214 +\
+            0.136986301369863/cse_210 + 0.684931506849315/cse_207, fCa)), 0,\
+            -2.201102401922496e+28*(Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i)/(cse_207*cse_207)\
+            - 0.03424657534246575*ufl.conditional(ufl.lt(cse_212, 500.0),\
+            10000.0, 0)*cse_213/(cse_214*cse_214) -\
+            0.0684931506849315*ufl.conditional(ufl.lt(cse_208, 500.0),\
+            1250.0, 0)*cse_209/(cse_210*cse_210))
+        cse_215 = ufl.exp(4 + cse_137)
+        cse_216 = 1 + cse_215
+        cse_217 = 85*ufl.exp(-((45 + V)*(45 + V))/320)
+        cse_218 = ufl.exp(-4 + cse_137)
+        cse_219 = 1 + cse_218
+        cse_220 = 3 + 5/cse_219 + cse_217
+        cse_221 = 1.0/cse_220
+        jacobian[170] = (1.0/cse_216 - s)*(cse_218/(cse_219*cse_219) - (-9/32 -\
+            V/160)*cse_217)/(cse_220*cse_220) -\
+            cse_215*cse_221/(5*(cse_216*cse_216))
+        jacobian[180] = -cse_221
+        cse_222 = ufl.exp(10/3 + cse_130)
+        cse_223 = 1 + cse_222
+        cse_224 = 9.5*ufl.exp(-((40 + V)*(40 + V))/1800)
+        cse_225 = 0.8 + cse_224
+        cse_226 = 1.0/cse_225
+        jacobian[187] = cse_222*cse_226/(6*(cse_223*cse_223)) - (-2/45 -\
+            V/900)*(1.0/cse_223 - r)*cse_224/(cse_225*cse_225)
+        jacobian[198] = -cse_226
+        cse_229 = K_buf_sr + Ca_SR
+        cse_230 = 1 + cse_228/(cse_229*cse_229)
+        cse_231 = _p30/cse_230
+        cse_232 = (Ca_SR*Ca_SR)
+        cse_233 = _p31 + cse_232
+        cse_234 = a_rel/cse_233
+        cse_235 = c_rel + cse_232*cse_234
+        cse_236 = cse_235*g
+        jacobian[211] = -cse_231*cse_236
+        cse_238 = (2*Ca_SR*cse_234 +\
+            _p32*(Ca_SR*Ca_SR*Ca_SR)/(cse_233*cse_233))*d*g
+        cse_239 = V_leak*(-Ca_i + Ca_SR)
+        cse_241 = 1 + cse_240/(Ca_i*Ca_i)
+        cse_242 = Vmax_up/cse_241
+        cse_243 = cse_236*d
+        jacobian[216] = (-cse_238 + cse_237)*cse_231 + _p33*(-cse_239 -\
+            cse_243 + cse_242)/((cse_229*cse_229*cse_229)*(cse_230*cse_230))
+        cse_244 = _p34/((Ca_i*Ca_i*Ca_i)*(cse_241*cse_241))
+        jacobian[217] = (V_leak + cse_244)*cse_231
+        cse_245 = cse_235*d
+        jacobian[218] = -cse_231*cse_245
+        jacobian[268] = _p35*cse_98
+        cse_248 = K_buf_c + Ca_i
+        cse_249 = 1 + cse_247/(cse_248*cse_248)
+        cse_250 = 1.0/cse_249
+        jacobian[228] = (_p36*V*cse_13*cse_17 + cse_236)*cse_250
+        jacobian[233] = (V_leak + cse_238)*cse_250
+        jacobian[235] = cse_245*cse_250
+        cse_251 = _p37*cse_250
+        jacobian[221] = -(_p41 + _p38*cse_13*cse_15*d*f*fCa +\
+            _p39*V*cse_11*cse_15*cse_18*d*f*fCa +\
+            _p40*Ca_i*V*cse_11*cse_13*d*f*fCa + cse_39 + cse_41)*cse_251
+        jacobian[236] = cse_107*cse_251
+        cse_252 = _p42*V*cse_13*cse_15*cse_250*d
+        jacobian[229] = -cse_252*fCa
+        jacobian[230] = -cse_252*f
+        jacobian[234] = (-cse_244 + _p43*(-cse_93 + 2*cse_98 + cse_92 +\
+            cse_95 + cse_97) + cse_237)*cse_250 + _p46*(-cse_242 +\
+            _p43*(g_bca*(_p44*ufl.ln(Ca_o*cse_94) + V) + Ca_i*cse_92 +\
+            cse_15*cse_96 + _p45*cse_33*cse_40) + cse_239 +\
+            cse_243)/((cse_248*cse_248*cse_248)*(cse_249*cse_249))
+        cse_255 = 1 + 5.439910241481018e+20*(Ca_i*Ca_i*Ca_i*Ca_i*Ca_i*Ca_i)
+        cse_256 = 1.0/cse_255
+        cse_257 = ufl.exp(cse_211)
+        cse_258 = 1 + 0.0301973834223185*cse_257
+        cse_259 = 1.0/cse_258
+        cse_260 = cse_256*cse_259
+        cse_261 = 1 + 1.9720198874049195e+55*ufl.elem_pow(Ca_i, 16)
+        cse_262 = 1.0/cse_261
+        cse_263 = 1 - cse_259
+        cse_264 = cse_262*cse_263
+        cse_265 = -g + cse_260 + cse_264
+        cse_266 = ufl.exp(60 + V)
+        cse_267 = 1 + cse_266
+        cse_268 = ufl.exp(10.0*cse_260 + 10.0*cse_264 - 10.0*g)
+        cse_269 = 1 + cse_268
+        cse_270 = 1.0/cse_269
+        jacobian[238] = _p47*cse_265*cse_266*cse_270/(cse_267*cse_267)
+        cse_271 = 1.0/cse_267
+        cse_272 = (1 - 1.0*cse_270*cse_271)*cse_254
+        cse_273 = (Ca_i*Ca_i*Ca_i*Ca_i*Ca_i)*cse_259/(cse_255*cse_255)
+        cse_274 = 1.0/(cse_258*cse_258)
+        cse_275 = cse_256*cse_257*cse_274
+        cse_276 = cse_257*cse_262*cse_274
+        cse_277 = ufl.elem_pow(Ca_i, 15)*cse_263/(cse_261*cse_261)
+        cse_278 = cse_254*cse_265*cse_268*cse_271/(cse_269*cse_269)
+        jacobian[251] = (301.973834223185*cse_276 - 301.973834223185*cse_275 -\
+            3.263946144888611e+21*cse_273 -\
+            3.1552318198478713e+56*cse_277)*cse_272 +\
+            (3019.73834223185*cse_276 - 3.2639461448886107e+22*cse_273 -\
+            3019.73834223185*cse_275 -\
+            3.1552318198478714e+57*cse_277)*cse_278
+        jacobian[252] = -cse_272 - 10.0*cse_278
+        jacobian[255] = (-3*cse_26 - 3*cse_38 + 3*cse_41 + cse_0 +\
+            cse_3)*cse_279
+        jacobian[259] = _p48*cse_83
+        jacobian[260] = _p48*cse_85
+        jacobian[261] = _p48*cse_86
+        jacobian[270] = (-9*cse_106 - 3*cse_104 + 3*cse_105 + cse_100)*cse_279
+        jacobian[272] = (2*cse_26 + cse_75)*cse_279
+        jacobian[273] = _p48*cse_77
+        jacobian[274] = _p48*cse_78
+        jacobian[275] = _p48*cse_80
+        jacobian[282] = _p48*cse_89
+        jacobian[283] = _p48*cse_90
+        jacobian[287] = (-2*cse_105 + 2*cse_104 + cse_102)*cse_279
+        jacobian[288] = cse_109*cse_279
+
+        # Return results
+        return ufl.as_matrix([jacobian[17*i:17*(i + 1)] for i in range(17)])
+
+    def num_states(self):
+        return 16
+
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 17)
+        V, Xr1, Xr2, Xs, m, h, j, d, f, fCa, s, r, Ca_SR, Ca_i, g, Na_i, K_i\
+            = states
+
+        # Assign parameters
+        assert(len(parameters) == 45)
+        P_kna = parameters[0]
+        g_K1 = parameters[1]
+        g_Kr = parameters[2]
+        g_Ks = parameters[3]
+        g_Na = parameters[4]
+        g_bna = parameters[5]
+        g_CaL = parameters[6]
+        g_bca = parameters[7]
+        g_to = parameters[8]
+        K_mNa = parameters[9]
+        K_mk = parameters[10]
+        P_NaK = parameters[11]
+        K_NaCa = parameters[12]
+        K_sat = parameters[13]
+        Km_Ca = parameters[14]
+        Km_Nai = parameters[15]
+        alpha = parameters[16]
+        gamma = parameters[17]
+        K_pCa = parameters[18]
+        g_pCa = parameters[19]
+        g_pK = parameters[20]
+        Buf_c = parameters[21]
+        Buf_sr = parameters[22]
+        Ca_o = parameters[23]
+        K_buf_c = parameters[24]
+        K_buf_sr = parameters[25]
+        K_up = parameters[26]
+        V_leak = parameters[27]
+        V_sr = parameters[28]
+        Vmax_up = parameters[29]
+        a_rel = parameters[30]
+        b_rel = parameters[31]
+        c_rel = parameters[32]
+        tau_g = parameters[33]
+        Na_o = parameters[34]
+        Cm = parameters[35]
+        F = parameters[36]
+        R = parameters[37]
+        T = parameters[38]
+        V_c = parameters[39]
+        stim_amplitude = parameters[40]
+        stim_duration = parameters[41]
+        stim_start = parameters[43]
+        K_o = parameters[44]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
 
         # Expressions for the Reversal potentials component
-        E_Na = R*T*ufl.ln(Na_o/Na_i)/F
-        E_K = R*T*ufl.ln(K_o/K_i)/F
-        E_Ks = R*T*ufl.ln((Na_o*P_kna + K_o)/(K_i + P_kna*Na_i))/F
-        E_Ca = 0.5*R*T*ufl.ln(Ca_o/Ca_i)/F
+        E_Na = R*T*numpy.log(Na_o/Na_i)/F
+        E_K = R*T*numpy.log(K_o/K_i)/F
+        E_Ks = R*T*numpy.log((K_o + Na_o*P_kna)/(P_kna*Na_i + K_i))/F
+        E_Ca = 0.5*R*T*numpy.log(Ca_o/Ca_i)/F
 
         # Expressions for the Inward rectifier potassium current component
-        alpha_K1 = 0.1/(1 + 6.14421235333e-06*ufl.exp(-0.06*E_K + 0.06*V))
-        beta_K1 = (3.06060402008*ufl.exp(0.0002*V - 0.0002*E_K) +\
-            0.367879441171*ufl.exp(0.1*V - 0.1*E_K))/(1 + ufl.exp(0.5*E_K -\
-            0.5*V))
+        alpha_K1 = 0.1/(1 + 6.14421235332821e-06*numpy.exp(0.06*V - 0.06*E_K))
+        beta_K1 = (0.36787944117144233*numpy.exp(0.1*V - 0.1*E_K) +\
+            3.0606040200802673*numpy.exp(0.0002*V - 0.0002*E_K))/(1 +\
+            numpy.exp(0.5*E_K - 0.5*V))
         xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
-        i_K1 = 0.430331482912*g_K1*ufl.sqrt(K_o)*(-E_K + V)*xK1_inf
+        i_K1 = 0.4303314829119352*g_K1*numpy.sqrt(K_o)*(-E_K + V)*xK1_inf
 
         # Expressions for the Rapid time dependent potassium current component
-        i_Kr = 0.430331482912*g_Kr*ufl.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
+        i_Kr = 0.4303314829119352*g_Kr*numpy.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
 
         # Expressions for the Xr1 gate component
-        xr1_inf = 1.0/(1 + ufl.exp(-26/7 - V/7))
-        alpha_xr1 = 450/(1 + ufl.exp(-9/2 - V/10))
-        beta_xr1 = 6/(1 + 13.5813245226*ufl.exp(0.0869565217391*V))
+        xr1_inf = 1.0/(1 + numpy.exp(-26/7 - V/7))
+        alpha_xr1 = 450/(1 + numpy.exp(-9/2 - V/10))
+        beta_xr1 = 6/(1 + 13.581324522578193*numpy.exp(0.08695652173913043*V))
         tau_xr1 = alpha_xr1*beta_xr1
-        F_expressions[0] = (xr1_inf - Xr1)/tau_xr1
+        dy[1] = (-Xr1 + xr1_inf)/tau_xr1
 
         # Expressions for the Xr2 gate component
-        xr2_inf = 1.0/(1 + ufl.exp(11/3 + V/24))
-        alpha_xr2 = 3/(1 + ufl.exp(-3 - V/20))
-        beta_xr2 = 1.12/(1 + ufl.exp(-3 + V/20))
+        xr2_inf = 1.0/(1 + numpy.exp(11/3 + V/24))
+        alpha_xr2 = 3/(1 + numpy.exp(-3 - V/20))
+        beta_xr2 = 1.12/(1 + numpy.exp(-3 + V/20))
         tau_xr2 = alpha_xr2*beta_xr2
-        F_expressions[1] = (xr2_inf - Xr2)/tau_xr2
+        dy[2] = (-Xr2 + xr2_inf)/tau_xr2
 
         # Expressions for the Slow time dependent potassium current component
         i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
 
         # Expressions for the Xs gate component
-        xs_inf = 1.0/(1 + ufl.exp(-5/14 - V/14))
-        alpha_xs = 1100/ufl.sqrt(1 + ufl.exp(-5/3 - V/6))
-        beta_xs = 1.0/(1 + ufl.exp(-3 + V/20))
+        xs_inf = 1.0/(1 + numpy.exp(-5/14 - V/14))
+        alpha_xs = 1100/numpy.sqrt(1 + numpy.exp(-5/3 - V/6))
+        beta_xs = 1.0/(1 + numpy.exp(-3 + V/20))
         tau_xs = alpha_xs*beta_xs
-        F_expressions[2] = (xs_inf - Xs)/tau_xs
+        dy[3] = (-Xs + xs_inf)/tau_xs
 
         # Expressions for the Fast sodium current component
         i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
 
         # Expressions for the m gate component
-        m_inf = 1.0/((1 + 0.00184221158117*ufl.exp(-0.110741971207*V))*(1 +\
-            0.00184221158117*ufl.exp(-0.110741971207*V)))
-        alpha_m = 1.0/(1 + ufl.exp(-12 - V/5))
-        beta_m = 0.1/(1 + ufl.exp(-1/4 + V/200)) + 0.1/(1 + ufl.exp(7 + V/5))
+        m_inf = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V)))
+        alpha_m = 1.0/(1 + numpy.exp(-12 - V/5))
+        beta_m = 0.1/(1 + numpy.exp(7 + V/5)) + 0.1/(1 + numpy.exp(-1/4 +\
+            V/200))
         tau_m = alpha_m*beta_m
-        F_expressions[3] = (-m + m_inf)/tau_m
+        dy[4] = (-m + m_inf)/tau_m
 
         # Expressions for the h gate component
-        h_inf = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V)))
-        alpha_h = 4.43126792958e-07*ufl.exp(-0.147058823529*V)/(1 +\
-            2.35385266837e+17*ufl.exp(1.0*V))
-        beta_h = (2.7*ufl.exp(0.079*V) + 310000*ufl.exp(0.3485*V))/(1 +\
-            2.35385266837e+17*ufl.exp(1.0*V)) + 0.77*(1 - 1/(1 +\
-            2.35385266837e+17*ufl.exp(1.0*V)))/(0.13 +\
-            0.0497581410839*ufl.exp(-0.0900900900901*V))
+        h_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_h = 4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V)/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))
+        beta_h = (310000*numpy.exp(0.3485*V) + 2.7*numpy.exp(0.079*V))/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)) + 0.77*(1 - 1/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)))/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V))
         tau_h = 1.0/(alpha_h + beta_h)
-        F_expressions[4] = (-h + h_inf)/tau_h
+        dy[5] = (-h + h_inf)/tau_h
 
         # Expressions for the j gate component
-        j_inf = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V)))
-        alpha_j = (37.78 + V)*(-25428*ufl.exp(0.2444*V) -\
-            6.948e-06*ufl.exp(-0.04391*V))/((1 +\
-            2.35385266837e+17*ufl.exp(1.0*V))*(1 +\
-            50262745826.0*ufl.exp(0.311*V)))
+        j_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_j = (37.78 + V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            50262745825.95399*numpy.exp(0.311*V)))
         beta_j = 0.6*(1 - 1/(1 +\
-            2.35385266837e+17*ufl.exp(1.0*V)))*ufl.exp(0.057*V)/(1 +\
-            0.0407622039784*ufl.exp(-0.1*V)) +\
-            0.02424*ufl.exp(-0.01052*V)/((1 +\
-            2.35385266837e+17*ufl.exp(1.0*V))*(1 +\
-            0.0039608683399*ufl.exp(-0.1378*V)))
+            2.3538526683701997e+17*numpy.exp(1.0*V)))*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V)) +\
+            0.02424*numpy.exp(-0.01052*V)/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V)))
         tau_j = 1.0/(alpha_j + beta_j)
-        F_expressions[5] = (-j + j_inf)/tau_j
+        dy[6] = (-j + j_inf)/tau_j
 
         # Expressions for the Sodium background current component
         i_b_Na = g_bna*(-E_Na + V)
 
         # Expressions for the L_type Ca current component
-        i_CaL = 4*g_CaL*(F*F)*(Ca_i*ufl.exp(2*F*V/(R*T)) -\
-            0.341*Ca_o)*V*d*f*fCa/(R*T*(-1 + ufl.exp(2*F*V/(R*T))))
+        i_CaL = 4*g_CaL*(F*F)*(-0.341*Ca_o +\
+            Ca_i*numpy.exp(2*F*V/(R*T)))*V*d*f*fCa/(R*T*(-1 +\
+            numpy.exp(2*F*V/(R*T))))
 
         # Expressions for the d gate component
-        d_inf = 1.0/(1 + 0.513417119033*ufl.exp(-0.133333333333*V))
-        alpha_d = 0.25 + 1.4/(1 + ufl.exp(-35/13 - V/13))
-        beta_d = 1.4/(1 + ufl.exp(1 + V/5))
-        gamma_d = 1.0/(1 + ufl.exp(5/2 - V/20))
+        d_inf = 1.0/(1 + 0.513417119032592*numpy.exp(-0.13333333333333333*V))
+        alpha_d = 0.25 + 1.4/(1 + numpy.exp(-35/13 - V/13))
+        beta_d = 1.4/(1 + numpy.exp(1 + V/5))
+        gamma_d = 1.0/(1 + numpy.exp(5/2 - V/20))
         tau_d = alpha_d*beta_d + gamma_d
-        F_expressions[6] = (-d + d_inf)/tau_d
+        dy[7] = (-d + d_inf)/tau_d
 
         # Expressions for the f gate component
-        f_inf = 1.0/(1 + ufl.exp(20/7 + V/7))
-        tau_f = 80 + 1125*ufl.exp(-((27 + V)*(27 + V))/240) + 165/(1 +\
-            ufl.exp(5/2 - V/10))
-        F_expressions[7] = (f_inf - f)/tau_f
+        f_inf = 1.0/(1 + numpy.exp(20/7 + V/7))
+        tau_f = 80 + 165/(1 + numpy.exp(5/2 - V/10)) + 1125*numpy.exp(-((27 +\
+            V)*(27 + V))/240)
+        dy[8] = (-f + f_inf)/tau_f
 
         # Expressions for the FCa gate component
-        alpha_fCa = 1.0/(1 + 8.03402376702e+27*ufl.elem_pow(Ca_i, 8))
+        alpha_fCa = 1.0/(1 + 8.03402376701711e+27*numpy.power(Ca_i, 8))
         exp_arg_0 = -5.0 + 10000.0*Ca_i
-        exp_arg_00 = ufl.conditional(ufl.lt(exp_arg_0, 500.0), exp_arg_0,\
-            500.0)
-        beta_fCa = 0.1/(1 + ufl.exp(exp_arg_00))
+        exp_arg_00 = numpy.where((exp_arg_0 < 500.0), exp_arg_0, 500.0)
+        beta_fCa = 0.1/(1 + numpy.exp(exp_arg_00))
         exp_arg_1 = -0.9375 + 1250.0*Ca_i
-        exp_arg_11 = ufl.conditional(ufl.lt(exp_arg_1, 500.0), exp_arg_1,\
-            500.0)
-        gama_fCa = 0.2/(1 + ufl.exp(exp_arg_11))
-        fCa_inf = 0.157534246575 + 0.684931506849*gama_fCa +\
-            0.684931506849*alpha_fCa + 0.684931506849*beta_fCa
+        exp_arg_11 = numpy.where((exp_arg_1 < 500.0), exp_arg_1, 500.0)
+        gama_fCa = 0.2/(1 + numpy.exp(exp_arg_11))
+        fCa_inf = 0.15753424657534246 + 0.684931506849315*alpha_fCa +\
+            0.684931506849315*beta_fCa + 0.684931506849315*gama_fCa
         tau_fCa = 2
         d_fCa = (-fCa + fCa_inf)/tau_fCa
-        F_expressions[8] = ufl.conditional(ufl.And(ufl.gt(V, -60),\
-            ufl.gt(fCa_inf, fCa)), 0, d_fCa)
+        dy[9] = numpy.where(numpy.logical_and((V > -60), (fCa_inf > fCa)), 0,\
+            d_fCa)
 
         # Expressions for the Calcium background current component
         i_b_Ca = g_bca*(-E_Ca + V)
@@ -398,69 +1063,366 @@ class Tentusscher_2004_mcell_cont(CardiacCellModel):
         i_to = g_to*(-E_K + V)*r*s
 
         # Expressions for the s gate component
-        s_inf = 1.0/(1 + ufl.exp(4 + V/5))
-        tau_s = 3 + 5/(1 + ufl.exp(-4 + V/5)) + 85*ufl.exp(-((45 + V)*(45 +\
+        s_inf = 1.0/(1 + numpy.exp(4 + V/5))
+        tau_s = 3 + 5/(1 + numpy.exp(-4 + V/5)) + 85*numpy.exp(-((45 + V)*(45 +\
             V))/320)
-        F_expressions[9] = (s_inf - s)/tau_s
+        dy[10] = (-s + s_inf)/tau_s
 
         # Expressions for the r gate component
-        r_inf = 1.0/(1 + ufl.exp(10/3 - V/6))
-        tau_r = 0.8 + 9.5*ufl.exp(-((40 + V)*(40 + V))/1800)
-        F_expressions[10] = (r_inf - r)/tau_r
+        r_inf = 1.0/(1 + numpy.exp(10/3 - V/6))
+        tau_r = 0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800)
+        dy[11] = (-r + r_inf)/tau_r
 
         # Expressions for the Sodium potassium pump current component
         i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
-            0.0353*ufl.exp(-F*V/(R*T)) + 0.1245*ufl.exp(-0.1*F*V/(R*T))))
+            0.0353*numpy.exp(-F*V/(R*T)) + 0.1245*numpy.exp(-0.1*F*V/(R*T))))
 
         # Expressions for the Sodium calcium exchanger current component
-        i_NaCa = K_NaCa*(-alpha*(Na_o*Na_o*Na_o)*Ca_i*ufl.exp(F*(-1 +\
-            gamma)*V/(R*T)) +\
-            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(F*gamma*V/(R*T)))/((1 +\
-            K_sat*ufl.exp(F*(-1 + gamma)*V/(R*T)))*(Km_Ca +\
-            Ca_o)*((Na_o*Na_o*Na_o) + (Km_Nai*Km_Nai*Km_Nai)))
+        i_NaCa = K_NaCa*(Ca_o*(Na_i*Na_i*Na_i)*numpy.exp(F*gamma*V/(R*T)) -\
+            alpha*(Na_o*Na_o*Na_o)*Ca_i*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))/((1 + K_sat*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))*(Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) +\
+            (Na_o*Na_o*Na_o)))
 
         # Expressions for the Calcium pump current component
-        i_p_Ca = g_pCa*Ca_i/(Ca_i + K_pCa)
+        i_p_Ca = g_pCa*Ca_i/(K_pCa + Ca_i)
 
         # Expressions for the Potassium pump current component
-        i_p_K = g_pK*(-E_K + V)/(1 + 65.4052157419*ufl.exp(-0.167224080268*V))
+        i_p_K = g_pK*(-E_K + V)/(1 +\
+            65.40521574193832*numpy.exp(-0.16722408026755853*V))
 
         # Expressions for the Calcium dynamics component
         i_rel = (c_rel + a_rel*(Ca_SR*Ca_SR)/((b_rel*b_rel) +\
             (Ca_SR*Ca_SR)))*d*g
         i_up = Vmax_up/(1 + (K_up*K_up)/(Ca_i*Ca_i))
-        i_leak = V_leak*(Ca_SR - Ca_i)
-        g_inf = 1/((1 + 0.0301973834223*ufl.exp(10000.0*Ca_i))*(1 +\
-            5.43991024148e+20*ufl.elem_pow(Ca_i, 6))) + (1 - 1/(1 +\
-            0.0301973834223*ufl.exp(10000.0*Ca_i)))/(1 +\
-            1.9720198874e+55*ufl.elem_pow(Ca_i, 16))
+        i_leak = V_leak*(-Ca_i + Ca_SR)
+        g_inf = (1 - 1/(1 + 0.0301973834223185*numpy.exp(10000.0*Ca_i)))/(1 +\
+            1.9720198874049195e+55*numpy.power(Ca_i, 16)) + 1/((1 +\
+            0.0301973834223185*numpy.exp(10000.0*Ca_i))*(1 +\
+            5.439910241481018e+20*numpy.power(Ca_i, 6)))
         d_g = (-g + g_inf)/tau_g
-        F_expressions[13] = (1 - 1.0/((1 + ufl.exp(60 + V))*(1 +\
-            ufl.exp(10.0*g_inf - 10.0*g))))*d_g
-        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((Ca_i + K_buf_c)*(Ca_i + K_buf_c)))
-        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((Ca_SR + K_buf_sr)*(Ca_SR +\
-            K_buf_sr)))
-        F_expressions[12] = (i_rel - i_up - Cm*(i_b_Ca + i_p_Ca - 2*i_NaCa +\
-            i_CaL)/(2*F*V_c) + i_leak)*Ca_i_bufc
-        F_expressions[11] = V_c*(i_up - i_leak - i_rel)*Ca_sr_bufsr/V_sr
+        dy[14] = (1 - 1.0/((1 + numpy.exp(60 + V))*(1 + numpy.exp(10.0*g_inf\
+            - 10.0*g))))*d_g
+        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((K_buf_c + Ca_i)*(K_buf_c + Ca_i)))
+        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((K_buf_sr + Ca_SR)*(K_buf_sr\
+            + Ca_SR)))
+        dy[13] = (-i_up - Cm*(-2*i_NaCa + i_CaL + i_b_Ca + i_p_Ca)/(2*F*V_c)\
+            + i_leak + i_rel)*Ca_i_bufc
+        dy[12] = V_c*(-i_leak - i_rel + i_up)*Ca_sr_bufsr/V_sr
 
         # Expressions for the Sodium dynamics component
-        F_expressions[14] = Cm*(-i_b_Na - i_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
+        dy[15] = Cm*(-i_Na - i_b_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
 
         # Expressions for the Membrane component
-        i_Stim = -stim_amplitude*(1 - 1/(1 + ufl.exp(5.0*time -\
-            5.0*stim_start)))/(1 + ufl.exp(5.0*time - 5.0*stim_start -\
-            5.0*stim_duration))
+        i_Stim = -stim_amplitude*(1 - 1/(1 + numpy.exp(5.0*time -\
+            5.0*stim_start)))/(1 + numpy.exp(5.0*time - 5.0*stim_duration -\
+            5.0*stim_start))
+        dy[0] = -i_CaL - i_K1 - i_Kr - i_Ks - i_Na - i_NaCa - i_NaK - i_Stim\
+            - i_b_Ca - i_b_Na - i_p_Ca - i_p_K - i_to
 
         # Expressions for the Potassium dynamics component
-        F_expressions[15] = Cm*(2*i_NaK - i_Ks - i_Kr - i_to - i_Stim - i_p_K\
-            - i_K1)/(F*V_c)
+        dy[16] = Cm*(-i_K1 - i_Kr - i_Ks - i_Stim - i_p_K - i_to +\
+            2*i_NaK)/(F*V_c)
 
         # Return results
-        return dolfin.as_vector(F_expressions)
+        return dy
 
-    def num_states(self):
-        return 16
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
+        """
+        Advance the states (in place) by a Rush-Larsen step of length dt
+        """
+        # Assign states
+        assert(len(states) == 17)
+        V, Xr1, Xr2, Xs, m, h, j, d, f, fCa, s, r, Ca_SR, Ca_i, g, Na_i, K_i\
+            = states
+
+        # Assign parameters
+        assert(len(parameters) == 45)
+        P_kna = parameters[0]
+        g_K1 = parameters[1]
+        g_Kr = parameters[2]
+        g_Ks = parameters[3]
+        g_Na = parameters[4]
+        g_bna = parameters[5]
+        g_CaL = parameters[6]
+        g_bca = parameters[7]
+        g_to = parameters[8]
+        K_mNa = parameters[9]
+        K_mk = parameters[10]
+        P_NaK = parameters[11]
+        K_NaCa = parameters[12]
+        K_sat = parameters[13]
+        Km_Ca = parameters[14]
+        Km_Nai = parameters[15]
+        alpha = parameters[16]
+        gamma = parameters[17]
+        K_pCa = parameters[18]
+        g_pCa = parameters[19]
+        g_pK = parameters[20]
+        Buf_c = parameters[21]
+        Buf_sr = parameters[22]
+        Ca_o = parameters[23]
+        K_buf_c = parameters[24]
+        K_buf_sr = parameters[25]
+        K_up = parameters[26]
+        V_leak = parameters[27]
+        V_sr = parameters[28]
+        Vmax_up = parameters[29]
+        a_rel = parameters[30]
+        b_rel = parameters[31]
+        c_rel = parameters[32]
+        tau_g = parameters[33]
+        Na_o = parameters[34]
+        Cm = parameters[35]
+        F = parameters[36]
+        R = parameters[37]
+        T = parameters[38]
+        V_c = parameters[39]
+        stim_amplitude = parameters[40]
+        stim_duration = parameters[41]
+        stim_start = parameters[43]
+        K_o = parameters[44]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((11,) + numpy.shape(states)[1:])
+
+        # Expressions for the Reversal potentials component
+        E_Na = R*T*numpy.log(Na_o/Na_i)/F
+        E_K = R*T*numpy.log(K_o/K_i)/F
+        E_Ks = R*T*numpy.log((K_o + Na_o*P_kna)/(P_kna*Na_i + K_i))/F
+        E_Ca = 0.5*R*T*numpy.log(Ca_o/Ca_i)/F
+
+        # Expressions for the Inward rectifier potassium current component
+        alpha_K1 = 0.1/(1 + 6.14421235332821e-06*numpy.exp(0.06*V - 0.06*E_K))
+        beta_K1 = (0.36787944117144233*numpy.exp(0.1*V - 0.1*E_K) +\
+            3.0606040200802673*numpy.exp(0.0002*V - 0.0002*E_K))/(1 +\
+            numpy.exp(0.5*E_K - 0.5*V))
+        xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
+        i_K1 = 0.4303314829119352*g_K1*numpy.sqrt(K_o)*(-E_K + V)*xK1_inf
+
+        # Expressions for the Rapid time dependent potassium current component
+        i_Kr = 0.4303314829119352*g_Kr*numpy.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
+
+        # Expressions for the Xr1 gate component
+        xr1_inf = 1.0/(1 + numpy.exp(-26/7 - V/7))
+        alpha_xr1 = 450/(1 + numpy.exp(-9/2 - V/10))
+        beta_xr1 = 6/(1 + 13.581324522578193*numpy.exp(0.08695652173913043*V))
+        tau_xr1 = alpha_xr1*beta_xr1
+        dy[1] = (-Xr1 + xr1_inf)/tau_xr1
+        linearized[0] = -(1 +\
+            13.581324522578193*numpy.exp(0.08695652173913043*V))*(1 +\
+            numpy.exp(-9/2 - V/10))/2700
+
+        # Expressions for the Xr2 gate component
+        xr2_inf = 1.0/(1 + numpy.exp(11/3 + V/24))
+        alpha_xr2 = 3/(1 + numpy.exp(-3 - V/20))
+        beta_xr2 = 1.12/(1 + numpy.exp(-3 + V/20))
+        tau_xr2 = alpha_xr2*beta_xr2
+        dy[2] = (-Xr2 + xr2_inf)/tau_xr2
+        linearized[1] = -0.2976190476190476*(1 + numpy.exp(-3 - V/20))*(1 +\
+            numpy.exp(-3 + V/20))
+
+        # Expressions for the Slow time dependent potassium current component
+        i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
+
+        # Expressions for the Xs gate component
+        xs_inf = 1.0/(1 + numpy.exp(-5/14 - V/14))
+        alpha_xs = 1100/numpy.sqrt(1 + numpy.exp(-5/3 - V/6))
+        beta_xs = 1.0/(1 + numpy.exp(-3 + V/20))
+        tau_xs = alpha_xs*beta_xs
+        dy[3] = (-Xs + xs_inf)/tau_xs
+        linearized[2] = -numpy.sqrt(1 + numpy.exp(-5/3 - V/6))*(1 +\
+            numpy.exp(-3 + V/20))/1100
+
+        # Expressions for the Fast sodium current component
+        i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
+
+        # Expressions for the m gate component
+        m_inf = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V)))
+        alpha_m = 1.0/(1 + numpy.exp(-12 - V/5))
+        beta_m = 0.1/(1 + numpy.exp(7 + V/5)) + 0.1/(1 + numpy.exp(-1/4 +\
+            V/200))
+        tau_m = alpha_m*beta_m
+        dy[4] = (-m + m_inf)/tau_m
+        linearized[3] = -(1 + numpy.exp(-12 - V/5))/(0.1/(1 + numpy.exp(7 +\
+            V/5)) + 0.1/(1 + numpy.exp(-1/4 + V/200)))
+
+        # Expressions for the h gate component
+        h_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_h = 4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V)/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))
+        beta_h = (310000*numpy.exp(0.3485*V) + 2.7*numpy.exp(0.079*V))/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)) + 0.77*(1 - 1/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)))/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V))
+        tau_h = 1.0/(alpha_h + beta_h)
+        dy[5] = (-h + h_inf)/tau_h
+        linearized[4] = -(310000*numpy.exp(0.3485*V) +\
+            2.7*numpy.exp(0.079*V))/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)) - 0.77*(1 - 1/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)))/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V)) -\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V)/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))
+
+        # Expressions for the j gate component
+        j_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_j = (37.78 + V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            50262745825.95399*numpy.exp(0.311*V)))
+        beta_j = 0.6*(1 - 1/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)))*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V)) +\
+            0.02424*numpy.exp(-0.01052*V)/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V)))
+        tau_j = 1.0/(alpha_j + beta_j)
+        dy[6] = (-j + j_inf)/tau_j
+        linearized[5] = -0.6*(1 - 1/(1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V)))*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V)) -\
+            0.02424*numpy.exp(-0.01052*V)/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V))) - (37.78 +\
+            V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/((1 +\
+            2.3538526683701997e+17*numpy.exp(1.0*V))*(1 +\
+            50262745825.95399*numpy.exp(0.311*V)))
+
+        # Expressions for the Sodium background current component
+        i_b_Na = g_bna*(-E_Na + V)
+
+        # Expressions for the L_type Ca current component
+        i_CaL = 4*g_CaL*(F*F)*(-0.341*Ca_o +\
+            Ca_i*numpy.exp(2*F*V/(R*T)))*V*d*f*fCa/(R*T*(-1 +\
+            numpy.exp(2*F*V/(R*T))))
+
+        # Expressions for the d gate component
+        d_inf = 1.0/(1 + 0.513417119032592*numpy.exp(-0.13333333333333333*V))
+        alpha_d = 0.25 + 1.4/(1 + numpy.exp(-35/13 - V/13))
+        beta_d = 1.4/(1 + numpy.exp(1 + V/5))
+        gamma_d = 1.0/(1 + numpy.exp(5/2 - V/20))
+        tau_d = alpha_d*beta_d + gamma_d
+        dy[7] = (-d + d_inf)/tau_d
+        linearized[6] = -1/(1.0/(1 + numpy.exp(5/2 - V/20)) + 1.4*(0.25 +\
+            1.4/(1 + numpy.exp(-35/13 - V/13)))/(1 + numpy.exp(1 + V/5)))
+
+        # Expressions for the f gate component
+        f_inf = 1.0/(1 + numpy.exp(20/7 + V/7))
+        tau_f = 80 + 165/(1 + numpy.exp(5/2 - V/10)) + 1125*numpy.exp(-((27 +\
+            V)*(27 + V))/240)
+        dy[8] = (-f + f_inf)/tau_f
+        linearized[7] = -1/(80 + 165/(1 + numpy.exp(5/2 - V/10)) +\
+            1125*numpy.exp(-((27 + V)*(27 + V))/240))
+
+        # Expressions for the FCa gate component
+        alpha_fCa = 1.0/(1 + 8.03402376701711e+27*numpy.power(Ca_i, 8))
+        exp_arg_0 = -5.0 + 10000.0*Ca_i
+        exp_arg_00 = numpy.where((exp_arg_0 < 500.0), exp_arg_0, 500.0)
+        beta_fCa = 0.1/(1 + numpy.exp(exp_arg_00))
+        exp_arg_1 = -0.9375 + 1250.0*Ca_i
+        exp_arg_11 = numpy.where((exp_arg_1 < 500.0), exp_arg_1, 500.0)
+        gama_fCa = 0.2/(1 + numpy.exp(exp_arg_11))
+        fCa_inf = 0.15753424657534246 + 0.684931506849315*alpha_fCa +\
+            0.684931506849315*beta_fCa + 0.684931506849315*gama_fCa
+        tau_fCa = 2
+        d_fCa = (-fCa + fCa_inf)/tau_fCa
+        dy[9] = numpy.where(numpy.logical_and((V > -60), (fCa_inf > fCa)), 0,\
+            d_fCa)
+        linearized[8] = numpy.where(numpy.logical_and((V > -60),\
+            (0.15753424657534246 + 0.0684931506849315/(1 +\
+            numpy.exp(numpy.where((-5.0 + 10000.0*Ca_i < 500.0), -5.0 +\
+            10000.0*Ca_i, 500.0))) + 0.136986301369863/(1 +\
+            numpy.exp(numpy.where((-0.9375 + 1250.0*Ca_i < 500.0), -0.9375 +\
+            1250.0*Ca_i, 500.0))) + 0.684931506849315/(1 +\
+            8.03402376701711e+27*numpy.power(Ca_i, 8)) > fCa)), 0, -1/2)
+
+        # Expressions for the Calcium background current component
+        i_b_Ca = g_bca*(-E_Ca + V)
+
+        # Expressions for the Transient outward current component
+        i_to = g_to*(-E_K + V)*r*s
+
+        # Expressions for the s gate component
+        s_inf = 1.0/(1 + numpy.exp(4 + V/5))
+        tau_s = 3 + 5/(1 + numpy.exp(-4 + V/5)) + 85*numpy.exp(-((45 + V)*(45 +\
+            V))/320)
+        dy[10] = (-s + s_inf)/tau_s
+        linearized[9] = -1/(3 + 5/(1 + numpy.exp(-4 + V/5)) +\
+            85*numpy.exp(-((45 + V)*(45 + V))/320))
+
+        # Expressions for the r gate component
+        r_inf = 1.0/(1 + numpy.exp(10/3 - V/6))
+        tau_r = 0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800)
+        dy[11] = (-r + r_inf)/tau_r
+        linearized[10] = -1/(0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800))
+
+        # Expressions for the Sodium potassium pump current component
+        i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
+            0.0353*numpy.exp(-F*V/(R*T)) + 0.1245*numpy.exp(-0.1*F*V/(R*T))))
+
+        # Expressions for the Sodium calcium exchanger current component
+        i_NaCa = K_NaCa*(Ca_o*(Na_i*Na_i*Na_i)*numpy.exp(F*gamma*V/(R*T)) -\
+            alpha*(Na_o*Na_o*Na_o)*Ca_i*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))/((1 + K_sat*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))*(Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) +\
+            (Na_o*Na_o*Na_o)))
+
+        # Expressions for the Calcium pump current component
+        i_p_Ca = g_pCa*Ca_i/(K_pCa + Ca_i)
+
+        # Expressions for the Potassium pump current component
+        i_p_K = g_pK*(-E_K + V)/(1 +\
+            65.40521574193832*numpy.exp(-0.16722408026755853*V))
+
+        # Expressions for the Calcium dynamics component
+        i_rel = (c_rel + a_rel*(Ca_SR*Ca_SR)/((b_rel*b_rel) +\
+            (Ca_SR*Ca_SR)))*d*g
+        i_up = Vmax_up/(1 + (K_up*K_up)/(Ca_i*Ca_i))
+        i_leak = V_leak*(-Ca_i + Ca_SR)
+        g_inf = (1 - 1/(1 + 0.0301973834223185*numpy.exp(10000.0*Ca_i)))/(1 +\
+            1.9720198874049195e+55*numpy.power(Ca_i, 16)) + 1/((1 +\
+            0.0301973834223185*numpy.exp(10000.0*Ca_i))*(1 +\
+            5.439910241481018e+20*numpy.power(Ca_i, 6)))
+        d_g = (-g + g_inf)/tau_g
+        dy[14] = (1 - 1.0/((1 + numpy.exp(60 + V))*(1 + numpy.exp(10.0*g_inf\
+            - 10.0*g))))*d_g
+        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((K_buf_c + Ca_i)*(K_buf_c + Ca_i)))
+        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((K_buf_sr + Ca_SR)*(K_buf_sr\
+            + Ca_SR)))
+        dy[13] = (-i_up - Cm*(-2*i_NaCa + i_CaL + i_b_Ca + i_p_Ca)/(2*F*V_c)\
+            + i_leak + i_rel)*Ca_i_bufc
+        dy[12] = V_c*(-i_leak - i_rel + i_up)*Ca_sr_bufsr/V_sr
+        dy[15] = Cm*(-i_Na - i_b_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
+
+        # Expressions for the Membrane component
+        i_Stim = -stim_amplitude*(1 - 1/(1 + numpy.exp(5.0*time -\
+            5.0*stim_start)))/(1 + numpy.exp(5.0*time - 5.0*stim_duration -\
+            5.0*stim_start))
+        dy[0] = -i_CaL - i_K1 - i_Kr - i_Ks - i_Na - i_NaCa - i_NaK - i_Stim\
+            - i_b_Ca - i_b_Na - i_p_Ca - i_p_K - i_to
+        dy[16] = Cm*(-i_K1 - i_Kr - i_Ks - i_Stim - i_p_K - i_to +\
+            2*i_NaK)/(F*V_c)
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
 
     def __str__(self):
         return 'Tentusscher_2004_mcell_cont cardiac cell model'
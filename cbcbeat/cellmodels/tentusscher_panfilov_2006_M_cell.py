@@ -1,10 +1,10 @@
-
 """This module contains a Tentusscher_panfilov_2006_M_cell cardiac cell model
 
 The module was autogenerated from a gotran ode file
 """
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -109,6 +109,39 @@ class Tentusscher_panfilov_2006_M_cell(CardiacCellModel):
         """
         Original gotran transmembrane current dV/dt
         """
+        return self._I_and_F(v, s, time)[0]
+
+    def I(self, v, s, time=None):
+        """
+        Transmembrane current
+
+           I = -dV/dt
+
+        """
+        return -self._I(v, s, time)
+
+    def F(self, v, s, time=None):
+        """
+        Right hand side for ODE system
+        """
+        return self._I_and_F(v, s, time)[1]
+
+    def _I_and_F(self, v, s, time):
+        """
+        Return dV/dt and the right hand side for ODE system, computed
+        once for the same arguments and parameters
+        """
+        key = (v, s, time) + tuple(self._parameters.values())
+        (cached_key, I_and_F) = getattr(self, "_cached_I_and_F", ((), None))
+        if [id(k) for k in key] != [id(k) for k in cached_key]:
+            I_and_F = self._compute_I_and_F(v, s, time)
+            self._cached_I_and_F = (key, I_and_F)
+        return I_and_F
+
+    def _compute_I_and_F(self, v, s, time):
+        """
+        Compute dV/dt and the right hand side for ODE system together
+        """
         time = time if time else Constant(0.0)
 
         # Assign states
@@ -139,90 +172,192 @@ class Tentusscher_panfilov_2006_M_cell(CardiacCellModel):
         K_pCa = self._parameters["K_pCa"]
         g_pCa = self._parameters["g_pCa"]
         g_pK = self._parameters["g_pK"]
+        Buf_c = self._parameters["Buf_c"]
+        Buf_sr = self._parameters["Buf_sr"]
+        Buf_ss = self._parameters["Buf_ss"]
         Ca_o = self._parameters["Ca_o"]
+        EC = self._parameters["EC"]
+        K_buf_c = self._parameters["K_buf_c"]
+        K_buf_sr = self._parameters["K_buf_sr"]
+        K_buf_ss = self._parameters["K_buf_ss"]
+        K_up = self._parameters["K_up"]
+        V_leak = self._parameters["V_leak"]
+        V_rel = self._parameters["V_rel"]
+        V_sr = self._parameters["V_sr"]
+        V_ss = self._parameters["V_ss"]
+        V_xfer = self._parameters["V_xfer"]
+        Vmax_up = self._parameters["Vmax_up"]
+        k1_prime = self._parameters["k1_prime"]
+        k2_prime = self._parameters["k2_prime"]
+        k3 = self._parameters["k3"]
+        k4 = self._parameters["k4"]
+        max_sr = self._parameters["max_sr"]
+        min_sr = self._parameters["min_sr"]
         Na_o = self._parameters["Na_o"]
+        Cm = self._parameters["Cm"]
         F = self._parameters["F"]
         R = self._parameters["R"]
         T = self._parameters["T"]
+        V_c = self._parameters["V_c"]
         K_o = self._parameters["K_o"]
 
         # Init return args
         current = [ufl.zero()]*1
+        F_expressions = [ufl.zero()]*18
 
-        # Expressions for the Reversal potentials component
-        E_Na = R*T*ufl.ln(Na_o/Na_i)/F
-        E_K = R*T*ufl.ln(K_o/K_i)/F
-        E_Ks = R*T*ufl.ln((Na_o*P_kna + K_o)/(K_i + P_kna*Na_i))/F
-        E_Ca = 0.5*R*T*ufl.ln(Ca_o/Ca_i)/F
-
-        # Expressions for the Inward rectifier potassium current component
-        alpha_K1 = 0.1/(1 + 6.14421235333e-06*ufl.exp(-0.06*E_K + 0.06*V))
-        beta_K1 = (3.06060402008*ufl.exp(0.0002*V - 0.0002*E_K) +\
-            0.367879441171*ufl.exp(0.1*V - 0.1*E_K))/(1 + ufl.exp(0.5*E_K -\
-            0.5*V))
-        xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
-        i_K1 = 0.430331482912*g_K1*ufl.sqrt(K_o)*(-E_K + V)*xK1_inf
-
-        # Expressions for the Rapid time dependent potassium current component
-        i_Kr = 0.430331482912*g_Kr*ufl.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
-
-        # Expressions for the Slow time dependent potassium current component
-        i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
-
-        # Expressions for the Fast sodium current component
-        i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
-
-        # Expressions for the Sodium background current component
-        i_b_Na = g_bna*(-E_Na + V)
-
-        # Expressions for the L_type Ca current component
-        i_CaL = 4*g_CaL*(F*F)*(-15 + V)*(0.25*Ca_ss*ufl.exp(F*(-30 +\
-            2*V)/(R*T)) - Ca_o)*d*f*f2*fCass/(R*T*(-1 + ufl.exp(F*(-30 +\
-            2*V)/(R*T))))
-
-        # Expressions for the Calcium background current component
-        i_b_Ca = g_bca*(-E_Ca + V)
-
-        # Expressions for the Transient outward current component
-        i_to = g_to*(-E_K + V)*r*s
-
-        # Expressions for the Sodium potassium pump current component
-        i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
-            0.0353*ufl.exp(-F*V/(R*T)) + 0.1245*ufl.exp(-0.1*F*V/(R*T))))
-
-        # Expressions for the Sodium calcium exchanger current component
-        i_NaCa = K_NaCa*(-alpha*(Na_o*Na_o*Na_o)*Ca_i*ufl.exp(F*(-1 +\
-            gamma)*V/(R*T)) +\
-            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(F*gamma*V/(R*T)))/((1 +\
-            K_sat*ufl.exp(F*(-1 + gamma)*V/(R*T)))*(Km_Ca +\
-            Ca_o)*((Na_o*Na_o*Na_o) + (Km_Nai*Km_Nai*Km_Nai)))
-
-        # Expressions for the Calcium pump current component
-        i_p_Ca = g_pCa*Ca_i/(Ca_i + K_pCa)
-
-        # Expressions for the Potassium pump current component
-        i_p_K = g_pK*(-E_K + V)/(1 + 65.4052157419*ufl.exp(-0.167224080268*V))
-
-        # Expressions for the Membrane component
-        i_Stim = 0
-        current[0] = -i_CaL - i_Ks - i_NaCa - i_b_Na - i_Stim - i_Kr - i_p_Ca\
-            - i_to - i_b_Ca - i_Na - i_p_K - i_NaK - i_K1
+        # Parameter-only expressions
+        cse_0 = 1.0/F
+        cse_1 = R*T*cse_0
+        cse_13 = 1.0/R
+        cse_14 = 1.0/T
+        cse_15 = F*cse_13*cse_14
+        cse_20 = (Na_o*Na_o*Na_o)
+        cse_43 = 1.0/V_c
+        cse_44 = Cm*cse_0*cse_43
+        cse_45 = 1.0/V_ss
+        _p0 = (ufl.sqrt(K_o))
+        _p1 = K_o + Na_o*P_kna
+        _p2 = -cse_1
+        _p3 = -g_Ks
+        _p4 = -g_pK
+        _p5 = -g_to
+        _p6 = -0.04303314829119352*g_K1
+        _p7 = -0.4303314829119352*g_Kr
+        _p8 = -0.5*cse_1
+        _p9 = -g_bna
+        _p10 = -g_Na
+        _p11 = -cse_15
+        _p12 = K_o*P_NaK/(K_mk + K_o)
+        _p13 = -Ca_o
+        _p14 = -1 + gamma
+        _p15 = -alpha*cse_20
+        _p16 = K_NaCa/((Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) + cse_20))
+        _p17 = -g_bca
+        _p18 = -g_pCa
+        _p19 = -4*(F*F)*cse_13*cse_14
+        _p20 = (K_up*K_up)
+        _p21 = (EC*EC)
+        _p22 = min_sr - max_sr
+        _p23 = -k2_prime
+        _p24 = Buf_sr*K_buf_sr
+        _p25 = Buf_c*K_buf_c
+        _p26 = g_bca/2
+        _p27 = g_pCa/2
+        _p28 = -cse_44
+        _p29 = V_sr*cse_43
+        _p30 = Buf_ss*K_buf_ss
+        _p31 = V_sr*cse_45
+        _p32 = -V_c*cse_45
+        _p33 = -2*Cm*F*cse_13*cse_14*cse_45
+
+        # Expressions depending on the states
+        cse_2 = cse_1*ufl.ln(K_o/K_i)
+        cse_3 = -cse_2 + V
+        cse_4 = _p0*cse_3
+        cse_5 = 1.0/(1 + 6.14421235332821e-06*ufl.exp(0.06*V - 0.06*cse_2))
+        cse_6 = 0.1*V
+        cse_7 = _p3*(Xs*Xs)*(_p2*ufl.ln(_p1/(P_kna*Na_i + K_i)) + V) +\
+            _p4*cse_3/(1 + 65.40521574193832*ufl.exp(-0.16722408026755853*V))\
+            + _p5*cse_3*r*s + _p6*cse_4*cse_5/(0.1*cse_5 +\
+            (0.36787944117144233*ufl.exp(-0.1*cse_2 + cse_6) +\
+            3.0606040200802673*ufl.exp(0.0002*V - 0.0002*cse_2))/(1 +\
+            ufl.exp(0.5*cse_2 - 0.5*V))) + _p7*Xr1*Xr2*cse_4
+        cse_8 = 1.0/(K_pCa + Ca_i)
+        cse_9 = _p8*ufl.ln(Ca_o/Ca_i) + V
+        cse_10 = _p2*ufl.ln(Na_o/Na_i) + V
+        cse_11 = _p9*cse_10
+        cse_12 = _p10*(m*m*m)*cse_10*h*j
+        cse_16 = V*cse_15
+        cse_17 = _p12*Na_i/((K_mNa + Na_i)*(1 + 0.0353*ufl.exp(-cse_16) +\
+            0.1245*ufl.exp(_p11*cse_6)))
+        cse_18 = ufl.exp((-30 + 2*V)*cse_15)
+        cse_19 = g_CaL*(-15 + V)*(_p13 + 0.25*Ca_ss*cse_18)*d*f*f2*fCass/(-1 +\
+            cse_18)
+        cse_21 = ufl.exp(_p14*cse_16)
+        cse_22 = _p16*(_p15*Ca_i*cse_21 +\
+            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(gamma*cse_16))/(1 + K_sat*cse_21)
+        cse_23 = -cse_22
+        current[0] = -cse_17 + _p17*cse_9 + _p19*cse_19 + _p18*Ca_i*cse_8 +\
+            cse_11 + cse_12 + cse_23 + cse_7
+        cse_24 = V/10
+        cse_25 = -cse_24
+        cse_26 = V/7
+        F_expressions[0] = (1 +\
+            13.581324522578193*ufl.exp(0.08695652173913043*V))*(1 +\
+            ufl.exp(-9/2 + cse_25))*(1.0/(1 + ufl.exp(-26/7 - cse_26)) -\
+            Xr1)/2700
+        cse_27 = V/20
+        cse_28 = -cse_27
+        F_expressions[1] = 0.2976190476190476*(1 + ufl.exp(-3 + cse_27))*(1 +\
+            ufl.exp(-3 + cse_28))*(1.0/(1 + ufl.exp(11/3 + V/24)) - Xr2)
+        cse_29 = -V/6
+        F_expressions[2] = (1.0/(1 + ufl.exp(-5/14 - V/14)) - Xs)/(80 +\
+            1400/((1 + ufl.exp(-7/3 + V/15))*(ufl.sqrt(1 + ufl.exp(5/6 +\
+            cse_29)))))
+        F_expressions[11] = (1.0/(1 + ufl.exp(10/3 + cse_29)) - r)/(0.8 +\
+            9.5*ufl.exp(-((40 + V)*(40 + V))/1800))
+        cse_30 = V/5
+        F_expressions[3] = (1 + ufl.exp(-12 - cse_30))*(1.0/((1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*ufl.exp(-0.1107419712070875*V))) -\
+            m)/(0.1/(1 + ufl.exp(7 + cse_30)) + 0.1/(1 + ufl.exp(-1/4 +\
+            V/200)))
+        F_expressions[6] = (1.0/(1 +\
+            0.34415378686541237*ufl.exp(-0.13333333333333333*V)) - d)/(1.0/(1 +\
+            ufl.exp(5/2 + cse_28)) + 1.4*(0.25 + 1.4/(1 + ufl.exp(-35/13 -\
+            V/13)))/(1 + ufl.exp(1 + cse_30)))
+        F_expressions[10] = (1.0/(1 + ufl.exp(4 + cse_30)) - s)/(3 + 5/(1 +\
+            ufl.exp(-4 + cse_30)) + 85*ufl.exp(-((45 + V)*(45 + V))/320))
+        cse_31 = 1.0/((1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*ufl.exp(0.13458950201884254*V)))
+        F_expressions[4] = (-h + cse_31)*(ufl.conditional(ufl.lt(V, -40),\
+            4.4312679295805147e-07*ufl.exp(-0.14705882352941177*V), 0) +\
+            ufl.conditional(ufl.lt(V, -40), 310000*ufl.exp(0.3485*V) +\
+            2.7*ufl.exp(0.079*V), 0.77/(0.13 +\
+            0.049758141083938695*ufl.exp(-0.0900900900900901*V))))
+        F_expressions[5] = (-j + cse_31)*(ufl.conditional(ufl.lt(V, -40),\
+            0.02424*ufl.exp(-0.01052*V)/(1 +\
+            0.003960868339904256*ufl.exp(-0.1378*V)), 0.6*ufl.exp(0.057*V)/(1 +\
+            0.040762203978366204*ufl.exp(-cse_6))) +\
+            ufl.conditional(ufl.lt(V, -40), (37.78 +\
+            V)*(-25428*ufl.exp(0.2444*V) - 6.948e-06*ufl.exp(-0.04391*V))/(1 +\
+            50262745825.95399*ufl.exp(0.311*V)), 0))
+        cse_32 = ((27 + V)*(27 + V))
+        cse_33 = 1.0/(1 + ufl.exp(3 + cse_24))
+        F_expressions[7] = (1.0/(1 + ufl.exp(20/7 + cse_26)) - f)/(20 +\
+            180*cse_33 + 200/(1 + ufl.exp(13/10 + cse_25)) +\
+            1102.5*ufl.exp(-cse_32/225))
+        F_expressions[8] = (0.33 - f2 + 0.67/(1 + ufl.exp(5 +\
+            cse_26)))/(31/(1 + ufl.exp(5/2 + cse_25)) + 80*cse_33 +\
+            562*ufl.exp(-cse_32/240))
+        cse_34 = (Ca_ss*Ca_ss)
+        cse_35 = 1.0/(1 + 400.0*cse_34)
+        F_expressions[9] = (0.4 - fCass + 0.6*cse_35)/(2 + 80*cse_35)
+        cse_36 = -Ca_i
+        cse_37 = V_leak*(Ca_SR + cse_36)
+        cse_38 = Vmax_up/(1 + _p20/(Ca_i*Ca_i))
+        cse_39 = max_sr + _p22/(1 + _p21/(Ca_SR*Ca_SR))
+        cse_40 = k1_prime*cse_34/cse_39
+        F_expressions[15] = k4*(1 - R_prime) + _p23*Ca_ss*R_prime*cse_39
+        cse_41 = V_rel*(-Ca_ss + Ca_SR)*R_prime*cse_40/(k3 + cse_40)
+        F_expressions[12] = (-cse_37 - cse_41 + cse_38)/(1 + _p24/((K_buf_sr\
+            + Ca_SR)*(K_buf_sr + Ca_SR)))
+        cse_42 = V_xfer*(Ca_ss + cse_36)
+        F_expressions[13] = (_p28*(_p26*cse_9 + _p27*Ca_i*cse_8 + cse_23) +\
+            _p29*(-cse_38 + cse_37) + cse_42)/(1 + _p25/((K_buf_c +\
+            Ca_i)*(K_buf_c + Ca_i)))
+        F_expressions[16] = (-3*cse_17 - 3*cse_22 + cse_11 + cse_12)*cse_44
+        F_expressions[17] = (2*cse_17 + cse_7)*cse_44
+        F_expressions[14] = (_p31*cse_41 + _p32*cse_42 + _p33*cse_19)/(1 +\
+            _p30/((K_buf_ss + Ca_ss)*(K_buf_ss + Ca_ss)))
 
         # Return results
-        return current[0]
-
-    def I(self, v, s, time=None):
-        """
-        Transmembrane current
-
-           I = -dV/dt
-
-        """
-        return -self._I(v, s, time)
+        return current[0], dolfin.as_vector(F_expressions)
 
-    def F(self, v, s, time=None):
+    def jacobian(self, v, s, time=None):
         """
-        Right hand side for ODE system
+        Jacobian of the right hand side (dV/dt, dS/dt) with respect to (v, s)
         """
         time = time if time else Constant(0.0)
 
@@ -284,116 +419,672 @@ class Tentusscher_panfilov_2006_M_cell(CardiacCellModel):
         K_o = self._parameters["K_o"]
 
         # Init return args
-        F_expressions = [ufl.zero()]*18
+        jacobian = [ufl.zero()]*361
+
+        # Parameter-only expressions
+        cse_0 = -g_bna
+        cse_4 = (F*F*F)
+        cse_5 = 1.0/(R*R)
+        cse_6 = 1.0/(T*T)
+        cse_8 = 1.0/R
+        cse_9 = 1.0/T
+        cse_10 = F*cse_8*cse_9
+        cse_14 = (F*F)
+        cse_18 = 1.0/(K_mk + K_o)
+        cse_27 = 1.0/(Ca_o + Km_Ca)
+        cse_28 = (Na_o*Na_o*Na_o)
+        cse_29 = 1.0/((Km_Nai*Km_Nai*Km_Nai) + cse_28)
+        cse_30 = -1 + gamma
+        cse_36 = F*cse_30*cse_8*cse_9
+        cse_44 = (ufl.sqrt(K_o))
+        cse_49 = 1.0/F
+        cse_50 = R*T*cse_49
+        cse_58 = 0.5*R*T*cse_49
+        cse_223 = Buf_sr*K_buf_sr
+        cse_228 = (K_up*K_up)
+        cse_232 = max_sr - min_sr
+        cse_233 = (EC*EC)
+        cse_242 = -V_leak
+        cse_248 = (k1_prime*k1_prime)
+        cse_256 = 1.0/V_c
+        cse_257 = Buf_c*K_buf_c
+        cse_262 = V_sr*cse_256
+        cse_263 = Cm*cse_256*cse_49/2
+        cse_265 = Buf_ss*K_buf_ss
+        cse_269 = 1.0/V_ss
+        cse_270 = 2*Cm*F*cse_269*cse_8*cse_9
+        cse_272 = V_sr*cse_269
+        cse_274 = V_c*V_xfer*cse_269
+        cse_276 = Cm*cse_256*cse_49
+        _p0 = -1.0*g_CaL*cse_14*cse_8*cse_9
+        _p1 = -Ca_o
+        _p2 = -4*g_CaL*cse_14*cse_8*cse_9
+        _p3 = 4*g_CaL*cse_14*cse_8*cse_9
+        _p4 = g_CaL*cse_5*cse_6
+        _p5 = -cse_10
+        _p6 = 0.012450000000000001*cse_10
+        _p7 = K_o*P_NaK*cse_18
+        _p8 = alpha*cse_28
+        _p9 = -cse_36
+        _p10 = F*gamma*cse_8*cse_9
+        _p11 = K_NaCa*cse_27*cse_29
+        _p12 = K_NaCa*K_sat*cse_27*cse_29*cse_36
+        _p13 = 0.4303314829119352*g_Kr*cse_44
+        _p14 = 0.04303314829119352*g_K1*cse_44
+        _p15 = 1.5864288080001357e-08*g_K1*cse_44
+        _p16 = -g_Ks
+        _p17 = -10.937327047146876*g_pK
+        _p18 = 8*cse_4
+        _p19 = -2.0*g_CaL*cse_4*cse_5*cse_6
+        _p20 = -g_bca + cse_0
+        _p21 = K_o + Na_o*P_kna
+        _p22 = -cse_50
+        _p23 = 2*g_Ks
+        _p24 = 3*g_Na
+        _p25 = g_bca*cse_58
+        _p26 = K_NaCa*alpha*cse_27*cse_28*cse_29
+        _p27 = R*T*cse_49
+        _p28 = -g_bna
+        _p29 = g_Ks*cse_50
+        _p30 = -P_kna
+        _p31 = Ca_o*K_NaCa*cse_27*cse_29
+        _p32 = -0.5*R*T*cse_49
+        _p33 = -cse_232
+        _p34 = 2*k2_prime*cse_232*cse_233
+        _p35 = 2*V_rel*cse_232*cse_233
+        _p36 = 2*cse_223
+        _p37 = 2*Vmax_up*cse_228
+        _p38 = 2*k1_prime
+        _p39 = 2*cse_248
+        _p40 = V_rel*k1_prime
+        _p41 = 3*Cm*cse_256*cse_49
+        _p42 = Cm*cse_256*cse_49
+        _p43 = g_bca/2
+        _p44 = V_leak*cse_262
+        _p45 = -cse_263
+        _p46 = -V_xfer
+        _p47 = -cse_58
+        _p48 = -2*K_NaCa*cse_27*cse_29
+        _p49 = 2*cse_257
+        _p50 = 4*Cm*cse_14*cse_269
+        _p51 = -2*Cm*F*g_CaL*cse_269*cse_8*cse_9
+        _p52 = -1.0*Cm*g_CaL*cse_14*cse_269*cse_5*cse_6
+        _p53 = V_sr*cse_269
+        _p54 = -g_CaL*cse_270
+        _p55 = 2*Cm*F*g_CaL*cse_269*cse_8*cse_9
+        _p56 = -cse_272
+        _p57 = -0.5*Cm*F*g_CaL*cse_269*cse_8*cse_9
+        _p58 = -cse_274
+        _p59 = 2*cse_265
+        _p60 = -k4
+        _p61 = -cse_276
+
+        # Expressions depending on the states
+        cse_1 = (m*m*m)
+        cse_2 = g_Na*cse_1*h*j
+        cse_3 = -cse_2
+        cse_7 = -15 + V
+        cse_11 = ufl.exp((-30 + 2*V)*cse_10)
+        cse_12 = -1 + cse_11
+        cse_13 = 1.0/cse_12
+        jacobian[15] = _p0*cse_11*cse_13*cse_7*d*f*f2*fCass
+        cse_15 = _p1 + 0.25*Ca_ss*cse_11
+        jacobian[7] = _p2*cse_13*cse_15*cse_7*f*f2*fCass
+        cse_16 = _p3*cse_13*cse_15*d*f*f2
+        jacobian[10] = -cse_16*cse_7
+        cse_17 = _p4*cse_11*cse_15*cse_7*d*f*f2*fCass/(cse_12*cse_12)
+        cse_19 = K_mNa + Na_i
+        cse_20 = 1.0/cse_19
+        cse_21 = V*cse_10
+        cse_22 = 0.0353*ufl.exp(-cse_21)
+        cse_23 = 0.1*V
+        cse_24 = ufl.exp(_p5*cse_23)
+        cse_25 = 1 + 0.1245*cse_24 + cse_22
+        cse_26 = _p7*(_p6*cse_24 + cse_10*cse_22)*Na_i*cse_20/(cse_25*cse_25)
+        cse_31 = ufl.exp(cse_21*cse_30)
+        cse_32 = 1 + K_sat*cse_31
+        cse_33 = 1.0/cse_32
+        cse_34 = ufl.exp(gamma*cse_21)
+        cse_35 = Ca_o*(Na_i*Na_i*Na_i)*cse_34
+        cse_37 = _p8*Ca_i*cse_31
+        cse_38 = _p11*(_p10*cse_35 + _p9*cse_37)*cse_33
+        cse_39 = -cse_38
+        cse_40 = -cse_37 + cse_35
+        cse_41 = _p12*cse_31*cse_40/(cse_32*cse_32)
+        cse_42 = (Xs*Xs)
+        cse_43 = g_to*r*s
+        cse_45 = _p13*Xr1*Xr2
+        cse_46 = ufl.exp(-0.16722408026755853*V)
+        cse_47 = 1 + 65.40521574193832*cse_46
+        cse_48 = g_pK/cse_47
+        cse_51 = 1.0/K_i
+        cse_52 = ufl.ln(K_o*cse_51)
+        cse_53 = cse_50*cse_52
+        cse_54 = -cse_53 + V
+        cse_55 = ufl.exp(0.06*V - 0.06*cse_53)
+        cse_56 = 1 + 6.14421235332821e-06*cse_55
+        cse_57 = 1.0/cse_56
+        cse_59 = ufl.exp(-0.5*V + cse_52*cse_58)
+        cse_60 = 1 + cse_59
+        cse_61 = 1.0/cse_60
+        cse_62 = ufl.exp(0.0002*V - 0.0002*cse_53)
+        cse_63 = ufl.exp(-0.1*cse_53 + cse_23)
+        cse_64 = 0.36787944117144233*cse_63 + 3.0606040200802673*cse_62
+        cse_65 = 0.1*cse_57 + cse_61*cse_64
+        cse_66 = 1.0/cse_65
+        cse_67 = _p14*cse_57*cse_66
+        cse_68 = 1.0/(cse_56*cse_56)
+        cse_69 = _p15*cse_54*cse_55*cse_66*cse_68
+        cse_70 = _p14*cse_54*cse_57/(cse_65*cse_65)
+        cse_71 = 3.686527411996926e-08*cse_55*cse_68
+        cse_72 = 0.0006121208040160535*cse_62
+        cse_73 = 0.036787944117144235*cse_63
+        cse_74 = cse_59*cse_64/(cse_60*cse_60)
+        cse_75 = -cse_43 - cse_45 - cse_48 - cse_67 + _p16*cse_42 -\
+            (-0.5*cse_74 - (cse_72 + cse_73)*cse_61 + cse_71)*cse_70 +\
+            _p17*cse_46*cse_54/(cse_47*cse_47) + cse_69
+        jacobian[0] = _p20 - cse_26 + _p18*cse_17 - cse_16*fCass +\
+            _p19*Ca_ss*cse_11*cse_13*cse_7*d*f*f2*fCass + cse_3 + cse_39 +\
+            cse_41 + cse_75
+        cse_76 = _p13*cse_54
+        cse_77 = Xr2*cse_76
+        jacobian[1] = -cse_77
+        cse_78 = Xr1*cse_76
+        jacobian[2] = -cse_78
+        cse_79 = 1.0/(P_kna*Na_i + K_i)
+        cse_80 = _p23*(_p22*ufl.ln(_p21*cse_79) + V)*Xs
+        jacobian[3] = -cse_80
+        cse_81 = 1.0/Na_i
+        cse_82 = _p22*ufl.ln(Na_o*cse_81) + V
+        cse_83 = _p24*(m*m)*cse_82*h*j
+        jacobian[4] = -cse_83
+        cse_84 = g_Na*cse_1*cse_82
+        cse_85 = cse_84*j
+        jacobian[5] = -cse_85
+        cse_86 = cse_84*h
+        jacobian[6] = -cse_86
+        cse_87 = _p3*cse_13*cse_15*cse_7*d*fCass
+        jacobian[8] = -cse_87*f2
+        jacobian[9] = -cse_87*f
+        cse_88 = g_to*cse_54
+        cse_89 = cse_88*r
+        jacobian[11] = -cse_89
+        cse_90 = cse_88*s
+        jacobian[12] = -cse_90
+        cse_91 = K_pCa + Ca_i
+        cse_92 = g_pCa/cse_91
+        cse_93 = g_pCa*Ca_i/(cse_91*cse_91)
+        cse_94 = 1.0/Ca_i
+        cse_95 = _p25*cse_94
+        cse_96 = _p26*cse_31*cse_33
+        jacobian[14] = -cse_92 - cse_95 + cse_93 + cse_96
+        cse_97 = _p27*cse_81
+        cse_98 = _p28*cse_97 - cse_2*cse_97
+        cse_99 = _p29*cse_42*cse_79
+        cse_100 = _p30*cse_99
+        cse_101 = 1.0/cse_25
+        cse_102 = _p7*cse_101*cse_20
+        cse_103 = _p7*Na_i*cse_101/(cse_19*cse_19)
+        cse_104 = _p31*(Na_i*Na_i)*cse_33*cse_34
+        cse_105 = 3*cse_104
+        jacobian[17] = -cse_102 - cse_105 + cse_100 + cse_103 + cse_98
+        cse_106 = _p27*cse_51
+        cse_107 = -cse_99 + cse_106*cse_69 - (cse_106*cse_71 -\
+            (cse_106*cse_72 + cse_106*cse_73)*cse_61 +\
+            _p32*cse_51*cse_74)*cse_70 - cse_106*cse_43 - cse_106*cse_45 -\
+            cse_106*cse_48 - cse_106*cse_67
+        jacobian[18] = cse_107
+        cse_108 = ufl.exp(0.08695652173913043*V)
+        cse_109 = V/10
+        cse_110 = -cse_109
+        cse_111 = ufl.exp(-9/2 + cse_110)
+        cse_112 = 1 + cse_111
+        cse_113 = V/7
+        cse_114 = ufl.exp(-26/7 - cse_113)
+        cse_115 = 1 + cse_114
+        cse_116 = 1.0/cse_115 - Xr1
+        cse_117 = 1 + 13.581324522578193*cse_108
+        cse_118 = cse_112*cse_117
+        jacobian[19] = -cse_111*cse_116*cse_117/27000 +\
+            cse_114*cse_118/(18900*(cse_115*cse_115)) +\
+            0.00043740175596065033*cse_108*cse_112*cse_116
+        jacobian[20] = -cse_118/2700
+        cse_119 = V/20
+        cse_120 = ufl.exp(-3 + cse_119)
+        cse_121 = -cse_119
+        cse_122 = ufl.exp(-3 + cse_121)
+        cse_123 = 1 + cse_122
+        cse_124 = ufl.exp(11/3 + V/24)
+        cse_125 = 1 + cse_124
+        cse_126 = 0.014880952380952382/cse_125 - 0.014880952380952382*Xr2
+        cse_127 = 1 + cse_120
+        cse_128 = cse_123*cse_127
+        jacobian[38] = cse_120*cse_123*cse_126 - cse_122*cse_126*cse_127 -\
+            0.01240079365079365*cse_124*cse_128/(cse_125*cse_125)
+        jacobian[40] = -0.2976190476190476*cse_128
+        cse_129 = ufl.exp(-5/14 - V/14)
+        cse_130 = 1 + cse_129
+        cse_131 = -V/6
+        cse_132 = ufl.exp(5/6 + cse_131)
+        cse_133 = 1 + cse_132
+        cse_134 = 1.0/(ufl.sqrt(cse_133))
+        cse_135 = ufl.exp(-7/3 + V/15)
+        cse_136 = 1 + cse_135
+        cse_137 = 1.0/cse_136
+        cse_138 = 80 + 1400*cse_134*cse_137
+        cse_139 = 1.0/cse_138
+        jacobian[57] = (1.0/cse_130 -\
+            Xs)*(-350*cse_132*cse_137/(3*(cse_133*ufl.sqrt(cse_133))) +\
+            280*cse_134*cse_135/(3*(cse_136*cse_136)))/(cse_138*cse_138) +\
+            cse_129*cse_139/(14*(cse_130*cse_130))
+        jacobian[60] = -cse_139
+        cse_140 = V/5
+        cse_141 = ufl.exp(-12 - cse_140)
+        cse_142 = ufl.exp(-0.1107419712070875*V)
+        cse_143 = 1 + 0.0018422115811651339*cse_142
+        cse_144 = 1.0/(cse_143*cse_143) - m
+        cse_145 = ufl.exp(-1/4 + V/200)
+        cse_146 = 1 + cse_145
+        cse_147 = ufl.exp(7 + cse_140)
+        cse_148 = 1 + cse_147
+        cse_149 = 0.1/cse_146 + 0.1/cse_148
+        cse_150 = 1.0/cse_149
+        cse_151 = 1 + cse_141
+        cse_152 = cse_150*cse_151
+        jacobian[76] = -cse_141*cse_144*cse_150/5 +\
+            0.0004080202837575048*cse_142*cse_152/(cse_143*cse_143*cse_143) +\
+            (0.0005*cse_145/(cse_146*cse_146) +\
+            0.020000000000000004*cse_147/(cse_148*cse_148))*cse_144*cse_151/(cse_149*cse_149)
+        jacobian[80] = -cse_152
+        cse_153 = ufl.exp(0.13458950201884254*V)
+        cse_154 = 1 + 15212.593285654404*cse_153
+        cse_155 = 4094.9107094628275*cse_153/(cse_154*cse_154*cse_154)
+        cse_156 = ufl.exp(-0.14705882352941177*V)
+        cse_157 = ufl.exp(0.079*V)
+        cse_158 = ufl.exp(0.3485*V)
+        cse_159 = ufl.exp(-0.0900900900900901*V)
+        cse_160 = 0.13 + 0.049758141083938695*cse_159
+        jacobian[100] = -ufl.conditional(ufl.lt(V, -40),\
+            4.4312679295805147e-07*cse_156, 0) - ufl.conditional(ufl.lt(V,\
+            -40), 310000*cse_158 + 2.7*cse_157, 0.77/cse_160)
+        cse_161 = 1.0/(cse_154*cse_154)
+        jacobian[95] = (-h + cse_161)*(ufl.conditional(ufl.lt(V, -40),\
+            -6.516570484677227e-08*cse_156, 0) + ufl.conditional(ufl.lt(V,\
+            -40), 108034.99999999999*cse_158 + 0.21330000000000002*cse_157,\
+            0.003451690867984937*cse_159/(cse_160*cse_160))) -\
+            (ufl.conditional(ufl.lt(V, -40), 4.4312679295805147e-07*cse_156,\
+            0) + ufl.conditional(ufl.lt(V, -40), 310000*cse_158 +\
+            2.7*cse_157, 0.77/cse_160))*cse_155
+        cse_162 = 37.78 + V
+        cse_163 = ufl.exp(0.311*V)
+        cse_164 = 1 + 50262745825.95399*cse_163
+        cse_165 = 1.0/cse_164
+        cse_166 = ufl.exp(-0.04391*V)
+        cse_167 = ufl.exp(0.2444*V)
+        cse_168 = -25428*cse_167 - 6.948e-06*cse_166
+        cse_169 = cse_165*cse_168
+        cse_170 = 1 + 0.003960868339904256*ufl.exp(-0.1378*V)
+        cse_171 = ufl.exp(-0.01052*V)/cse_170
+        cse_172 = 1 + 0.040762203978366204*ufl.exp(-cse_23)
+        cse_173 = ufl.exp(0.057*V)/cse_172
+        jacobian[114] = (-j + cse_161)*(ufl.conditional(ufl.lt(V, -40),\
+            -0.00025500480000000003*cse_171 +\
+            1.323037761146867e-05*ufl.exp(-0.14832*V)/(cse_170*cse_170),\
+            0.0342*cse_173 +\
+            0.002445732238701972*ufl.exp(-0.043000000000000003*V)/(cse_172*cse_172))\
+            + ufl.conditional(ufl.lt(V, -40), (3.0508668e-07*cse_166 -\
+            6214.6032000000005*cse_167)*cse_162*cse_165 -\
+            15631713951.87169*cse_162*cse_163*cse_168/(cse_164*cse_164) +\
+            cse_169, 0)) - (ufl.conditional(ufl.lt(V, -40), 0.02424*cse_171,\
+            0.6*cse_173) + ufl.conditional(ufl.lt(V, -40), cse_162*cse_169,\
+            0))*cse_155
+        jacobian[120] = -ufl.conditional(ufl.lt(V, -40), 0.02424*cse_171,\
+            0.6*cse_173) - ufl.conditional(ufl.lt(V, -40), cse_162*cse_169,\
+            0)
+        cse_174 = ufl.exp(-0.13333333333333333*V)
+        cse_175 = 1 + 0.34415378686541237*cse_174
+        cse_176 = ufl.exp(5/2 + cse_121)
+        cse_177 = 1 + cse_176
+        cse_178 = ufl.exp(1 + cse_140)
+        cse_179 = 1 + cse_178
+        cse_180 = 1.0/cse_179
+        cse_181 = ufl.exp(-35/13 - V/13)
+        cse_182 = 1 + cse_181
+        cse_183 = 0.25 + 1.4/cse_182
+        cse_184 = 1.0/cse_177 + 1.4*cse_180*cse_183
+        cse_185 = 1.0/cse_184
+        jacobian[133] = (1.0/cse_175 - d)*(-cse_176/(20*(cse_177*cse_177)) +\
+            0.27999999999999997*cse_178*cse_183/(cse_179*cse_179) -\
+            0.15076923076923077*cse_180*cse_181/(cse_182*cse_182))/(cse_184*cse_184)\
+            + 0.045887171582054985*cse_174*cse_185/(cse_175*cse_175)
+        jacobian[140] = -cse_185
+        cse_186 = ufl.exp(20/7 + cse_113)
+        cse_187 = 1 + cse_186
+        cse_188 = ((27 + V)*(27 + V))
+        cse_189 = 1102.5*ufl.exp(-cse_188/225)
+        cse_190 = ufl.exp(13/10 + cse_110)
+        cse_191 = 1 + cse_190
+        cse_192 = ufl.exp(3 + cse_109)
+        cse_193 = 1 + cse_192
+        cse_194 = 1.0/cse_193
+        cse_195 = 20 + 180*cse_194 + 200/cse_191 + cse_189
+        cse_196 = 1.0/cse_195
+        jacobian[160] = -cse_196
+        cse_197 = cse_192/(cse_193*cse_193)
+        jacobian[152] = (1.0/cse_187 - f)*(18*cse_197 - (-6/25 -\
+            2*V/225)*cse_189 -\
+            20*cse_190/(cse_191*cse_191))/(cse_195*cse_195) -\
+            cse_186*cse_196/(7*(cse_187*cse_187))
+        cse_198 = ufl.exp(5 + cse_113)
+        cse_199 = 1 + cse_198
+        cse_200 = 562*ufl.exp(-cse_188/240)
+        cse_201 = ufl.exp(5/2 + cse_110)
+        cse_202 = 1 + cse_201
+        cse_203 = 31/cse_202 + 80*cse_194 + cse_200
+        cse_204 = 1.0/cse_203
+        jacobian[171] = (0.33 - f2 + 0.67/cse_199)*(8*cse_197 - (-9/40 -\
+            V/120)*cse_200 -\
+            31*cse_201/(10*(cse_202*cse_202)))/(cse_203*cse_203) -\
+            0.09571428571428571*cse_198*cse_204/(cse_199*cse_199)
+        jacobian[180] = -cse_204
+        cse_205 = (Ca_ss*Ca_ss)
+        cse_206 = 1 + 400.0*cse_205
+        cse_207 = 1.0/cse_206
+        cse_208 = 2 + 80*cse_207
+        cse_209 = 1.0/cse_208
+        jacobian[200] = -cse_209
+        cse_210 = Ca_ss/(cse_206*cse_206)
+        jacobian[205] = -480.0*cse_209*cse_210 + 64000.0*(0.4 - fCass +\
+            0.6*cse_207)*cse_210/(cse_208*cse_208)
+        cse_211 = ufl.exp(4 + cse_140)
+        cse_212 = 1 + cse_211
+        cse_213 = 85*ufl.exp(-((45 + V)*(45 + V))/320)
+        cse_214 = ufl.exp(-4 + cse_140)
+        cse_215 = 1 + cse_214
+        cse_216 = 3 + 5/cse_215 + cse_213
+        cse_217 = 1.0/cse_216
+        jacobian[209] = (1.0/cse_212 - s)*(cse_214/(cse_215*cse_215) - (-9/32 -\
+            V/160)*cse_213)/(cse_216*cse_216) -\
+            cse_211*cse_217/(5*(cse_212*cse_212))
+        jacobian[220] = -cse_217
+        cse_218 = ufl.exp(10/3 + cse_131)
+        cse_219 = 1 + cse_218
+        cse_220 = 9.5*ufl.exp(-((40 + V)*(40 + V))/1800)
+        cse_221 = 0.8 + cse_220
+        cse_222 = 1.0/cse_221
+        jacobian[228] = cse_218*cse_222/(6*(cse_219*cse_219)) - (-2/45 -\
+            V/900)*(1.0/cse_219 - r)*cse_220/(cse_221*cse_221)
+        jacobian[240] = -cse_222
+        cse_224 = K_buf_sr + Ca_SR
+        cse_225 = 1 + cse_223/(cse_224*cse_224)
+        cse_226 = -Ca_i
+        cse_227 = V_leak*(Ca_SR + cse_226)
+        cse_229 = 1 + cse_228/(Ca_i*Ca_i)
+        cse_230 = Vmax_up/cse_229
+        cse_231 = -Ca_ss + Ca_SR
+        cse_234 = 1 + cse_233/(Ca_SR*Ca_SR)
+        cse_235 = max_sr + _p33/cse_234
+        cse_236 = 1.0/cse_235
+        cse_237 = k1_prime*cse_205*cse_236
+        cse_238 = k3 + cse_237
+        cse_239 = 1.0/cse_238
+        cse_240 = V_rel*R_prime*cse_237*cse_239
+        cse_241 = 1.0/cse_225
+        cse_243 = 1.0/(Ca_SR*Ca_SR*Ca_SR)
+        cse_244 = 1.0/(cse_234*cse_234)
+        jacobian[317] = _p34*Ca_ss*R_prime*cse_243*cse_244
+        cse_245 = _p35*R_prime*cse_231*cse_243*cse_244
+        cse_246 = 1.0/(cse_235*cse_235)
+        cse_247 = k1_prime*cse_205*cse_239*cse_245*cse_246
+        cse_249 = 1.0/(cse_238*cse_238)
+        cse_250 =\
+            (Ca_ss*Ca_ss*Ca_ss*Ca_ss)*cse_245*cse_248*cse_249/(cse_235*cse_235*cse_235)
+        jacobian[260] = (-cse_240 - cse_247 + cse_242 + cse_250)*cse_241 +\
+            _p36*(-cse_227 - cse_231*cse_240 +\
+            cse_230)/((cse_224*cse_224*cse_224)*(cse_225*cse_225))
+        cse_251 = _p37/((Ca_i*Ca_i*Ca_i)*(cse_229*cse_229))
+        jacobian[261] = (V_leak + cse_251)*cse_241
+        cse_252 = V_rel*cse_231
+        cse_253 = _p38*Ca_ss*R_prime*cse_236*cse_239*cse_252
+        cse_254 = _p39*(Ca_ss*Ca_ss*Ca_ss)*R_prime*cse_246*cse_249*cse_252
+        jacobian[262] = (-cse_253 + cse_240 + cse_254)*cse_241
+        cse_255 = _p40*cse_205*cse_231*cse_236*cse_239
+        jacobian[263] = -cse_241*cse_255
+        jacobian[337] = _p41*cse_96
+        cse_258 = K_buf_c + Ca_i
+        cse_259 = 1 + cse_257/(cse_258*cse_258)
+        cse_260 = 1.0/cse_259
+        jacobian[281] = V_xfer*cse_260
+        cse_261 = _p42*cse_260
+        jacobian[266] = -(_p43 + cse_39 + cse_41)*cse_261
+        jacobian[283] = cse_105*cse_261
+        jacobian[279] = _p44*cse_260
+        cse_264 = Ca_ss + cse_226
+        jacobian[280] = (_p46 + _p45*(-cse_93 + 2*cse_96 + cse_92 + cse_95) +\
+            (-cse_251 + cse_242)*cse_262)*cse_260 +\
+            _p49*(_p45*(g_bca*(_p47*ufl.ln(Ca_o*cse_94) + V) + Ca_i*cse_92 +\
+            _p48*cse_33*cse_40) + V_xfer*cse_264 + (-cse_230 +\
+            cse_227)*cse_262)/((cse_258*cse_258*cse_258)*(cse_259*cse_259))
+        cse_266 = K_buf_ss + Ca_ss
+        cse_267 = 1 + cse_265/(cse_266*cse_266)
+        cse_268 = 1.0/cse_267
+        jacobian[285] = (_p50*cse_17 + _p51*cse_13*cse_15*d*f*f2*fCass +\
+            _p52*Ca_ss*cse_11*cse_13*cse_7*d*f*f2*fCass)*cse_268
+        jacobian[293] = _p51*cse_13*cse_15*cse_268*cse_7*d*f2*fCass
+        jacobian[301] = _p53*cse_255*cse_268
+        jacobian[292] = _p54*cse_13*cse_15*cse_268*cse_7*f*f2*fCass
+        cse_271 = _p55*cse_13*cse_15*cse_268*cse_7*d*f
+        jacobian[294] = -cse_271*fCass
+        jacobian[295] = -cse_271*f2
+        cse_273 = cse_240*cse_272
+        jacobian[298] = (_p56*cse_250 + cse_247*cse_272 + cse_273)*cse_268
+        jacobian[299] = cse_268*cse_274
+        jacobian[300] = (_p58 - cse_273 + _p56*cse_254 + cse_253*cse_272 +\
+            _p57*cse_11*cse_13*cse_7*d*f*f2*fCass)*cse_268 +\
+            _p59*(_p58*cse_264 + cse_231*cse_273 +\
+            _p54*cse_13*cse_15*cse_7*d*f*f2*fCass)/((cse_266*cse_266*cse_266)*(cse_267*cse_267))
+        cse_275 = k2_prime*cse_235
+        jacobian[319] = -R_prime*cse_275
+        jacobian[320] = _p60 - Ca_ss*cse_275
+        jacobian[323] = (-3*cse_26 - 3*cse_38 + 3*cse_41 + cse_0 +\
+            cse_3)*cse_276
+        jacobian[327] = _p61*cse_83
+        jacobian[328] = _p61*cse_85
+        jacobian[329] = _p61*cse_86
+        jacobian[340] = (-9*cse_104 - 3*cse_102 + 3*cse_103 + cse_98)*cse_276
+        jacobian[342] = (2*cse_26 + cse_75)*cse_276
+        jacobian[343] = _p61*cse_77
+        jacobian[344] = _p61*cse_78
+        jacobian[345] = _p61*cse_80
+        jacobian[353] = _p61*cse_89
+        jacobian[354] = _p61*cse_90
+        jacobian[359] = (-2*cse_103 + 2*cse_102 + cse_100)*cse_276
+        jacobian[360] = cse_107*cse_276
+
+        # Return results
+        return ufl.as_matrix([jacobian[19*i:19*(i + 1)] for i in range(19)])
+
+    def num_states(self):
+        return 18
+
+    @staticmethod
+    def rhs(states, parameters, time, out=None):
+        """
+        Compute the right-hand side of all states (in place in out if given)
+        """
+        # Assign states
+        assert(len(states) == 19)
+        V, Xr1, Xr2, Xs, m, h, j, d, f, f2, fCass, s, r, Ca_SR, Ca_i, Ca_ss,\
+            R_prime, Na_i, K_i = states
+
+        # Assign parameters
+        assert(len(parameters) == 53)
+        P_kna = parameters[0]
+        g_K1 = parameters[1]
+        g_Kr = parameters[2]
+        g_Ks = parameters[3]
+        g_Na = parameters[4]
+        g_bna = parameters[5]
+        g_CaL = parameters[6]
+        g_bca = parameters[7]
+        g_to = parameters[8]
+        K_mNa = parameters[9]
+        K_mk = parameters[10]
+        P_NaK = parameters[11]
+        K_NaCa = parameters[12]
+        K_sat = parameters[13]
+        Km_Ca = parameters[14]
+        Km_Nai = parameters[15]
+        alpha = parameters[16]
+        gamma = parameters[17]
+        K_pCa = parameters[18]
+        g_pCa = parameters[19]
+        g_pK = parameters[20]
+        Buf_c = parameters[21]
+        Buf_sr = parameters[22]
+        Buf_ss = parameters[23]
+        Ca_o = parameters[24]
+        EC = parameters[25]
+        K_buf_c = parameters[26]
+        K_buf_sr = parameters[27]
+        K_buf_ss = parameters[28]
+        K_up = parameters[29]
+        V_leak = parameters[30]
+        V_rel = parameters[31]
+        V_sr = parameters[32]
+        V_ss = parameters[33]
+        V_xfer = parameters[34]
+        Vmax_up = parameters[35]
+        k1_prime = parameters[36]
+        k2_prime = parameters[37]
+        k3 = parameters[38]
+        k4 = parameters[39]
+        max_sr = parameters[40]
+        min_sr = parameters[41]
+        Na_o = parameters[42]
+        Cm = parameters[43]
+        F = parameters[44]
+        R = parameters[45]
+        T = parameters[46]
+        V_c = parameters[47]
+        K_o = parameters[52]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states)) if out is None else out
 
         # Expressions for the Reversal potentials component
-        E_Na = R*T*ufl.ln(Na_o/Na_i)/F
-        E_K = R*T*ufl.ln(K_o/K_i)/F
-        E_Ks = R*T*ufl.ln((Na_o*P_kna + K_o)/(K_i + P_kna*Na_i))/F
-        E_Ca = 0.5*R*T*ufl.ln(Ca_o/Ca_i)/F
+        E_Na = R*T*numpy.log(Na_o/Na_i)/F
+        E_K = R*T*numpy.log(K_o/K_i)/F
+        E_Ks = R*T*numpy.log((K_o + Na_o*P_kna)/(P_kna*Na_i + K_i))/F
+        E_Ca = 0.5*R*T*numpy.log(Ca_o/Ca_i)/F
 
         # Expressions for the Inward rectifier potassium current component
-        alpha_K1 = 0.1/(1 + 6.14421235333e-06*ufl.exp(-0.06*E_K + 0.06*V))
-        beta_K1 = (3.06060402008*ufl.exp(0.0002*V - 0.0002*E_K) +\
-            0.367879441171*ufl.exp(0.1*V - 0.1*E_K))/(1 + ufl.exp(0.5*E_K -\
-            0.5*V))
+        alpha_K1 = 0.1/(1 + 6.14421235332821e-06*numpy.exp(0.06*V - 0.06*E_K))
+        beta_K1 = (0.36787944117144233*numpy.exp(0.1*V - 0.1*E_K) +\
+            3.0606040200802673*numpy.exp(0.0002*V - 0.0002*E_K))/(1 +\
+            numpy.exp(0.5*E_K - 0.5*V))
         xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
-        i_K1 = 0.430331482912*g_K1*ufl.sqrt(K_o)*(-E_K + V)*xK1_inf
+        i_K1 = 0.4303314829119352*g_K1*numpy.sqrt(K_o)*(-E_K + V)*xK1_inf
 
         # Expressions for the Rapid time dependent potassium current component
-        i_Kr = 0.430331482912*g_Kr*ufl.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
+        i_Kr = 0.4303314829119352*g_Kr*numpy.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
 
         # Expressions for the Xr1 gate component
-        xr1_inf = 1.0/(1 + ufl.exp(-26/7 - V/7))
-        alpha_xr1 = 450/(1 + ufl.exp(-9/2 - V/10))
-        beta_xr1 = 6/(1 + 13.5813245226*ufl.exp(0.0869565217391*V))
+        xr1_inf = 1.0/(1 + numpy.exp(-26/7 - V/7))
+        alpha_xr1 = 450/(1 + numpy.exp(-9/2 - V/10))
+        beta_xr1 = 6/(1 + 13.581324522578193*numpy.exp(0.08695652173913043*V))
         tau_xr1 = alpha_xr1*beta_xr1
-        F_expressions[0] = (xr1_inf - Xr1)/tau_xr1
+        dy[1] = (-Xr1 + xr1_inf)/tau_xr1
 
         # Expressions for the Xr2 gate component
-        xr2_inf = 1.0/(1 + ufl.exp(11/3 + V/24))
-        alpha_xr2 = 3/(1 + ufl.exp(-3 - V/20))
-        beta_xr2 = 1.12/(1 + ufl.exp(-3 + V/20))
+        xr2_inf = 1.0/(1 + numpy.exp(11/3 + V/24))
+        alpha_xr2 = 3/(1 + numpy.exp(-3 - V/20))
+        beta_xr2 = 1.12/(1 + numpy.exp(-3 + V/20))
         tau_xr2 = alpha_xr2*beta_xr2
-        F_expressions[1] = (xr2_inf - Xr2)/tau_xr2
+        dy[2] = (-Xr2 + xr2_inf)/tau_xr2
 
         # Expressions for the Slow time dependent potassium current component
         i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
 
         # Expressions for the Xs gate component
-        xs_inf = 1.0/(1 + ufl.exp(-5/14 - V/14))
-        alpha_xs = 1400/ufl.sqrt(1 + ufl.exp(5/6 - V/6))
-        beta_xs = 1.0/(1 + ufl.exp(-7/3 + V/15))
+        xs_inf = 1.0/(1 + numpy.exp(-5/14 - V/14))
+        alpha_xs = 1400/numpy.sqrt(1 + numpy.exp(5/6 - V/6))
+        beta_xs = 1.0/(1 + numpy.exp(-7/3 + V/15))
         tau_xs = 80 + alpha_xs*beta_xs
-        F_expressions[2] = (xs_inf - Xs)/tau_xs
+        dy[3] = (-Xs + xs_inf)/tau_xs
 
         # Expressions for the Fast sodium current component
         i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
 
         # Expressions for the m gate component
-        m_inf = 1.0/((1 + 0.00184221158117*ufl.exp(-0.110741971207*V))*(1 +\
-            0.00184221158117*ufl.exp(-0.110741971207*V)))
-        alpha_m = 1.0/(1 + ufl.exp(-12 - V/5))
-        beta_m = 0.1/(1 + ufl.exp(-1/4 + V/200)) + 0.1/(1 + ufl.exp(7 + V/5))
+        m_inf = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V)))
+        alpha_m = 1.0/(1 + numpy.exp(-12 - V/5))
+        beta_m = 0.1/(1 + numpy.exp(7 + V/5)) + 0.1/(1 + numpy.exp(-1/4 +\
+            V/200))
         tau_m = alpha_m*beta_m
-        F_expressions[3] = (-m + m_inf)/tau_m
+        dy[4] = (-m + m_inf)/tau_m
 
         # Expressions for the h gate component
-        h_inf = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V)))
-        alpha_h = ufl.conditional(ufl.lt(V, -40),\
-            4.43126792958e-07*ufl.exp(-0.147058823529*V), 0)
-        beta_h = ufl.conditional(ufl.lt(V, -40), 2.7*ufl.exp(0.079*V) +\
-            310000*ufl.exp(0.3485*V), 0.77/(0.13 +\
-            0.0497581410839*ufl.exp(-0.0900900900901*V)))
+        h_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_h = numpy.where((V < -40),\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V), 0)
+        beta_h = numpy.where((V < -40), 310000*numpy.exp(0.3485*V) +\
+            2.7*numpy.exp(0.079*V), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V)))
         tau_h = 1.0/(alpha_h + beta_h)
-        F_expressions[4] = (-h + h_inf)/tau_h
+        dy[5] = (-h + h_inf)/tau_h
 
         # Expressions for the j gate component
-        j_inf = 1.0/((1 + 15212.5932857*ufl.exp(0.134589502019*V))*(1 +\
-            15212.5932857*ufl.exp(0.134589502019*V)))
-        alpha_j = ufl.conditional(ufl.lt(V, -40), (37.78 +\
-            V)*(-25428*ufl.exp(0.2444*V) - 6.948e-06*ufl.exp(-0.04391*V))/(1 +\
-            50262745826.0*ufl.exp(0.311*V)), 0)
-        beta_j = ufl.conditional(ufl.lt(V, -40),\
-            0.02424*ufl.exp(-0.01052*V)/(1 +\
-            0.0039608683399*ufl.exp(-0.1378*V)), 0.6*ufl.exp(0.057*V)/(1 +\
-            0.0407622039784*ufl.exp(-0.1*V)))
+        j_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_j = numpy.where((V < -40), (37.78 +\
+            V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V)), 0)
+        beta_j = numpy.where((V < -40), 0.02424*numpy.exp(-0.01052*V)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V)),\
+            0.6*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V)))
         tau_j = 1.0/(alpha_j + beta_j)
-        F_expressions[5] = (-j + j_inf)/tau_j
+        dy[6] = (-j + j_inf)/tau_j
 
         # Expressions for the Sodium background current component
         i_b_Na = g_bna*(-E_Na + V)
 
         # Expressions for the L_type Ca current component
-        i_CaL = 4*g_CaL*(F*F)*(-15 + V)*(0.25*Ca_ss*ufl.exp(F*(-30 +\
-            2*V)/(R*T)) - Ca_o)*d*f*f2*fCass/(R*T*(-1 + ufl.exp(F*(-30 +\
+        i_CaL = 4*g_CaL*(F*F)*(-15 + V)*(-Ca_o + 0.25*Ca_ss*numpy.exp(F*(-30 +\
+            2*V)/(R*T)))*d*f*f2*fCass/(R*T*(-1 + numpy.exp(F*(-30 +\
             2*V)/(R*T))))
 
         # Expressions for the d gate component
-        d_inf = 1.0/(1 + 0.344153786865*ufl.exp(-0.133333333333*V))
-        alpha_d = 0.25 + 1.4/(1 + ufl.exp(-35/13 - V/13))
-        beta_d = 1.4/(1 + ufl.exp(1 + V/5))
-        gamma_d = 1.0/(1 + ufl.exp(5/2 - V/20))
+        d_inf = 1.0/(1 + 0.34415378686541237*numpy.exp(-0.13333333333333333*V))
+        alpha_d = 0.25 + 1.4/(1 + numpy.exp(-35/13 - V/13))
+        beta_d = 1.4/(1 + numpy.exp(1 + V/5))
+        gamma_d = 1.0/(1 + numpy.exp(5/2 - V/20))
         tau_d = alpha_d*beta_d + gamma_d
-        F_expressions[6] = (-d + d_inf)/tau_d
+        dy[7] = (-d + d_inf)/tau_d
 
         # Expressions for the f gate component
-        f_inf = 1.0/(1 + ufl.exp(20/7 + V/7))
-        tau_f = 20 + 1102.5*ufl.exp(-((27 + V)*(27 + V))/225) + 180/(1 +\
-            ufl.exp(3 + V/10)) + 200/(1 + ufl.exp(13/10 - V/10))
-        F_expressions[7] = (f_inf - f)/tau_f
+        f_inf = 1.0/(1 + numpy.exp(20/7 + V/7))
+        tau_f = 20 + 180/(1 + numpy.exp(3 + V/10)) + 200/(1 + numpy.exp(13/10 -\
+            V/10)) + 1102.5*numpy.exp(-((27 + V)*(27 + V))/225)
+        dy[8] = (-f + f_inf)/tau_f
 
         # Expressions for the F2 gate component
-        f2_inf = 0.33 + 0.67/(1 + ufl.exp(5 + V/7))
-        tau_f2 = 80/(1 + ufl.exp(3 + V/10)) + 562*ufl.exp(-((27 + V)*(27 +\
-            V))/240) + 31/(1 + ufl.exp(5/2 - V/10))
-        F_expressions[8] = (-f2 + f2_inf)/tau_f2
+        f2_inf = 0.33 + 0.67/(1 + numpy.exp(5 + V/7))
+        tau_f2 = 31/(1 + numpy.exp(5/2 - V/10)) + 80/(1 + numpy.exp(3 +\
+            V/10)) + 562*numpy.exp(-((27 + V)*(27 + V))/240)
+        dy[9] = (-f2 + f2_inf)/tau_f2
 
         # Expressions for the FCass gate component
         fCass_inf = 0.4 + 0.6/(1 + 400.0*(Ca_ss*Ca_ss))
         tau_fCass = 2 + 80/(1 + 400.0*(Ca_ss*Ca_ss))
-        F_expressions[9] = (fCass_inf - fCass)/tau_fCass
+        dy[10] = (-fCass + fCass_inf)/tau_fCass
 
         # Expressions for the Calcium background current component
         i_b_Ca = g_bca*(-E_Ca + V)
@@ -402,69 +1093,359 @@ class Tentusscher_panfilov_2006_M_cell(CardiacCellModel):
         i_to = g_to*(-E_K + V)*r*s
 
         # Expressions for the s gate component
-        s_inf = 1.0/(1 + ufl.exp(4 + V/5))
-        tau_s = 3 + 5/(1 + ufl.exp(-4 + V/5)) + 85*ufl.exp(-((45 + V)*(45 +\
+        s_inf = 1.0/(1 + numpy.exp(4 + V/5))
+        tau_s = 3 + 5/(1 + numpy.exp(-4 + V/5)) + 85*numpy.exp(-((45 + V)*(45 +\
             V))/320)
-        F_expressions[10] = (s_inf - s)/tau_s
+        dy[11] = (-s + s_inf)/tau_s
 
         # Expressions for the r gate component
-        r_inf = 1.0/(1 + ufl.exp(10/3 - V/6))
-        tau_r = 0.8 + 9.5*ufl.exp(-((40 + V)*(40 + V))/1800)
-        F_expressions[11] = (r_inf - r)/tau_r
+        r_inf = 1.0/(1 + numpy.exp(10/3 - V/6))
+        tau_r = 0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800)
+        dy[12] = (-r + r_inf)/tau_r
 
         # Expressions for the Sodium potassium pump current component
         i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
-            0.0353*ufl.exp(-F*V/(R*T)) + 0.1245*ufl.exp(-0.1*F*V/(R*T))))
+            0.0353*numpy.exp(-F*V/(R*T)) + 0.1245*numpy.exp(-0.1*F*V/(R*T))))
 
         # Expressions for the Sodium calcium exchanger current component
-        i_NaCa = K_NaCa*(-alpha*(Na_o*Na_o*Na_o)*Ca_i*ufl.exp(F*(-1 +\
-            gamma)*V/(R*T)) +\
-            Ca_o*(Na_i*Na_i*Na_i)*ufl.exp(F*gamma*V/(R*T)))/((1 +\
-            K_sat*ufl.exp(F*(-1 + gamma)*V/(R*T)))*(Km_Ca +\
-            Ca_o)*((Na_o*Na_o*Na_o) + (Km_Nai*Km_Nai*Km_Nai)))
+        i_NaCa = K_NaCa*(Ca_o*(Na_i*Na_i*Na_i)*numpy.exp(F*gamma*V/(R*T)) -\
+            alpha*(Na_o*Na_o*Na_o)*Ca_i*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))/((1 + K_sat*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))*(Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) +\
+            (Na_o*Na_o*Na_o)))
 
         # Expressions for the Calcium pump current component
-        i_p_Ca = g_pCa*Ca_i/(Ca_i + K_pCa)
+        i_p_Ca = g_pCa*Ca_i/(K_pCa + Ca_i)
 
         # Expressions for the Potassium pump current component
-        i_p_K = g_pK*(-E_K + V)/(1 + 65.4052157419*ufl.exp(-0.167224080268*V))
+        i_p_K = g_pK*(-E_K + V)/(1 +\
+            65.40521574193832*numpy.exp(-0.16722408026755853*V))
 
         # Expressions for the Calcium dynamics component
         i_up = Vmax_up/(1 + (K_up*K_up)/(Ca_i*Ca_i))
-        i_leak = V_leak*(Ca_SR - Ca_i)
-        i_xfer = V_xfer*(Ca_ss - Ca_i)
-        kcasr = max_sr - (-min_sr + max_sr)/(1 + (EC*EC)/(Ca_SR*Ca_SR))
-        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((Ca_i + K_buf_c)*(Ca_i + K_buf_c)))
-        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((Ca_SR + K_buf_sr)*(Ca_SR +\
-            K_buf_sr)))
-        Ca_ss_bufss = 1.0/(1 + Buf_ss*K_buf_ss/((Ca_ss + K_buf_ss)*(Ca_ss +\
-            K_buf_ss)))
-        F_expressions[13] = (i_xfer - Cm*(i_b_Ca + i_p_Ca -\
-            2*i_NaCa)/(2*F*V_c) + V_sr*(-i_up + i_leak)/V_c)*Ca_i_bufc
+        i_leak = V_leak*(-Ca_i + Ca_SR)
+        i_xfer = V_xfer*(-Ca_i + Ca_ss)
+        kcasr = max_sr - (max_sr - min_sr)/(1 + (EC*EC)/(Ca_SR*Ca_SR))
+        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((K_buf_c + Ca_i)*(K_buf_c + Ca_i)))
+        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((K_buf_sr + Ca_SR)*(K_buf_sr\
+            + Ca_SR)))
+        Ca_ss_bufss = 1.0/(1 + Buf_ss*K_buf_ss/((K_buf_ss + Ca_ss)*(K_buf_ss\
+            + Ca_ss)))
+        dy[14] = (V_sr*(-i_up + i_leak)/V_c - Cm*(-2*i_NaCa + i_b_Ca +\
+            i_p_Ca)/(2*F*V_c) + i_xfer)*Ca_i_bufc
         k1 = k1_prime/kcasr
         k2 = k2_prime*kcasr
-        O = (Ca_ss*Ca_ss)*R_prime*k1/((Ca_ss*Ca_ss)*k1 + k3)
-        F_expressions[15] = -Ca_ss*R_prime*k2 + k4*(1 - R_prime)
-        i_rel = V_rel*(Ca_SR - Ca_ss)*O
-        F_expressions[12] = (i_up - i_leak - i_rel)*Ca_sr_bufsr
-        F_expressions[14] = (-Cm*i_CaL/(2*F*V_ss) - V_c*i_xfer/V_ss +\
-            V_sr*i_rel/V_ss)*Ca_ss_bufss
+        O = (Ca_ss*Ca_ss)*R_prime*k1/(k3 + (Ca_ss*Ca_ss)*k1)
+        dy[16] = k4*(1 - R_prime) - Ca_ss*R_prime*k2
+        i_rel = V_rel*(-Ca_ss + Ca_SR)*O
+        dy[13] = (-i_leak - i_rel + i_up)*Ca_sr_bufsr
+        dy[15] = (V_sr*i_rel/V_ss - V_c*i_xfer/V_ss -\
+            Cm*i_CaL/(2*F*V_ss))*Ca_ss_bufss
 
         # Expressions for the Sodium dynamics component
-        F_expressions[16] = Cm*(-i_b_Na - i_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
+        dy[17] = Cm*(-i_Na - i_b_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
 
         # Expressions for the Membrane component
         i_Stim = 0
+        dy[0] = -i_Stim - i_CaL - i_K1 - i_Kr - i_Ks - i_Na - i_NaCa - i_NaK\
+            - i_b_Ca - i_b_Na - i_p_Ca - i_p_K - i_to
 
         # Expressions for the Potassium dynamics component
-        F_expressions[17] = Cm*(2*i_NaK - i_Ks - i_Stim - i_Kr - i_to - i_p_K\
-            - i_K1)/(F*V_c)
+        dy[18] = Cm*(-i_Stim - i_K1 - i_Kr - i_Ks - i_p_K - i_to +\
+            2*i_NaK)/(F*V_c)
 
         # Return results
-        return dolfin.as_vector(F_expressions)
+        return dy
 
-    def num_states(self):
-        return 18
+    @staticmethod
+    def rush_larsen_step(states, parameters, time, dt):
+        """
+        Advance the states (in place) by a Rush-Larsen step of length dt
+        """
+        # Assign states
+        assert(len(states) == 19)
+        V, Xr1, Xr2, Xs, m, h, j, d, f, f2, fCass, s, r, Ca_SR, Ca_i, Ca_ss,\
+            R_prime, Na_i, K_i = states
+
+        # Assign parameters
+        assert(len(parameters) == 53)
+        P_kna = parameters[0]
+        g_K1 = parameters[1]
+        g_Kr = parameters[2]
+        g_Ks = parameters[3]
+        g_Na = parameters[4]
+        g_bna = parameters[5]
+        g_CaL = parameters[6]
+        g_bca = parameters[7]
+        g_to = parameters[8]
+        K_mNa = parameters[9]
+        K_mk = parameters[10]
+        P_NaK = parameters[11]
+        K_NaCa = parameters[12]
+        K_sat = parameters[13]
+        Km_Ca = parameters[14]
+        Km_Nai = parameters[15]
+        alpha = parameters[16]
+        gamma = parameters[17]
+        K_pCa = parameters[18]
+        g_pCa = parameters[19]
+        g_pK = parameters[20]
+        Buf_c = parameters[21]
+        Buf_sr = parameters[22]
+        Buf_ss = parameters[23]
+        Ca_o = parameters[24]
+        EC = parameters[25]
+        K_buf_c = parameters[26]
+        K_buf_sr = parameters[27]
+        K_buf_ss = parameters[28]
+        K_up = parameters[29]
+        V_leak = parameters[30]
+        V_rel = parameters[31]
+        V_sr = parameters[32]
+        V_ss = parameters[33]
+        V_xfer = parameters[34]
+        Vmax_up = parameters[35]
+        k1_prime = parameters[36]
+        k2_prime = parameters[37]
+        k3 = parameters[38]
+        k4 = parameters[39]
+        max_sr = parameters[40]
+        min_sr = parameters[41]
+        Na_o = parameters[42]
+        Cm = parameters[43]
+        F = parameters[44]
+        R = parameters[45]
+        T = parameters[46]
+        V_c = parameters[47]
+        K_o = parameters[52]
+
+        # Init return args
+        dy = numpy.empty(numpy.shape(states))
+        linearized = numpy.empty((13,) + numpy.shape(states)[1:])
+
+        # Expressions for the Reversal potentials component
+        E_Na = R*T*numpy.log(Na_o/Na_i)/F
+        E_K = R*T*numpy.log(K_o/K_i)/F
+        E_Ks = R*T*numpy.log((K_o + Na_o*P_kna)/(P_kna*Na_i + K_i))/F
+        E_Ca = 0.5*R*T*numpy.log(Ca_o/Ca_i)/F
+
+        # Expressions for the Inward rectifier potassium current component
+        alpha_K1 = 0.1/(1 + 6.14421235332821e-06*numpy.exp(0.06*V - 0.06*E_K))
+        beta_K1 = (0.36787944117144233*numpy.exp(0.1*V - 0.1*E_K) +\
+            3.0606040200802673*numpy.exp(0.0002*V - 0.0002*E_K))/(1 +\
+            numpy.exp(0.5*E_K - 0.5*V))
+        xK1_inf = alpha_K1/(alpha_K1 + beta_K1)
+        i_K1 = 0.4303314829119352*g_K1*numpy.sqrt(K_o)*(-E_K + V)*xK1_inf
+
+        # Expressions for the Rapid time dependent potassium current component
+        i_Kr = 0.4303314829119352*g_Kr*numpy.sqrt(K_o)*(-E_K + V)*Xr1*Xr2
+
+        # Expressions for the Xr1 gate component
+        xr1_inf = 1.0/(1 + numpy.exp(-26/7 - V/7))
+        alpha_xr1 = 450/(1 + numpy.exp(-9/2 - V/10))
+        beta_xr1 = 6/(1 + 13.581324522578193*numpy.exp(0.08695652173913043*V))
+        tau_xr1 = alpha_xr1*beta_xr1
+        dy[1] = (-Xr1 + xr1_inf)/tau_xr1
+        linearized[0] = -(1 +\
+            13.581324522578193*numpy.exp(0.08695652173913043*V))*(1 +\
+            numpy.exp(-9/2 - V/10))/2700
+
+        # Expressions for the Xr2 gate component
+        xr2_inf = 1.0/(1 + numpy.exp(11/3 + V/24))
+        alpha_xr2 = 3/(1 + numpy.exp(-3 - V/20))
+        beta_xr2 = 1.12/(1 + numpy.exp(-3 + V/20))
+        tau_xr2 = alpha_xr2*beta_xr2
+        dy[2] = (-Xr2 + xr2_inf)/tau_xr2
+        linearized[1] = -0.2976190476190476*(1 + numpy.exp(-3 - V/20))*(1 +\
+            numpy.exp(-3 + V/20))
+
+        # Expressions for the Slow time dependent potassium current component
+        i_Ks = g_Ks*(Xs*Xs)*(-E_Ks + V)
+
+        # Expressions for the Xs gate component
+        xs_inf = 1.0/(1 + numpy.exp(-5/14 - V/14))
+        alpha_xs = 1400/numpy.sqrt(1 + numpy.exp(5/6 - V/6))
+        beta_xs = 1.0/(1 + numpy.exp(-7/3 + V/15))
+        tau_xs = 80 + alpha_xs*beta_xs
+        dy[3] = (-Xs + xs_inf)/tau_xs
+        linearized[2] = -1/(80 + 1400/((1 + numpy.exp(-7/3 +\
+            V/15))*numpy.sqrt(1 + numpy.exp(5/6 - V/6))))
+
+        # Expressions for the Fast sodium current component
+        i_Na = g_Na*(m*m*m)*(-E_Na + V)*h*j
+
+        # Expressions for the m gate component
+        m_inf = 1.0/((1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V))*(1 +\
+            0.0018422115811651339*numpy.exp(-0.1107419712070875*V)))
+        alpha_m = 1.0/(1 + numpy.exp(-12 - V/5))
+        beta_m = 0.1/(1 + numpy.exp(7 + V/5)) + 0.1/(1 + numpy.exp(-1/4 +\
+            V/200))
+        tau_m = alpha_m*beta_m
+        dy[4] = (-m + m_inf)/tau_m
+        linearized[3] = -(1 + numpy.exp(-12 - V/5))/(0.1/(1 + numpy.exp(7 +\
+            V/5)) + 0.1/(1 + numpy.exp(-1/4 + V/200)))
+
+        # Expressions for the h gate component
+        h_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_h = numpy.where((V < -40),\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V), 0)
+        beta_h = numpy.where((V < -40), 310000*numpy.exp(0.3485*V) +\
+            2.7*numpy.exp(0.079*V), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V)))
+        tau_h = 1.0/(alpha_h + beta_h)
+        dy[5] = (-h + h_inf)/tau_h
+        linearized[4] = -numpy.where((V < -40),\
+            4.4312679295805147e-07*numpy.exp(-0.14705882352941177*V), 0) -\
+            numpy.where((V < -40), 310000*numpy.exp(0.3485*V) +\
+            2.7*numpy.exp(0.079*V), 0.77/(0.13 +\
+            0.049758141083938695*numpy.exp(-0.0900900900900901*V)))
+
+        # Expressions for the j gate component
+        j_inf = 1.0/((1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V))*(1 +\
+            15212.593285654404*numpy.exp(0.13458950201884254*V)))
+        alpha_j = numpy.where((V < -40), (37.78 +\
+            V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V)), 0)
+        beta_j = numpy.where((V < -40), 0.02424*numpy.exp(-0.01052*V)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V)),\
+            0.6*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V)))
+        tau_j = 1.0/(alpha_j + beta_j)
+        dy[6] = (-j + j_inf)/tau_j
+        linearized[5] = -numpy.where((V < -40),\
+            0.02424*numpy.exp(-0.01052*V)/(1 +\
+            0.003960868339904256*numpy.exp(-0.1378*V)),\
+            0.6*numpy.exp(0.057*V)/(1 +\
+            0.040762203978366204*numpy.exp(-0.1*V))) - numpy.where((V < -40),\
+            (37.78 + V)*(-25428*numpy.exp(0.2444*V) -\
+            6.948e-06*numpy.exp(-0.04391*V))/(1 +\
+            50262745825.95399*numpy.exp(0.311*V)), 0)
+
+        # Expressions for the Sodium background current component
+        i_b_Na = g_bna*(-E_Na + V)
+
+        # Expressions for the L_type Ca current component
+        i_CaL = 4*g_CaL*(F*F)*(-15 + V)*(-Ca_o + 0.25*Ca_ss*numpy.exp(F*(-30 +\
+            2*V)/(R*T)))*d*f*f2*fCass/(R*T*(-1 + numpy.exp(F*(-30 +\
+            2*V)/(R*T))))
+
+        # Expressions for the d gate component
+        d_inf = 1.0/(1 + 0.34415378686541237*numpy.exp(-0.13333333333333333*V))
+        alpha_d = 0.25 + 1.4/(1 + numpy.exp(-35/13 - V/13))
+        beta_d = 1.4/(1 + numpy.exp(1 + V/5))
+        gamma_d = 1.0/(1 + numpy.exp(5/2 - V/20))
+        tau_d = alpha_d*beta_d + gamma_d
+        dy[7] = (-d + d_inf)/tau_d
+        linearized[6] = -1/(1.0/(1 + numpy.exp(5/2 - V/20)) + 1.4*(0.25 +\
+            1.4/(1 + numpy.exp(-35/13 - V/13)))/(1 + numpy.exp(1 + V/5)))
+
+        # Expressions for the f gate component
+        f_inf = 1.0/(1 + numpy.exp(20/7 + V/7))
+        tau_f = 20 + 180/(1 + numpy.exp(3 + V/10)) + 200/(1 + numpy.exp(13/10 -\
+            V/10)) + 1102.5*numpy.exp(-((27 + V)*(27 + V))/225)
+        dy[8] = (-f + f_inf)/tau_f
+        linearized[7] = -1/(20 + 180/(1 + numpy.exp(3 + V/10)) + 200/(1 +\
+            numpy.exp(13/10 - V/10)) + 1102.5*numpy.exp(-((27 + V)*(27 +\
+            V))/225))
+
+        # Expressions for the F2 gate component
+        f2_inf = 0.33 + 0.67/(1 + numpy.exp(5 + V/7))
+        tau_f2 = 31/(1 + numpy.exp(5/2 - V/10)) + 80/(1 + numpy.exp(3 +\
+            V/10)) + 562*numpy.exp(-((27 + V)*(27 + V))/240)
+        dy[9] = (-f2 + f2_inf)/tau_f2
+        linearized[8] = -1/(31/(1 + numpy.exp(5/2 - V/10)) + 80/(1 +\
+            numpy.exp(3 + V/10)) + 562*numpy.exp(-((27 + V)*(27 + V))/240))
+
+        # Expressions for the FCass gate component
+        fCass_inf = 0.4 + 0.6/(1 + 400.0*(Ca_ss*Ca_ss))
+        tau_fCass = 2 + 80/(1 + 400.0*(Ca_ss*Ca_ss))
+        dy[10] = (-fCass + fCass_inf)/tau_fCass
+        linearized[9] = -1/(2 + 80/(1 + 400.0*(Ca_ss*Ca_ss)))
+
+        # Expressions for the Calcium background current component
+        i_b_Ca = g_bca*(-E_Ca + V)
+
+        # Expressions for the Transient outward current component
+        i_to = g_to*(-E_K + V)*r*s
+
+        # Expressions for the s gate component
+        s_inf = 1.0/(1 + numpy.exp(4 + V/5))
+        tau_s = 3 + 5/(1 + numpy.exp(-4 + V/5)) + 85*numpy.exp(-((45 + V)*(45 +\
+            V))/320)
+        dy[11] = (-s + s_inf)/tau_s
+        linearized[10] = -1/(3 + 5/(1 + numpy.exp(-4 + V/5)) +\
+            85*numpy.exp(-((45 + V)*(45 + V))/320))
+
+        # Expressions for the r gate component
+        r_inf = 1.0/(1 + numpy.exp(10/3 - V/6))
+        tau_r = 0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800)
+        dy[12] = (-r + r_inf)/tau_r
+        linearized[11] = -1/(0.8 + 9.5*numpy.exp(-((40 + V)*(40 + V))/1800))
+
+        # Expressions for the Sodium potassium pump current component
+        i_NaK = K_o*P_NaK*Na_i/((K_mNa + Na_i)*(K_mk + K_o)*(1 +\
+            0.0353*numpy.exp(-F*V/(R*T)) + 0.1245*numpy.exp(-0.1*F*V/(R*T))))
+
+        # Expressions for the Sodium calcium exchanger current component
+        i_NaCa = K_NaCa*(Ca_o*(Na_i*Na_i*Na_i)*numpy.exp(F*gamma*V/(R*T)) -\
+            alpha*(Na_o*Na_o*Na_o)*Ca_i*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))/((1 + K_sat*numpy.exp(F*(-1 +\
+            gamma)*V/(R*T)))*(Ca_o + Km_Ca)*((Km_Nai*Km_Nai*Km_Nai) +\
+            (Na_o*Na_o*Na_o)))
+
+        # Expressions for the Calcium pump current component
+        i_p_Ca = g_pCa*Ca_i/(K_pCa + Ca_i)
+
+        # Expressions for the Potassium pump current component
+        i_p_K = g_pK*(-E_K + V)/(1 +\
+            65.40521574193832*numpy.exp(-0.16722408026755853*V))
+
+        # Expressions for the Calcium dynamics component
+        i_up = Vmax_up/(1 + (K_up*K_up)/(Ca_i*Ca_i))
+        i_leak = V_leak*(-Ca_i + Ca_SR)
+        i_xfer = V_xfer*(-Ca_i + Ca_ss)
+        kcasr = max_sr - (max_sr - min_sr)/(1 + (EC*EC)/(Ca_SR*Ca_SR))
+        Ca_i_bufc = 1.0/(1 + Buf_c*K_buf_c/((K_buf_c + Ca_i)*(K_buf_c + Ca_i)))
+        Ca_sr_bufsr = 1.0/(1 + Buf_sr*K_buf_sr/((K_buf_sr + Ca_SR)*(K_buf_sr\
+            + Ca_SR)))
+        Ca_ss_bufss = 1.0/(1 + Buf_ss*K_buf_ss/((K_buf_ss + Ca_ss)*(K_buf_ss\
+            + Ca_ss)))
+        dy[14] = (V_sr*(-i_up + i_leak)/V_c - Cm*(-2*i_NaCa + i_b_Ca +\
+            i_p_Ca)/(2*F*V_c) + i_xfer)*Ca_i_bufc
+        k1 = k1_prime/kcasr
+        k2 = k2_prime*kcasr
+        O = (Ca_ss*Ca_ss)*R_prime*k1/(k3 + (Ca_ss*Ca_ss)*k1)
+        dy[16] = k4*(1 - R_prime) - Ca_ss*R_prime*k2
+        linearized[12] = -k4 - k2_prime*(max_sr - (max_sr - min_sr)/(1 +\
+            (EC*EC)/(Ca_SR*Ca_SR)))*Ca_ss
+        i_rel = V_rel*(-Ca_ss + Ca_SR)*O
+        dy[13] = (-i_leak - i_rel + i_up)*Ca_sr_bufsr
+        dy[15] = (V_sr*i_rel/V_ss - V_c*i_xfer/V_ss -\
+            Cm*i_CaL/(2*F*V_ss))*Ca_ss_bufss
+        dy[17] = Cm*(-i_Na - i_b_Na - 3*i_NaCa - 3*i_NaK)/(F*V_c)
+
+        # Expressions for the Membrane component
+        i_Stim = 0
+        dy[0] = -i_Stim - i_CaL - i_K1 - i_Kr - i_Ks - i_Na - i_NaCa - i_NaK\
+            - i_b_Ca - i_b_Na - i_p_Ca - i_p_K - i_to
+        dy[18] = Cm*(-i_Stim - i_K1 - i_Kr - i_Ks - i_p_K - i_to +\
+            2*i_NaK)/(F*V_c)
+
+        # Exponential integration of the linearized states (forward Euler for
+        # vanishing linear terms), forward Euler for the others
+        rows = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 16]
+        dy_rows = dy[rows]
+        linear = numpy.abs(linearized) >= 1e-08
+        linearized = numpy.where(linear, linearized, 1.0)
+        states_rows = states[rows] + numpy.where(linear,\
+            numpy.expm1(dt*linearized)/linearized, dt)*dy_rows
+        states += dt*dy
+        states[rows] = states_rows
 
     def __str__(self):
         return 'Tentusscher_panfilov_2006_M_cell cardiac cell model'
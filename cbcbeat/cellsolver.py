@@ -5,12 +5,16 @@ __author__ = "Marie E. Rognes (meg@simula.no), 2012--2013"
 __all__ = ["BasicSingleCellSolver",
            "BasicCardiacODESolver",
            "CardiacODESolver",
-           "SingleCellSolver"]
+           "SingleCellSolver",
+           "EnsembleSingleCellSolver"]
 
+import numpy
 from dolfinimport import *
 from cbcbeat import CardiacCellModel, MultiCellModel
 from cbcbeat.markerwisefield import *
 from cbcbeat.utils import state_space, TimeStepper, splat, annotate_kwargs
+from cbcbeat.arrayodesolver import ArrayODESolver
+from cbcbeat.statearray import StateArray
 
 class BasicCardiacODESolver(object):
     """A basic, non-optimised solver for systems of ODEs typically
@@ -30,6 +34,46 @@ class BasicCardiacODESolver(object):
     default theta=0.5, which corresponds to a Crank-Nicolson
     scheme. This can be changed by modifying the solver parameters.
 
+    The Jacobian of the Newton iteration is assembled from the
+    Jacobian of the cell model (see
+    :py:meth:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel.jacobian`)
+    if available (and the parameter "use_cell_model_jacobian" is
+    True), and derived automatically otherwise.
+
+    With piecewise constant (DG0) spaces for the membrane potential
+    and the states (the default), the ODE system of each cell is
+    decoupled from the others: the nonlinear system is block-diagonal
+    with one block per cell. The parameter "nonlinear_solver" chooses
+    how it is solved:
+
+    * "global" (the default): a Newton iteration on the global
+      system, assembled and solved by the NonlinearVariationalSolver
+      (see the "nonlinear_variational_solver" parameters).
+    * "local": a batched Newton iteration with small dense systems
+      per cell, starting from the states of the previous step, by the
+      :py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`. Its
+      tolerances and iteration limits are the "ArrayODESolver"
+      parameters, the "nonlinear_variational_solver" parameters are
+      not used. Spatially varying coefficients (and the stimulus) are
+      approximated by their averages over each cell, that is, the
+      cell model is evaluated at the cell averages of its
+      coefficients instead of integrated over the cell, so the
+      results differ from the global solver where the coefficients
+      vary within the cells. Statistics of the Newton iterations per
+      cell of the last step are available as solver.newton_statistics.
+    * "auto": "local" if the system is block-diagonal, not annotated
+      (for dolfin-adjoint) and all coefficients of the cell model and
+      the stimulus are spatially constant (Constants or numbers, such
+      that the cell averages are exact), "global" otherwise.
+
+    The local solver requires a single cell model and a stimulus which
+    is not Markerwise.
+
+    The solvers are created in the first step and reused, they are
+    recreated if the parameters of the cell model have been changed
+    (see
+    :py:meth:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel.set_parameters`).
+
     .. note::
 
        For the sake of simplicity and consistency with other solver
@@ -71,8 +115,10 @@ class BasicCardiacODESolver(object):
         self._I_ion = self._model.I
         self._num_states = self._model.num_states()
 
-        # Handle stimulus
+        # Handle stimulus (a separable stimulus is used as an expression)
         self._I_s = handle_markerwise(I_s, GenericFunction)
+        if isinstance(self._I_s, SeparableStimulus):
+            self._I_s = self._I_s.expression()
 
         # Initialize and update parameters if given
         self.parameters = self.default_parameters()
@@ -98,6 +144,19 @@ class BasicCardiacODESolver(object):
         self.vs_ = Function(self.VS, name="vs_")
         self.vs = Function(self.VS, name="vs")
 
+        # The time step and theta are updated in each step, the
+        # variational problem and solver are created in the first step
+        # and recreated if the parameters of the cell model change
+        self._k_n = Constant(1.0)
+        self._theta = Constant(self.parameters["theta"])
+        self._solver = None
+        self._model_parameters = None
+
+        # The batched local solver is created in the first local step
+        self._array_solver = None
+        self.states = None
+        self.newton_statistics = {}
+
     @property
     def time(self):
         "The internal time of the solver."
@@ -117,6 +176,12 @@ class BasicCardiacODESolver(object):
         params.add("S_polynomial_degree", 0)
         params.add("S_polynomial_family", "DG")
         params.add("enable_adjoint", True)
+        params.add("use_cell_model_jacobian", True)
+
+        # The nonlinear solver: "global", "local" (with the
+        # coefficients approximated by their cell averages) or "auto"
+        params.add("nonlinear_solver", "global")
+        params.add(ArrayODESolver.default_parameters())
 
         # Use iterative solver as default.
         params.add(NonlinearVariationalSolver.default_parameters())
@@ -196,18 +261,166 @@ class BasicCardiacODESolver(object):
 
         timer = Timer("ODE step")
 
-        # Check for cell meshs
-        dim = self._mesh.topology().dim()
-
         # Extract time mesh
         (t0, t1) = interval
-        k_n = Constant(t1 - t0)
+        dt = t1 - t0
+        theta = self.parameters["theta"]
+        self._k_n.assign(Constant(dt))
+        self._theta.assign(Constant(theta))
+
+        # Set time (propagates to time-dependent variables defined via
+        # self.time)
+        t = t0 + theta*(t1 - t0)
+        self.time.assign(t)
+
+        # Recreate the solvers if the parameters of the cell model
+        # have changed (scalar parameters are compiled into them)
+        model_parameters = self._snapshot_model_parameters()
+        if model_parameters != self._model_parameters:
+            self._solver = None
+            self._array_solver = None
+            self._model_parameters = model_parameters
+
+        # Solve the decoupled systems of the cells locally
+        if self._use_local_solver():
+            self._local_step(interval)
+            self.time.assign(t)
+            timer.stop()
+            return
+
+        # Set-up current variables
+        self.vs.assign(self.vs_) # Start with good guess
+
+        # Solve system
+        if self._solver is None:
+            self._solver = self._create_solver()
+        solver_params = self.parameters["nonlinear_variational_solver"]
+        self._solver.parameters.update(solver_params)
+        self._solver.solve()
+        timer.stop()
+
+    def _snapshot_model_parameters(self):
+        """Return a snapshot of the parameters of the cell model(s): the
+        values of the scalar parameters and the identities of the
+        parameters given as functions (which are updated in place)."""
+        if isinstance(self._model, MultiCellModel):
+            models = self._model.models()
+        else:
+            models = [self._model]
+        snapshot = [id(self._model)]
+        for model in models:
+            for (name, value) in model.parameters().items():
+                if isinstance(value, GenericFunction):
+                    value = id(value)
+                snapshot.append((name, value))
+        return snapshot
+
+    def _is_block_diagonal(self):
+        """Return True if the nonlinear system is block-diagonal (with
+        one block per cell) and can be solved by the local solver."""
+        p = self.parameters
+        return (p["V_polynomial_family"] == "DG" and
+                p["V_polynomial_degree"] == 0 and
+                p["S_polynomial_family"] == "DG" and
+                p["S_polynomial_degree"] == 0 and
+                not isinstance(self._model, MultiCellModel) and
+                not isinstance(self._I_s, Markerwise))
+
+    def _has_constant_coefficients(self):
+        """Return True if the coefficients of the cell model and the
+        stimulus are spatially constant, such that their cell averages
+        (used by the local solver) are exact."""
+        from ufl.algorithms import extract_coefficients
+        from ufl.algorithms.analysis import extract_type
+        from ufl.classes import GeometricQuantity
+
+        values = list(self._model.parameters().values())
+        if self._I_s is not None:
+            values.append(self._I_s)
+        for value in values:
+            if isinstance(value, (float, int, Constant)):
+                continue
+            if isinstance(value, GenericFunction):
+                return False
+            if (extract_type(value, GeometricQuantity) or
+                not all(isinstance(c, Constant)
+                        for c in extract_coefficients(value))):
+                return False
+        return True
+
+    def _use_local_solver(self):
+        "Return True if the step is to be solved by the local solver."
+        mode = self.parameters["nonlinear_solver"]
+        if mode not in ("global", "local", "auto"):
+            error("Unknown nonlinear solver %s, expecting one of global, "
+                  "local or auto" % mode)
+        if mode == "global":
+            return False
+        annotate = annotate_kwargs(self.parameters).get("annotate", False)
+        if mode == "auto":
+            return (self._is_block_diagonal() and not annotate and
+                    self._has_constant_coefficients())
+        if not self._is_block_diagonal():
+            error("The local nonlinear solver requires DG0 spaces, a single "
+                  "cell model and a stimulus which is not Markerwise")
+        if annotate:
+            error("The local nonlinear solver does not support annotation, "
+                  "set enable_adjoint to False")
+        return True
+
+    def _local_step(self, interval):
+        """Advance the states of all (locally owned) cells over the
+        given time interval by a theta-scheme step, solving the system
+        of each cell by a batched Newton iteration."""
+        if self._array_solver is None:
+            names = list(self._model.default_initial_conditions().keys())
+            if len(names) != self._num_states + 1:
+                names = None
+            self.states = StateArray(self.VS, names,
+                                     dim=self._mesh.topology().dim())
+            self._array_solver = ArrayODESolver(
+                self._model, self._time, "Theta", I_s=self._I_s,
+                params=self.parameters["ArrayODESolver"])
+
+            # The volumes of the cells, for the cell averages
+            self._DG0 = FunctionSpace(self._mesh, "DG", 0)
+            self._volumes = self._cell_integrals(Constant(1.0))
+
+        solver = self._array_solver
+        solver.parameters["theta"] = self.parameters["theta"]
+        self.states.gather(self.vs_)
+        solver.advance(self.states.values, interval,
+                       lambda c: self._cell_integrals(c)/self._volumes)
+        self.states.scatter(self.vs)
+
+        self.newton_statistics = solver.newton_statistics
+        info("Local Newton iterations on t = (%g, %g): mean %g, maximum %d"
+             % (interval + (self.newton_statistics["mean_iterations"],
+                            self.newton_statistics["maximum_iterations"])))
+
+    def _cell_integrals(self, c):
+        """Return the integrals of the coefficient c over the (locally
+        owned) cells, in the order of the states."""
+        dofs = self.states.vertex_dofs(self._DG0)
+        if dofs is None:
+            error("Unable to evaluate coefficients in the cells")
+        w = TestFunction(self._DG0)
+        return assemble(c*w*dx).get_local()[dofs]
+
+    def _create_solver(self):
+        """Create the nonlinear variational solver for a step, with the
+        time step and theta given by self._k_n and self._theta.
+
+        *Returns*
+          solver (:py:class:`dolfin.NonlinearVariationalSolver`)
+        """
+        k_n = self._k_n
+        theta = self._theta
 
         # Extract previous solution(s)
         (v_, s_) = splat(self.vs_, self._num_states+1)
 
         # Set-up current variables
-        self.vs.assign(self.vs_) # Start with good guess
         (v, s) = splat(self.vs, self._num_states+1)
         (w, r) = splat(TestFunction(self.VS), self._num_states+1)
 
@@ -215,16 +428,10 @@ class BasicCardiacODESolver(object):
         Dt_v = (v - v_)/k_n
         Dt_s = (s - s_)/k_n
 
-        theta = self.parameters["theta"]
-
-        # Set time (propagates to time-dependent variables defined via
-        # self.time)
-        t = t0 + theta*(t1 - t0)
-        self.time.assign(t)
-
         v_mid = theta*v + (1.0 - theta)*v_
         s_mid = theta*s + (1.0 - theta)*s_
 
+        jacobian = None
         if isinstance(self._model, MultiCellModel):
             #assert(model.mesh() == self._mesh)
 
@@ -278,16 +485,25 @@ class BasicCardiacODESolver(object):
             I_theta = - self._I_ion(v_mid, s_mid, time=self.time)
             lhs = (Dt_v - I_theta)*w*dz + inner(Dt_s - F_theta, r)*dz
 
+            # The Jacobian of the cell model, if available
+            if self.parameters["use_cell_model_jacobian"]:
+                jacobian = self._model.jacobian(v_mid, s_mid, time=self.time)
+
         # Set-up system of equations
         G = lhs - rhs
 
+        # Use the Jacobian of the cell model at averaged v and s if
+        # available: the derivative of G is (dvs/k_n - theta*J*dvs, q)
+        if jacobian is not None:
+            dvs = TrialFunction(self.VS)
+            q = TestFunction(self.VS)
+            J = (inner(dvs, q)/k_n - theta*inner(dot(jacobian, dvs), q))*dz
+        else:
+            J = derivative(G, self.vs)
+
         # Solve system
-        pde = NonlinearVariationalProblem(G, self.vs, J=derivative(G, self.vs))
-        solver = NonlinearVariationalSolver(pde)
-        solver_params = self.parameters["nonlinear_variational_solver"]
-        solver.parameters.update(solver_params)
-        solver.solve()
-        timer.stop()
+        pde = NonlinearVariationalProblem(G, self.vs, J=J)
+        return NonlinearVariationalSolver(pde)
 
 
 class CardiacODESolver(object):
@@ -314,6 +530,27 @@ class CardiacODESolver(object):
        intended to be set) by modifying the solution fields prior to
        simulation.
 
+    By default, the nodes are advanced by dolfin's
+    PointIntegralSolver. Setting the "engine" parameter to
+    "ArrayODESolver" instead advances all vertices at once using
+    vectorised NumPy kernels (see
+    :py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`) for the schemes
+    "ForwardEuler", "RL1", "GRL1" and "BackwardEuler". The states of
+    the locally owned vertices are then held in a structure-of-arrays
+    layout (see :py:class:`~cbcbeat.statearray.StateArray`), available
+    as solver.states, which is advanced in place and kept across
+    steps: vs is updated from it after each step, and it is only
+    gathered from vs\_ again if vs\_ has been modified otherwise (as
+    detected with petsc4py, without it the states are gathered in
+    each step).
+
+    A :py:class:`~cbcbeat.cellmodels.MultiCellModel` is always
+    advanced by the ArrayODESolver engine (with a warning if the
+    PointIntegralSolver engine is chosen): the vertices are grouped
+    by the cell model of the majority of their (marked) cells, and
+    each cell model advances only its own states at its own vertices.
+    The remaining (trivial) states of these vertices are zero.
+
     *Arguments*
       mesh (:py:class:`dolfin.Mesh`)
         The spatial mesh (mesh)
@@ -336,8 +573,6 @@ class CardiacODESolver(object):
     """
     def __init__(self, mesh, time, model, I_s=None, params=None):
 
-        import ufl.classes
-
         # Store input
         self._mesh = mesh
         self._time = time
@@ -348,7 +583,10 @@ class CardiacODESolver(object):
         self._I_ion = self._model.I
         self._num_states = self._model.num_states()
 
+        # Handle stimulus (a separable stimulus is used as an expression)
         self._I_s = handle_markerwise(I_s, GenericFunction)
+        if isinstance(self._I_s, SeparableStimulus):
+            self._I_s = self._I_s.expression()
 
         # Create time if not given, otherwise use given time
         if time is None:
@@ -369,6 +607,34 @@ class CardiacODESolver(object):
         self.vs_ = Function(self.VS, name="vs_")
         self.vs = Function(self.VS, name="vs")
 
+        # Figure out whether we should annotate or not
+        self._annotate_kwargs = annotate_kwargs(self.parameters)
+
+        # Initialize the engine advancing the nodes. The cell models
+        # of a MultiCellModel are advanced by the array solver (NB:
+        # self.parameters is a copy of the given parameters)
+        self.states = None
+        engine = self.parameters["engine"]
+        if isinstance(self._model, MultiCellModel):
+            if engine == "PointIntegralSolver":
+                warning("The PointIntegralSolver engine does not support "
+                        "a MultiCellModel, using the ArrayODESolver engine")
+                engine = "ArrayODESolver"
+                self.parameters["engine"] = engine
+            elif engine != "ArrayODESolver":
+                error("Unknown engine %s for the CardiacODESolver" % engine)
+        if engine == "PointIntegralSolver":
+            self._init_point_integral_solver()
+        elif engine == "ArrayODESolver":
+            self._init_array_solver()
+        else:
+            error("Unknown engine %s for the CardiacODESolver" % engine)
+
+    def _init_point_integral_solver(self):
+        "Initialize the point integral solver and update its parameters."
+
+        import ufl.classes
+
         # Initialize scheme
         (v, s) = splat(self.vs, self._num_states+1)
         (w, q) = splat(TestFunction(self.VS), self._num_states+1)
@@ -400,18 +666,113 @@ class CardiacODESolver(object):
         # we had only one integral...
         self._rhs = rhs*dP()
 
-        #sys.exit()
         name = self.parameters["scheme"]
         Scheme = self._name_to_scheme(name)
         self._scheme = Scheme(self._rhs, self.vs, self._time)
 
-        # Figure out whether we should annotate or not
-        self._annotate_kwargs = annotate_kwargs(self.parameters)
-
-        # Initialize solver and update its parameters
         self._pi_solver = PointIntegralSolver(self._scheme)
         self._pi_solver.parameters.update(self.parameters["point_integral_solver"])
 
+    def _init_array_solver(self):
+        """Initialize the vectorised array solver(s) and the maps
+        between the dofs of vs and the (locally owned) vertices."""
+        if isinstance(self._I_s, Markerwise):
+            error("Markerwise stimulus not supported by the ArrayODESolver")
+
+        # The states at the vertices owned by this process, one
+        # contiguous block per state
+        names = None
+        if not isinstance(self._model, MultiCellModel):
+            names = list(self._model.default_initial_conditions().keys())
+            if len(names) != self._num_states + 1:
+                names = None
+        self.states = StateArray(self.VS, names)
+
+        # Group the vertices by cell model: (vertices, number of rows
+        # of the states, solver) for each cell model
+        if isinstance(self._model, MultiCellModel):
+            models = self._model.models()
+            groups = self._vertices_per_model()
+        else:
+            models = [self._model]
+            groups = [None]
+        self._array_solvers = []
+        for (model, nodes) in zip(models, groups):
+            solver = ArrayODESolver(model, self._time,
+                                    self.parameters["scheme"],
+                                    I_s=self._I_s,
+                                    params=self.parameters["ArrayODESolver"])
+            self._array_solvers.append((nodes, model.num_states() + 1,
+                                        solver))
+
+        # Neighbouring (owned) vertices for the activity mask
+        if self.parameters["ArrayODESolver"]["use_activity_mask"]:
+            self._mesh.init(1, 0)
+            edges = self._mesh.topology()(1, 0)().reshape(-1, 2)
+            vertices = self.states.vertices
+            for (nodes, _, solver) in self._array_solvers:
+                if nodes is not None:
+                    vertices = self.states.vertices[nodes]
+                local = -numpy.ones(self._mesh.num_vertices(), dtype=int)
+                local[vertices] = numpy.arange(len(vertices))
+                local_edges = local[edges]
+                solver.set_neighbours(local_edges[(local_edges >= 0).all(axis=1)])
+
+        # Scalar space used to evaluate spatially varying coefficients
+        self._V = None
+        self._coefficient_values = {}
+
+    def _vertices_per_model(self):
+        """Return the indices (into the states) of the vertices
+        advanced by each of the cell models of the MultiCellModel.
+
+        A vertex is advanced by the cell model of the majority of the
+        cells sharing it (ties are resolved by the order of the
+        models). Vertices not adjacent to any of the marked domains
+        are not advanced.
+        """
+        markers = self._model.markers()
+        keys = self._model.keys()
+        values = markers.array()
+        vertices = self.states.vertices
+
+        if markers.dim() == 0:
+            # Vertex markers give the cell model directly
+            counts = numpy.array([values[vertices] == key for key in keys],
+                                 dtype=int)
+        else:
+            if markers.dim() != self._mesh.topology().dim():
+                error("Expecting cell or vertex markers for the MultiCellModel")
+            cells = self._mesh.cells()
+            counts = numpy.zeros((len(keys), self._mesh.num_vertices()),
+                                 dtype=int)
+            for (k, key) in enumerate(keys):
+                marked = cells[values == key].ravel()
+                counts[k] = numpy.bincount(marked,
+                                           minlength=self._mesh.num_vertices())
+            counts = counts[:, vertices]
+
+        model = numpy.argmax(counts, axis=0)
+        model[counts.max(axis=0) == 0] = -1
+        return [numpy.flatnonzero(model == k) for k in range(len(keys))]
+
+    def _evaluate_at_vertices(self, c):
+        """Return the values of the coefficient c at the locally owned
+        vertices (in the order of the states)."""
+        if self._V is None:
+            self._V = FunctionSpace(self._mesh, "CG", 1)
+            if self.states.vertex_dofs(self._V) is None:
+                error("Unable to evaluate coefficients at the vertices")
+
+        # The coefficients are shared by the cell models, evaluate
+        # them once per time
+        key = (id(c), float(self._time))
+        if key not in self._coefficient_values:
+            c_V = interpolate(c, self._V)
+            self._coefficient_values[key] = \
+                c_V.vector().get_local()[self.states.vertex_dofs(self._V)]
+        return self._coefficient_values[key]
+
     def _name_to_scheme(self, name):
         """Return scheme class with given name
 
@@ -433,7 +794,9 @@ class CardiacODESolver(object):
         """
         params = Parameters("CardiacODESolver")
         params.add("scheme", "BackwardEuler")
+        params.add("engine", "PointIntegralSolver")
         params.add(PointIntegralSolver.default_parameters())
+        params.add(ArrayODESolver.default_parameters())
         params.add("enable_adjoint", True)
 
         return params
@@ -465,15 +828,65 @@ class CardiacODESolver(object):
         # initial condition in vs_ to vs:
 
         timer = Timer("ODE step")
-        self.vs.assign(self.vs_)
 
         (t0, t1) = interval
         dt = t1 - t0
 
         self._annotate_kwargs = annotate_kwargs(self.parameters)
-        self._pi_solver.step(dt, **self._annotate_kwargs)
+        if self.parameters["engine"] == "ArrayODESolver":
+            self._array_step(interval)
+        else:
+            self.vs.assign(self.vs_)
+            self._pi_solver.step(dt, **self._annotate_kwargs)
         timer.stop()
 
+    def _array_step(self, interval):
+        """Advance all locally owned vertices of vs over the given
+        time interval with the vectorised array solver."""
+        if self._annotate_kwargs.get("annotate", False):
+            error("The ArrayODESolver engine does not support annotation, "
+                  "set enable_adjoint to False")
+
+        # The states are kept across steps, gather them only if vs_
+        # has been modified since they were last synchronized
+        if not self.states.is_synchronized(self.vs_):
+            self.states.gather(self.vs_)
+        y = self.states.values
+        for (nodes, n, solver) in self._array_solvers:
+            if nodes is None:
+                solver.advance(y, interval, self._evaluate_at_vertices)
+                continue
+            if not len(nodes):
+                continue
+
+            # Advance only the (non-trivial) states of the vertices of
+            # this cell model, the remaining states are zero
+            evaluate = lambda c: self._evaluate_at_vertices(c)[nodes]
+            y_k = y[:n, nodes]
+            solver.advance(y_k, interval, evaluate)
+            y[:n, nodes] = y_k
+            y[n:, nodes] = 0.0
+        self._coefficient_values.clear()
+        self.states.scatter(self.vs)
+
+        solvers = [solver for (nodes, _, solver) in self._array_solvers
+                   if nodes is None or len(nodes)]
+        if self.parameters["ArrayODESolver"]["use_multirate"]:
+            statistics = [solver.substep_statistics for solver in solvers]
+            total = sum(s["total_substeps"] for s in statistics)
+            num_nodes = sum(sum(s["nodes_per_substeps"].values())
+                            for s in statistics)
+            info("ODE substeps on t = (%g, %g): mean %g, maximum %d, total %d"
+                 % (interval + (total/float(max(num_nodes, 1)),
+                                max([0] + [s["maximum_substeps"]
+                                           for s in statistics]),
+                                total)))
+        if self.parameters["ArrayODESolver"]["use_activity_mask"]:
+            statistics = [solver.activity_statistics for solver in solvers]
+            info("Active ODE nodes on t = (%g, %g): %d of %d"
+                 % (interval + (sum(s["active_nodes"] for s in statistics),
+                                sum(s["total_nodes"] for s in statistics))))
+
     def solve(self, interval, dt=None):
         """
         Solve the problem given by the model on a given time interval
@@ -520,7 +933,11 @@ class CardiacODESolver(object):
             yield (t0, t1), self.vs
 
             # FIXME: This eventually breaks in parallel!?
+            synchronized = (self.states is not None and
+                            self.states.is_synchronized(self.vs))
             self.vs_.assign(self.vs)
+            if synchronized:
+                self.states.synchronize(self.vs_)
 
 class BasicSingleCellSolver(BasicCardiacODESolver):
     """A basic, non-optimised solver for systems of ODEs typically
@@ -608,3 +1025,178 @@ class SingleCellSolver(CardiacODESolver):
         # super-class.
         CardiacODESolver.__init__(self, mesh, time, model,
                                   I_s=model.stimulus, params=params)
+
+class EnsembleSingleCellSolver(object):
+    """A solver for an ensemble of N single cells of the same cardiac
+    cell model, differing in their parameters and/or initial
+    conditions, as in parameter sweeps and populations of models. All
+    cells are advanced in lockstep as one vectorised system by the
+    :py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`, without any
+    mesh.
+
+    The given parameters are made (cell) varying coefficients of the
+    cell model, whereas the remaining parameters keep their values.
+    The stimulus of the cell model (if any) is applied to all cells.
+
+    *Arguments*
+      Model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel` subclass)
+        The cardiac cell model class
+      parameter_names (list of str, optional)
+        The names of the p varying parameters
+      parameter_values (:py:class:`numpy.ndarray`, optional)
+        The values of the varying parameters, one row of length p per
+        cell
+      initial_conditions (:py:class:`numpy.ndarray`, optional)
+        The initial values of the membrane potential and the states,
+        one row per cell (or a single row for all cells). The default
+        initial conditions of the cell model are used if not given.
+      time (:py:class:`dolfin.Constant`, optional)
+        A constant holding the current time
+      params (:py:class:`dolfin.Parameters`, optional)
+        Solver parameters
+
+    *Example of usage*::
+
+      g = numpy.linspace(0.5, 1.5, 100)[:, None]*14.838
+      solver = EnsembleSingleCellSolver(Tentusscher_panfilov_2006_epi_cell,
+                                        ["g_Na"], g)
+      (times, traces) = solver.solve((0.0, 100.0), 0.1)
+      v = traces[:, 0, :]  # The membrane potential of each cell
+    """
+    def __init__(self, Model, parameter_names=(), parameter_values=None,
+                 initial_conditions=None, time=None, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        if time is None:
+            time = Constant(0.0)
+        self._time = time
+
+        # Replace the varying parameters by placeholder coefficients,
+        # their values are given per cell
+        self._model = Model()
+        parameter_names = list(parameter_names)
+        self._values = {}
+        num_cells = None
+        if parameter_names:
+            values = numpy.array(parameter_values, dtype=float, ndmin=2)
+            if values.shape[1] != len(parameter_names):
+                error("Expecting %d parameter values per cell, not %d"
+                      % (len(parameter_names), values.shape[1]))
+            num_cells = values.shape[0]
+            placeholders = dict((name, Expression("0.0", degree=0))
+                                for name in parameter_names)
+            self._model.set_parameters(**placeholders)
+            for (k, name) in enumerate(parameter_names):
+                self._values[id(placeholders[name])] = \
+                    numpy.ascontiguousarray(values[:, k])
+
+        # The states of all cells, one row per state
+        n = self._model.num_states() + 1
+        if initial_conditions is None:
+            initial_conditions = [float(value) for value in
+                                  Model.default_initial_conditions().values()]
+        y = numpy.array(initial_conditions, dtype=float, ndmin=2)
+        if y.shape[1] != n:
+            error("Expecting %d initial values per cell, not %d"
+                  % (n, y.shape[1]))
+        if num_cells is None:
+            num_cells = y.shape[0]
+        elif y.shape[0] not in (1, num_cells):
+            error("Expecting initial values for %d cells, not %d"
+                  % (num_cells, y.shape[0]))
+        self._y = numpy.empty((n, num_cells))
+        self._y[:] = y.T
+
+        self._solver = ArrayODESolver(self._model, self._time,
+                                      self.parameters["scheme"],
+                                      I_s=self._model.stimulus,
+                                      params=self.parameters["ArrayODESolver"])
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = Parameters("EnsembleSingleCellSolver")
+        params.add("scheme", "BackwardEuler")
+        params.add(ArrayODESolver.default_parameters())
+        return params
+
+    @property
+    def model(self):
+        "The cardiac cell model (with placeholders for the varying parameters)"
+        return self._model
+
+    @property
+    def num_cells(self):
+        "The number of cells"
+        return self._y.shape[1]
+
+    @property
+    def states(self):
+        """The current membrane potential and states of the cells, as a
+        (view) array of shape (N, num_states + 1)."""
+        return self._y.T
+
+    def _evaluate(self, c):
+        """Return the values of the coefficient c for the cells: the
+        given values of the varying parameters, or the value of other
+        (spatially constant) coefficients."""
+        if id(c) in self._values:
+            return self._values[id(c)]
+        return float(c(0.0))
+
+    def step(self, interval):
+        """
+        Advance all cells over the given time interval (t0, t1).
+
+        *Arguments*
+          interval (:py:class:`tuple`)
+            The time interval (t0, t1) for the step
+        """
+        timer = Timer("Ensemble ODE step")
+        self._solver.advance(self._y, interval, self._evaluate)
+        timer.stop()
+
+    def solve(self, interval, dt=None, save_every=1):
+        """
+        Solve on the given time interval (t0, t1) with the time step
+        dt and return the traces of the membrane potential and states
+        of all cells.
+
+        *Arguments*
+          interval (:py:class:`tuple`)
+            The time interval for the solve given by (t0, t1)
+          dt (int, optional)
+            The timestep for the solve. Defaults to length of interval
+          save_every (int, optional)
+            Store the states every save_every steps only
+
+        *Returns*
+          (times, traces) (:py:class:`tuple` of :py:class:`numpy.ndarray`)
+            The times of the stored states and the states, as an array
+            of shape (N, num_states + 1, len(times))
+        """
+        (T0, T) = interval
+        if dt is None:
+            dt = (T - T0)
+        steps = list(TimeStepper(interval, dt))
+        saved = [0] + [i + 1 for i in range(len(steps))
+                       if (i + 1) % save_every == 0 or i == len(steps) - 1]
+
+        times = numpy.array([T0] + [t1 for (t0, t1) in steps])[saved]
+        traces = numpy.empty((self.num_cells, len(self._y), len(saved)))
+        traces[:, :, 0] = self.states
+        k = 1
+        for (i, (t0, t1)) in enumerate(steps):
+            self.step((t0, t1))
+            if k < len(saved) and saved[k] == i + 1:
+                traces[:, :, k] = self.states
+                k += 1
+        return (times, traces)
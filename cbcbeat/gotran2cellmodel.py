@@ -11,22 +11,32 @@ except Exception, e:
     print "Gotran not installed. Not possible to convert gotran model to cellmodel."
     raise e
 
+from collections import OrderedDict
+
+from sympy.core.function import AppliedUndef
+from sympy.printing.precedence import precedence
+
 # Gotran imports
+from modelparameters.sympytools import sp
+from modelparameters.codegeneration import _CustomPythonCodePrinter
 from gotran.model.ode import ODE
-from gotran.common import error as gotran_error, check_arg
+from gotran.model.utils import ode_primitives
+from gotran.model.odeobjects import Comment
+from gotran.common import error as gotran_error, check_arg, info
 from gotran.common.options import parameters as gotran_parameters
 from gotran.codegeneration.algorithmcomponents import componentwise_derivative
 from gotran.codegeneration.codecomponent import CodeComponent
 
 from cbcbeat.gotran2dolfin import DOLFINCodeGenerator
+from cbcbeat.gotran2numpy import NumPyKernelCodeGenerator, state_indices
 
-_class_template = """
-\"\"\"This module contains a {ModelName} cardiac cell model
+_class_template = """\"\"\"This module contains a {ModelName} cardiac cell model
 
 The module was autogenerated from a gotran ode file
 \"\"\"
 from __future__ import division
 from collections import OrderedDict
+import numpy
 import ufl
 
 from cbcbeat.dolfinimport import *
@@ -77,10 +87,10 @@ class {ModelName}(CardiacCellModel):
         Right hand side for ODE system
         \"\"\"
 {F_body}
-
+{I_and_F}{jacobian}
     def num_states(self):
         return {num_states}
-
+{array_kernels}
     def __str__(self):
         return '{ModelName} cardiac cell model'
 """
@@ -92,13 +102,202 @@ _class_form = dict(
   F_body="NOT_IMPLEMENTED",
   num_states="NOT_IMPLEMENTED",
   initial_conditions="NOT_IMPLEMENTED",
+  array_kernels="",
+  I_and_F="",
+  jacobian="",
 )
 
+class _OptimizingUFLPrinter(_CustomPythonCodePrinter):
+    """A printer of sympy expressions as UFL code, printing integer
+    and half-integer powers as products (and square roots). Powers of
+    parameter-only expressions are printed with the Python power
+    operator, such that they are folded for numeric parameters. Floats
+    are printed with full precision, as the folded numerals are prone
+    to cancellation."""
+
+    def __init__(self, constant=False):
+        _CustomPythonCodePrinter.__init__(self, "ufl")
+        self._constant = constant
+
+    def _print_Float(self, expr):
+        if expr.is_zero or not expr.is_finite:
+            return _CustomPythonCodePrinter._print_Float(self, expr)
+        return repr(float(expr))
+
+    def _print_Pow(self, expr, rational=False):
+        PREC = precedence(expr)
+        if expr.exp.is_number:
+            exponent = float(expr.exp)
+            (n, half) = divmod(abs(exponent), 1.0)
+            if half in (0.0, 0.5) and 0.5 <= n + half <= 8 and \
+                   n + half != 1:
+                base = self.parenthesize(expr.base, PREC)
+                factors = [base]*int(n)
+                if half:
+                    factors.append("ufl.sqrt({0})".format(\
+                        self._print(expr.base)))
+                product = "*".join(factors)
+                return "({0})".format(product) if exponent > 0 else \
+                       "1.0/({0})".format(product)
+        if self._constant and not expr.exp.is_Integer:
+            return "{0}**{1}".format(self.parenthesize(expr.base, PREC),
+                                     self.parenthesize(expr.exp, PREC))
+        return _CustomPythonCodePrinter._print_Pow(self, expr, rational)
+
+_ufl_printer = _OptimizingUFLPrinter()
+_constant_ufl_printer = _OptimizingUFLPrinter(constant=True)
+
+def _hoist_constant_expressions(expr, constants, hoisted):
+    """Return expr with its maximal subexpressions depending only on
+    the symbol names in constants replaced by new symbols. The
+    replaced subexpressions are added to the ordered dict hoisted
+    (mapping them to their symbols); the parameter-only factors
+    (terms) of a product (sum) are hoisted together."""
+
+    def constant(e):
+        return all(sym.name in constants for sym in e.free_symbols)
+
+    # Named intermediates are represented by undefined functions of
+    # their dependencies
+    def atomic(e):
+        return e.is_Atom or isinstance(e, AppliedUndef)
+
+    def hoistable(e):
+        return isinstance(e, sp.Expr) and not atomic(e) and \
+               not e.is_Relational
+
+    def hoist(e):
+        if hoisted.get(e) is not None:
+            return hoisted[e]
+        symbol = sp.Symbol("_p{0}".format(len(hoisted)))
+        hoisted[e] = symbol
+        return symbol
+
+    def visit(e):
+        if atomic(e):
+            return e
+        if hoistable(e) and constant(e):
+            return hoist(e)
+        if e.is_Mul or e.is_Add:
+            const_args = [arg for arg in e.args if constant(arg)]
+            args = [visit(arg) for arg in e.args if not constant(arg)]
+            if len(const_args) > 1:
+                const = e.func(*const_args)
+                args.append(const if atomic(const) else hoist(const))
+            else:
+                args.extend(visit(arg) for arg in const_args)
+            return e.func(*args)
+        return e.func(*[visit(arg) for arg in e.args])
+
+    return visit(expr)
+
+def _count_ops(exprs):
+    """Return the number of operations in the sympy expressions, not
+    counting the dependencies of the named intermediates."""
+    return sum(sp.count_ops(expr.xreplace(dict(\
+        (f, sp.Symbol(f.func.__name__)) for f in expr.atoms(AppliedUndef)))) \
+               for expr in exprs)
+
+class _IAndFComponent(CodeComponent):
+    """A component computing the transmembrane current (dV/dt) and the
+    right hand side of the remaining states (dS/dt) together."""
+
+    def __init__(self, ode, I_ind, F_inds, params=None):
+        super(_IAndFComponent, self).__init__(\
+            "I_and_F", ode, "_compute_I_and_F", "", params=params)
+
+        # Index the results separately
+        self.shapes["current"] = (1,)
+        self.shapes["F_expressions"] = (len(F_inds),)
+        expr = ode.state_expressions[I_ind]
+        self.add_indexed_expression("current", 0, expr.expr, dependent=expr)
+        for (k, ind) in enumerate(F_inds):
+            expr = ode.state_expressions[ind]
+            self.add_indexed_expression("F_expressions", k, expr.expr,
+                                        dependent=expr)
+
+        results = {"current": self.indexed_objects("current"),
+                   "F_expressions": self.indexed_objects("F_expressions")}
+        results, body_expressions = self._body_from_results(**results)
+        self.body_expressions = self._recreate_body(body_expressions,
+                                                    **results)
+
+class _JacobianComponent(CodeComponent):
+    """A component computing the nonzero entries of the Jacobian of the
+    right hand side (dV/dt, dS/dt) with respect to the states (V, S),
+    in the order of the cell model given by indices."""
+
+    def __init__(self, ode, indices, params=None):
+        super(_JacobianComponent, self).__init__(\
+            "Jacobian", ode, "jacobian", "", params=params)
+
+        N = len(indices)
+        self.shapes["jacobian"] = (N, N)
+        self.num_nonzero = 0
+        states = ode.full_states
+        state_dict = dict((states[ind].sym, k) \
+                          for (k, ind) in enumerate(indices))
+        time_sym = states[0].time.sym
+        for (i, ind) in enumerate(indices):
+            expr = ode.state_expressions[ind]
+
+            # Differentiate the expanded expressions, as gotran cannot
+            # expand derivatives through nested intermediates (common
+            # sub expressions are eliminated afterwards)
+            expanded = ode.expanded_expression(expr)
+            columns = sorted((state_dict[sym], sym) for sym in \
+                             ode_primitives(expanded, time_sym) \
+                             if sym in state_dict)
+            for (j, sym) in columns:
+                self.num_nonzero += 1
+                self.add_indexed_expression("jacobian", (i, j),
+                                            expanded.diff(sym),
+                                            dependent=expr)
+
+        results = {"jacobian": self.indexed_objects("jacobian")}
+        results, body_expressions = self._body_from_results(**results)
+        self.body_expressions = self._recreate_body(body_expressions,
+                                                    **results)
+
 class CellModelGenerator(DOLFINCodeGenerator):
     """
     Convert a Gotran model to a cbcbeat compatible cell model
+
+    The cell model implements the right-hand side by UFL expressions
+    (the I and F methods) and, if numpy_kernels is True, by vectorised
+    NumPy kernels acting on arrays of states, see
+    :py:class:`~cbcbeat.gotran2numpy.NumPyKernelCodeGenerator`.
+
+    If optimize is True, I and F are computed together by a single
+    method, _I_and_F, which returns the pair of the last call again for
+    the same v, s, time and parameters (I and F are typically called
+    with the same arguments in turn), and where
+
+    * common subexpressions of I and F are eliminated, and
+      intermediates that are numerals are inlined,
+    * the subexpressions depending on the parameters only are hoisted
+      out of the state dependent expressions. They are computed first,
+      such that they are folded into constants for numeric (not
+      spatially varying) parameters,
+    * integer and half-integer powers are computed by products (and
+      square roots), and products of exponentials by the exponential
+      of a sum.
+
+    The number of operations before and after the optimisation is
+    reported and stored in the attribute operation_counts.
+
+    If jacobian is True, the cell model has a jacobian method returning
+    the Jacobian of the right hand side (dV/dt, dS/dt) with respect to
+    (v, s), used by the implicit ODE schemes. Only the nonzero entries
+    are computed, optimised as I and F above.
+
+    The states of the cell model are the membrane potential followed
+    by the remaining states in the order of the ODE, or in the order
+    given by the state names in state_order (typically to keep the
+    state order of an existing cell model).
     """
-    def __init__(self, ode, membrane_potential):
+    def __init__(self, ode, membrane_potential, numpy_kernels=True,
+                 optimize=True, jacobian=True, state_order=None):
 
         # Init base class
         super(CellModelGenerator, self).__init__()
@@ -146,9 +345,9 @@ class CellModelGenerator(DOLFINCodeGenerator):
         # The name of the membrane potential
         self.V_name = state.name
 
-        # Get the I and F expressions
-        I_ind = [ind for ind, expr in enumerate(ode.state_expressions) \
-                 if expr.state.name == self.V_name][0]
+        # Get the I and F expressions, in the order of the cell model
+        self._indices = state_indices(ode, self.V_name, state_order)
+        I_ind = self._indices[0]
 
         # Create gotran code component for I(s,t) (dV/dt)
         I_comp = componentwise_derivative(ode, I_ind, \
@@ -156,8 +355,7 @@ class CellModelGenerator(DOLFINCodeGenerator):
                                           result_name="current")
 
         # Create gotran code component for F(s,t) (dS/dt)
-        F_inds = range(ode.num_full_states)
-        F_inds.remove(I_ind)
+        F_inds = self._indices[1:]
         F_comp = componentwise_derivative(ode, F_inds, \
                                           generation_params.code, \
                                           result_name="F_expressions")
@@ -173,6 +371,152 @@ class CellModelGenerator(DOLFINCodeGenerator):
         self._class_form["default_parameters"] = self.default_parameters_body(ode)
         self._class_form["initial_conditions"] = self.initial_conditions_body(ode)
 
+        # Optimise the computation of I and F
+        if optimize:
+            self._optimize(ode, I_ind, F_inds, generation_params,
+                           [I_comp, F_comp])
+
+        # Generate the (sparse and optimised) Jacobian
+        if jacobian:
+            self._jacobian(ode, [I_ind] + F_inds, generation_params)
+
+        # Generate the NumPy kernels
+        if numpy_kernels:
+            kernels = NumPyKernelCodeGenerator(ode, self.V_name,
+                                               state_order)
+            self._class_form["array_kernels"] = "\n" + "\n\n".join(\
+                [kernels.rhs_code(indent=1),
+                 kernels.rush_larsen_code(indent=1)]) + "\n"
+
+    def _optimize(self, ode, I_ind, F_inds, generation_params, comps):
+        "Generate the optimised _I_and_F method used by I and F."
+
+        before = _count_ops(expr.expr for comp in comps \
+                            for expr in comp.body_expressions \
+                            if not isinstance(expr, Comment))
+
+        # Create a code component for I and F together with common sub
+        # expressions eliminated
+        comp = _IAndFComponent(ode, I_ind, F_inds,
+                               params=self._cse_params(generation_params))
+        (body_lines, after, hoisted) = self._optimized_body(ode, comp)
+
+        lines = self._init_arguments(comp) + body_lines
+        F = "F_expressions[0]" if len(F_inds) == 1 else \
+            "dolfin.as_vector(F_expressions)"
+        lines += ["", "# Return results", "return current[0], " + F]
+        lines = self.wrap_body_with_function_prototype(\
+            ["\"\"\"",
+             "Compute dV/dt and the right hand side for ODE system together",
+             "\"\"\""] + lines, "_compute_I_and_F", "self, v, s, time")
+
+        # Build the expressions once for the same arguments and
+        # parameters
+        cache_lines = self.wrap_body_with_function_prototype(\
+            ["\"\"\"",
+             "Return dV/dt and the right hand side for ODE system, computed",
+             "once for the same arguments and parameters",
+             "\"\"\"",
+             "key = (v, s, time) + tuple(self._parameters.values())",
+             "(cached_key, I_and_F) = getattr(self, \"_cached_I_and_F\", "\
+             "((), None))",
+             "if [id(k) for k in key] != [id(k) for k in cached_key]:",
+             "    I_and_F = self._compute_I_and_F(v, s, time)",
+             "    self._cached_I_and_F = (key, I_and_F)",
+             "return I_and_F"], "_I_and_F", "self, v, s, time")
+
+        self._class_form["I_and_F"] = "\n" + "\n".join(\
+            self.indent_and_split_lines(cache_lines, indent=1)) + "\n\n" + \
+            "\n".join(self.indent_and_split_lines(lines, indent=1)) + "\n"
+        self._class_form["I_body"] = "\n".join(self.indent_and_split_lines(\
+            ["return self._I_and_F(v, s, time)[0]"], indent=2))
+        self._class_form["F_body"] = "\n".join(self.indent_and_split_lines(\
+            ["return self._I_and_F(v, s, time)[1]"], indent=2))
+
+        self.operation_counts = dict(before=before, after=after,
+                                     hoisted=hoisted)
+        info("Number of operations in I and F of {0}: {1} before and {2} "\
+             "after optimisation (and {3} in parameter-only "\
+             "expressions)".format(self.name, before, after, hoisted))
+
+    def _jacobian(self, ode, indices, generation_params):
+        "Generate the jacobian method."
+
+        comp = _JacobianComponent(ode, indices,
+                                  params=self._cse_params(generation_params))
+        (body_lines, after, hoisted) = self._optimized_body(ode, comp)
+
+        lines = self._init_arguments(comp) + body_lines
+        N = len(indices)
+        lines += ["", "# Return results",
+                  "return ufl.as_matrix([jacobian[{0}*i:{0}*(i + 1)] "\
+                  "for i in range({0})])".format(N)]
+        lines = self.wrap_body_with_function_prototype(\
+            ["\"\"\"",
+             "Jacobian of the right hand side (dV/dt, dS/dt) with respect "\
+             "to (v, s)",
+             "\"\"\""] + lines, "jacobian", "self, v, s, time=None")
+
+        self._class_form["jacobian"] = "\n" + "\n".join(\
+            self.indent_and_split_lines(lines, indent=1)) + "\n"
+        info("Number of operations in the Jacobian of {0}: {1} in {2} "\
+             "nonzero entries (and {3} in parameter-only "\
+             "expressions)".format(self.name, after, comp.num_nonzero,
+                                   hoisted))
+
+    def _cse_params(self, generation_params):
+        """Return the code generation parameters with common sub
+        expressions eliminated."""
+        generation_params = generation_params.copy()
+        generation_params.code.body.use_cse = True
+        generation_params.code.body.optimize_exprs = "numerals"
+        return generation_params.code
+
+    def _optimized_body(self, ode, comp):
+        """Return the optimised lines of the body and result expressions
+        of comp, the number of operations in the lines depending on the
+        states and the number of operations in the hoisted
+        parameter-only expressions."""
+
+        # Hoist the parameter-only expressions, including the
+        # intermediates depending on parameters only
+        constants = set(param.name for param in ode.parameters)
+        hoisted = OrderedDict()
+        (constant_lines, body_lines) = ([], [])
+        after = 0
+        for expr in comp.body_expressions:
+            if isinstance(expr, Comment):
+                continue
+            sympy_expr = sp.powsimp(expr.expr, combine="exp", deep=True)
+            if "[" not in expr.name and all(sym.name in constants for sym \
+                                            in sympy_expr.free_symbols):
+                constants.add(expr.name)
+                constant_lines.append((expr.name, sympy_expr))
+                continue
+            sympy_expr = _hoist_constant_expressions(sympy_expr, constants,
+                                                     hoisted)
+            after += _count_ops([sympy_expr])
+            body_lines.append(self._optimized_code(sympy_expr, expr.name))
+
+        # Hoisted expressions are computed in order of creation, after
+        # the intermediates they depend on
+        constant_lines += [(symbol.name, expr) for (expr, symbol) \
+                           in hoisted.items()]
+
+        lines = []
+        if constant_lines:
+            lines += ["", "# Parameter-only expressions"]
+            lines += [self._optimized_code(expr, name, constant=True) \
+                      for (name, expr) in constant_lines]
+        lines += ["", "# Expressions depending on the states"] + body_lines
+        return (lines, after,
+                _count_ops(expr for (name, expr) in constant_lines))
+
+    def _optimized_code(self, expr, name, constant=False):
+        "Return UFL code assigning the sympy expression expr to name."
+        printer = _constant_ufl_printer if constant else _ufl_printer
+        return "{0} = {1}".format(name, printer.doprint(expr))
+
     def _init_arguments(self, comp, default_arguments=None):
 
         check_arg(comp, CodeComponent)
@@ -197,10 +541,10 @@ class CellModelGenerator(DOLFINCodeGenerator):
         if self.V_name != "v":
             body_lines.append("{0} = v".format(self.V_name))
 
-        state_names = [state for state in states if state != self.V_name]
-        if len(states) == 1:
-            if states[0] != "s":
-                body_lines.append("{0} = s".format(states[0]))
+        state_names = [states[ind] for ind in self._indices[1:]]
+        if len(state_names) == 1:
+            if state_names[0] != "s":
+                body_lines.append("{0} = s".format(state_names[0]))
         else:
             body_lines.append("assert(len(s) == {0})".format(num_states-1))
             body_lines.append(", ".join(state_names) + " = s")
@@ -218,11 +562,12 @@ class CellModelGenerator(DOLFINCodeGenerator):
 
         for result_name in comp.results:
             shape = comp.shapes[result_name]
-            if len(shape) > 1:
-                error("expected only result expression with rank 1")
+            if len(shape) > 2:
+                error("expected only result expression with rank 1 or 2")
 
+            # Rank 2 results are stored row by row in a flat list
             body_lines.append("{0} = [ufl.zero()]*{1}".format(\
-                result_name, shape[0]))
+                result_name, reduce(lambda n, m: n*m, shape)))
 
         return body_lines
 
@@ -260,8 +605,9 @@ class CellModelGenerator(DOLFINCodeGenerator):
 
         # First get ic for v
         v_init = ode.present_ode_objects[self.V_name].init
-        s_init, s_names = zip(*[(state.init, state.name) for state in ode.full_states \
-                                if state.name != self.V_name])
+        s_init, s_names = zip(*[(ode.full_states[ind].init,
+                                 ode.full_states[ind].name) \
+                                for ind in self._indices[1:]])
         body_lines = ["ic = OrderedDict([(\"{}\", {}),".format(\
             self.V_name, v_init)]
         body_lines.extend("                  (\"{}\", {}),".format(name, value) \
@@ -0,0 +1,273 @@
+"""This module contains a code generator for vectorised NumPy kernels
+of a gotran ODE: the right-hand side and a Rush-Larsen step, acting
+in place on arrays of the states of many cells at once, see
+:py:class:`~cbcbeat.gotran2numpy.NumPyKernelCodeGenerator`.
+"""
+
+try:
+    import gotran
+
+except Exception, e:
+    print "Gotran not installed. Not possible to convert gotran model to cellmodel."
+    raise e
+
+from modelparameters.codegeneration import _CustomPythonCodePrinter
+
+from gotran.model.ode import ODE
+from gotran.model.odeobjects import Comment
+from gotran.common import check_arg, error
+from gotran.common.options import parameters
+from gotran.codegeneration.codegenerators import PythonCodeGenerator
+from gotran.codegeneration.codecomponent import CodeComponent
+
+__all__ = ["NumPyKernelCodeGenerator", "state_indices"]
+
+def state_indices(ode, membrane_potential, state_order=None):
+    """Return the indices of the states of the ODE in the order of the
+    cell model: the membrane potential first, followed by the remaining
+    states in the order of the ODE, or in the order of the state names
+    in state_order."""
+    names = [expr.state.name for expr in ode.state_expressions]
+    V_ind = names.index(membrane_potential)
+    if not state_order:
+        return [V_ind] + [ind for ind in range(ode.num_full_states) \
+                          if ind != V_ind]
+    state_order = [name for name in state_order \
+                   if name != membrane_potential]
+    if sorted(state_order) != sorted(name for name in names \
+                                     if name != membrane_potential):
+        error("Expected the state order to list the states of the ODE: "\
+              "{0}".format(", ".join(names)))
+    return [V_ind] + [names.index(name) for name in state_order]
+
+class _NumPyPrinter(_CustomPythonCodePrinter):
+    """A printer of sympy expressions as NumPy code acting elementwise
+    on arrays: conditionals, logical operators and minima/maxima are
+    printed as NumPy functions instead of Python operators."""
+
+    def __init__(self):
+        _CustomPythonCodePrinter.__init__(self, "numpy")
+
+    def _print_Float(self, expr):
+        if expr.is_zero or not expr.is_finite:
+            return _CustomPythonCodePrinter._print_Float(self, expr)
+        return repr(float(expr))
+
+    def _print_Piecewise(self, expr):
+        result = ""
+        for (e, c) in expr.args[:-1]:
+            result += "numpy.where({0}, {1}, ".format(self._print(c),
+                                                     self._print(e))
+        return result + self._print(expr.args[-1].expr) + \
+               ")"*(len(expr.args) - 1)
+
+    def _print_Relational(self, expr):
+        return "({0} {1} {2})".format(self._print(expr.lhs), expr.rel_op,
+                                      self._print(expr.rhs))
+
+    def _print_reduction(self, function, args):
+        code = self._print(args[-1])
+        for arg in reversed(args[:-1]):
+            code = "numpy.{0}({1}, {2})".format(function, self._print(arg),
+                                               code)
+        return code
+
+    def _print_And(self, expr):
+        return self._print_reduction("logical_and", expr.args)
+
+    def _print_Or(self, expr):
+        return self._print_reduction("logical_or", expr.args)
+
+    def _print_Not(self, expr):
+        return "numpy.logical_not({0})".format(self._print(expr.args[0]))
+
+    def _print_Min(self, expr):
+        return self._print_reduction("minimum", expr.args)
+
+    def _print_Max(self, expr):
+        return self._print_reduction("maximum", expr.args)
+
+_numpy_printer = _NumPyPrinter()
+
+class RushLarsenComponent(CodeComponent):
+    """A component computing the right-hand side of all states and the
+    linearized derivatives of the states whose derivative is linear in
+    the state itself (typically the gating variables)."""
+
+    def __init__(self, ode, indices, params=None):
+        super(RushLarsenComponent, self).__init__(\
+            "RushLarsen", ode, "rush_larsen_step",
+            "Computes the derivatives and the linearized derivatives",
+            params=params)
+
+        # The states whose derivative depends on the state, with a
+        # vanishing second derivative with respect to the state
+        # (conditions are piecewise constant), as the linear rows of
+        # CellModelKernels. The expanded expressions are
+        # differentiated, as gotran cannot expand derivatives through
+        # nested intermediates.
+        state_exprs = [ode.state_expressions[index] for index in indices]
+        self.linear = []
+        linearized = []
+        for (k, expr) in enumerate(state_exprs):
+            sym = expr.state.sym
+            expr_diff = ode.expanded_expression(expr).diff(sym)
+            if expr_diff != 0 and expr_diff.diff(sym) == 0:
+                self.linear.append(k)
+                linearized.append((expr, expr_diff))
+
+        self.shapes["dy"] = (len(indices),)
+        self.shapes["linearized"] = (len(linearized),)
+        for (k, expr) in enumerate(state_exprs):
+            self.add_indexed_expression("dy", k, expr.expr, dependent=expr)
+        for (k, (expr, expr_diff)) in enumerate(linearized):
+            self.add_indexed_expression("linearized", k, expr_diff,
+                                        dependent=expr)
+
+        results = {"linearized": self.indexed_objects("linearized"),
+                   "dy": self.indexed_objects("dy")}
+        results, body_expressions = self._body_from_results(**results)
+        self.body_expressions = self._recreate_body(body_expressions,
+                                                    **results)
+
+class NumPyKernelCodeGenerator(PythonCodeGenerator):
+    """
+    Generate vectorised NumPy kernels of a gotran ODE, as static
+    methods of a cbcbeat cell model. The kernels act on the states of
+    N cells at once, given as an array of shape (num_states + 1, N)
+    with the membrane potential in row 0 and the remaining states in
+    the order of the cell model. The parameters are given as a
+    sequence in the order of the default parameters of the cell
+    model, where each parameter is a scalar or an array of length N.
+
+    The generated kernels are:
+
+    * rhs(states, parameters, time, out=None): the right-hand side
+      (dV/dt and dS/dt) of all states
+    * rush_larsen_step(states, parameters, time, dt): advance the
+      states (in place) by a Rush-Larsen step: the states whose
+      derivative is linear in the state itself are integrated
+      exponentially, the remaining states by forward Euler. This is
+      the RL1 scheme of the
+      :py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`.
+
+    The remaining states are in the order of the ODE, or in the order
+    given by the state names in state_order.
+    """
+    def __init__(self, ode, membrane_potential, state_order=None):
+
+        check_arg(ode, ODE, 0)
+        check_arg(membrane_potential, str, 1)
+
+        # Init base class
+        super(NumPyKernelCodeGenerator, self).__init__(ns="numpy")
+
+        generation_params = parameters.generation.copy()
+        generation_params.code.default_arguments = "stp"
+        generation_params.code.time.name = "time"
+
+        generation_params.code.array.index_format = "[]"
+        generation_params.code.array.index_offset = 0
+
+        generation_params.code.parameters.representation = "named"
+        generation_params.code.parameters.array_name = "parameters"
+        generation_params.code.states.representation = "named"
+        generation_params.code.states.array_name = "states"
+        generation_params.code.body.representation = "named"
+        generation_params.code.body.use_cse = False
+        self.params = generation_params
+
+        # The states in the order of the cell model: the membrane
+        # potential first
+        self._ode = ode
+        self._indices = state_indices(ode, membrane_potential, state_order)
+
+    def to_code(self, expr, name):
+        "Return NumPy code assigning the sympy expression expr to name."
+        return "{0} = {1}".format(name, _numpy_printer.doprint(expr))
+
+    def _init_arguments(self, comp):
+        "Return lines assigning the states and parameters."
+        states = [self._ode.state_expressions[ind].state \
+                  for ind in self._indices]
+        body_lines = ["# Assign states"]
+        body_lines.append("assert(len(states) == {0})".format(len(states)))
+        body_lines.append(", ".join(state.name for state in states) + \
+                          " = states")
+
+        used_parameters = [param.name for param in comp.used_parameters]
+        if used_parameters:
+            body_lines.append("")
+            body_lines.append("# Assign parameters")
+            body_lines.append("assert(len(parameters) == {0})".format(\
+                self._ode.num_parameters))
+            for (i, param) in enumerate(self._ode.parameters):
+                if param.name in used_parameters:
+                    body_lines.append("{0} = parameters[{1}]".format(\
+                        param.name, i))
+        return body_lines
+
+    def _body_lines(self, comp):
+        "Return lines computing the body and result expressions of comp."
+        body_lines = []
+        for expr in comp.body_expressions:
+            if isinstance(expr, Comment):
+                body_lines.append("")
+                body_lines.append("# " + str(expr))
+            else:
+                body_lines.append(self.to_code(expr.expr, expr.name))
+        return body_lines
+
+    def rhs_code(self, indent=0):
+        "Return the code of the rhs kernel."
+        comp = CodeComponent("rhs", self._ode, "rhs", "",
+                             params=self.params.code,
+                             dy=[self._ode.state_expressions[ind] \
+                                 for ind in self._indices])
+        body_lines = ["\"\"\"",
+                      "Compute the right-hand side of all states (in place "\
+                      "in out if given)",
+                      "\"\"\""]
+        body_lines += self._init_arguments(comp)
+        body_lines += ["", "# Init return args",
+                       "dy = numpy.empty(numpy.shape(states)) "\
+                       "if out is None else out"]
+        body_lines += self._body_lines(comp)
+        body_lines += ["", "# Return results", "return dy"]
+
+        lines = self.wrap_body_with_function_prototype(\
+            body_lines, "rhs", "states, parameters, time, out=None",
+            decorators="@staticmethod")
+        return "\n".join(self.indent_and_split_lines(lines, indent=indent))
+
+    def rush_larsen_code(self, indent=0, delta=1.e-8):
+        "Return the code of the rush_larsen_step kernel."
+        comp = RushLarsenComponent(self._ode, self._indices,
+                                   params=self.params.code)
+        body_lines = ["\"\"\"",
+                      "Advance the states (in place) by a Rush-Larsen step "\
+                      "of length dt",
+                      "\"\"\""]
+        body_lines += self._init_arguments(comp)
+        body_lines += ["", "# Init return args",
+                       "dy = numpy.empty(numpy.shape(states))",
+                       "linearized = numpy.empty(({0},) + "\
+                       "numpy.shape(states)[1:])".format(len(comp.linear))]
+        body_lines += self._body_lines(comp)
+        body_lines += ["",
+                       "# Exponential integration of the linearized states "\
+                       "(forward Euler for vanishing linear terms), forward "\
+                       "Euler for the others",
+                       "rows = {0!r}".format(comp.linear),
+                       "dy_rows = dy[rows]",
+                       "linear = numpy.abs(linearized) >= {0!r}".format(delta),
+                       "linearized = numpy.where(linear, linearized, 1.0)",
+                       "states_rows = states[rows] + numpy.where(linear, "\
+                       "numpy.expm1(dt*linearized)/linearized, dt)*dy_rows",
+                       "states += dt*dy",
+                       "states[rows] = states_rows"]
+
+        lines = self.wrap_body_with_function_prototype(\
+            body_lines, "rush_larsen_step", "states, parameters, time, dt",
+            decorators="@staticmethod")
+        return "\n".join(self.indent_and_split_lines(lines, indent=indent))
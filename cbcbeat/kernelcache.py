@@ -0,0 +1,194 @@
+"""This module contains a persistent, size limited cache of the
+generated NumPy kernels of the cardiac cell models, see
+:py:class:`~cbcbeat.kernelcache.KernelCache`.
+
+The cache is shared between processes: it lives in the directory
+given by the environment variable CBCBEAT_CACHE_DIR (by default
+~/.cache/cbcbeat/kernels) and holds at most CBCBEAT_CACHE_SIZE
+megabytes (by default 200).
+"""
+
+__all__ = ["KernelCache", "kernel_cache"]
+
+import errno
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+from cbcbeat.dolfinimport import GenericFunction, warning
+
+class KernelCache(object):
+    """A persistent cache of kernel sources on disk. Each entry is a
+    pickled dictionary stored in a file named by its key. Reading an
+    entry marks it as recently used, and the least recently used
+    entries are evicted when the size of the cache exceeds the
+    maximal size.
+
+    The cache is safe to share between processes: entries are written
+    to temporary files and moved into place atomically, and failures
+    to read or write entries are treated as cache misses.
+
+    *Arguments*
+      path (str, optional)
+        The directory of the cache
+      maximum_size (int, optional)
+        The maximal size of the cache (in bytes)
+
+    *Example of usage*::
+
+      cache = KernelCache()
+      key = cache.key(model, "GRL1")
+      entry = cache.get(key)
+      if entry is None:
+          entry = ...  # Generate the kernel sources
+          cache.set(key, entry)
+    """
+    def __init__(self, path=None, maximum_size=None):
+        if path is None:
+            path = os.environ.get("CBCBEAT_CACHE_DIR",
+                                  os.path.join(os.path.expanduser("~"),
+                                               ".cache", "cbcbeat",
+                                               "kernels"))
+        if maximum_size is None:
+            maximum_size = int(float(os.environ.get("CBCBEAT_CACHE_SIZE",
+                                                    200))*1024**2)
+        self.path = path
+        self.maximum_size = maximum_size
+        self._warned = False
+
+    def key(self, model, *args):
+        """Return the key of the kernels of the given cell model and
+        any additional (hashable) options, or None if the source of
+        the cell model is not available.
+
+        The key is computed from the source of the cell model class
+        (and its base classes), the values of its scalar parameters
+        and the type and shape of its other parameters (the values of
+        which are passed to the kernels at run time), the options and
+        the source of the kernel generator itself.
+
+        *Arguments*
+          model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`)
+            The cardiac cell model
+          args
+            Additional options (such as the scheme)
+        """
+        import cbcbeat.ufl2numpy
+        try:
+            sources = [inspect.getsource(cls)
+                       for cls in inspect.getmro(model.__class__)
+                       if cls is not object]
+            sources.append(inspect.getsource(cbcbeat.ufl2numpy))
+        except (IOError, TypeError):
+            return None
+
+        parameters = []
+        for (name, value) in model.parameters().items():
+            if isinstance(value, GenericFunction):
+                value = (type(value).__name__, tuple(value.ufl_shape))
+            parameters.append((name, repr(value)))
+
+        signature = hashlib.sha1()
+        for item in sources + [repr(parameters), repr(args)]:
+            signature.update(item.encode("utf-8"))
+        return signature.hexdigest()
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + ".pickle")
+
+    def _warn(self, message):
+        "Warn (once) that the cache could not be used."
+        if not self._warned:
+            warning("Unable to use the kernel cache in %s: %s"
+                    % (self.path, message))
+            self._warned = True
+
+    def get(self, key):
+        """Return the entry with the given key, or None if the key is
+        None or not in the cache."""
+        if key is None:
+            return None
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(filename, None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry
+
+    def set(self, key, entry):
+        """Store the entry (a picklable object) with the given key and
+        evict the least recently used entries if the cache is full."""
+        if key is None:
+            return
+        try:
+            if not os.path.isdir(self.path):
+                try:
+                    os.makedirs(self.path)
+                except OSError as e:
+                    if e.errno != errno.EEXIST:
+                        raise
+            (fd, tmp) = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=2)
+            os.rename(tmp, self._filename(key))
+        except (IOError, OSError) as e:
+            self._warn(str(e))
+            return
+        self.evict()
+
+    def entries(self):
+        """Return the (key, size, last used time) of the entries, the
+        most recently used last."""
+        entries = []
+        try:
+            filenames = os.listdir(self.path)
+        except OSError:
+            return entries
+        for filename in filenames:
+            if not filename.endswith(".pickle"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, filename))
+            except OSError:
+                continue
+            entries.append((filename[:-len(".pickle")], stat.st_size,
+                            stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        "Return the total size of the entries (in bytes)."
+        return sum(size for (key, size, used) in self.entries())
+
+    def evict(self, maximum_size=None):
+        """Remove the least recently used entries until the size of
+        the cache is at most maximum_size (by default the maximal size
+        of the cache)."""
+        if maximum_size is None:
+            maximum_size = self.maximum_size
+        entries = self.entries()
+        total = sum(size for (key, size, used) in entries)
+        for (key, size, used) in entries:
+            if total <= maximum_size:
+                break
+            try:
+                os.remove(self._filename(key))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        "Remove all entries."
+        self.evict(0)
+
+_kernel_cache = None
+
+def kernel_cache():
+    "Return the default (process wide) kernel cache."
+    global _kernel_cache
+    if _kernel_cache is None:
+        _kernel_cache = KernelCache()
+    return _kernel_cache
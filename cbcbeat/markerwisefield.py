@@ -2,9 +2,15 @@
 # Use and modify at will
 # Last changed: 2016-10-19
 
-__all__ = ["Markerwise", "handle_markerwise", "rhs_with_markerwise_field"]
+__all__ = ["Markerwise", "SeparableStimulus", "handle_markerwise",
+           "rhs_with_markerwise_field"]
 
-from dolfinimport import dx, Measure, error
+import numpy
+import ufl
+from ufl.algorithms import extract_coefficients
+
+from dolfinimport import dx, Measure, Constant, assemble, error
+from cbcbeat.ufl2numpy import NumPyCodeGenerator, compile_kernel
 
 def handle_markerwise(g, classtype):
     # Handle stimulus
@@ -26,6 +32,9 @@ def rhs_with_markerwise_field(g, mesh, v):
         markers = g.markers()
         dz = Measure("dx", domain=mesh, subdomain_data=markers)
         rhs = sum([g*v*dz(i) for (i, g) in zip(g.keys(), g.values())])
+    elif isinstance(g, SeparableStimulus):
+        dz = dx
+        rhs = g.expression()*v*dz()
     else:
         dz = dx
         rhs = g*v*dz()
@@ -83,6 +92,120 @@ class Markerwise(object):
         "The objects"
         return self._objects[key]
 
+class SeparableStimulus(object):
+    """A space-time separable stimulus
+
+    .. math::
+
+      I_s(x, t) = \\sum_k a_k(t) g_k(x)
+
+    given by spatially constant amplitudes :math:`a_k` (UFL
+    expressions of Constants, typically of the time, see
+    :py:mod:`~cbcbeat.stimulus`) and spatial fields :math:`g_k`.
+
+    The :py:class:`~cbcbeat.monodomainsolver.MonodomainSolver` and
+    the :py:class:`~cbcbeat.bidomainsolver.BidomainSolver` assemble
+    the load vector of each field once. In each step, only the
+    amplitudes are evaluated (by a compiled kernel) and the load
+    vectors of the nonzero amplitudes are added to the right-hand
+    side, see :py:meth:`apply`. Other solvers use the stimulus as the
+    expression :py:meth:`expression`.
+
+    *Arguments*
+      amplitudes (list of :py:class:`ufl.Expr` or float)
+        The amplitudes, depending on scalar Constants only
+      fields (list of :py:class:`ufl.Expr`)
+        The spatial fields
+
+    *Example of usage*::
+
+      region = region_indicator(markers, 1)
+      I_s = SeparableStimulus([pulse_train(time, 50.0, 1.0, 2.0,
+                                           500.0, 10)], [region])
+    """
+    def __init__(self, amplitudes, fields):
+
+        # Check input
+        assert len(amplitudes) == len(fields), \
+            "Expecting the number of amplitudes to equal the number of fields"
+
+        self._amplitudes = [ufl.as_ufl(a) for a in amplitudes]
+        self._fields = list(fields)
+
+        # Compile a kernel evaluating the amplitudes from the values of
+        # the Constants they depend on
+        self._constants = []
+        for a in self._amplitudes:
+            for c in extract_coefficients(a):
+                if not isinstance(c, Constant) or c.ufl_shape != ():
+                    error("Expecting the amplitudes to depend on scalar "
+                          "Constants only, not on %r" % c)
+                if c not in self._constants:
+                    self._constants.append(c)
+        symbols = dict((c, "c[%d]" % i)
+                       for (i, c) in enumerate(self._constants))
+        (lines, codes) = NumPyCodeGenerator(symbols).generate(
+            self._amplitudes)
+        lines.append("return [%s]" % ", ".join(codes))
+        (self._kernel, source) = compile_kernel("amplitudes", ("c",), lines)
+
+    def __len__(self):
+        "The number of terms"
+        return len(self._fields)
+
+    def fields(self):
+        "The spatial fields"
+        return self._fields
+
+    def amplitudes(self):
+        """The values of the amplitudes (:py:class:`numpy.ndarray`)
+        for the current values of the Constants."""
+        c = [float(constant) for constant in self._constants]
+        return numpy.array([float(a) for a in self._kernel(c)])
+
+    def expression(self):
+        "The stimulus as an UFL expression"
+        return sum(a*g for (a, g) in zip(self._amplitudes, self._fields))
+
+    def load_vectors(self, v, dz=dx):
+        """Assemble the load vectors of the fields.
+
+        *Arguments*
+          v (:py:class:`ufl.Argument`)
+            The test function (or a component of it)
+          dz (:py:class:`ufl.Measure`, optional)
+            The measure
+
+        *Returns*
+          vectors (list of :py:class:`dolfin.GenericVector`)
+            The load vectors
+        """
+        return [assemble(g*v*dz()) for g in self._fields]
+
+    def apply(self, b, vectors, scale=1.0):
+        """Add the load vectors scaled by the current amplitudes (and
+        the given scale) to b. The terms with zero amplitude are
+        skipped.
+
+        *Arguments*
+          b (:py:class:`dolfin.GenericVector`)
+            The vector to add to (in place)
+          vectors (list of :py:class:`dolfin.GenericVector`)
+            The load vectors, as returned by :py:meth:`load_vectors`
+          scale (float, optional)
+            The scale of all terms
+
+        *Returns*
+          num_terms (int)
+            The number of terms added
+        """
+        num_terms = 0
+        for (a, g) in zip(self.amplitudes(), vectors):
+            if a != 0.0:
+                b.axpy(scale*a, g)
+                num_terms += 1
+        return num_terms
+
 if __name__ == "__main__":
 
     from dolfin import *
@@ -29,7 +29,9 @@ __all__ = ["BasicMonodomainSolver", "MonodomainSolver"]
 
 from dolfinimport import *
 from cbcbeat.markerwisefield import *
-from cbcbeat.utils import end_of_time, annotate_kwargs
+from cbcbeat.utils import end_of_time, annotate_kwargs, split_linear_rhs, \
+    OperatorCache, AffineOperator, PreconditionerReusePolicy, \
+    InitialGuessExtrapolator
 
 class BasicMonodomainSolver(object):
     """This solver is based on a theta-scheme discretization in time
@@ -111,6 +113,13 @@ class BasicMonodomainSolver(object):
         # Figure out whether we should annotate or not
         self._annotate_kwargs = annotate_kwargs(self.parameters)
 
+        # The time step and theta are updated in each step, the
+        # variational problem and solver are created once (in the
+        # first step)
+        self._k_n = Constant(1.0)
+        self._theta = Constant(self.parameters["theta"])
+        self._solver = None
+
     @property
     def time(self):
         "The internal time of the solver."
@@ -200,16 +209,34 @@ class BasicMonodomainSolver(object):
 
         # Extract interval and thus time-step
         (t0, t1) = interval
-        k_n = Constant(t1 - t0)
         theta = self.parameters["theta"]
-
-        # Extract conductivities
-        M_i = self._M_i
+        self._k_n.assign(Constant(t1 - t0))
+        self._theta.assign(Constant(theta))
 
         # Set time
         t = t0 + theta*(t1 - t0)
         self.time.assign(t)
 
+        # Set-up solver
+        if self._solver is None:
+            self._solver = self._create_solver()
+        self._solver.parameters.update(
+            self.parameters["linear_variational_solver"])
+        self._solver.solve()
+
+    def _create_solver(self):
+        """Create the linear variational solver for a step, with the
+        time step and theta given by self._k_n and self._theta.
+
+        *Returns*
+          solver (:py:class:`dolfin.LinearVariationalSolver`)
+        """
+        k_n = self._k_n
+        theta = self._theta
+
+        # Extract conductivities
+        M_i = self._M_i
+
         # Define variational formulation
         v = TrialFunction(self.V)
         w = TestFunction(self.V)
@@ -223,11 +250,7 @@ class BasicMonodomainSolver(object):
         # Define variational problem
         a, L = system(G)
         pde = LinearVariationalProblem(a, L, self.v)
-
-        # Set-up solver
-        solver = LinearVariationalSolver(pde)
-        solver.parameters.update(self.parameters["linear_variational_solver"])
-        solver.solve()
+        return LinearVariationalSolver(pde)
 
     @staticmethod
     def default_parameters():
@@ -258,6 +281,15 @@ class MonodomainSolver(BasicMonodomainSolver):
         BasicMonodomainSolver.__init__(self, mesh, time, M_i, I_s=I_s,
                                        v_=v_, params=params)
 
+        # A separable stimulus is added by its preassembled load
+        # vectors (unless annotating)
+        self._stimulus_vectors = None
+        if (isinstance(self._I_s, SeparableStimulus)
+            and not self._annotate_kwargs.get("annotate", False)):
+            debug("Preassembling the load vectors of the stimulus")
+            self._stimulus_vectors = self._I_s.load_vectors(
+                TestFunction(self.V))
+
         # Create variational forms
         self._timestep = Constant(self.parameters["default_timestep"])
         (self._lhs, self._rhs, self._prec) \
@@ -270,15 +302,74 @@ class MonodomainSolver(BasicMonodomainSolver):
         self._rhs_vector = Vector(mesh.mpi_comm(), self._lhs_matrix.size(0))
         self._lhs_matrix.init_vector(self._rhs_vector, 0)
 
-        # Create linear solver (based on parameter choices)
+        # Preassemble the matrix of the right-hand side acting on the
+        # previous solution (will be updated if time-step changes)
+        self._init_rhs_matrix()
+
+        # Create linear solver (based on parameter choices) and the
+        # reuse policy of its preconditioner (if iterative)
+        self.preconditioner_policy = None
+        if self.parameters["linear_solver_type"] == "iterative":
+            self.preconditioner_policy = PreconditionerReusePolicy(
+                self.parameters["preconditioner_reuse"])
+
+        # The initial guess of the iterative solver (unless annotating)
+        self.initial_guess = None
+        if (self.parameters["linear_solver_type"] == "iterative"
+            and not self._annotate_kwargs.get("annotate", False)):
+            self.initial_guess = InitialGuessExtrapolator(
+                self.parameters["initial_guess"])
+        self._prec_matrix = None
         self._linear_solver, self._update_solver = self._create_linear_solver()
 
+        # Cache the operators of each timestep (from the first step,
+        # such that the default timestep does not take up an entry),
+        # and the timestep independent matrices of the operators
+        # (created when the timestep first changes)
+        self._affine_operators = {}
+        self._operator_cache = OperatorCache(self.parameters["operator_cache"])
+
     @property
     def linear_solver(self):
         """The linear solver (:py:class:`dolfin.LUSolver` or
         :py:class:`dolfin.KrylovSolver`)."""
         return self._linear_solver
 
+    def _init_rhs_matrix(self):
+        """Preassemble the matrix of the right-hand side acting on the
+        previous solution, if the right-hand side can be split (see
+        :py:func:`~cbcbeat.utils.split_linear_rhs`)."""
+        self._rhs_matrix = None
+        if (not self.parameters["use_preassembled_rhs"]
+            or self._annotate_kwargs.get("annotate", False)):
+            return
+        split = split_linear_rhs(self._rhs, self.v_, self.time)
+        if split is None:
+            debug("Unable to preassemble the right-hand side matrix")
+            return
+
+        debug("Preassembling the right-hand side matrix")
+        (self._rhs_state, self._rhs_bilinear, self._rhs_source) = split
+        self._rhs_matrix = assemble(self._rhs_bilinear)
+        if self._rhs_source is not None:
+            self._source_vector = Vector(self._mesh.mpi_comm(),
+                                         self._lhs_matrix.size(0))
+            self._lhs_matrix.init_vector(self._source_vector, 0)
+
+    def _assemble_rhs(self, dt):
+        """Assemble the right-hand side vector, by the product of the
+        preassembled matrix with the previous solution if available."""
+        if self._rhs_matrix is None:
+            assemble(self._rhs, tensor=self._rhs_vector,
+                     **self._annotate_kwargs)
+        else:
+            self._rhs_matrix.mult(self._rhs_state.vector(), self._rhs_vector)
+            if self._rhs_source is not None:
+                assemble(self._rhs_source, tensor=self._source_vector)
+                self._rhs_vector.axpy(1.0, self._source_vector)
+        if self._stimulus_vectors is not None:
+            self._I_s.apply(self._rhs_vector, self._stimulus_vectors, dt)
+
     def _create_linear_solver(self):
         "Helper function for creating linear solver based on parameters."
         solver_type = self.parameters["linear_solver_type"]
@@ -286,6 +377,7 @@ class MonodomainSolver(BasicMonodomainSolver):
         if solver_type == "direct":
             solver = LUSolver(self._lhs_matrix, self.parameters["lu_type"])
             solver.parameters.update(self.parameters["lu_solver"])
+            solver.parameters["reuse_factorization"] = True
             update_routine = self._update_lu_solver
 
         elif solver_type == "iterative":
@@ -296,8 +388,9 @@ class MonodomainSolver(BasicMonodomainSolver):
             alg = self.parameters["algorithm"]
             prec = self.parameters["preconditioner"]
             if self.parameters["use_custom_preconditioner"]:
-                self._prec_matrix = assemble(self._prec,
-                                             **self._annotate_kwargs)
+                if self._prec_matrix is None:
+                    self._prec_matrix = assemble(self._prec,
+                                                 **self._annotate_kwargs)
                 solver = PETScKrylovSolver(alg, prec)
                 solver.parameters.update(self.parameters["krylov_solver"])
                 solver.set_operators(self._lhs_matrix, self._prec_matrix)
@@ -342,6 +435,24 @@ class MonodomainSolver(BasicMonodomainSolver):
         params.add("preconditioner", "petsc_amg")
         params.add("use_custom_preconditioner", True)
 
+        # Evaluate the right-hand side by a preassembled matrix if
+        # possible
+        params.add("use_preassembled_rhs", True)
+
+        # Cache the operators of the most recently used timesteps, and
+        # update operators from their cached timestep independent
+        # matrices if possible
+        params.add(OperatorCache.default_parameters())
+        params.add("update_operators_by_axpy", True)
+
+        # Reuse the preconditioner of the iterative solver according
+        # to its convergence history
+        params.add(PreconditionerReusePolicy.default_parameters())
+
+        # Form the initial guess of the iterative solver from the
+        # solutions of the previous timesteps
+        params.add(InitialGuessExtrapolator.default_parameters())
+
         # Add default parameters from both LU and Krylov solvers
         params.add(LUSolver.default_parameters())
         params.add(KrylovSolver.default_parameters())
@@ -379,7 +490,8 @@ class MonodomainSolver(BasicMonodomainSolver):
         Dt_v_k_n = (v - self.v_)
         v_mid = theta*v + (1.0 - theta)*self.v_
 
-        (dz, rhs) = rhs_with_markerwise_field(self._I_s, self._mesh, w)
+        I_s = None if self._stimulus_vectors is not None else self._I_s
+        (dz, rhs) = rhs_with_markerwise_field(I_s, self._mesh, w)
         theta_parabolic = inner(M_i*grad(v_mid), grad(w))*dz()
         G = Dt_v_k_n*w*dz + k_n*theta_parabolic - k_n*rhs
 
@@ -413,18 +525,108 @@ class MonodomainSolver(BasicMonodomainSolver):
 
         # Update matrix and linear solvers etc as needed
         timestep_unchanged = (abs(dt - float(self._timestep)) < 1.e-12)
+        if timestep_unchanged and not len(self._operator_cache):
+            self._cache_operators(dt)
         self._update_solver(timestep_unchanged, dt)
 
         # Assemble right-hand-side
         timer0 = Timer("Assemble rhs")
-        assemble(self._rhs, tensor=self._rhs_vector, **self._annotate_kwargs)
+        self._assemble_rhs(dt)
         del timer0
 
-        # Solve problem
-        self.linear_solver.solve(self.v.vector(), self._rhs_vector,
-                                 **self._annotate_kwargs)
+        # Solve problem (reusing the preconditioner according to its
+        # reuse policy)
+        policy = self.preconditioner_policy
+        if policy is not None:
+            self.linear_solver.set_reuse_preconditioner(policy.reuse())
+        guess = self.initial_guess
+        if guess is not None and guess.active():
+            self.linear_solver.parameters["nonzero_initial_guess"] = True
+            guess.guess(t1, self.v.vector(), self._lhs_matrix,
+                        self._rhs_vector)
+        iterations = self.linear_solver.solve(self.v.vector(),
+                                              self._rhs_vector,
+                                              **self._annotate_kwargs)
+        if policy is not None:
+            policy.update(iterations)
+        if guess is not None:
+            guess.update(t1, self.v.vector())
         timer.stop()
 
+    def _cache_operators(self, dt):
+        "Store the current operators in the operator cache."
+        self._operator_cache.set(dt, {"lhs": self._lhs_matrix,
+                                      "prec": self._prec_matrix,
+                                      "rhs": self._rhs_matrix,
+                                      "solver": self._linear_solver})
+
+    def _assemble_operator(self, name, form, dt, tensor=None):
+        """Assemble the matrix of the given timestep dependent bilinear
+        form for the timestep dt (in place if tensor is given). If
+        possible, the matrix is formed from the cached timestep
+        independent matrices of the form by a sparse AXPY (see
+        :py:class:`~cbcbeat.utils.AffineOperator`) instead."""
+        if name not in self._affine_operators:
+            self._affine_operators[name] = None
+            if (self.parameters["update_operators_by_axpy"]
+                and not self._annotate_kwargs.get("annotate", False)
+                and AffineOperator.split(form, self._timestep) is not None):
+                self._affine_operators[name] = AffineOperator(form,
+                                                              self._timestep)
+
+        operator = self._affine_operators[name]
+        if operator is not None:
+            return operator.assemble(dt, tensor=tensor)
+        if tensor is None:
+            return assemble(form, **self._annotate_kwargs)
+        return assemble(form, tensor=tensor, **self._annotate_kwargs)
+
+    def _update_operators(self, dt):
+        """Update the operators (matrices and linear solver) to the
+        timestep dt: restore them from the operator cache if
+        available, otherwise assemble them. If the operator cache
+        holds a single timestep only, the matrices of the linear
+        solver are updated in place, otherwise new matrices and a new
+        linear solver are created.
+
+        *Returns*
+          in_place (bool)
+            Whether the matrices of the linear solver were updated in
+            place
+        """
+
+        # Update stored timestep
+        # FIXME: dolfin_adjoint still can't annotate constant assignment.
+        self._timestep.assign(Constant(dt))#, annotate=annotate)
+
+        entry = self._operator_cache.get(dt)
+        if entry is not None:
+            debug("Reusing the cached operators of timestep %g" % dt)
+            self._lhs_matrix = entry["lhs"]
+            self._prec_matrix = entry["prec"]
+            self._rhs_matrix = entry["rhs"]
+            self._linear_solver = entry["solver"]
+            return False
+
+        # Assemble matrices
+        in_place = self._operator_cache.parameters["maximum_size"] <= 1
+        tensor = lambda A: A if in_place else None
+        self._lhs_matrix = self._assemble_operator(
+            "lhs", self._lhs, dt, tensor(self._lhs_matrix))
+        if self._rhs_matrix is not None:
+            self._rhs_matrix = self._assemble_operator(
+                "rhs", self._rhs_bilinear, dt, tensor(self._rhs_matrix))
+        if self._prec_matrix is not None:
+            self._prec_matrix = self._assemble_operator(
+                "prec", self._prec, dt, tensor(self._prec_matrix))
+
+        # The linear solver notices that its matrices have changed,
+        # otherwise make new linear solver
+        if not in_place:
+            (self._linear_solver, dummy) = self._create_linear_solver()
+        self._cache_operators(dt)
+        return in_place
+
     def _update_lu_solver(self, timestep_unchanged, dt):
         """Helper function for updating an LUSolver depending on
         whether timestep has changed."""
@@ -436,42 +638,20 @@ class MonodomainSolver(BasicMonodomainSolver):
             self.linear_solver.parameters["reuse_factorization"] = True
         else:
             debug("Timestep has changed, updating LU factorization")
-            self.linear_solver.parameters["reuse_factorization"] = False
-
-            # Update stored timestep
-            # FIXME: dolfin_adjoint still can't annotate constant assignment.
-            self._timestep.assign(Constant(dt))#, annotate=annotate)
-
-            # Reassemble matrix
-            assemble(self._lhs, tensor=self._lhs_matrix,
-                     **self._annotate_kwargs)
+            in_place = self._update_operators(dt)
+            self.linear_solver.parameters["reuse_factorization"] = \
+                not in_place
 
     def _update_krylov_solver(self, timestep_unchanged, dt):
         """Helper function for updating a KrylovSolver depending on
         whether timestep has changed."""
 
-        kwargs = annotate_kwargs(self.parameters)
-        # Update reuse of preconditioner parameter in accordance with
-        # changes in timestep
         if timestep_unchanged:
             debug("Timestep is unchanged, reusing preconditioner")
-            #self.linear_solver.parameters["preconditioner"]["structure"] = "same"
         else:
             debug("Timestep has changed, updating preconditioner")
-            #self.linear_solver.parameters["preconditioner"]["structure"] = \
-            #                                            "same_nonzero_pattern"
-
-            # Update stored timestep
-            self._timestep.assign(Constant(dt))
-
-            # Reassemble matrix
-            assemble(self._lhs, tensor=self._lhs_matrix,
-                     **self._annotate_kwargs)
-
-            # Reassemble preconditioner
-            if self.parameters["use_custom_preconditioner"]:
-                assemble(self._prec, tensor=self._prec_matrix,
-                         **self._annotate_kwargs)
+            self._update_operators(dt)
+            self.preconditioner_policy.operator_changed()
 
         # Set nonzero initial guess if it indeed is nonzero
         #if (self.v.vector().norm("l2") > 1.e-12):
@@ -0,0 +1,335 @@
+"""This module contains a utility for pacing single cells to their
+periodic steady state (limit cycle), typically to obtain initial
+conditions for tissue simulations, see
+:py:class:`~cbcbeat.prepacing.SingleCellPrePacer`.
+
+The paced states are stored in the (persistent) kernel cache, see
+:py:mod:`~cbcbeat.kernelcache`, so pacing the same cell model with
+the same parameters and protocol again is instantaneous.
+"""
+
+__all__ = ["SingleCellPrePacer", "prepace"]
+
+import numpy
+import ufl
+
+from cbcbeat.dolfinimport import Parameters, Constant, Timer, error, \
+    warning, info
+from cbcbeat.utils import TimeStepper
+from cbcbeat.arrayodesolver import ArrayODESolver
+from cbcbeat.kernelcache import kernel_cache
+
+class SingleCellPrePacer(object):
+    """Pace a single cell with a periodic stimulus until it reaches its
+    periodic steady state, that is, until the states at the start of
+    consecutive beats agree within the tolerances:
+
+    .. math::
+
+      |P(y) - y| \\leq atol + rtol |P(y)|
+
+    where :math:`P` is the period map, advancing the states over one
+    basic cycle length (BCL). The cell is advanced by the
+    :py:class:`~cbcbeat.arrayodesolver.ArrayODESolver` (the engine of
+    the :py:class:`~cbcbeat.cellsolver.SingleCellSolver`) with the
+    stimulus
+
+    .. math::
+
+      I_s(t) = A \\quad \\mathrm{for} \\quad t_s \\leq t \\bmod BCL < t_s + d
+
+    of amplitude :math:`A`, start :math:`t_s` and duration :math:`d`
+    (see the "stimulus" parameters). The stimulus of the cell model
+    itself is not used.
+
+    The convergence can be accelerated by the parameter "accelerator":
+
+    * "none": pace until convergence.
+    * "extrapolation": every few beats (see the "extrapolation"
+      parameters), the states are extrapolated to their limits from
+      the last three beats, assuming a geometric convergence of each
+      state (Aitken's delta-squared process).
+    * "newton": after a few plain beats, solve :math:`P(y) - y = 0` by
+      a Newton iteration with a finite difference approximation of the
+      Jacobian of the period map. The perturbed states are paced
+      together with the current states as one vectorised system. The
+      Newton steps are computed by least squares (ignoring the
+      directions of conserved quantities, with eigenvalues of the
+      Jacobian at one) and limited to a maximal relative change of the
+      states (see the "newton" parameters). A Newton step that does
+      not reduce the beat-to-beat change is rejected in favour of a
+      plain beat.
+
+    Converged states are stored in the kernel cache, keyed by the cell
+    model (its class and parameters), the BCL, the stimulus protocol,
+    the scheme, the time step and the tolerances.
+
+    *Arguments*
+      model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`)
+        A cardiac cell model
+      initial_conditions (:py:class:`numpy.ndarray`, optional)
+        The initial values of the membrane potential and the states.
+        The default initial conditions of the cell model are used if
+        not given.
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters
+
+    *Example of usage*::
+
+      params = SingleCellPrePacer.default_parameters()
+      params["bcl"] = 1000.0
+      params["accelerator"] = "newton"
+      pacer = SingleCellPrePacer(Tentusscher_panfilov_2006_epi_cell(),
+                                 params=params)
+      y = pacer.solve()
+      print pacer.statistics["beats"]
+    """
+    def __init__(self, model, initial_conditions=None, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        accelerator = self.parameters["accelerator"]
+        if accelerator not in ("none", "extrapolation", "newton"):
+            error("Unknown accelerator %r, expecting one of none, "
+                  "extrapolation or newton" % accelerator)
+
+        self._model = model
+        if initial_conditions is None:
+            initial_conditions = [float(value) for value in
+                                  model.default_initial_conditions().values()]
+        self._y0 = numpy.array(initial_conditions, dtype=float)
+        if self._y0.shape != (model.num_states() + 1,):
+            error("Expecting %d initial values, not %r"
+                  % (model.num_states() + 1, self._y0.shape))
+
+        # The stimulus protocol, with the time relative to the start of
+        # the beat
+        self._time = Constant(0.0)
+        stimulus = self.parameters["stimulus"]
+        (amplitude, start, duration) = (Constant(stimulus["amplitude"]),
+                                        Constant(stimulus["start"]),
+                                        Constant(stimulus["duration"]))
+        t = self._time
+        I_s = amplitude*ufl.conditional(ufl.And(ufl.ge(t, start),
+                                                ufl.lt(t, start + duration)),
+                                        1.0, 0.0)
+
+        self._solver = ArrayODESolver(model, self._time,
+                                      self.parameters["scheme"], I_s=I_s,
+                                      params=self.parameters["ArrayODESolver"])
+        self.statistics = {}
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = Parameters("SingleCellPrePacer")
+        params.add("bcl", 1000.0)
+        params.add("dt", 0.1)
+        params.add("scheme", "GRL1")
+        params.add("maximum_beats", 1000)
+        params.add("absolute_tolerance", 1.e-8)
+        params.add("relative_tolerance", 1.e-6)
+        params.add("accelerator", "none")
+        params.add("use_cache", True)
+
+        stimulus = Parameters("stimulus")
+        stimulus.add("amplitude", 50.0)
+        stimulus.add("start", 1.0)
+        stimulus.add("duration", 1.0)
+        params.add(stimulus)
+
+        extrapolation = Parameters("extrapolation")
+        extrapolation.add("interval", 10)
+        extrapolation.add("maximum_ratio", 0.999)
+        params.add(extrapolation)
+
+        newton = Parameters("newton")
+        newton.add("start", 5)
+        newton.add("perturbation", 1.e-7)
+        newton.add("maximum_relative_step", 0.1)
+        newton.add("rcond", 1.e-6)
+        params.add(newton)
+
+        params.add(ArrayODESolver.default_parameters())
+        return params
+
+    def _key(self):
+        "Return the key of the paced states in the kernel cache."
+        p = self.parameters
+        stimulus = p["stimulus"]
+        return kernel_cache().key(self._model, "prepacing", p["bcl"],
+                                  stimulus["amplitude"], stimulus["start"],
+                                  stimulus["duration"], p["scheme"], p["dt"],
+                                  p["absolute_tolerance"],
+                                  p["relative_tolerance"],
+                                  _parameter_items(p["ArrayODESolver"]))
+
+    def _evaluate(self, c):
+        "Return the value of a (spatially constant) coefficient."
+        return float(c(0.0))
+
+    def beat(self, y):
+        """Advance the states over one basic cycle length (in place).
+
+        *Arguments*
+          y (:py:class:`numpy.ndarray`)
+            The states, an array of shape (num_states + 1, N) of one
+            or more cells
+        """
+        timer = Timer("Pre-pacing beat")
+        for interval in TimeStepper((0.0, self.parameters["bcl"]),
+                                    self.parameters["dt"]):
+            self._solver.advance(y, interval, self._evaluate)
+        timer.stop()
+
+    def _error_ratio(self, y, y_next):
+        "Return the maximal ratio of the beat-to-beat change to the tolerance."
+        tolerance = (self.parameters["absolute_tolerance"]
+                     + self.parameters["relative_tolerance"]*numpy.abs(y_next))
+        ratio = numpy.max(numpy.abs(y_next - y)/tolerance)
+        return ratio if numpy.isfinite(ratio) else numpy.inf
+
+    def _extrapolate(self, history):
+        """Return the states extrapolated from the states at the start
+        of three consecutive beats."""
+        (y0, y1, y2) = history
+        (d1, d2) = (y1 - y0, y2 - y1)
+        maximum_ratio = self.parameters["extrapolation"]["maximum_ratio"]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            q = d2/d1
+        geometric = (d1 != 0.0) & (q > 0.0) & (q <= maximum_ratio)
+        y = y2.copy()
+        y[geometric] += (d2*q/(1.0 - q))[geometric]
+        return y
+
+    def _pace(self, y):
+        """Pace the states y (with the chosen accelerator) and return
+        the final states, the number of beats and the last error
+        ratio."""
+        accelerator = self.parameters["accelerator"]
+        maximum_beats = self.parameters["maximum_beats"]
+        interval = self.parameters["extrapolation"]["interval"]
+        newton = self.parameters["newton"]
+        n = len(y)
+
+        (beats, ratio) = (0, numpy.inf)
+        history = [y.copy()]
+        y_fallback = None
+        while beats < maximum_beats:
+            use_newton = (accelerator == "newton"
+                          and beats >= newton["start"])
+            if use_newton:
+                # Pace the states and the perturbed states together
+                h = newton["perturbation"]*numpy.abs(y)
+                h[h == 0.0] = newton["perturbation"]
+                Y = numpy.empty((n, n + 1))
+                Y[:] = y[:, None]
+                Y[numpy.arange(n), numpy.arange(1, n + 1)] += h
+                self.beat(Y)
+                y_next = Y[:, 0].copy()
+            else:
+                y_next = y.copy()
+                self.beat(y_next[:, None])
+            beats += 1
+
+            previous = ratio
+            ratio = self._error_ratio(y, y_next)
+            info("Beat %d: beat-to-beat change %g times the tolerance"
+                 % (beats, ratio))
+            if ratio <= 1.0:
+                return (y_next, beats, ratio)
+
+            if use_newton:
+                if y_fallback is not None and ratio > previous:
+                    # Reject the last Newton step: continue (without
+                    # a check) from the paced states of the previous
+                    # iterate
+                    (y, y_fallback) = (y_fallback, None)
+                    continue
+
+                # Newton step for P(y) - y = 0, limited to a maximal
+                # relative change of the states
+                J = (Y[:, 1:] - y_next[:, None])/h
+                dy = numpy.linalg.lstsq(J - numpy.identity(n), y - y_next,
+                                        rcond=newton["rcond"])[0]
+                with numpy.errstate(divide="ignore", invalid="ignore"):
+                    step = numpy.max(numpy.abs(dy)/numpy.abs(y))
+                if step > newton["maximum_relative_step"]:
+                    dy *= newton["maximum_relative_step"]/step
+                y_fallback = y_next
+                y = y + dy
+            elif accelerator == "extrapolation":
+                y = y_next
+                history = (history + [y])[-3:]
+                if beats % interval == 0 and len(history) == 3:
+                    y = self._extrapolate(history)
+                    history = [y]
+            else:
+                y = y_next
+
+        return (y, beats, ratio)
+
+    def solve(self):
+        """Pace the cell to its periodic steady state, or return the
+        states from the cache if available.
+
+        *Returns*
+          y (:py:class:`numpy.ndarray`)
+            The membrane potential and the states at the start of a
+            beat of the periodic steady state
+        """
+        cache = kernel_cache()
+        key = self._key() if self.parameters["use_cache"] else None
+        entry = cache.get(key)
+        if entry is not None:
+            self.statistics = dict(entry["statistics"], cached=True)
+            return numpy.array(entry["states"])
+
+        (y, beats, ratio) = self._pace(self._y0.copy())
+        converged = bool(ratio <= 1.0)
+        self.statistics = {"beats": beats, "error_ratio": float(ratio),
+                           "converged": converged, "cached": False}
+        if converged:
+            cache.set(key, {"states": [float(value) for value in y],
+                            "statistics": self.statistics})
+        else:
+            warning("Pre-pacing did not converge in %d beats (the "
+                    "beat-to-beat change is %g times the tolerance)"
+                    % (beats, ratio))
+        return y
+
+def _parameter_items(params):
+    "Return the (nested) items of the parameters as a sorted tuple."
+    return tuple((key, _parameter_items(params[key])
+                  if isinstance(params[key], Parameters) else params[key])
+                 for key in sorted(params.keys()))
+
+def prepace(model, params=None):
+    """Pace the cell model to its periodic steady state and set its
+    initial conditions to the paced states, see
+    :py:class:`~cbcbeat.prepacing.SingleCellPrePacer`.
+
+    *Arguments*
+      model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`)
+        A cardiac cell model
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters of the :py:class:`~cbcbeat.prepacing.SingleCellPrePacer`
+
+    *Returns*
+      statistics (:py:class:`dict`)
+        The number of beats, the last error ratio and whether the
+        pacing converged or was read from the cache
+    """
+    pacer = SingleCellPrePacer(model, params=params)
+    y = pacer.solve()
+    names = list(model.default_initial_conditions().keys())
+    model.set_initial_conditions(**dict((name, float(value))
+                                        for (name, value) in zip(names, y)))
+    return pacer.statistics
@@ -138,6 +138,15 @@ class BasicSplittingSolver:
 
         self.merger = FunctionAssigner(self.VS.sub(0), V)
 
+        # Merge through the state array of the ODE solver instead, if
+        # it has one and v is continuous piecewise linear
+        self._states = getattr(self.ode_solver, "states", None)
+        self._merge_dofs = None
+        element = V.ufl_element()
+        if (self._states is not None and element.family() == "Lagrange"
+            and element.degree() == 1):
+            self._merge_dofs = self._states.vertex_dofs(V)
+
         self._annotate_kwargs = annotate_kwargs(self.parameters)
 
     def _create_ode_solver(self):
@@ -293,8 +302,13 @@ class BasicSplittingSolver:
             # Yield solutions
             yield (t0, t1), self.solution_fields()
 
-            # Update previous solution
+            # Update previous solution (the state array of the ODE
+            # solver, if any, then holds the previous solution)
+            synchronized = (self._states is not None and
+                            self._states.is_synchronized(self.vs))
             self.vs_.assign(self.vs)
+            if synchronized:
+                self._states.synchronize(self.vs_)
 
     def step(self, interval):
         """
@@ -368,11 +382,15 @@ class BasicSplittingSolver:
         timer = Timer("Merge step")
 
         begin(PROGRESS, "Merging")
-        if self.parameters["pde_solver"] == "bidomain":
-            v = self.vur.sub(0)
+        if self._merge_dofs is not None:
+            self._states.v[:] = self.vur.vector().get_local()[self._merge_dofs]
+            self._states.scatter(solution, 0)
         else:
-            v = self.vur
-        self.merger.assign(solution.sub(0), v, **self._annotate_kwargs)
+            if self.parameters["pde_solver"] == "bidomain":
+                v = self.vur.sub(0)
+            else:
+                v = self.vur
+            self.merger.assign(solution.sub(0), v, **self._annotate_kwargs)
         end()
 
         timer.stop()
@@ -399,6 +417,12 @@ class SplittingSolver(BasicSplittingSolver):
     Godunov splitting while "theta" set to 0.5 to a (2nd order) Strang
     splitting.
 
+    The cell model may be a
+    :py:class:`~cbcbeat.cellmodels.MultiCellModel`, the cell models of
+    the different domains are then advanced by the CardiacODESolver
+    on their own vertices (see
+    :py:class:`~cbcbeat.cellsolver.CardiacODESolver`).
+
     *Arguments*
       model (:py:class:`cbcbeat.cardiacmodels.CardiacModel`)
         a CardiacModel object describing the simulation set-up
@@ -0,0 +1,231 @@
+"""This module contains a structure-of-arrays container for the
+states of the cardiac cell models at the vertices (or cells) of a
+mesh, see :py:class:`~cbcbeat.statearray.StateArray`.
+"""
+
+__all__ = ["StateArray"]
+
+import numpy
+
+from cbcbeat.dolfinimport import error
+
+def vertex_dofs(V, dim=0):
+    """Return the local dofs of each (scalar) component of the
+    continuous piecewise linear space V at the vertices of its mesh,
+    as an array of shape (number of components, number of vertices).
+
+    *Arguments*
+      V (:py:class:`dolfin.FunctionSpace`)
+        A scalar or vector valued CG1 space, or a subspace of such
+      dim (int, optional)
+        The topological dimension of the mesh entities holding the
+        dofs: 0 (vertices) by default, or the dimension of the cells
+        for a piecewise constant (DG0) space V
+    """
+    mesh = V.mesh()
+    num_components = V.num_sub_spaces() or 1
+    spaces = [V.sub(i) for i in range(num_components)] if V.num_sub_spaces() \
+             else [V]
+    dofs = numpy.array([W.dofmap().entity_dofs(mesh, dim) for W in spaces],
+                       dtype=numpy.intc)
+    if dofs.shape != (num_components, mesh.num_entities(dim)):
+        error("Expecting one degree of freedom per mesh entity and component")
+    return dofs
+
+def _vector_state(u):
+    """Return the PETSc object state of the vector of the function u,
+    which changes whenever the vector is modified, or None if not
+    available (without petsc4py)."""
+    try:
+        from cbcbeat.dolfinimport import as_backend_type
+        return as_backend_type(u.vector()).vec().stateGet()
+    except (AttributeError, RuntimeError, TypeError, ImportError):
+        return None
+
+class StateArray(object):
+    """A container holding the states at the locally owned vertices in
+    a structure-of-arrays layout: :py:attr:`values` is a C-contiguous
+    array of shape (num_states, N), with one contiguous block per
+    state variable (the membrane potential first).
+
+    Indexing gives zero-copy views of the individual states, and the
+    states are gathered from and scattered to the (interleaved) dofs
+    of continuous piecewise linear vector fields by precomputed index
+    maps. The states of piecewise constant (DG0) vector fields are
+    held at the cells instead if dim is the dimension of the cells.
+
+    The container records the field it was last gathered from or
+    scattered to, so that a solver keeping its states in the container
+    across steps only gathers them again when the field has been
+    modified since (see :py:meth:`is_synchronized`).
+
+    *Arguments*
+      VS (:py:class:`dolfin.FunctionSpace`)
+        A (vector) CG1 space holding the membrane potential and states
+      names (list of str, optional)
+        The names of the states
+      dim (int, optional)
+        The topological dimension of the mesh entities holding the
+        states, 0 (vertices) by default
+
+    *Example of usage*::
+
+      states = StateArray(vs.function_space(), ["V", "s"])
+      states.gather(vs)
+      v = states["V"]  # A view, modifying v modifies states
+      states.scatter(vs)
+    """
+    def __init__(self, VS, names=None, dim=0):
+
+        self._mesh = VS.mesh()
+        self.names = list(names) if names is not None else None
+        self._dim = dim
+        dofs = vertex_dofs(VS, dim)
+        if self.names is not None and len(self.names) != len(dofs):
+            error("Expecting %d state names, not %d"
+                  % (len(dofs), len(self.names)))
+
+        # Restrict to the vertices owned by this process (all dofs of
+        # a vertex have the same owner)
+        dofmap = VS.dofmap()
+        local_size = dofmap.ownership_range()[1] - dofmap.ownership_range()[0]
+        self.vertices = numpy.flatnonzero(dofs[0] < local_size)
+        self._dofs = dofs[:, self.vertices]
+        self._local_size = local_size
+        self._vertex_dofs = {}
+
+        self.values = numpy.zeros(self._dofs.shape)
+        self._synchronized = None
+
+    def __len__(self):
+        "The number of states (including the membrane potential)"
+        return self.values.shape[0]
+
+    def _index(self, key):
+        "Return the index of the state with the given index or name."
+        if isinstance(key, (int, numpy.integer)):
+            return key
+        if self.names is None or key not in self.names:
+            error("Unknown state %r" % (key,))
+        return self.names.index(key)
+
+    def __getitem__(self, key):
+        "Return a view of the state with the given index or name."
+        return self.values[self._index(key)]
+
+    @property
+    def v(self):
+        "A view of the membrane potential"
+        return self.values[0]
+
+    @property
+    def num_vertices(self):
+        "The number of (locally owned) vertices"
+        return self.values.shape[1]
+
+    def gather(self, vs):
+        """Copy the values of the field vs into the array.
+
+        *Arguments*
+          vs (:py:class:`dolfin.Function`)
+            A function in the space of the container
+        """
+        self.values[:] = vs.vector().get_local()[self._dofs]
+        self.synchronize(vs)
+
+    def scatter(self, vs, key=None):
+        """Copy the values of the array (or of a single state) into the
+        field vs.
+
+        *Arguments*
+          vs (:py:class:`dolfin.Function`)
+            A function in the space of the container
+          key (int or str, optional)
+            The index or name of the state to copy, all states are
+            copied if not given
+        """
+        if key is None:
+            # The dofs of the owned vertices cover all owned dofs
+            x = numpy.empty(self._local_size)
+            x[self._dofs] = self.values
+        else:
+            x = vs.vector().get_local()
+            x[self._dofs[self._index(key)]] = self[key]
+        vs.vector().set_local(x)
+        vs.vector().apply("insert")
+        if key is None:
+            self.synchronize(vs)
+        else:
+            self._synchronized = None
+
+    def synchronize(self, vs):
+        """Record that the array holds the values of the field vs (for
+        instance after vs has been assigned from a synchronized field).
+
+        *Arguments*
+          vs (:py:class:`dolfin.Function`)
+            A function in the space of the container
+        """
+        self._synchronized = (vs, _vector_state(vs))
+
+    def is_synchronized(self, vs):
+        """Return True if the array holds the values of the field vs:
+        vs is the field last gathered from or scattered to and it has
+        not been modified since. Modifications are detected by the
+        PETSc object state of the vector, without petsc4py the field
+        is never considered synchronized.
+
+        *Arguments*
+          vs (:py:class:`dolfin.Function`)
+            A function in the space of the container
+        """
+        if self._synchronized is None:
+            return False
+        (u, state) = self._synchronized
+        return u is vs and state is not None and state == _vector_state(vs)
+
+    def vertex_dofs(self, V):
+        """Return the local dofs of the (scalar) CG1 space V at the
+        locally owned vertices (or of the DG0 space V at the cells),
+        in the order of the container, or None if some of these dofs
+        are not owned by this process."""
+        key = V.id()
+        if key not in self._vertex_dofs:
+            dofs = vertex_dofs(V, self._dim)[0][self.vertices]
+            owned = V.dofmap().dofs() - V.dofmap().ownership_range()[0]
+            if not numpy.in1d(dofs, owned).all():
+                dofs = None
+            self._vertex_dofs[key] = dofs
+        return self._vertex_dofs[key]
+
+    def _owned_dofs(self, u):
+        "Return the local dofs of the scalar field u at the vertices."
+        dofs = self.vertex_dofs(u.function_space())
+        if dofs is None:
+            error("The dofs of the field are not owned by the vertices")
+        return dofs
+
+    def gather_state(self, key, u):
+        """Copy the values of the scalar field u into the given state.
+
+        *Arguments*
+          key (int or str)
+            The index or name of the state
+          u (:py:class:`dolfin.Function`)
+            A scalar CG1 function (or a component of a mixed function)
+        """
+        self[key][:] = u.vector().get_local()[self._owned_dofs(u)]
+
+    def scatter_state(self, key, u):
+        """Copy the values of the given state into the scalar field u.
+
+        *Arguments*
+          key (int or str)
+            The index or name of the state
+          u (:py:class:`dolfin.Function`)
+            A scalar CG1 function (or a component of a mixed function)
+        """
+        x = u.vector().get_local()
+        x[self._owned_dofs(u)] = self[key]
+        u.vector().set_local(x)
+        u.vector().apply("insert")
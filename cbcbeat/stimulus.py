@@ -0,0 +1,220 @@
+"""This module contains a library of stimulus protocols: single
+pulses, periodic pulse trains, S1-S2 protocols and multi-site
+stimulation, optionally restricted to marked regions of the mesh.
+
+The protocols are UFL expressions of the time Constant (and of the
+indicator functions of the stimulated regions, see
+:py:func:`region_indicator`). They are compiled into the forms and
+kernels of the solvers like any other expression, instead of being
+evaluated point by point in Python, and can be given as stimulus
+wherever a stimulus is accepted, for instance by
+:py:class:`~cbcbeat.cardiacmodels.CardiacModel`. The pulses of a
+protocol are selected by a balanced tree of conditionals on the
+time, so evaluating a protocol of n pulses costs about log2(n)
+comparisons, and nothing more while no pulse is active.
+
+The amplitudes, times and intervals can be given as numbers or as
+Constants. The values of Constants can be changed (for instance the
+coupling interval of an S1-S2 protocol) without compiling the forms
+and kernels again.
+
+*Example of usage*::
+
+  markers = MeshFunction("size_t", mesh, mesh.topology().dim(), 0)
+  CompiledSubDomain("x[0] <= 0.1").mark(markers, 1)
+  coupling_interval = Constant(300.0)
+  stimulus = s1s2(time, 50.0, 2.0, 500.0, 4, coupling_interval,
+                  s1_region=region_indicator(markers, 1))
+  heart = CardiacModel(mesh, time, M_i, M_e, cell_model, stimulus)
+"""
+
+__all__ = ["region_indicator", "single_pulse", "pulse_train", "s1s2",
+           "multi_site"]
+
+import numpy
+import ufl
+
+from cbcbeat.dolfinimport import Function, FunctionSpace, error
+from cbcbeat.statearray import vertex_dofs
+
+def region_indicator(markers, values=1):
+    """Return the indicator function of a marked region: one in the
+    region and zero elsewhere.
+
+    *Arguments*
+      markers (:py:class:`dolfin.MeshFunction`)
+        Cell markers (giving a piecewise constant indicator) or vertex
+        markers (giving a continuous piecewise linear indicator)
+      values (int or list of int, optional)
+        The marker value(s) of the region
+
+    *Returns*
+      indicator (:py:class:`dolfin.Function`)
+        The indicator function of the region
+    """
+    mesh = markers.mesh()
+    dim = markers.dim()
+    if dim == mesh.topology().dim():
+        V = FunctionSpace(mesh, "DG", 0)
+    elif dim == 0:
+        V = FunctionSpace(mesh, "CG", 1)
+    else:
+        error("Expecting cell or vertex markers, not markers of "
+              "dimension %d" % dim)
+
+    # Set the values of the owned dofs of the marked entities
+    inside = numpy.in1d(markers.array(), numpy.atleast_1d(values))
+    dofs = vertex_dofs(V, dim)[0]
+    (first, last) = V.dofmap().ownership_range()
+    owned = dofs < last - first
+    x = numpy.zeros(last - first)
+    x[dofs[owned]] = inside[owned]
+
+    indicator = Function(V, name="region")
+    indicator.vector().set_local(x)
+    indicator.vector().apply("insert")
+    return indicator
+
+def _pulses(time, starts, duration):
+    """Return an expression which is one within the pulses of the given
+    duration starting at the given (increasing) times, and zero
+    otherwise. The pulse is selected by a balanced tree of
+    conditionals on the time."""
+    if len(starts) == 1:
+        return ufl.conditional(ufl.And(ufl.ge(time, starts[0]),
+                                       ufl.lt(time, starts[0] + duration)),
+                               1.0, 0.0)
+    middle = len(starts)//2
+    return ufl.conditional(ufl.lt(time, starts[middle]),
+                           _pulses(time, starts[:middle], duration),
+                           _pulses(time, starts[middle:], duration))
+
+def _stimulus(amplitude, pulses, region):
+    "Return the stimulus of the given amplitude, pulses and region."
+    stimulus = amplitude*pulses
+    if region is not None:
+        stimulus = stimulus*region
+    return stimulus
+
+def single_pulse(time, amplitude, start, duration, region=None):
+    """Return a single square pulse.
+
+    *Arguments*
+      time (:py:class:`dolfin.Constant`)
+        The time
+      amplitude (float or :py:class:`dolfin.Constant`)
+        The amplitude of the pulse
+      start (float or :py:class:`dolfin.Constant`)
+        The start time of the pulse
+      duration (float or :py:class:`dolfin.Constant`)
+        The duration of the pulse
+      region (:py:class:`dolfin.Function`, optional)
+        The indicator function of the stimulated region (see
+        :py:func:`region_indicator`), the whole domain if not given
+
+    *Returns*
+      stimulus (:py:class:`ufl.Expr`)
+        The stimulus
+    """
+    return _stimulus(amplitude, _pulses(time, [start], duration), region)
+
+def pulse_train(time, amplitude, start, duration, bcl, num_pulses,
+                region=None):
+    """Return a periodic train of square pulses, starting at the times
+    start + k*bcl for k = 0, ..., num_pulses - 1.
+
+    *Arguments*
+      time (:py:class:`dolfin.Constant`)
+        The time
+      amplitude (float or :py:class:`dolfin.Constant`)
+        The amplitude of the pulses
+      start (float or :py:class:`dolfin.Constant`)
+        The start time of the first pulse
+      duration (float or :py:class:`dolfin.Constant`)
+        The duration of each pulse
+      bcl (float or :py:class:`dolfin.Constant`)
+        The basic cycle length (the period)
+      num_pulses (int)
+        The number of pulses
+      region (:py:class:`dolfin.Function`, optional)
+        The indicator function of the stimulated region (see
+        :py:func:`region_indicator`), the whole domain if not given
+
+    *Returns*
+      stimulus (:py:class:`ufl.Expr`)
+        The stimulus
+    """
+    if num_pulses < 1:
+        error("Expecting at least one pulse, not %d" % num_pulses)
+    starts = [start + k*bcl for k in range(num_pulses)]
+    return _stimulus(amplitude, _pulses(time, starts, duration), region)
+
+def s1s2(time, amplitude, duration, bcl, num_s1, coupling_interval,
+         start=0.0, s1_region=None, s2_region=None):
+    """Return an S1-S2 protocol: a train of num_s1 S1 pulses with the
+    basic cycle length bcl, followed by an S2 pulse the coupling
+    interval after the last S1 pulse.
+
+    *Arguments*
+      time (:py:class:`dolfin.Constant`)
+        The time
+      amplitude (float or :py:class:`dolfin.Constant`)
+        The amplitude of the pulses
+      duration (float or :py:class:`dolfin.Constant`)
+        The duration of each pulse
+      bcl (float or :py:class:`dolfin.Constant`)
+        The basic cycle length of the S1 pulses
+      num_s1 (int)
+        The number of S1 pulses
+      coupling_interval (float or :py:class:`dolfin.Constant`)
+        The interval between the starts of the last S1 pulse and of
+        the S2 pulse
+      start (float or :py:class:`dolfin.Constant`, optional)
+        The start time of the first S1 pulse
+      s1_region (:py:class:`dolfin.Function`, optional)
+        The indicator function of the region of the S1 pulses, the
+        whole domain if not given
+      s2_region (:py:class:`dolfin.Function`, optional)
+        The indicator function of the region of the S2 pulse, the
+        region of the S1 pulses if not given
+
+    *Returns*
+      stimulus (:py:class:`ufl.Expr`)
+        The stimulus
+    """
+    if num_s1 < 1:
+        error("Expecting at least one S1 pulse, not %d" % num_s1)
+    starts = [start + k*bcl for k in range(num_s1)]
+    s2_start = starts[-1] + coupling_interval
+    if s2_region is None or s2_region is s1_region:
+        return _stimulus(amplitude,
+                         _pulses(time, starts + [s2_start], duration),
+                         s1_region)
+    return (_stimulus(amplitude, _pulses(time, starts, duration), s1_region)
+            + _stimulus(amplitude, _pulses(time, [s2_start], duration),
+                        s2_region))
+
+def multi_site(time, amplitude, duration, sites):
+    """Return a multi-site stimulus: a square pulse in each of the
+    given regions, each starting at its own time.
+
+    *Arguments*
+      time (:py:class:`dolfin.Constant`)
+        The time
+      amplitude (float or :py:class:`dolfin.Constant`)
+        The amplitude of the pulses
+      duration (float or :py:class:`dolfin.Constant`)
+        The duration of each pulse
+      sites (list of :py:class:`tuple`)
+        The stimulation sites given by (region, start): the indicator
+        function of the region (see :py:func:`region_indicator`) and
+        the start time of its pulse
+
+    *Returns*
+      stimulus (:py:class:`ufl.Expr`)
+        The stimulus
+    """
+    if not sites:
+        error("Expecting at least one stimulation site")
+    return sum(single_pulse(time, amplitude, start, duration, region)
+               for (region, start) in sites)
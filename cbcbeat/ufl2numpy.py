@@ -0,0 +1,706 @@
+"""This module contains a translator from UFL expressions to
+vectorised NumPy code. It is used to lower the right-hand side of a
+:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`
+into array kernels which act on all nodes at once, see
+:py:class:`~cbcbeat.arrayodesolver.ArrayODESolver`.
+"""
+
+__all__ = ["NumPyCodeGenerator", "CellModelKernels", "VoltageLookupTable"]
+
+import threading
+import numpy
+import ufl
+from ufl.classes import Terminal, ScalarValue, Zero, Variable, Condition
+from ufl.algorithms import expand_derivatives, extract_coefficients
+
+from cbcbeat.dolfinimport import dolfin, error
+
+class NumPyCodeGenerator(object):
+    """Generate Python code evaluating a set of UFL expressions with
+    NumPy. The terminals of the expressions are given as code strings
+    via the symbols map. Subexpressions used more than once are
+    assigned to temporaries, such that common subexpressions are
+    evaluated once only.
+
+    *Arguments*
+      symbols (dict)
+        A map from UFL terminals (or indexed terminals) to code strings
+
+    *Example of usage*::
+
+      generator = NumPyCodeGenerator({y[0]: "y[0]", y[1]: "y[1]"})
+      (lines, codes) = generator.generate([ufl.exp(y[0])*y[1]])
+    """
+
+    # Maximal nesting of an inlined expression before a temporary is
+    # introduced (keeps the Python parser happy)
+    max_depth = 16
+
+    _binary_operators = {"sum": "+", "product": "*", "division": "/",
+                         "power": "**", "eq": "==", "ne": "!=",
+                         "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+    _functions = {"exp": "numpy.exp", "ln": "numpy.log",
+                  "sqrt": "numpy.sqrt", "abs": "numpy.abs",
+                  "cos": "numpy.cos", "sin": "numpy.sin",
+                  "tan": "numpy.tan", "acos": "numpy.arccos",
+                  "asin": "numpy.arcsin", "atan": "numpy.arctan",
+                  "cosh": "numpy.cosh", "sinh": "numpy.sinh",
+                  "tanh": "numpy.tanh", "atan_2": "numpy.arctan2",
+                  "min_value": "numpy.minimum",
+                  "max_value": "numpy.maximum",
+                  "and_condition": "numpy.logical_and",
+                  "or_condition": "numpy.logical_or",
+                  "not_condition": "numpy.logical_not",
+                  "conditional": "numpy.where"}
+
+    def __init__(self, symbols):
+        self._symbols = dict(symbols)
+        self._code = {}
+        self._depth = {}
+        self._num_temporaries = 0
+
+    def _operands(self, o):
+        "Return the operands of o that need code."
+        if o in self._symbols or isinstance(o, Terminal):
+            return ()
+        if isinstance(o, Variable):
+            return o.ufl_operands[:1]
+        return o.ufl_operands
+
+    def _count_uses(self, exprs):
+        "Count the number of uses of each node in the expression DAGs."
+        uses = {}
+        visited = set()
+        stack = list(exprs)
+        for expr in exprs:
+            uses[expr] = uses.get(expr, 0) + 1
+        while stack:
+            o = stack.pop()
+            if o in visited:
+                continue
+            visited.add(o)
+            for op in self._operands(o):
+                uses[op] = uses.get(op, 0) + 1
+                stack.append(op)
+        return uses
+
+    def _terminal_code(self, o):
+        "Return code for a terminal (or symbol) o."
+        if o in self._symbols:
+            return self._symbols[o]
+        if isinstance(o, Zero) and o.ufl_shape == ():
+            return "0.0"
+        if isinstance(o, ScalarValue):
+            value = float(o)
+            return repr(value) if value >= 0 else "(%r)" % value
+        error("Unable to lower UFL terminal %r to NumPy code" % o)
+
+    def _expression_code(self, o, ops):
+        "Return code for the operator o applied to the code of its operands."
+        name = o._ufl_handler_name_
+        if name == "variable":
+            return ops[0]
+        if name in self._binary_operators:
+            return "(%s %s %s)" % (ops[0], self._binary_operators[name],
+                                   ops[1])
+        if name in self._functions:
+            return "%s(%s)" % (self._functions[name], ", ".join(ops))
+        error("Unable to lower UFL expression of type %s to NumPy code"
+              % type(o).__name__)
+
+    def generate(self, exprs):
+        """Generate code for the given expressions.
+
+        *Arguments*
+          exprs (list of :py:class:`ufl.Expr`)
+            The (scalar) expressions
+
+        *Returns*
+          (lines, codes) (:py:class:`tuple`)
+            The lines assigning the temporaries and the code string
+            for each of the given expressions
+        """
+        exprs = [ufl.as_ufl(expr) for expr in exprs]
+        uses = self._count_uses(exprs)
+        lines = []
+
+        # Iterative post-order traversal of the expression DAGs
+        stack = [(expr, False) for expr in reversed(exprs)]
+        while stack:
+            (o, ready) = stack.pop()
+            if o in self._code:
+                continue
+            operands = self._operands(o)
+            if not operands:
+                self._code[o] = self._terminal_code(o)
+                self._depth[o] = 0
+                continue
+            if not ready:
+                stack.append((o, True))
+                stack.extend((op, False) for op in reversed(operands)
+                             if op not in self._code)
+                continue
+
+            code = self._expression_code(o, [self._code[op]
+                                             for op in operands])
+            depth = 1 + max(self._depth[op] for op in operands)
+
+            # Assign shared (or too deep) subexpressions to temporaries
+            if ((uses.get(o, 0) > 1 or depth > self.max_depth)
+                and not isinstance(o, Variable)):
+                name = "_t%d" % self._num_temporaries
+                self._num_temporaries += 1
+                lines.append("%s = %s" % (name, code))
+                (code, depth) = (name, 0)
+
+            self._code[o] = code
+            self._depth[o] = depth
+
+        return (lines, [self._code[expr] for expr in exprs])
+
+def compile_kernel(name, arguments, lines, namespace=None):
+    """Compile a Python function with the given name, arguments and
+    body lines using the NumPy namespace (extended by the given
+    namespace) and return it together with its source.
+    """
+    source = "def %s(%s):\n%s\n" % (name, ", ".join(arguments),
+                                    "\n".join("    " + line
+                                              for line in lines or ["pass"]))
+    return (load_kernel(name, source, namespace), source)
+
+def load_kernel(name, source, namespace=None):
+    """Compile the Python function with the given name from its
+    source (as returned by :py:func:`compile_kernel`) using the NumPy
+    namespace (extended by the given namespace) and return it.
+    """
+    namespace = dict(namespace or {}, numpy=numpy)
+    exec(compile(source, "<cbcbeat %s kernel>" % name, "exec"), namespace)
+    return namespace[name]
+
+class VoltageLookupTable(object):
+    """A table of expressions depending on the membrane potential
+    only, tabulated on a uniform grid and evaluated by linear
+    interpolation. The expressions may additionally depend on
+    constant coefficients, the table is recomputed whenever their
+    values change. Potentials outside of the grid are clamped to the
+    grid.
+
+    The tabulation points are placed at the midpoints of the cells of
+    the given range: rate functions typically have removable
+    singularities at round potentials (such as 0/0 at V = -47 mV) that
+    must not be sampled.
+
+    *Arguments*
+      exprs (list of :py:class:`ufl.Expr`)
+        The expressions to tabulate
+      symbols (dict)
+        A map from the terminals of the expressions to code strings,
+        the membrane potential must map to "y[0]" and the constant
+        coefficients to "c[i]"
+      constants (list of int)
+        The indices of the constant coefficients
+      grid (:py:class:`tuple`)
+        The grid given by (minimum, maximum, step)
+    """
+    def __init__(self, exprs, symbols, constants, grid):
+        self._init_grid(constants, grid)
+        self.exprs = list(exprs)
+        self._size = len(self.exprs)
+
+        generator = NumPyCodeGenerator(symbols)
+        (lines, codes) = generator.generate(self.exprs)
+        lines += ["out[%d] = %s" % (k, code) for (k, code) in enumerate(codes)]
+        (self._tabulate, self.source) = compile_kernel("tabulate",
+                                                       ("y", "c", "out"),
+                                                       lines)
+
+    @classmethod
+    def from_source(cls, source, size, constants, grid):
+        """Create a lookup table of size expressions from the source
+        of its tabulation kernel (see :py:attr:`source`). The
+        expressions themselves (:py:attr:`exprs`) are then None."""
+        table = cls.__new__(cls)
+        table._init_grid(constants, grid)
+        table.exprs = None
+        table._size = size
+        table._tabulate = load_kernel("tabulate", source)
+        table.source = source
+        return table
+
+    def _init_grid(self, constants, grid):
+        "Initialize the grid and the table."
+        (v_min, v_max, step) = grid
+        if not (v_max > v_min and step > 0):
+            error("Invalid lookup table grid %r" % (grid,))
+        self._constants = list(constants)
+        self._step = float(step)
+        self._v_min = float(v_min) + 0.5*self._step
+        num = int(numpy.ceil((v_max - v_min)/float(step) - 1.e-8))
+        self.grid = self._v_min + self._step*numpy.arange(max(num, 2))
+        self._key = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def evaluate(self, v, c):
+        """Evaluate the expressions exactly at the potentials v (with
+        coefficient values c) and return them as an array of shape
+        (len(self), len(v))."""
+        y = numpy.asarray(v, dtype=float)[None, :]
+        out = numpy.empty((len(self), y.shape[1]))
+        with numpy.errstate(divide="ignore", invalid="ignore",
+                            over="ignore", under="ignore"):
+            self._tabulate(y, c, out)
+        return out
+
+    def _update(self, c):
+        "Tabulate the expressions if the constant coefficients changed."
+        key = tuple(float(c[i]) for i in self._constants)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    self._tabulate_table(c, key)
+
+    def _tabulate_table(self, c, key):
+        "Tabulate the expressions for the coefficient values c."
+        self._table = self.evaluate(self.grid, c)
+
+        # Fill in removable singularities (such as 0/0 in rate
+        # functions) by interpolation from the neighbouring values
+        for row in self._table:
+            finite = numpy.isfinite(row)
+            if not finite.all() and finite.any():
+                row[~finite] = numpy.interp(self.grid[~finite],
+                                            self.grid[finite], row[finite])
+        # Store the values and slopes of each cell contiguously
+        self._cells = numpy.ascontiguousarray(self._table[:, :-1].T)
+        self._slopes = numpy.ascontiguousarray(
+            numpy.diff(self._table, axis=1).T)
+        self._key = key
+
+    def __call__(self, v, c):
+        """Interpolate the expressions at the potentials v (with
+        coefficient values c) and return them as an array of shape
+        (len(self), len(v))."""
+        self._update(c)
+        x = numpy.clip((v - self._v_min)/self._step, 0, len(self.grid) - 1)
+        i = numpy.clip(x.astype(int), 0, len(self.grid) - 2)
+        w = x - i
+        values = self._cells[i]
+        values += w[:, None]*self._slopes[i]
+        return values.T
+
+    def accuracy(self, c, pointwise=False):
+        """Return the maximal absolute and relative interpolation errors
+        of each expression (with coefficient values c), measured at
+        the points a third and two thirds into each cell of the grid.
+        The relative errors are scaled by the maximal magnitude of each
+        expression on the grid, or by the exact values if pointwise is
+        True. In the latter case, expressions changing sign on the grid
+        have an infinite relative error.
+
+        *Returns*
+          (absolute, relative) (:py:class:`tuple` of :py:class:`numpy.ndarray`)
+        """
+        points = numpy.concatenate([self.grid[:-1] + self._step/3.0,
+                                    self.grid[:-1] + 2*self._step/3.0])
+        exact = self.evaluate(points, c)
+        error = numpy.abs(self(points, c) - exact)
+        absolute = numpy.nanmax(error, axis=1)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            if pointwise:
+                relative = numpy.nanmax(error/numpy.abs(exact), axis=1)
+                signs = numpy.sign(self._table)
+                relative[(signs.min(axis=1) != signs.max(axis=1)) |
+                         (signs.min(axis=1) == 0)] = numpy.inf
+            else:
+                scale = numpy.nanmax(numpy.abs(self._table), axis=1)
+                relative = numpy.where(scale > 0, absolute/scale, 0.0)
+        return (absolute, relative)
+
+class CellModelKernels(object):
+    """Vectorised NumPy kernels for the right-hand side of the ODE
+    system of a cardiac cell model
+
+    .. math::
+
+      v_t = - I_{ion}(v, s) + I_s
+
+      s_t = F(v, s)
+
+    The kernels act on state arrays y of shape (num_states + 1, N)
+    holding the membrane potential in row 0 and the remaining states
+    in the rows 1, ..., num_states, one column per node. The kernel
+    arguments are the state array y, the time (float), the values of
+    the coefficients (see :py:attr:`coefficients`) and the output
+    array(s). If a stimulus is given, :py:attr:`stimulus` is a kernel
+    evaluating it alone (into out[0]). If the cell model provides its
+    Jacobian (see
+    :py:meth:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel.jacobian`),
+    :py:meth:`jacobian_kernel` evaluates its nonzero entries.
+
+    If a lookup table grid is given, the nontrivial subexpressions
+    depending on the membrane potential only (typically the rate
+    functions of the gating variables) are tabulated and evaluated by
+    interpolation, see :py:class:`VoltageLookupTable`. Subexpressions
+    that cannot be interpolated within the given tolerance (such as
+    terms with poles) are evaluated exactly, or their operands
+    tabulated instead.
+
+    *Arguments*
+      model (:py:class:`~cbcbeat.cellmodels.cardiaccellmodel.CardiacCellModel`)
+        The cardiac cell model
+      time (:py:class:`dolfin.Constant`)
+        A constant holding the current time
+      I_s (:py:class:`dolfin.GenericFunction` or :py:class:`ufl.Expr`, optional)
+        A typically time-dependent external stimulus
+      lookup_table (:py:class:`tuple`, optional)
+        The lookup table grid given by (minimum, maximum, step)
+      lookup_table_tolerance (float, optional)
+        The tolerance for the interpolation error of each tabulated
+        subexpression, relative to its maximal magnitude
+      sources (dict, optional)
+        The sources of the kernels, as returned by :py:meth:`sources`
+        for the same cell model and options. The kernels are then
+        loaded from the sources instead of generated, unless the
+        coefficients (see :py:attr:`signature`) differ, and
+        :py:attr:`loaded` is set to True.
+    """
+    def __init__(self, model, time, I_s=None, lookup_table=None,
+                 lookup_table_tolerance=1.e-4, sources=None):
+
+        self._time = time
+        self.num_states = model.num_states()
+        n = self.num_states
+
+        # Define symbolic states (as variables to allow for
+        # differentiation)
+        element = ufl.VectorElement("Real", ufl.interval, 0, dim=n+1)
+        y = ufl.Coefficient(element)
+        self._y = [ufl.variable(y[i]) for i in range(n+1)]
+        v = self._y[0]
+        s = self._y[1] if n == 1 else ufl.as_vector(self._y[1:])
+
+        # Extract right-hand side expressions
+        F = ufl.as_ufl(model.F(v, s, time))
+        I = ufl.as_ufl(model.I(v, s, time))
+        if F.ufl_shape == ():
+            F_exprs = [F]
+        else:
+            F_exprs = [F[i] for i in range(F.ufl_shape[0])]
+        assert len(F_exprs) == n, \
+            "Expecting %d state expressions, not %d" % (n, len(F_exprs))
+        dv = - I if I_s is None else - I + I_s
+        self._rhs = [dv] + F_exprs
+
+        # Extract the nonzero entries of the Jacobian, if provided by
+        # the cell model (the stimulus does not depend on the states)
+        J = model.jacobian(v, s, time)
+        self._jacobian = None
+        if J is not None:
+            J = ufl.as_ufl(J)
+            self._jacobian = [(i, j, J[i, j]) for i in range(n+1)
+                              for j in range(n+1)
+                              if not isinstance(J[i, j], Zero)]
+
+        # Collect coefficients, the states and the time are handled
+        # separately
+        self.coefficients = []
+        for expr in self._rhs + [e for (i, j, e) in self._jacobian or []]:
+            for c in extract_coefficients(expr):
+                if c is not y and c is not time and c not in self.coefficients:
+                    self.coefficients.append(c)
+
+        self._symbols = dict((y[i], "y[%d]" % i) for i in range(n+1))
+        self._symbols[time] = "time"
+        self._symbols.update((c, "c[%d]" % i)
+                             for (i, c) in enumerate(self.coefficients))
+
+        # The signature of the coefficients: the name of the cell
+        # model parameter (if any), the type and the shape of each
+        names = [(value, name) for (name, value)
+                 in model.parameters().items()]
+        self.signature = [(next((name for (value, name) in names
+                                 if value is c), None),
+                           type(c).__name__, tuple(c.ufl_shape))
+                          for c in self.coefficients]
+
+        self._diagonal = None
+        self._diagonal_kernels = {}
+        self._diagonal_sources = {}
+        self.lookup_table = None
+        self._lookup_symbols = {}
+        self.stimulus = None
+        self._stimulus_source = None
+        self._jacobian_kernel = None
+        self._jacobian_source = None
+
+        self.loaded = (sources is not None and
+                       sources.get("signature") == self.signature)
+        if self.loaded:
+            self._load(sources, lookup_table)
+            return
+
+        # Classify whether each right-hand side is linear in its own
+        # state
+        self.nonlinear = [i for (i, df) in enumerate(self.diagonal)
+                          if not isinstance(df, Zero)]
+        self.linear = [i for i in self.nonlinear if isinstance(
+            expand_derivatives(ufl.diff(self.diagonal[i], self._y[i])),
+            Zero)]
+
+        # Tabulate the voltage dependent subexpressions if requested
+        if lookup_table is not None:
+            self.lookup_table = self._create_lookup_table(
+                lookup_table, lookup_table_tolerance)
+            self._lookup_symbols = dict(
+                (e, "_L[%d]" % k)
+                for (k, e) in enumerate(self.lookup_table.exprs))
+
+        # Compile right-hand side kernel
+        (self.rhs, self.rhs_source) = self._compile_rhs()
+
+        # Compile stimulus kernel (writing into out[0])
+        if I_s is not None:
+            (self.stimulus, self._stimulus_source) = \
+                self._compile("stimulus", [("out[0]", I_s)], lookup=False)
+
+    @property
+    def diagonal(self):
+        "The diagonal of the Jacobian of the right-hand side"
+        if self._diagonal is None:
+            self._diagonal = [expand_derivatives(ufl.diff(f, self._y[i]))
+                              for (i, f) in enumerate(self._rhs)]
+        return self._diagonal
+
+    def sources(self):
+        """Return the sources of the kernels (and the classification
+        of the states) as a picklable dictionary, from which the
+        kernels can be loaded without generating them again."""
+        lut = None
+        if self.lookup_table is not None:
+            lut = {"source": self.lookup_table.source,
+                   "size": len(self.lookup_table),
+                   "constants": self.lookup_table._constants}
+        return {"signature": self.signature,
+                "nonlinear": self.nonlinear,
+                "linear": self.linear,
+                "rhs": self.rhs_source,
+                "stimulus": self._stimulus_source,
+                "jacobian": self._jacobian_source,
+                "diagonal": dict(self._diagonal_sources),
+                "lookup_table": lut}
+
+    def _load(self, sources, grid):
+        "Load the kernels from the given sources."
+        self.nonlinear = list(sources["nonlinear"])
+        self.linear = list(sources["linear"])
+        lut = sources["lookup_table"]
+        if lut is not None:
+            self.lookup_table = VoltageLookupTable.from_source(
+                lut["source"], lut["size"], lut["constants"], grid)
+        self.rhs_source = sources["rhs"]
+        self.rhs = self._load_kernel("rhs", self.rhs_source)
+        if sources["stimulus"] is not None:
+            self._stimulus_source = sources["stimulus"]
+            self.stimulus = load_kernel("stimulus", self._stimulus_source)
+        if sources.get("jacobian") is not None:
+            self._jacobian_source = sources["jacobian"]
+            self._jacobian_kernel = self._load_kernel("jacobian",
+                                                      self._jacobian_source)
+        for (rows, source) in sources["diagonal"].items():
+            self._diagonal_sources[rows] = source
+            self._diagonal_kernels[rows] = \
+                self._load_kernel("rhs_and_diagonal", source)
+
+    def _load_kernel(self, name, source):
+        "Load a kernel (using the lookup table, if any) from its source."
+        namespace = None
+        if self.lookup_table is not None:
+            namespace = {"lookup_table": self.lookup_table}
+        return load_kernel(name, source, namespace)
+
+    def _create_lookup_table(self, grid, tolerance):
+        """Create the lookup table for the given grid, including the
+        maximal voltage dependent subexpressions which can be
+        interpolated within the tolerance."""
+        constants = [i for (i, c) in enumerate(self.coefficients)
+                     if self.is_constant(c)]
+        c = [float(c) if self.is_constant(c) else 0.0
+             for c in self.coefficients]
+        exprs = self._rhs + self.diagonal
+        (nodes, operands, tabulatable) = self._voltage_dependence(exprs)
+
+        def check(candidates, pointwise=False):
+            "Split the candidates into accepted and rejected ones."
+            table = VoltageLookupTable(candidates, self._symbols, constants,
+                                       grid)
+            relative = table.accuracy(c, pointwise)[1]
+            accepted = [e for (e, r) in zip(candidates, relative)
+                        if r <= tolerance]
+            return (accepted, [e for e in candidates if e not in accepted])
+
+        def subtree(o):
+            "Return the nodes of the expression o."
+            visited = set()
+            stack = [o]
+            while stack:
+                o = stack.pop()
+                if o not in visited:
+                    visited.add(o)
+                    stack.extend(operands(o))
+            return visited
+
+        # Interpolation errors in divisors are amplified near their
+        # zeros. Hence the maximal tabulatable subexpressions of the
+        # divisors must be accurate pointwise, otherwise none of their
+        # nodes are tabulated (all occurrences of a node share its
+        # table entry).
+        divisors = []
+        for o in nodes:
+            if o._ufl_handler_name_ == "division":
+                stack = [o.ufl_operands[1]]
+                while stack:
+                    d = stack.pop()
+                    if d not in tabulatable:
+                        stack.extend(operands(d))
+                    elif d not in divisors:
+                        divisors.append(d)
+        protected = set()
+        if divisors:
+            for d in check(divisors, pointwise=True)[1]:
+                protected.update(subtree(d))
+
+        # Start from the maximal tabulatable subexpressions, and try
+        # the operands of the rejected ones instead
+        maximal = set(exprs)
+        for p in nodes:
+            if p not in tabulatable:
+                maximal.update(operands(p))
+        candidates = [o for o in nodes if o in tabulatable and o in maximal]
+        accepted = []
+        while candidates:
+            rejected = [e for e in candidates if e in protected]
+            candidates = [e for e in candidates if e not in protected]
+            if candidates:
+                (passed, failed) = check(candidates)
+                accepted += passed
+                rejected += failed
+            candidates = []
+            for e in rejected:
+                for op in operands(e):
+                    if (op in tabulatable and op not in accepted
+                        and op not in candidates):
+                        candidates.append(op)
+
+        return VoltageLookupTable(accepted, self._symbols, constants, grid)
+
+    def _voltage_dependence(self, exprs):
+        """Classify the nodes of exprs and return them (in post-order)
+        together with a function returning the operands of a node and
+        the set of nodes which can be tabulated: the nontrivial nodes
+        depending on the membrane potential and constant coefficients
+        only."""
+        v = self._y[0].ufl_operands[0]
+        constants = [c for c in self.coefficients if self.is_constant(c)]
+        operands = NumPyCodeGenerator(self._symbols)._operands
+
+        # Classify the nodes in post-order: whether they depend on v
+        # and constants only (None if they depend on anything else)
+        # and whether they are costly to evaluate
+        nodes = []
+        depends = {}
+        costly = {}
+        stack = [(expr, False) for expr in reversed(exprs)]
+        while stack:
+            (o, ready) = stack.pop()
+            if o in depends:
+                continue
+            ops = operands(o)
+            if not ops:
+                if o == v:
+                    depends[o] = True
+                elif (isinstance(o, (ScalarValue, Zero))
+                      or o in constants or o not in self._symbols
+                      and not isinstance(o, ufl.Coefficient)):
+                    depends[o] = False
+                else:
+                    depends[o] = None
+                costly[o] = False
+                nodes.append(o)
+                continue
+            if not ready:
+                stack.append((o, True))
+                stack.extend((op, False) for op in ops if op not in depends)
+                continue
+            values = [depends[op] for op in ops]
+            depends[o] = None if None in values else any(values)
+            costly[o] = (any(costly[op] for op in ops) or
+                         o._ufl_handler_name_ not in ("sum", "product",
+                                                      "variable"))
+            nodes.append(o)
+
+        tabulatable = set(o for o in nodes if depends[o] and costly[o]
+                          and not isinstance(o, Condition))
+        return (nodes, operands, tabulatable)
+
+    def _compile(self, name, targets, lookup=True):
+        """Compile a kernel assigning the given expressions to the
+        targets, using the lookup table (if any) if lookup is True."""
+        symbols = dict(self._symbols)
+        lookup = lookup and self.lookup_table is not None
+        if lookup:
+            symbols.update(self._lookup_symbols)
+        generator = NumPyCodeGenerator(symbols)
+        (lines, codes) = generator.generate([e for (t, e) in targets])
+        lines += ["%s = %s" % (t, code)
+                  for ((t, e), code) in zip(targets, codes)]
+        namespace = None
+        if lookup:
+            lines.insert(0, "_L = lookup_table(y[0], c)")
+            namespace = {"lookup_table": self.lookup_table}
+        return compile_kernel(name, ("y", "time", "c", "out", "diagonal=None"),
+                              lines, namespace)
+
+    def _compile_rhs(self):
+        "Compile the right-hand side kernel."
+        targets = [("out[%d]" % i, f) for (i, f) in enumerate(self._rhs)]
+        return self._compile("rhs", targets)
+
+    def is_constant(self, c):
+        "Return True if the coefficient c is constant in space."
+        return isinstance(c, dolfin.Constant)
+
+    def diagonal_kernel(self, rows):
+        """Return a kernel evaluating the right-hand side (into out)
+        and the diagonal of its Jacobian for the given rows (into
+        diagonal, one row per given row).
+
+        *Arguments*
+          rows (list of int)
+            The state indices (0 is the membrane potential)
+        """
+        rows = tuple(int(i) for i in rows)
+        if rows not in self._diagonal_kernels:
+            targets = [("out[%d]" % i, f) for (i, f) in enumerate(self._rhs)]
+            targets += [("diagonal[%d]" % k, self.diagonal[i])
+                        for (k, i) in enumerate(rows)]
+            (kernel, source) = self._compile("rhs_and_diagonal", targets)
+            self._diagonal_kernels[rows] = kernel
+            self._diagonal_sources[rows] = source
+        return self._diagonal_kernels[rows]
+
+    def jacobian_kernel(self):
+        """Return a kernel evaluating the nonzero entries of the
+        Jacobian of the right-hand side (into out, of shape
+        (num_states + 1, num_states + 1, N), the zero entries are left
+        untouched), or None if the cell model does not provide its
+        Jacobian."""
+        if self._jacobian_kernel is None and self._jacobian is not None:
+            targets = [("out[%d, %d]" % (i, j), e)
+                       for (i, j, e) in self._jacobian]
+            (self._jacobian_kernel, self._jacobian_source) = \
+                self._compile("jacobian", targets)
+        return self._jacobian_kernel
@@ -3,9 +3,15 @@
 __author__ = "Marie E. Rognes (meg@simula.no), 2012--2013"
 
 __all__ = ["state_space", "end_of_time", "convergence_rate",
-           "Projecter"]
+           "Projecter", "OperatorCache", "AffineOperator",
+           "PreconditionerReusePolicy", "InitialGuessExtrapolator",
+           "KrylovRecycler"]
 
 import math
+import collections
+import numpy
+import ufl
+import ufl.algorithms
 from dolfinimport import dolfin, dolfin_adjoint
 if dolfin_adjoint:
     from dolfin_adjoint import assemble, LUSolver, KrylovSolver
@@ -23,6 +29,116 @@ def annotate_kwargs(ba_parameters):
 
     return {"annotate": True}
 
+def split_linear_rhs(L, u_, time):
+    """Split the linear form L, which is linear in the previous
+    solution u\_ (a Function or a component of a Function u), as
+
+    .. math::
+
+      L(w) = a(u, w) + f(w)
+
+    such that L can be evaluated by the product of the (preassembled)
+    matrix of a with the vector of u, plus the vector of f. This is
+    only possible if a does not depend on the time, that is, if its
+    coefficients are Constants (other than the time) and Functions.
+
+    *Arguments*
+      L (:py:class:`ufl.Form`)
+        The linear form
+      u\_ (:py:class:`ufl.Expr`)
+        The previous solution
+      time (:py:class:`dolfin.Constant`)
+        The time
+
+    *Returns*
+      (u, a, f) (:py:class:`tuple`)
+        The Function u, the bilinear form a and the source form f (or
+        None if L has no source terms), or None if L cannot be split
+    """
+    functions = ufl.algorithms.extract_coefficients(u_)
+    if len(functions) != 1 or not isinstance(functions[0], dolfin.Function):
+        return None
+    u = functions[0]
+
+    L = ufl.replace(L, {u: dolfin.TrialFunction(u.function_space())})
+    a = ufl.lhs(L)
+    f = - ufl.rhs(L)
+    if a.empty():
+        return None
+    for c in a.coefficients():
+        if (c is time or
+            not isinstance(c, (dolfin.Constant, dolfin.Function))):
+            return None
+    return (u, a, None if f.empty() else f)
+
+class AffineOperator(object):
+    """A bilinear form which is affine in a Constant k (typically the
+    time step)
+
+    .. math::
+
+      a(k) = a_0 + k a_1
+
+    and whose matrix is assembled from the cached matrices of
+    :math:`a_0` and :math:`a_1` by a sparse AXPY, see
+    :py:meth:`assemble`. The cached matrices are assembled when first
+    needed.
+
+    *Arguments*
+      a (:py:class:`ufl.Form`)
+        The bilinear form
+      k (:py:class:`dolfin.Constant`)
+        The Constant
+    """
+    def __init__(self, a, k):
+        split = self.split(a, k)
+        if split is None:
+            dolfin.error("Expecting a form which is affine in the "
+                         "given Constant")
+        (self.a0, self.a1) = split
+        self._A0 = None
+        self._A1 = None
+
+    @staticmethod
+    def split(a, k):
+        """Return the forms (a_0, a_1) of the form a, or None if a is
+        not affine (or is constant) in k."""
+        a0 = ufl.replace(a, {k: ufl.as_ufl(0.0)})
+        a1 = ufl.algorithms.expand_derivatives(
+            ufl.derivative(a, k, ufl.as_ufl(1.0)))
+        if a0.empty() or a1.empty() or k in a1.coefficients():
+            return None
+        return (a0, a1)
+
+    def assemble(self, k, tensor=None):
+        """Assemble the matrix for the value k by a sparse AXPY of the
+        cached matrices.
+
+        *Arguments*
+          k (float)
+            The value of the Constant
+          tensor (:py:class:`dolfin.GenericMatrix`, optional)
+            The matrix to update in place (with the sparsity pattern
+            of the form), a new matrix is returned if not given
+
+        *Returns*
+          A (:py:class:`dolfin.GenericMatrix`)
+            The matrix
+        """
+        if self._A0 is None:
+            dolfin.debug("Assembling the matrices of an affine operator")
+            self._A0 = assemble(self.a0)
+            self._A1 = assemble(self.a1)
+            self._same_pattern = (self._A0.nnz() == self._A1.nnz())
+
+        if tensor is None:
+            tensor = self._A0.copy()
+        else:
+            tensor.zero()
+            tensor.axpy(1.0, self._A0, self._same_pattern)
+        tensor.axpy(float(k), self._A1, self._same_pattern)
+        return tensor
+
 def splat(vs, dim):
 
     if vs.function_space().ufl_element().num_sub_elements()==dim:
@@ -266,3 +382,525 @@ class Projecter(object):
         L = dolfin.inner(f, self.v)*dolfin.dx()
         assemble(L, tensor=self.b)
         self.solver.solve(u.vector(), self.b)
+
+class OperatorCache(object):
+    """A least recently used (LRU) cache of the operators of a solver
+    for different time steps: the assembled matrices and the linear
+    solver holding their factorization or preconditioner (such as an
+    AMG hierarchy). Switching back to a cached time step then costs
+    nothing.
+
+    The least recently used entries are evicted when the number of
+    entries exceeds the maximal size, or when the estimated memory of
+    the assembled matrices (12 bytes per nonzero) exceeds the maximal
+    memory. The most recently used entry is always kept. Note that
+    factorizations typically need a (problem dependent) multiple of
+    the memory of their matrix.
+
+    *Arguments*
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters
+    """
+    def __init__(self, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        self._entries = collections.OrderedDict()
+        self._memory = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = dolfin.Parameters("operator_cache")
+        params.add("maximum_size", 2)
+        params.add("maximum_memory", 0.0) # In MB, no limit if zero
+        return params
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, dt):
+        "Return the key of the time step dt."
+        return round(float(dt), 12)
+
+    def memory(self):
+        "The estimated memory of the cached matrices (in bytes)"
+        return sum(self._memory.values())
+
+    def get(self, dt):
+        """Return the entry of the time step dt (and mark it as most
+        recently used), or None if not cached."""
+        key = self._key(dt)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = entry
+        return entry
+
+    def set(self, dt, entry):
+        """Store the entry (a dict of matrices, solvers etc.) of the
+        time step dt and evict the least recently used entries if the
+        cache is full."""
+        key = self._key(dt)
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        self._memory[key] = 12*sum(value.nnz() for value in entry.values()
+                                   if hasattr(value, "nnz"))
+
+        maximum_size = max(self.parameters["maximum_size"], 1)
+        maximum_memory = self.parameters["maximum_memory"]*1024.0**2
+        while len(self._entries) > 1 and (
+            len(self._entries) > maximum_size or
+            (maximum_memory > 0 and self.memory() > maximum_memory)):
+            (evicted, dummy) = self._entries.popitem(last=False)
+            del self._memory[evicted]
+            dolfin.debug("Evicting the operators of timestep %g" % evicted)
+
+class PreconditionerReusePolicy(object):
+    """A policy deciding, from the convergence history of a Krylov
+    solver, whether to reuse its preconditioner (such as an AMG
+    hierarchy) in the next solve or to rebuild it for the current
+    operator. The policy (parameter "policy") is one of
+
+    * "never": never reuse the preconditioner of an outdated
+      operator, that is, rebuild it whenever the operator changes.
+    * "always": always reuse the preconditioner, also across
+      changes of the operator.
+    * "interval": rebuild the preconditioner every "interval" solves.
+    * "iterations": rebuild the preconditioner when the number of
+      iterations of a solve exceeds "factor" times the baseline, the
+      number of iterations of the first solve with the current
+      preconditioner.
+
+    Except for "always", the preconditioner is also rebuilt in the
+    first solve after a change of the operator (see
+    :py:meth:`operator_changed`), such that the history of the
+    policy starts with a preconditioner of the current operator.
+    Rebuilding a preconditioner for an unchanged operator is a no-op
+    (PETSc sets up the preconditioner only if the operator has
+    changed).
+
+    *Arguments*
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters
+    """
+    def __init__(self, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        policy = self.parameters["policy"]
+        if policy not in ("never", "always", "interval", "iterations"):
+            dolfin.error("Unknown preconditioner reuse policy %r, expecting "
+                         "one of never, always, interval or iterations"
+                         % policy)
+
+        self.iterations = []
+        self.rebuilds = 0
+        self.reset()
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = dolfin.Parameters("preconditioner_reuse")
+        params.add("policy", "never")
+        params.add("interval", 10)
+        params.add("factor", 2.0)
+        return params
+
+    def reset(self):
+        "Start the history of a new preconditioner."
+        self._baseline = None
+        self._solves = 0
+        self._operator_changed = False
+
+    def operator_changed(self):
+        """Record that the operator has changed, such that the
+        preconditioner is rebuilt in the next solve (unless the policy
+        is "always")."""
+        self._operator_changed = True
+
+    def reuse(self):
+        """Return True if the preconditioner should be reused in the
+        next solve. Otherwise, the history of a new preconditioner is
+        started."""
+        policy = self.parameters["policy"]
+        if policy == "always":
+            return True
+        if policy == "never":
+            return False
+        if self._operator_changed:
+            reuse = False
+        elif policy == "interval":
+            reuse = self._solves < self.parameters["interval"]
+        else:
+            reuse = (self._baseline is None or self.iterations[-1] <=
+                     self.parameters["factor"]*self._baseline)
+        if not reuse:
+            if self._solves > 0:
+                dolfin.debug("Rebuilding the preconditioner")
+                self.rebuilds += 1
+            self.reset()
+        return reuse
+
+    def update(self, iterations):
+        "Record the number of iterations of a solve."
+        iterations = int(iterations)
+        self.iterations.append(iterations)
+        if self._baseline is None:
+            self._baseline = max(iterations, 1)
+        self._solves += 1
+
+class InitialGuessExtrapolator(object):
+    """An initial guess for the Krylov solves of a time dependent
+    problem A x = b, formed from the solutions of the previous time
+    steps. The solutions are kept in a ring buffer, and the guess
+    (parameter "method") is one of
+
+    * "none": leave the initial guess of the solver unchanged.
+    * "previous": the previous solution.
+    * "linear" or "quadratic": the extrapolation (in time) of the
+      polynomial interpolating the last two or three solutions.
+    * "pod": the Galerkin projection of the solution onto the span of
+      the last "history_size" solutions, that is, the guess x in the
+      span minimizing the A-norm of the error (for symmetric positive
+      definite A). This costs history_size matrix-vector products.
+
+    The ratio of the residual norm of the guess to the residual norm
+    of the previous solution is recorded (in residual_reductions) for
+    each guess.
+
+    *Arguments*
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters
+    """
+    def __init__(self, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        method = self.parameters["method"]
+        orders = {"none": 0, "previous": 0, "linear": 1, "quadratic": 2}
+        if method not in orders and method != "pod":
+            dolfin.error("Unknown initial guess %r, expecting one of none, "
+                         "previous, linear, quadratic or pod" % method)
+        size = (max(self.parameters["history_size"], 1) if method == "pod"
+                else orders[method] + 1)
+
+        self._history = collections.deque(maxlen=size)
+        self.residual_reductions = []
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = dolfin.Parameters("initial_guess")
+        params.add("method", "none")
+        params.add("history_size", 4)
+        return params
+
+    def active(self):
+        "Return True if the initial guess is formed by the extrapolator."
+        return self.parameters["method"] != "none"
+
+    def reset(self):
+        "Forget the previous solutions."
+        self._history.clear()
+
+    def update(self, t, x):
+        """Store the solution x (:py:class:`dolfin.GenericVector`) at
+        time t. The history is restarted if the time does not
+        increase."""
+        if not self.active():
+            return
+        if self._history and t <= self._history[-1][0] + 1.e-12:
+            self.reset()
+        self._history.append((float(t), x.copy()))
+
+    def _residual_norm(self, A, x, b, r):
+        "Return the norm of b - A x (using the work vector r)."
+        A.mult(x, r)
+        r.axpy(-1.0, b)
+        return r.norm("l2")
+
+    def _extrapolate(self, t, x):
+        "Set x to the extrapolation of the solutions to time t."
+        times = [s for (s, y) in self._history]
+        x.zero()
+        for (i, (s, y)) in enumerate(self._history):
+            weight = numpy.prod([(t - times[j])/(s - times[j])
+                                 for j in range(len(times)) if j != i])
+            x.axpy(weight, y)
+
+    def _project(self, A, b, x):
+        "Set x to the Galerkin projection onto the previous solutions."
+        Y = [y for (s, y) in self._history]
+        AY = []
+        for y in Y:
+            Ay = y.copy()
+            A.mult(y, Ay)
+            AY.append(Ay)
+        G = numpy.array([[y.inner(Ay) for Ay in AY] for y in Y])
+        c = numpy.linalg.lstsq(G, numpy.array([y.inner(b) for y in Y]),
+                               rcond=1.e-12)[0]
+        x.zero()
+        for (c_i, y) in zip(c, Y):
+            x.axpy(float(c_i), y)
+
+    def guess(self, t, x, A, b):
+        """Overwrite the previous solution x with the initial guess of
+        the solution of A x = b at time t.
+
+        *Arguments*
+          t (float)
+            The time of the solution
+          x (:py:class:`dolfin.GenericVector`)
+            The previous solution, overwritten by the guess
+          A (:py:class:`dolfin.GenericMatrix`)
+            The matrix
+          b (:py:class:`dolfin.GenericVector`)
+            The right-hand side
+        """
+        if not self.active() or not self._history:
+            return
+
+        r = x.copy()
+        previous = self._residual_norm(A, x, b, r)
+        if self.parameters["method"] == "pod":
+            self._project(A, b, x)
+        else:
+            self._extrapolate(t, x)
+        residual = self._residual_norm(A, x, b, r)
+        reduction = residual/previous if previous > 0.0 else 1.0
+        self.residual_reductions.append(reduction)
+        dolfin.debug("The initial guess reduces the residual by a "
+                     "factor %g" % reduction)
+
+class _DeflatedPreconditioner(object):
+    """The context of a PETSc (python) preconditioner deflating the
+    recycled space of a :py:class:`KrylovRecycler` on top of the
+    original preconditioner of a solver."""
+    def __init__(self, recycler, inner):
+        self.recycler = recycler
+        self.inner = inner
+        self.A = None
+        self._version = None
+        self._work = None
+
+    def setUp(self, pc):
+        (A, P) = pc.getOperators()
+        self.inner.setOperators(A, P)
+        self.inner.setUp()
+        self.A = A
+        self._version = None
+
+    def refresh(self, A):
+        """Deflate with the (new or updated) operator A in the next
+        application, also if the preconditioner is reused."""
+        self.A = A
+        self._version = None
+
+    def _deflate(self):
+        "Compute A Z and (Z^T A Z)^{-1} for the current recycled space."
+        Z = self.recycler.space
+        self._AZ = []
+        for z in Z:
+            Az = z.duplicate()
+            self.A.mult(z, Az)
+            self._AZ.append(Az)
+        E = numpy.array([[z.dot(Az) for Az in self._AZ] for z in Z])
+        self._Einv = numpy.linalg.pinv(0.5*(E + E.T)) if Z else None
+        self._version = self.recycler.version
+
+    def apply(self, pc, r, z):
+        if self._version != self.recycler.version:
+            self._deflate()
+        Z = self.recycler.space
+        if not Z:
+            self.inner.apply(r, z)
+            self.recycler._collect(self, z)
+            return
+        if self._work is None:
+            self._work = r.duplicate()
+
+        # z = M^{-1} (r - A Q r) - Q A M^{-1} (r - A Q r) + Q r
+        c = self._Einv.dot([z_i.dot(r) for z_i in Z])
+        s = self._work
+        r.copy(s)
+        for (c_i, Az_i) in zip(c, self._AZ):
+            s.axpy(-c_i, Az_i)
+        self.inner.apply(s, z)
+        d = self._Einv.dot([Az_i.dot(z) for Az_i in self._AZ])
+        for (c_i, d_i, z_i) in zip(c, d, Z):
+            z.axpy(c_i - d_i, z_i)
+        self.recycler._collect(self, z)
+
+class KrylovRecycler(object):
+    """Krylov subspace recycling for sequences of solves with the
+    same (or a slowly changing) symmetric matrix A, by deflation: the
+    preconditioner M of each attached Krylov solver is replaced by the
+    balancing preconditioner
+
+    .. math::
+
+      P^{-1} = (I - Q A) M^{-1} (I - A Q) + Q, \\quad Q = Z (Z^T A Z)^{-1} Z^T
+
+    with a coarse correction on a recycled space Z, removing the
+    slowest modes of the preconditioned operator from the iteration.
+    This costs about four vector operations per recycled vector and
+    iteration.
+
+    The recycled space is built from the Krylov spaces of the solves:
+    the preconditioner keeps a copy of the first "maximum_directions"
+    preconditioned residuals of a solve (which span the same space as
+    its search directions), and after the solve, for each of the
+    first "maximum_updates" solves, the approximate eigenvectors
+    (Ritz vectors) of the preconditioned operator :math:`M^{-1} A`
+    with the smallest eigenvalues are computed on the span of the
+    recycled space and these directions, and the "size" of them are
+    kept as the new recycled space. The recycled space is kept when
+    the solver or the matrix changes (for instance with the time
+    step).
+
+    The storage is bounded by size + maximum_directions vectors, and
+    size more vectors per attached solver. Recycling requires
+    petsc4py.
+
+    *Arguments*
+      params (:py:class:`dolfin.Parameters`, optional)
+        Parameters
+    """
+    def __init__(self, params=None):
+
+        # Initialize and update parameters if given
+        self.parameters = self.default_parameters()
+        if params is not None:
+            self.parameters.update(params)
+
+        self.space = []
+        self.version = 0
+        self.updates = 0
+        self._directions = []
+        self._active = None
+
+    @staticmethod
+    def default_parameters():
+        """Initialize and return a set of default parameters
+
+        *Returns*
+          A set of parameters (:py:class:`dolfin.Parameters`)
+        """
+        params = dolfin.Parameters("krylov_recycling")
+        params.add("size", 0) # No recycling if zero
+        params.add("maximum_directions", 20)
+        params.add("maximum_updates", 5)
+        return params
+
+    def attach(self, solver):
+        """Deflate the recycled space in the preconditioner of the
+        solver, and collect the directions of its solves. If
+        the solver is attached already, the deflation is recomputed
+        for its current operator (call after the operator has been
+        changed or updated in place).
+
+        *Arguments*
+          solver (:py:class:`dolfin.PETScKrylovSolver`)
+            The Krylov solver, with its operators set
+        """
+        try:
+            from petsc4py import PETSc
+        except ImportError:
+            dolfin.error("Krylov subspace recycling requires petsc4py")
+
+        ksp = solver.ksp()
+        inner = ksp.getPC()
+        if inner.getType() == PETSc.PC.Type.PYTHON:
+            context = inner.getPythonContext()
+            if (isinstance(context, _DeflatedPreconditioner)
+                and context.recycler is self):
+                (A, P) = ksp.getOperators()
+                context.refresh(A)
+                return
+        pc = PETSc.PC().createPython(_DeflatedPreconditioner(self, inner),
+                                     comm=ksp.getComm())
+        (A, P) = inner.getOperators()
+        pc.setOperators(A, P)
+        ksp.setPC(pc)
+
+    def _collecting(self):
+        "Return True if the directions of the solves are collected."
+        return self.updates < self.parameters["maximum_updates"]
+
+    def _collect(self, context, z):
+        """Collect the preconditioned residual z of the current solve
+        (by the preconditioner with the given context)."""
+        if (self._collecting() and
+            len(self._directions) < self.parameters["maximum_directions"]):
+            self._active = context
+            self._directions.append(z.copy())
+
+    def update(self):
+        """Update the recycled space from the directions of the last
+        solve (during the first maximum_updates solves)."""
+        if not self._collecting() or not self._directions:
+            return
+
+        # Ritz vectors of M^{-1} A on the span W, from the generalized
+        # eigenvalue problem W^T A M^{-1} A W y = theta W^T A W y
+        context = self._active
+        W = self.space + self._directions
+        AW = []
+        MAW = []
+        for w in W:
+            Aw = w.duplicate()
+            context.A.mult(w, Aw)
+            MAw = w.duplicate()
+            context.inner.apply(Aw, MAw)
+            AW.append(Aw)
+            MAW.append(MAw)
+        G = numpy.array([[Aw.dot(MAw) for MAw in MAW] for Aw in AW])
+        B = numpy.array([[Aw.dot(w) for w in W] for Aw in AW])
+
+        # Reduce to a standard eigenvalue problem on the A-orthonormal
+        # basis of W (dropping its numerically dependent directions)
+        (s, U) = numpy.linalg.eigh(0.5*(B + B.T))
+        keep = s > 1.e-12*max(s.max(), 0.0)
+        T = U[:, keep]/numpy.sqrt(s[keep])
+        (theta, Y) = numpy.linalg.eigh(T.T.dot(0.5*(G + G.T)).dot(T))
+        C = T.dot(Y[:, :self.parameters["size"]])
+
+        space = []
+        for c in C.T:
+            z = W[0].duplicate()
+            z.zeroEntries()
+            for (c_i, w) in zip(c, W):
+                z.axpy(c_i, w)
+            space.append(z)
+        self.space = space
+        self.version += 1
+        self.updates += 1
+        self._directions = []
+        dolfin.debug("Recycling %d Krylov vectors (smallest Ritz value %g)"
+                     % (len(space), theta[0] if len(theta) else 0.0))
@@ -127,18 +127,12 @@ def setup_cardiac_model(application_parameters):
     # Setup cell model
     cell_model = setup_cell_model(application_parameters)
 
-    # Define some simulation protocol (use cpp expression for speed)
+    # Define some simulation protocol: a pulse in the stimulation cells
     stimulation_cells = MeshFunction("size_t", mesh,
                                      "data/stimulation_cells.xml.gz")
-
-    V = FunctionSpace(mesh, "DG", 0)
-    from stimulation import cpp_stimulus
-    pulse = Expression(cpp_stimulus, element=V.ufl_element())
-    pulse.cell_data = stimulation_cells
     amp = application_parameters["stimulus_amplitude"]
-    pulse.amplitude = amp #
-    pulse.duration = 10.0 # ms
-    pulse.t = time        # ms
+    pulse = single_pulse(time, amp, 0.0, 10.0, # ms
+                         region=region_indicator(stimulation_cells, 1))
 
     # Initialize cardiac model with the above input
     heart = CardiacModel(mesh, time, M_i, M_e, cell_model, stimulus=pulse)
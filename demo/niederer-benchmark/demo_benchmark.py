@@ -148,6 +148,8 @@ def run_splitting_solver(mesh, application_parameters):
     dx = application_parameters["dx"]
     theta = application_parameters["theta"]
     scheme = application_parameters["scheme"]
+    ode_engine = application_parameters["ode_engine"]
+    activity_mask = application_parameters["activity_mask"]
     preconditioner = application_parameters["preconditioner"]
     store = application_parameters["store"]
     casedir = application_parameters["casedir"]
@@ -167,6 +169,11 @@ def run_splitting_solver(mesh, application_parameters):
     ps["enable_adjoint"] = False
     ps["apply_stimulus_current_to_pde"] = True
     ps["CardiacODESolver"]["scheme"] = scheme
+    ps["CardiacODESolver"]["engine"] = ode_engine
+
+    # Skip the ODE step for the tissue at rest (requires the
+    # ArrayODESolver engine)
+    ps["CardiacODESolver"]["ArrayODESolver"]["use_activity_mask"] = activity_mask
 
     # Disable adjoint annotating and recording (saves memory)
     parameters["adjoint"]["stop_annotating"] = True
@@ -219,7 +226,15 @@ def run_splitting_solver(mesh, application_parameters):
         if ((i%20 == 0) and MPI.rank(mpi_comm_world()) == 0):
             info("Reached t=%g/%g, dt=%g" % (t0, T, dt))
         if store:
-            assigner.assign(v, vs.sub(0))
+            # Copy v directly from the state array of the ODE solver
+            # if it has one and the dofs of v at its vertices are owned
+            # by this process
+            states = solver.ode_solver.states
+            if (states is not None and
+                states.vertex_dofs(v.function_space()) is not None):
+                states.scatter_state("V", v)
+            else:
+                assigner.assign(v, vs.sub(0))
             vfile.write(v, "/function", t1)
             vfile.flush()
 
@@ -274,6 +289,8 @@ def init_application_parameters():
     application_parameters.add("dx", 0.5) 
     application_parameters.add("T", 100.0) 
     application_parameters.add("scheme", "GRL1")
+    application_parameters.add("ode_engine", "PointIntegralSolver")
+    application_parameters.add("activity_mask", False)
     application_parameters.add("preconditioner", "sor") 
     application_parameters.add("refinements", 0) 
     application_parameters.parse()
@@ -1,17 +1,5 @@
 from cbcbeat import *
 
-class S1S2Stimulation(Expression):
-    "A S1-S2 stimulation protocol."
-    def __init__(self, t):
-        self.t = t # ms
-    def eval(self, value, x):
-        # S1 stimulus
-        if (float(self.t) >= 0 and float(self.t) <= 5
-            and near(x[0], 0.0)):
-            value[0] = 100. # mV
-        else:
-            value[0] = 0.0
-
 def main():
 
     # Create mesh
@@ -29,8 +17,11 @@ def main():
     # Create cell model
     cell_model = RogersMcCulloch()
 
-    # Create stimulus
-    I_s = S1S2Stimulation(t=time)
+    # Create stimulus: an S1 pulse at the left boundary
+    markers = VertexFunction("size_t", mesh, 0)
+    CompiledSubDomain("near(x[0], 0.0)").mark(markers, 1)
+    I_s = single_pulse(time, 100.0, 0.0, 5.0, # mV, ms
+                       region=region_indicator(markers, 1))
 
     # Create cardiac model from above inputs
     tissue = CardiacModel(mesh, time, M_i, M_e, cell_model, stimulus={0: I_s})
@@ -0,0 +1,77 @@
+"""Benchmark of the preconditioners of the BidomainSolver on the
+biventricular mesh of the demo in demo/bidomain-biventricular: the
+default (monolithic) AMG against the block (fieldsplit) preconditioner
+with AMG per block and the monodomain preconditioner (both with and
+without the average constraint on u).
+
+Run from this directory, for instance in parallel:
+
+  mpirun -n 4 python bidomain.py
+"""
+
+__all__ = []
+
+from cbcbeat import *
+
+parameters["form_compiler"]["cpp_optimize"] = True
+flags = ["-O3", "-ffast-math", "-march=native"]
+parameters["form_compiler"]["cpp_optimize_flags"] = " ".join(flags)
+parameters["form_compiler"]["quadrature_degree"] = 2
+
+data = "../../demo/bidomain-biventricular/data"
+
+def setup_problem():
+    "Return the mesh, the conductivities and the stimulus."
+    time = Constant(0.0)
+    mesh = Mesh("%s/mesh115_refined.xml.gz" % data)
+    mesh.coordinates()[:] /= 1000.0*10.0*4.0 # As in the demo
+
+    # Transversely isotropic conductivities with the fibers of the demo
+    Vv = VectorFunctionSpace(mesh, "DG", 0)
+    fiber = Function(Vv)
+    File("%s/fibers.xml.gz" % data) >> fiber
+    f = as_vector([fiber[0], fiber[1], fiber[2]])
+    I = Identity(3)
+    (g_il, g_it, g_el, g_et) = (0.17, 0.019, 0.62, 0.24)
+    M_i = g_it*I + (g_il - g_it)*outer(f, f)
+    M_e = g_et*I + (g_el - g_et)*outer(f, f)
+
+    stimulation_cells = MeshFunction("size_t", mesh,
+                                     "%s/stimulation_cells.xml.gz" % data)
+    I_s = single_pulse(time, 30.0, 0.0, 10.0,
+                       region=region_indicator(stimulation_cells, 1))
+    return (mesh, time, M_i, M_e, I_s)
+
+def run(name, preconditioner, algorithm, use_R, dt=0.1, num_steps=20):
+    "Run the bidomain solver and return the time and the iterations."
+    (mesh, time, M_i, M_e, I_s) = setup_problem()
+    params = BidomainSolver.default_parameters()
+    params["enable_adjoint"] = False
+    params["preconditioner"] = preconditioner
+    params["algorithm"] = algorithm
+    params["use_avg_u_constraint"] = use_R
+    solver = BidomainSolver(mesh, time, M_i, M_e, I_s=I_s, params=params)
+
+    timer = Timer("Bidomain solve: %s" % name)
+    for (interval, fields) in solver.solve((0.0, num_steps*dt), dt):
+        pass
+    timer.stop()
+    return (timer.elapsed()[0], solver.preconditioner_policy.iterations)
+
+if __name__ == "__main__":
+
+    cases = [("monolithic AMG", "petsc_amg", "cg", False),
+             ("fieldsplit", "fieldsplit", "cg", False),
+             ("fieldsplit with constraint", "fieldsplit", "gmres", True),
+             ("monodomain", "monodomain", "cg", False),
+             ("monodomain with constraint", "monodomain", "gmres", True)]
+    results = [(case[0],) + run(*case) for case in cases]
+
+    if MPI.rank(mpi_comm_world()) == 0:
+        print "%-28s %10s %10s %10s" % ("Preconditioner", "Time (s)",
+                                        "Mean its", "Max its")
+        for (name, seconds, iterations) in results:
+            print "%-28s %10.2f %10.1f %10d" % (
+                name, seconds, float(sum(iterations))/len(iterations),
+                max(iterations))
+    list_timings(TimingClear_keep, [TimingType_wall,])
@@ -10,6 +10,7 @@ minor = 0
 
 scripts = [pjoin("scripts", "gotran2beat"),
            pjoin("scripts", "gotran2dolfin"),
+           pjoin("scripts", "cbcbeat-kernel-cache"),
            ]
 
 if platform.system() == "Windows" or "bdist_wininst" in sys.argv:
@@ -0,0 +1,438 @@
+"""
+Unit tests for the vectorised ArrayODESolver engine of the
+CardiacODESolver.
+"""
+
+__all__ = ["TestArrayODESolver"]
+
+import gc
+import importlib
+import itertools
+import threading
+import numpy
+import pytest
+from testutils import fast, medium, slow, assert_almost_equal, parametrize, \
+    temporary_kernel_cache
+
+from dolfin import info_green, UnitIntervalMesh, CellFunction
+from cbcbeat import supported_cell_models, CardiacODESolver, \
+    MultiCellModel, Constant, Expression
+from cbcbeat.arrayodesolver import ArrayODESolver
+from cbcbeat.cellmodels import *
+
+supported_schemes = ["ForwardEuler", "BackwardEuler", "RL1", "GRL1"]
+supported_cell_models_str = [Model.__name__ for Model in supported_cell_models]
+generated_cell_models = [
+    "cbcbeat.cellmodels.%s.%s" % (module, module[0].upper() + module[1:])
+    for module in ["beeler_reuter_1977", "fenton_karma_1998_BR_altered",
+                   "fenton_karma_1998_MLR1_altered", "fitzhughnagumo",
+                   "grandi_pasqualini_bers_2010",
+                   "tentusscher_2004_mcell_cont",
+                   "tentusscher_2004_mcell_disc",
+                   "tentusscher_panfilov_2006_M_cell",
+                   "tentusscher_panfilov_2006_epi_cell"]]
+
+@pytest.mark.usefixtures("temporary_kernel_cache")
+class TestArrayODESolver(object):
+    "Test the ArrayODESolver engine against the PointIntegralSolver."
+
+    def _setup_solver(self, Model, Scheme, engine, mesh=None):
+        "Create a CardiacODESolver with the given scheme and engine."
+        model = eval(Model)()
+        time = Constant(0.0)
+        stim = Expression("1000*t", t=time, degree=1)
+
+        if mesh is None:
+            mesh = UnitIntervalMesh(5)
+        params = CardiacODESolver.default_parameters()
+        params["scheme"] = Scheme
+        params["engine"] = engine
+        params["enable_adjoint"] = False
+        solver = CardiacODESolver(mesh, time, model, I_s=stim, params=params)
+
+        (vs_, vs) = solver.solution_fields()
+        vs_.assign(model.initial_conditions())
+        vs.assign(vs_)
+        return solver
+
+    def _run(self, solver):
+        "Take two steps and return the solution values."
+        (vs_, vs) = solver.solution_fields()
+        dt = 0.01
+        solver.step((0.0, dt))
+        vs_.assign(vs)
+        solver.step((dt, 2*dt))
+        return vs.vector().get_local()
+
+    @slow
+    @parametrize(("Model", "Scheme"),
+                 list(itertools.product(supported_cell_models_str,
+                                        supported_schemes)))
+    def test_compare_against_point_integral_solver(self, Model, Scheme):
+        "Compare the solutions of the two engines."
+        info_green("\nTesting %s with %s scheme" % (Model, Scheme))
+        reference = self._run(self._setup_solver(Model, Scheme,
+                                                 "PointIntegralSolver"))
+        values = self._run(self._setup_solver(Model, Scheme,
+                                              "ArrayODESolver"))
+        assert_almost_equal(values, reference, tolerance=1e-6)
+
+    @medium
+    def test_multi_cell_model(self):
+        "Compare a MultiCellModel with the cell models on their own."
+        mesh = UnitIntervalMesh(10)
+        markers = CellFunction("size_t", mesh, 0)
+        markers.array()[:5] = 1
+        models = (Beeler_reuter_1977(), FitzHughNagumoManual())
+        multi = MultiCellModel(models, (1, 0), markers)
+
+        params = CardiacODESolver.default_parameters()
+        params["scheme"] = "GRL1"
+        params["enable_adjoint"] = False
+        time = Constant(0.0)
+        stim = Expression("1000*t", t=time, degree=1)
+        solver = CardiacODESolver(mesh, time, multi, I_s=stim, params=params)
+        assert solver.parameters["engine"] == "ArrayODESolver"
+        assert params["engine"] == "PointIntegralSolver"
+        params["engine"] = "Unknown"
+        with pytest.raises(RuntimeError):
+            CardiacODESolver(mesh, time, multi, I_s=stim, params=params)
+
+        # Initial conditions by the position of the vertices (the
+        # vertex at the interface belongs to the first model)
+        x = mesh.coordinates()[solver.states.vertices, 0]
+        domains = [x < 0.5 + 1.e-8, x > 0.5 + 1.e-8]
+        solver.states.values[:] = 0.0
+        for (model, nodes) in zip(models, domains):
+            initial = [float(value) for value in
+                       model.default_initial_conditions().values()]
+            solver.states.values[:len(initial), nodes] = \
+                numpy.array([initial]).T
+        solver.states.scatter(solver.vs_)
+        self._run(solver)
+        solver.states.gather(solver.vs)
+
+        for (model, nodes) in zip(models, domains):
+            single = self._setup_solver(type(model).__name__, "GRL1",
+                                        "ArrayODESolver", mesh)
+            self._run(single)
+            single.states.gather(single.vs)
+            n = model.num_states() + 1
+            assert_almost_equal(solver.states.values[:n, nodes],
+                                single.states.values[:, nodes], 1.e-12)
+            if n < len(solver.states):
+                assert_almost_equal(solver.states.values[n:, nodes], 0.0,
+                                    1.e-12)
+
+    @medium
+    def test_states_kept_across_steps(self):
+        """Test that the states kept across the steps of solve give the
+        solution of separate steps, and that modifications of vs_
+        between steps are picked up."""
+        results = []
+        for modify in (False, True):
+            solvers = [self._setup_solver("Beeler_reuter_1977", "RL1",
+                                          "ArrayODESolver")
+                       for k in range(2)]
+            (vs_, vs) = solvers[0].solution_fields()
+            for ((t0, t1), fields) in solvers[0].solve((0.0, 0.03), 0.01):
+                if modify and t0 == 0.0:
+                    vs.vector()[:] *= 1.01
+            (ref_, ref) = solvers[1].solution_fields()
+            for (t0, t1) in ((0.0, 0.01), (0.01, 0.02), (0.02, 0.03)):
+                solvers[1].step((t0, t1))
+                if modify and t0 == 0.0:
+                    ref.vector()[:] *= 1.01
+                ref_.assign(ref)
+            assert_almost_equal(vs.vector().get_local(),
+                                ref.vector().get_local(), 1.e-12)
+            results.append(vs.vector().get_local())
+        assert abs(results[1] - results[0]).max() > 1.e-6
+
+    @fast
+    def test_forward_euler_step(self):
+        "Test a single forward Euler step of the array solver."
+        model = FitzHughNagumoManual()
+        time = Constant(0.0)
+        solver = ArrayODESolver(model, time, "ForwardEuler")
+
+        y = numpy.array([[-85.0, -80.0], [0.0, 0.1]])
+        f = numpy.empty_like(y)
+        solver.kernels.rhs(y, 0.0, [float(c) for c in
+                                    solver.kernels.coefficients], f)
+        expected = y + 0.1*f
+
+        solver.advance(y, (0.0, 0.1))
+        assert_almost_equal(y, expected, tolerance=1e-12)
+        assert_almost_equal(float(time), 0.1, tolerance=1e-12)
+
+    @fast
+    def test_lookup_table(self):
+        "Test the lookup table against the exact kernels."
+        model = Beeler_reuter_1977()
+        params = ArrayODESolver.default_parameters()
+        params["use_lookup_table"] = True
+        solver = ArrayODESolver(model, Constant(0.0), "RL1", params=params)
+        exact = ArrayODESolver(model, Constant(0.0), "RL1")
+        assert len(solver.kernels.lookup_table) > 0
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*50).T
+        y[0] = numpy.linspace(-90.0, 40.0, 50)
+        report = solver.lookup_table_accuracy(y)
+        assert max(report["table_relative_error"]) < 1.e-4
+
+        y_exact = y.copy()
+        for k in range(10):
+            solver.advance(y, (k*0.01, (k + 1)*0.01))
+            exact.advance(y_exact, (k*0.01, (k + 1)*0.01))
+        assert_almost_equal(y, y_exact, tolerance=1.e-6)
+
+    @fast
+    @parametrize("criterion", ["voltage_increment", "error"])
+    def test_multirate(self, criterion):
+        "Test that only the depolarised nodes are refined."
+        model = Beeler_reuter_1977()
+        params = ArrayODESolver.default_parameters()
+        params["use_multirate"] = True
+        params["multirate"]["criterion"] = criterion
+        solver = ArrayODESolver(model, Constant(0.0), "RL1", params=params)
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*20).T
+        y[0, :5] = -40.0
+        solver.advance(y, (0.0, 0.5))
+
+        statistics = solver.substep_statistics
+        assert statistics["maximum_substeps"] > 1
+        assert statistics["nodes_per_substeps"][1] >= 15
+        assert numpy.all(numpy.isfinite(y))
+
+    @fast
+    def test_multirate_error(self):
+        """Test that the step-doubling error of the substeps chosen by
+        the error criterion is within the tolerance."""
+        model = Beeler_reuter_1977()
+        params = ArrayODESolver.default_parameters()
+        params["use_multirate"] = True
+        params["multirate"]["criterion"] = "error"
+        params["multirate"]["maximum_level"] = 10
+        solver = ArrayODESolver(model, Constant(0.0), "RL1", params=params)
+        single = ArrayODESolver(model, Constant(0.0), "RL1")
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y0 = numpy.array([initial]*20).T
+        y0[0] = numpy.linspace(-85.0, -30.0, 20)
+        dt = 0.1
+        y = y0.copy()
+        solver.advance(y, (0.0, dt))
+        assert solver.substep_statistics["maximum_substeps"] > 4
+
+        # The solutions with n substeps for all nodes
+        solutions = {}
+        for n in [2**level for level in range(12)]:
+            solutions[n] = y0.copy()
+            for k in range(n):
+                single.advance(solutions[n], (k*dt/n, (k + 1)*dt/n))
+
+        multirate = params["multirate"]
+        for node in range(y.shape[1]):
+            n = min(solutions, key=lambda n: numpy.max(numpy.abs(
+                solutions[n][:, node] - y[:, node])))
+            assert n < 2**10
+            (y_n, y_2n) = (solutions[n][:, node], solutions[2*n][:, node])
+            scale = (multirate["absolute_tolerance"] +
+                     multirate["relative_tolerance"]*numpy.abs(y_2n))
+            assert numpy.max(numpy.abs(y_2n - y_n)/scale) <= 1.0
+
+    @fast
+    def test_activity_mask(self):
+        "Test that nodes at rest are skipped and woken when moved."
+        model = FitzHughNagumoManual()
+        params = ArrayODESolver.default_parameters()
+        params["use_activity_mask"] = True
+        solver = ArrayODESolver(model, Constant(0.0), "ForwardEuler",
+                                params=params)
+        solver.set_neighbours([(i, i + 1) for i in range(9)])
+
+        # The resting state of the FitzHugh-Nagumo model
+        y = numpy.array([[-85.0]*10, [0.0]*10])
+        y[0, 0] = -60.0
+        solver.advance(y, (0.0, 0.1))
+        assert solver.activity_statistics["active_nodes"] == 10
+        assert solver.activity_statistics["quiescent_nodes"] == 8
+
+        # Move the potential of a quiescent node
+        y[0, 5] = -80.0
+        solver.advance(y, (0.1, 0.2))
+        assert solver.activity_statistics["active_nodes"] == 3
+
+    @fast
+    def test_threads(self):
+        "Test that threaded chunks give the same result as serial."
+        model = Beeler_reuter_1977()
+        params = ArrayODESolver.default_parameters()
+        params["chunk_size"] = 16
+        params["use_lookup_table"] = True
+        serial = ArrayODESolver(model, Constant(0.0), "BackwardEuler",
+                                params=params)
+        params["num_threads"] = 3
+        threaded = ArrayODESolver(model, Constant(0.0), "BackwardEuler",
+                                  params=params)
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*100).T
+        y[0] = numpy.linspace(-90.0, 20.0, 100)
+        y_threaded = y.copy()
+        for k in range(5):
+            serial.advance(y, (k*0.01, (k + 1)*0.01))
+            threaded.advance(y_threaded, (k*0.01, (k + 1)*0.01))
+        assert_almost_equal(y_threaded, y, tolerance=1.e-12)
+
+    @fast
+    def test_close_threads(self):
+        "Test that the pool of threads is terminated."
+        params = ArrayODESolver.default_parameters()
+        params["chunk_size"] = 16
+        params["num_threads"] = 3
+        threads = threading.active_count()
+        solver = ArrayODESolver(Beeler_reuter_1977(), Constant(0.0), "RL1",
+                                params=params)
+        y = numpy.array([[float(value) for value in Beeler_reuter_1977.
+                          default_initial_conditions().values()]]*100).T
+        solver.advance(y, (0.0, 0.01))
+        assert threading.active_count() > threads
+        solver.close()
+        assert threading.active_count() == threads
+
+        # The pool is created again when needed, and closed on deletion
+        solver.advance(y, (0.01, 0.02))
+        assert threading.active_count() > threads
+        del solver
+        gc.collect()
+        assert threading.active_count() == threads
+
+    @fast
+    @parametrize("Model", generated_cell_models)
+    def test_generated_numpy_kernels(self, Model):
+        "Test the generated NumPy kernels of the cell models."
+        (module, name) = Model.rsplit(".", 1)
+        Model = getattr(importlib.import_module(module), name)
+        model = Model()
+        params = ArrayODESolver.default_parameters()
+        params["use_model_kernels"] = False
+        solver = ArrayODESolver(model, Constant(0.0), "RL1", params=params)
+        parameters = [float(value) for value in
+                      model.default_parameters().values()]
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*5).T
+        y[0] += numpy.linspace(-10.0, 30.0, 5)
+
+        values = solver._coefficient_values(0.0, None)
+        f = numpy.empty_like(y)
+        solver.kernels.rhs(y, 0.0, values, f)
+        scale = numpy.maximum(numpy.abs(f).max(axis=1), 1.0)[:, None]
+        assert_almost_equal(Model.rhs(y, parameters, 0.0)/scale, f/scale,
+                            1.e-8)
+
+        # The Rush-Larsen step is the RL1 step
+        y_generated = y.copy()
+        Model.rush_larsen_step(y_generated, parameters, 0.0, 0.01)
+        solver._rush_larsen_step(y, 0.0, 0.01, values)
+        scale = numpy.maximum(numpy.abs(y).max(axis=1), 1.0)[:, None]
+        assert_almost_equal(y_generated/scale, y/scale, 1.e-10)
+
+    @fast
+    @parametrize(("Model", "Scheme"),
+                 list(itertools.product(["Beeler_reuter_1977",
+                                         "Fenton_karma_1998_MLR1_altered",
+                                         "Tentusscher_panfilov_2006_epi_cell"],
+                                        ["ForwardEuler", "BackwardEuler",
+                                         "RL1"])))
+    def test_model_kernels(self, Model, Scheme):
+        "Test stepping with the right-hand side kernel of the cell model."
+        model = eval(Model)()
+        time = Constant(0.0)
+        stim = Constant(100.0)*time
+        solvers = {}
+        for use_model_kernels in (True, False):
+            params = ArrayODESolver.default_parameters()
+            params["use_kernel_cache"] = False
+            params["use_model_kernels"] = use_model_kernels
+            solvers[use_model_kernels] = ArrayODESolver(model, time, Scheme,
+                                                        I_s=stim, params=params)
+        assert solvers[True].uses_model_kernels
+        assert not solvers[False].uses_model_kernels
+        assert solvers[True]._model_rush_larsen == (Scheme == "RL1")
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*5).T
+        y[0] += numpy.linspace(-5.0, 30.0, 5)
+        results = {}
+        for (use_model_kernels, solver) in solvers.items():
+            results[use_model_kernels] = y.copy()
+            for k in range(10):
+                solver.advance(results[use_model_kernels],
+                               (k*0.001, (k + 1)*0.001))
+        assert numpy.all(numpy.isfinite(results[False]))
+        assert_almost_equal(results[True], results[False], 1.e-8)
+
+    @fast
+    @parametrize("Model", ["Beeler_reuter_1977",
+                           "Fenton_karma_1998_BR_altered",
+                           "Tentusscher_panfilov_2006_epi_cell"])
+    def test_cell_model_jacobian(self, Model):
+        "Test the backward Euler step with the Jacobian of the cell model."
+        model = eval(Model)()
+        params = ArrayODESolver.default_parameters()
+        params["use_kernel_cache"] = False
+        solver = ArrayODESolver(model, Constant(0.0), "BackwardEuler",
+                                params=params)
+        assert solver.kernels.jacobian_kernel() is not None
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*5).T
+        y[0] += numpy.linspace(-10.0, 30.0, 5)
+        values = solver._coefficient_values(0.0, None)
+        f = numpy.empty_like(y)
+        solver.kernels.rhs(y, 0.0, values, f)
+
+        # Compare with the finite difference approximation
+        J = solver._jacobian(y, 0.0, values, f)
+        (solver.kernels._jacobian, solver.kernels._jacobian_kernel) = \
+            (None, None)
+        J_h = solver._jacobian(y, 0.0, values, f)
+        scale = numpy.max(numpy.abs(J_h), axis=(1, 2))[:, None, None]
+        assert_almost_equal((J/scale).ravel(), (J_h/scale).ravel(), 1.e-3)
+
+    @fast
+    @parametrize("theta", [0.5, 1.0])
+    def test_theta_scheme(self, theta):
+        "Test that the theta-scheme step solves the nonlinear system."
+        model = Tentusscher_panfilov_2006_epi_cell()
+        params = ArrayODESolver.default_parameters()
+        params["theta"] = theta
+        solver = ArrayODESolver(model, Constant(0.0), "Theta", params=params)
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y0 = numpy.array([initial]*4).T
+        y0[0] += numpy.linspace(0.0, 50.0, 4)
+        y = y0.copy()
+        solver.advance(y, (0.0, 0.1))
+
+        t = theta*0.1
+        f = numpy.empty_like(y)
+        solver.kernels.rhs(theta*y + (1.0 - theta)*y0, t,
+                           solver._coefficient_values(t, None), f)
+        assert_almost_equal(y - y0 - 0.1*f, 0.0, 1.e-10)
+        statistics = solver.newton_statistics
+        assert sum(statistics["nodes_per_iterations"].values()) == 4
+        assert statistics["maximum_iterations"] > 1
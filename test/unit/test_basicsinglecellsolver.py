@@ -11,9 +11,9 @@ from testutils import medium, assert_almost_equal, parametrize, cell_model
 
 from dolfin import info, info_red, info_green, UnitIntervalMesh
 from cbcbeat import supported_cell_models, \
-    CardiacODESolver, BasicSingleCellSolver, \
+    CardiacODESolver, BasicSingleCellSolver, BasicCardiacODESolver, \
     NoCellModel, FitzHughNagumoManual, \
-    Tentusscher_2004_mcell, \
+    Tentusscher_2004_mcell, Tentusscher_panfilov_2006_epi_cell, \
     Constant, Expression
 
 class TestBasicSingleCellSolver(object):
@@ -83,3 +83,89 @@ class TestBasicSingleCellSolver(object):
             assert_almost_equal(vec_solve[ind], ref_value, 1e-10)
         else:
             info_red("Missing references for %r, %r" % (Model, theta))
+
+    @medium
+    @parametrize(("theta"), [0.5, 1.])
+    def test_local_nonlinear_solver(self, theta):
+        """Test that the local and global nonlinear solvers agree, and
+        that the local solver is only used if asked for (or for
+        spatially constant coefficients)."""
+        results = {}
+        for mode in ("global", "local", "auto"):
+            time = Constant(0.0)
+            model = Tentusscher_panfilov_2006_epi_cell()
+            model.stimulus = Constant(1000.0)*time
+
+            params = BasicSingleCellSolver.default_parameters()
+            params["theta"] = theta
+            params["enable_adjoint"] = False
+            params["nonlinear_solver"] = mode
+            solver = BasicSingleCellSolver(model, time, params=params)
+            (vs_, vs) = solver.solution_fields()
+            vs_.assign(model.initial_conditions())
+            for ((t0, t1), vs) in solver.solve((0.0, 0.1), 0.01):
+                pass
+            results[mode] = vs.vector().array()
+
+        assert solver.newton_statistics["maximum_iterations"] > 0
+        assert_almost_equal(results["local"], results["global"], 1e-8)
+        assert (results["auto"] == results["local"]).all()
+        params = BasicSingleCellSolver.default_parameters()
+        assert params["nonlinear_solver"] == "global"
+
+    @medium
+    @parametrize(("mode"), ["global", "local"])
+    def test_changed_model_parameters(self, mode):
+        """Test that a change of the parameters of the cell model
+        between steps is picked up by the reused solver."""
+        params = BasicSingleCellSolver.default_parameters()
+        params["enable_adjoint"] = False
+        params["nonlinear_solver"] = mode
+
+        # Take two steps, changing a parameter in between
+        model = FitzHughNagumoManual()
+        solver = BasicSingleCellSolver(model, Constant(0.0), params=params)
+        (vs_, vs) = solver.solution_fields()
+        vs_.assign(model.initial_conditions())
+        solver.step((0.0, 0.01))
+        vs_.assign(vs)
+        first = vs.vector().array()
+        model.set_parameters(a=0.5, c_1=2.6)
+        solver.step((0.01, 0.02))
+
+        # Take the second step with a solver of the changed model
+        changed = FitzHughNagumoManual(params={"a": 0.5, "c_1": 2.6})
+        reference = BasicSingleCellSolver(changed, Constant(0.0),
+                                          params=params)
+        (ref_, ref) = reference.solution_fields()
+        ref_.vector().set_local(first)
+        ref_.vector().apply("insert")
+        reference.step((0.01, 0.02))
+
+        assert_almost_equal(vs.vector().array(), ref.vector().array(), 1e-12)
+
+    @medium
+    def test_local_nonlinear_solver_varying_stimulus(self):
+        """Test that the local solver, with the cell averages of a
+        spatially varying stimulus, agrees with the global solver, and
+        that it is not chosen automatically."""
+        results = {}
+        for mode in ("global", "local", "auto"):
+            time = Constant(0.0)
+            model = Tentusscher_panfilov_2006_epi_cell()
+            stimulus = Expression("1000*t*(1.0 + x[0])", t=time, degree=1)
+
+            params = BasicCardiacODESolver.default_parameters()
+            params["enable_adjoint"] = False
+            params["nonlinear_solver"] = mode
+            solver = BasicCardiacODESolver(UnitIntervalMesh(4), time, model,
+                                           I_s=stimulus, params=params)
+            (vs_, vs) = solver.solution_fields()
+            vs_.assign(model.initial_conditions())
+            for ((t0, t1), vs) in solver.solve((0.0, 0.1), 0.01):
+                pass
+            results[mode] = vs.vector().array()
+            assert bool(solver.newton_statistics) == (mode == "local")
+
+        assert (results["auto"] == results["global"]).all()
+        assert_almost_equal(results["local"], results["global"], 1e-8)
@@ -17,6 +17,36 @@ class TestModelCreation:
         model = cell_model
         ics = model.initial_conditions()
 
+    @fast
+    def test_I_and_F_built_once(self, cell_model):
+        "Test that I and F are built once for the same arguments."
+        model = cell_model
+        if not hasattr(model, "_compute_I_and_F"):
+            pytest.skip("I and F are not computed together")
+        calls = []
+        compute = model._compute_I_and_F
+        def counting_compute(v, s, time):
+            calls.append((v, s, time))
+            return compute(v, s, time)
+        model._compute_I_and_F = counting_compute
+
+        n = model.num_states()
+        v = Constant(-80.0)
+        s = as_vector([Constant(0.1) for i in range(n)]) if n > 1 \
+            else Constant(0.1)
+        time = Constant(0.0)
+        model.I(v, s, time)
+        model.F(v, s, time)
+        assert len(calls) == 1
+
+        # Other arguments or parameters are built again
+        model.F(v, s, Constant(1.0))
+        assert len(calls) == 2
+        (name, value) = list(model.parameters().items())[0]
+        model.set_parameters(**{name: float(value) + 1.0})
+        model.F(v, s, time)
+        assert len(calls) == 3
+
 class TestFormCompilation:
     "Test form compilation with different optimizations."
     def test_form_compilation(self, ode_test_form):
@@ -0,0 +1,43 @@
+"""
+Unit tests for the batched single cell ensemble solver.
+"""
+
+__all__ = ["TestEnsembleSingleCellSolver"]
+
+import numpy
+import pytest
+from testutils import fast, assert_almost_equal, temporary_kernel_cache
+
+from cbcbeat import EnsembleSingleCellSolver, Constant
+from cbcbeat.arrayodesolver import ArrayODESolver
+from cbcbeat.cellmodels import Tentusscher_panfilov_2006_epi_cell
+
+@pytest.mark.usefixtures("temporary_kernel_cache")
+class TestEnsembleSingleCellSolver(object):
+    "Test the ensemble solver against the cells solved one by one."
+
+    @fast
+    def test_parameter_sweep(self):
+        "Test that each cell is advanced with its own parameters."
+        Model = Tentusscher_panfilov_2006_epi_cell
+        g_Na = Model.default_parameters()["g_Na"]
+        values = numpy.array([[g_Na], [2*g_Na], [0.5*g_Na]])
+        initial = numpy.array([float(value) for value in
+                               Model.default_initial_conditions().values()])
+        initial[0] = -50.0
+
+        solver = EnsembleSingleCellSolver(Model, ["g_Na"], values,
+                                          initial_conditions=initial)
+        (times, traces) = solver.solve((0.0, 1.0), 0.01, save_every=10)
+        assert traces.shape == (3, len(initial), 11)
+        assert_almost_equal(times, numpy.linspace(0.0, 1.0, 11), 1.e-12)
+        assert_almost_equal(traces[:, :, 0], numpy.array([initial]*3), 1.e-12)
+
+        for k in range(3):
+            model = Model(params={"g_Na": values[k, 0]})
+            single = ArrayODESolver(model, Constant(0.0),
+                                    solver.parameters["scheme"])
+            y = initial[:, None].copy()
+            for i in range(100):
+                single.advance(y, (i*0.01, (i + 1)*0.01))
+            assert_almost_equal(traces[k, :, -1], y[:, 0], 1.e-10)
@@ -0,0 +1,122 @@
+"""
+Unit tests for the initial guesses of the Krylov solves of the PDE
+solvers.
+"""
+
+__all__ = ["TestInitialGuessExtrapolator"]
+
+import numpy
+import pytest
+from testutils import fast, assert_almost_equal
+
+from cbcbeat.utils import InitialGuessExtrapolator
+
+class Vector(object):
+    "A vector stand-in holding a NumPy array."
+    def __init__(self, values):
+        self.values = numpy.array(values, dtype=float)
+
+    def copy(self):
+        return Vector(self.values)
+
+    def zero(self):
+        self.values[:] = 0.0
+
+    def axpy(self, a, x):
+        self.values += a*x.values
+
+    def inner(self, x):
+        return numpy.dot(self.values, x.values)
+
+    def norm(self, norm_type):
+        return numpy.linalg.norm(self.values)
+
+class Matrix(object):
+    "A matrix stand-in holding a NumPy array."
+    def __init__(self, values):
+        self.values = numpy.array(values, dtype=float)
+
+    def mult(self, x, y):
+        y.values[:] = numpy.dot(self.values, x.values)
+
+class TestInitialGuessExtrapolator(object):
+    "Test the initial guesses from the previous solutions."
+
+    def setup_method(self, method):
+        n = 6
+        self.A = Matrix(2.0*numpy.identity(n) - numpy.eye(n, k=1)
+                        - numpy.eye(n, k=-1))
+        (self.a, self.b, self.c) = numpy.random.RandomState(0).rand(3, n)
+
+    def _solution(self, t):
+        "A solution quadratic in time."
+        return self.a + t*self.b + t**2*self.c
+
+    def _guess(self, method, times, t, **kwargs):
+        params = InitialGuessExtrapolator.default_parameters()
+        params["method"] = method
+        for (key, value) in kwargs.items():
+            params[key] = value
+        extrapolator = InitialGuessExtrapolator(params)
+        for s in times:
+            extrapolator.update(s, Vector(self._solution(s)))
+        x = Vector(self._solution(times[-1]))
+        b = Vector(numpy.dot(self.A.values, self._solution(t)))
+        extrapolator.guess(t, x, self.A, b)
+        return (x.values, extrapolator)
+
+    @fast
+    def test_extrapolation(self):
+        "Test that quadratic solutions are extrapolated exactly."
+        times = [0.0, 0.1, 0.25, 0.3]
+        (x, extrapolator) = self._guess("quadratic", times, 0.4)
+        assert_almost_equal(x, self._solution(0.4), 1.e-12)
+        assert extrapolator.residual_reductions[-1] < 1.e-10
+
+        # Linear extrapolation improves on the previous solution
+        (x, extrapolator) = self._guess("linear", times, 0.4)
+        assert 0.0 < extrapolator.residual_reductions[-1] < 1.0
+
+        # The previous solution is kept as it is
+        (x, extrapolator) = self._guess("previous", times, 0.4)
+        assert_almost_equal(x, self._solution(0.3), 1.e-12)
+        assert extrapolator.residual_reductions == [1.0]
+
+    @fast
+    def test_pod(self):
+        "Test the projection onto the span of the previous solutions."
+        (x, extrapolator) = self._guess("pod", [0.0, 0.1, 0.2], 0.7,
+                                        history_size=3)
+        assert_almost_equal(x, self._solution(0.7), 1.e-10)
+
+        # Only the last history_size solutions are kept
+        (x, extrapolator) = self._guess("pod", [0.0, 0.1, 0.2], 0.7,
+                                        history_size=2)
+        assert len(extrapolator._history) == 2
+        assert 0.0 < extrapolator.residual_reductions[-1] < 1.0
+
+    @fast
+    def test_restart(self):
+        "Test that the history is restarted when the time restarts."
+        params = InitialGuessExtrapolator.default_parameters()
+        params["method"] = "quadratic"
+        extrapolator = InitialGuessExtrapolator(params)
+        for s in (0.0, 0.1, 0.2, 0.0):
+            extrapolator.update(s, Vector(self._solution(s)))
+        assert len(extrapolator._history) == 1
+
+        params["method"] = "none"
+        extrapolator = InitialGuessExtrapolator(params)
+        extrapolator.update(0.0, Vector(self._solution(0.0)))
+        x = Vector(self._solution(0.0))
+        extrapolator.guess(0.1, x, self.A, x.copy())
+        assert extrapolator.residual_reductions == []
+        assert_almost_equal(x.values, self._solution(0.0), 1.e-12)
+
+    @fast
+    def test_unknown_method(self):
+        "Test that an unknown method is an error."
+        params = InitialGuessExtrapolator.default_parameters()
+        params["method"] = "cubic"
+        with pytest.raises(RuntimeError):
+            InitialGuessExtrapolator(params)
@@ -0,0 +1,94 @@
+"""
+Unit tests for the persistent kernel cache.
+"""
+
+__all__ = ["TestKernelCache"]
+
+import os
+import pickle
+import numpy
+import pytest
+from testutils import fast, assert_almost_equal
+
+from cbcbeat import Constant
+from cbcbeat.cellmodels import Beeler_reuter_1977
+from cbcbeat.kernelcache import KernelCache
+from cbcbeat.ufl2numpy import CellModelKernels
+
+class TestKernelCache(object):
+    "Test the storage and eviction of the kernel cache."
+
+    @fast
+    def test_keys(self):
+        "Test that the keys depend on the parameters and options."
+        cache = KernelCache(path="unused")
+        model = Beeler_reuter_1977()
+        key = cache.key(model, "GRL1")
+        assert key == cache.key(Beeler_reuter_1977(), "GRL1")
+        assert key != cache.key(model, "RL1")
+        model.set_parameters(g_s=0.1)
+        assert key != cache.key(model, "GRL1")
+
+        # The values of constant parameters are kernel arguments
+        model.set_parameters(g_s=Constant(0.1))
+        key = cache.key(model, "GRL1")
+        model.set_parameters(g_s=Constant(0.2))
+        assert key == cache.key(model, "GRL1")
+
+    @fast
+    def test_eviction(self, tmpdir):
+        "Test that the least recently used entries are evicted."
+        cache = KernelCache(path=str(tmpdir), maximum_size=10**6)
+        for (i, key) in enumerate(["a", "b", "c"]):
+            cache.set(key, "x"*1000)
+            os.utime(cache._filename(key), (i, i))
+        assert cache.get("a") == "x"*1000
+        assert cache.get("d") is None
+
+        cache.maximum_size = 3500
+        cache.set("d", "x"*1000)
+        assert [key for (key, size, used) in cache.entries()] == ["c", "a", "d"]
+
+        cache.clear()
+        assert cache.entries() == []
+
+    @fast
+    def test_load_kernels(self):
+        "Test that kernels loaded from their sources are the same."
+        model = Beeler_reuter_1977()
+        time = Constant(0.0)
+        grid = (-150.0, 100.0, 0.01)
+        kernels = CellModelKernels(model, time, lookup_table=grid)
+        rows = kernels.nonlinear
+        kernels.diagonal_kernel(rows)
+        sources = pickle.loads(pickle.dumps(kernels.sources()))
+        loaded = CellModelKernels(model, time, lookup_table=grid,
+                                  sources=sources)
+        assert loaded.loaded and not kernels.loaded
+        assert loaded.nonlinear == kernels.nonlinear
+        assert loaded.linear == kernels.linear
+        assert len(loaded.lookup_table) == len(kernels.lookup_table)
+
+        initial = [float(value) for value in
+                   model.default_initial_conditions().values()]
+        y = numpy.array([initial]*20).T
+        y[0] = numpy.linspace(-90.0, 40.0, 20)
+        c = [float(c) for c in kernels.coefficients]
+        (f, b) = (numpy.empty_like(y), numpy.empty((len(rows), 20)))
+        (g, d) = (numpy.empty_like(y), numpy.empty((len(rows), 20)))
+        kernels.diagonal_kernel(rows)(y, 0.0, c, f, b)
+        loaded.diagonal_kernel(rows)(y, 0.0, c, g, d)
+        assert_almost_equal(f, g, 1.e-14)
+        assert_almost_equal(b, d, 1.e-14)
+
+    @fast
+    def test_signature(self):
+        "Test that sources for other coefficients are not loaded."
+        time = Constant(0.0)
+        model = Beeler_reuter_1977(params={"g_s": Constant(0.0009)})
+        sources = CellModelKernels(model, time).sources()
+        other = Beeler_reuter_1977(params={"g_Na": Constant(0.04)})
+        kernels = CellModelKernels(other, time, sources=sources)
+        assert not kernels.loaded
+        assert kernels.signature == [("g_Na", "Constant", ())]
+        assert kernels.sources()["rhs"] != sources["rhs"]
@@ -0,0 +1,64 @@
+"""
+Unit tests for the Krylov subspace recycling of the PDE solvers.
+"""
+
+__all__ = ["TestKrylovRecycler"]
+
+import pytest
+from testutils import fast, assert_almost_equal
+
+from dolfin import *
+from cbcbeat.utils import KrylovRecycler
+
+class TestKrylovRecycler(object):
+    "Test the deflation of the recycled Krylov space."
+
+    def _system(self):
+        "Return the matrix and two right-hand sides of a Poisson problem."
+        mesh = UnitSquareMesh(16, 16)
+        V = FunctionSpace(mesh, "CG", 1)
+        u = TrialFunction(V)
+        v = TestFunction(V)
+        bc = DirichletBC(V, 0.0, "on_boundary")
+        a = inner(grad(u), grad(v))*dx
+        sources = [Expression("sin(3*x[0])*x[1]", degree=2),
+                   Expression("x[0]*cos(2*x[1])", degree=2)]
+        (A, b0) = assemble_system(a, sources[0]*v*dx, bc)
+        (A, b1) = assemble_system(a, sources[1]*v*dx, bc)
+        return (A, [b0, b1])
+
+    def _solve(self, recycler):
+        "Solve for both right-hand sides, updating the recycler."
+        (A, bs) = self._system()
+        solver = PETScKrylovSolver("cg", "jacobi")
+        solver.parameters["relative_tolerance"] = 1.e-10
+        solver.set_operator(A)
+        if recycler is not None:
+            recycler.attach(solver)
+        (solutions, iterations) = ([], [])
+        for b in bs:
+            x = Vector()
+            A.init_vector(x, 1)
+            iterations.append(solver.solve(x, b))
+            solutions.append(x.array())
+            if recycler is not None:
+                recycler.update()
+        return (solutions, iterations)
+
+    @fast
+    @pytest.mark.skipif(not has_petsc4py(), reason="Requires petsc4py")
+    def test_deflated_cg(self):
+        """Test that the deflated CG solve gives the same solution in
+        fewer iterations than CG."""
+        params = KrylovRecycler.default_parameters()
+        params["size"] = 4
+        params["maximum_updates"] = 1
+        recycler = KrylovRecycler(params)
+        (solutions, iterations) = self._solve(None)
+        (deflated, deflated_iterations) = self._solve(recycler)
+
+        assert len(recycler.space) == 4 and recycler.updates == 1
+        assert deflated_iterations[0] == iterations[0]
+        assert deflated_iterations[1] < iterations[1]
+        for (x, y) in zip(solutions, deflated):
+            assert_almost_equal(x, y, 1e-8)
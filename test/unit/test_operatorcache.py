@@ -0,0 +1,53 @@
+"""
+Unit tests for the LRU cache of the operators of the PDE solvers.
+"""
+
+__all__ = ["TestOperatorCache"]
+
+import pytest
+from testutils import fast
+
+from cbcbeat.utils import OperatorCache
+
+class Matrix(object):
+    "A matrix stand-in with a given number of nonzeros."
+    def __init__(self, nnz):
+        self._nnz = nnz
+
+    def nnz(self):
+        return self._nnz
+
+class TestOperatorCache(object):
+    "Test the eviction of the least recently used operators."
+
+    @fast
+    def test_maximum_size(self):
+        "Test that the least recently used timestep is evicted."
+        params = OperatorCache.default_parameters()
+        params["maximum_size"] = 2
+        cache = OperatorCache(params)
+        cache.set(0.1, {"lhs": Matrix(10)})
+        cache.set(0.5, {"lhs": Matrix(10)})
+        assert cache.get(0.1 + 1.e-14) is not None
+        cache.set(0.25, {"lhs": Matrix(10)})
+        assert len(cache) == 2
+        assert cache.get(0.5) is None
+        assert cache.get(0.1) is not None and cache.get(0.25) is not None
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    @fast
+    def test_maximum_memory(self):
+        "Test that the memory budget is respected."
+        params = OperatorCache.default_parameters()
+        params["maximum_size"] = 10
+        params["maximum_memory"] = 2.5*12/1024.0**2
+        cache = OperatorCache(params)
+        for dt in (0.1, 0.2, 0.3):
+            cache.set(dt, {"lhs": Matrix(1), "solver": None})
+        assert len(cache) == 2
+        assert cache.memory() == 24
+        assert cache.get(0.1) is None
+
+        # The most recently used entry is always kept
+        cache.set(0.4, {"lhs": Matrix(100)})
+        assert len(cache) == 1 and cache.get(0.4) is not None
@@ -5,12 +5,13 @@ Unit tests for various types of bidomain solver
 __author__ = "Marie E. Rognes (meg@simula.no), 2013"
 __all__ = [""]
 
-from testutils import assert_almost_equal, assert_equal, fast
+import pytest
+from testutils import assert_almost_equal, assert_equal, fast, parametrize
 
 from dolfin import *
 from cbcbeat import BasicBidomainSolver, BasicMonodomainSolver, \
         MonodomainSolver, BidomainSolver, \
-        Constant
+        Constant, SeparableStimulus, single_pulse
 
 class TestBasicBidomainSolver(object):
     "Test functionality for the basic bidomain solver."
@@ -140,6 +141,30 @@ class TestBasicMonodomainSolver(object):
         # Check that result from solve and step match.
         assert_equal(a, b)
 
+    @fast
+    def test_change_timestep(self):
+        "Test that a changed time step is used by the reused solver"
+        self.setUp()
+
+        Solver = BasicMonodomainSolver
+        solver = Solver(self.mesh, self.time,
+                        self.M_i, I_s=self.stimulus)
+        (v_, v) = solver.solution_fields()
+        solver.step((self.t0, self.t0 + self.dt))
+        v_.assign(v)
+        solver.step((self.t0 + self.dt, self.t0 + 3*self.dt))
+        a = v.vector().norm("l2")
+
+        # Take the second step with a new solver
+        solver = Solver(self.mesh, self.time,
+                        self.M_i, I_s=self.stimulus)
+        (w_, w) = solver.solution_fields()
+        w_.assign(v_)
+        solver.step((self.t0 + self.dt, self.t0 + 3*self.dt))
+        b = w.vector().norm("l2")
+
+        assert_almost_equal(a, b, 1.e-12)
+
 class TestBidomainSolver(object):
     def setUp(self):
         N = 5
@@ -246,6 +271,262 @@ class TestBidomainSolver(object):
         print "krylov gives ", b
         assert_almost_equal(a, b, 1e-4)
 
+    @fast
+    def test_separable_stimulus(self):
+        """Test that a separable stimulus gives the same results as
+        its expression."""
+        self.setUp()
+
+        params = BidomainSolver.default_parameters()
+        params["linear_solver_type"] = "direct"
+        params["use_avg_u_constraint"] = True
+        params["enable_adjoint"] = False
+        stimulus = SeparableStimulus(
+            [single_pulse(self.time, 2.0, 0.0, 0.15), 3.0],
+            [Expression("x[0]", degree=1), Expression("1.0 - x[1]", degree=1)])
+        results = []
+        for I_s in (stimulus, stimulus.expression()):
+            self.time.assign(0.0)
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=I_s, I_a=self.applied_current,
+                                    params=params)
+            solutions = solver.solve((self.t0, self.t0 + 3*self.dt), self.dt)
+            for (interval, fields) in solutions:
+                (v_, vur) = fields
+            results.append(vur.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+
+    @fast
+    def test_preassembled_rhs(self):
+        """Test that the right-hand side by the preassembled matrix
+        gives the same results as the assembled right-hand side, also
+        when the time step changes."""
+        self.setUp()
+
+        results = []
+        for use_preassembled_rhs in (True, False):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = "direct"
+            params["use_avg_u_constraint"] = True
+            params["enable_adjoint"] = False
+            params["use_preassembled_rhs"] = use_preassembled_rhs
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            (v_, vur) = solver.solution_fields()
+            for interval in ((0.0, 0.1), (0.1, 0.2), (0.2, 0.25)):
+                solver.step(interval)
+                solver.merger.assign(v_, vur.sub(0))
+            assert (solver._rhs_matrix is not None) == use_preassembled_rhs
+            results.append(vur.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+
+    @fast
+    def test_update_operators_by_axpy(self):
+        """Test that updating the operators by AXPY (in place or not)
+        gives the same results as assembling them."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.15), (0.15, 0.25)]
+        results = []
+        for (by_axpy, maximum_size) in ((False, 1), (True, 1), (True, 2)):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = "direct"
+            params["use_avg_u_constraint"] = True
+            params["enable_adjoint"] = False
+            params["update_operators_by_axpy"] = by_axpy
+            params["operator_cache"]["maximum_size"] = maximum_size
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            (v_, vur) = solver.solution_fields()
+            for interval in intervals:
+                solver.step(interval)
+                solver.merger.assign(v_, vur.sub(0))
+            results.append(vur.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+        assert_almost_equal(results[0], results[2], 1e-12)
+
+    @fast
+    @pytest.mark.skipif(not has_petsc4py(), reason="Requires petsc4py")
+    @parametrize(("fieldsplit_type"), ["additive", "symmetric_multiplicative"])
+    def test_fieldsplit(self, fieldsplit_type):
+        """Test that CG with the fieldsplit preconditioner converges to
+        the transmembrane potential of the direct solver."""
+        self.setUp()
+
+        results = []
+        for solver_type in ("direct", "iterative"):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = solver_type
+            params["use_avg_u_constraint"] = solver_type == "direct"
+            params["enable_adjoint"] = False
+            params["preconditioner"] = "fieldsplit"
+            params["fieldsplit"]["type"] = fieldsplit_type
+            params["algorithm"] = "cg"
+            params["petsc_krylov_solver"]["relative_tolerance"] = 1.e-12
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            solutions = solver.solve((self.t0, self.t0 + 3*self.dt), self.dt)
+            for (interval, fields) in solutions:
+                (v_, vur) = fields
+            results.append(vur.split(deepcopy=True)[0].vector().norm("l2"))
+
+        assert max(solver.preconditioner_policy.iterations) < 100
+        assert solver.linear_solver.ksp().getConvergedReason() > 0
+        assert_almost_equal(results[0], results[1], 1e-6)
+
+    @fast
+    @pytest.mark.skipif(not has_petsc4py(), reason="Requires petsc4py")
+    @parametrize(("fieldsplit_type"), ["additive", "symmetric_multiplicative"])
+    def test_fieldsplit_avg_u_constraint(self, fieldsplit_type):
+        """Test that GMRES with the fieldsplit preconditioner, with the
+        Lagrange multiplier of the average constraint on u in a block
+        of its own, converges to the solution of the direct solver."""
+        self.setUp()
+
+        results = []
+        for solver_type in ("direct", "iterative"):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = solver_type
+            params["use_avg_u_constraint"] = True
+            params["enable_adjoint"] = False
+            params["preconditioner"] = "fieldsplit"
+            params["fieldsplit"]["type"] = fieldsplit_type
+            params["algorithm"] = "gmres"
+            params["petsc_krylov_solver"]["relative_tolerance"] = 1.e-12
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            solutions = solver.solve((self.t0, self.t0 + 3*self.dt), self.dt)
+            for (interval, fields) in solutions:
+                (v_, vur) = fields
+            results.append(vur.vector().norm("l2"))
+
+        assert max(solver.preconditioner_policy.iterations) < 100
+        assert solver.linear_solver.ksp().getConvergedReason() > 0
+        assert_almost_equal(results[0], results[1], 1e-6)
+
+    @fast
+    @parametrize(("use_avg_u_constraint"), [True, False])
+    def test_monodomain_preconditioner(self, use_avg_u_constraint):
+        """Test that the monodomain preconditioner gives the solution of
+        the direct solver (with the average constraint on u), also
+        after a change of the timestep, both with and without the
+        constraint."""
+        self.setUp()
+
+        results = []
+        for solver_type in ("direct", "iterative"):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = solver_type
+            params["use_avg_u_constraint"] = (solver_type == "direct" or
+                                              use_avg_u_constraint)
+            params["enable_adjoint"] = False
+            params["preconditioner"] = "monodomain"
+            params["algorithm"] = "gmres"
+            params["petsc_krylov_solver"]["relative_tolerance"] = 1.e-12
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            for dt in (self.dt, 0.5*self.dt):
+                for (interval, fields) in solver.solve((0.0, 2*dt), dt):
+                    (v_, vur) = fields
+
+            # Compare v, and u normalized to zero average (which the
+            # Krylov solver need not give without the constraint)
+            (v, u) = vur.split(deepcopy=True)[:2]
+            volume = assemble(Constant(1.0)*dx(domain=self.mesh))
+            u_average = assemble(u*dx)/volume
+            results.append((v.vector().array(),
+                            u.vector().array() - u_average))
+
+        assert max(solver.preconditioner_policy.iterations) < 100
+        assert_almost_equal(results[0][0], results[1][0], 1e-6)
+        assert_almost_equal(results[0][1], results[1][1], 1e-6)
+
+    @fast
+    def test_initial_guess(self):
+        """Test that the extrapolated initial guesses give the same
+        solution, and that the residual reductions are recorded."""
+        self.setUp()
+
+        results = []
+        for method in ("none", "quadratic", "pod"):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = "iterative"
+            params["use_avg_u_constraint"] = False
+            params["enable_adjoint"] = False
+            params["algorithm"] = "cg"
+            params["petsc_krylov_solver"]["relative_tolerance"] = 1.e-12
+            params["initial_guess"]["method"] = method
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            solutions = solver.solve((self.t0, self.t0 + 5*self.dt), self.dt)
+            for (interval, fields) in solutions:
+                (v_, vur) = fields
+            reductions = solver.initial_guess.residual_reductions
+            assert len(reductions) == (0 if method == "none" else 4)
+            results.append(vur.split(deepcopy=True)[0].vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-6)
+        assert_almost_equal(results[0], results[2], 1e-6)
+
+    @fast
+    @pytest.mark.skipif(not has_petsc4py(), reason="Requires petsc4py")
+    @parametrize(("policy", "maximum_size"),
+                 [("never", 2), ("always", 1), ("interval", 2)])
+    def test_krylov_recycling(self, policy, maximum_size):
+        """Test that recycling the Krylov space gives the same solution
+        in fewer iterations, also after changes of the timestep (with
+        cached operators or operators updated in place) and rebuilds
+        of the preconditioner."""
+        self.setUp()
+
+        (results, iterations) = ([], [])
+        for size in (0, 4):
+            self.time.assign(0.0)
+            params = BidomainSolver.default_parameters()
+            params["linear_solver_type"] = "iterative"
+            params["use_avg_u_constraint"] = False
+            params["enable_adjoint"] = False
+            params["algorithm"] = "cg"
+            params["preconditioner"] = "jacobi"
+            params["petsc_krylov_solver"]["relative_tolerance"] = 1.e-10
+            params["operator_cache"]["maximum_size"] = maximum_size
+            params["preconditioner_reuse"]["policy"] = policy
+            params["preconditioner_reuse"]["interval"] = 2
+            params["krylov_recycling"]["size"] = size
+            params["krylov_recycling"]["maximum_updates"] = 2
+            solver = BidomainSolver(self.mesh, self.time, self.M_i, self.M_e,
+                                    I_s=self.stimulus,
+                                    I_a=self.applied_current, params=params)
+            t0 = 0.0
+            for dt in (self.dt, 0.5*self.dt, self.dt):
+                for (interval, fields) in solver.solve((t0, t0 + 3*dt), dt):
+                    (v_, vur) = fields
+                t0 += 3*dt
+            if size > 0:
+                assert len(solver.krylov_recycler.space) == size
+                assert solver.krylov_recycler.updates == 2
+            results.append(vur.split(deepcopy=True)[0].vector().norm("l2"))
+            iterations.append(solver.preconditioner_policy.iterations)
+
+        assert_almost_equal(results[0], results[1], 1e-6)
+        assert iterations[1][0] == iterations[0][0]
+        assert sum(iterations[1]) < sum(iterations[0])
+
 class TestMonodomainSolver(object):
     def setUp(self):
         N = 5
@@ -334,3 +615,213 @@ class TestMonodomainSolver(object):
         print "lu gives ", a
         print "krylov gives ", b
         assert_almost_equal(a, b, 1e-4)
+
+    @fast
+    def test_separable_stimulus(self):
+        """Test that a separable stimulus gives the same results as
+        its expression."""
+        self.setUp()
+
+        params = MonodomainSolver.default_parameters()
+        params["linear_solver_type"] = "direct"
+        params["enable_adjoint"] = False
+        stimulus = SeparableStimulus(
+            [single_pulse(self.time, 2.0, 0.0, 0.15), 3.0],
+            [Expression("x[0]", degree=1), Expression("1.0 - x[1]", degree=1)])
+        results = []
+        for I_s in (stimulus, stimulus.expression()):
+            self.time.assign(0.0)
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=I_s, params=params)
+            solutions = solver.solve((self.t0, self.t0 + 3*self.dt), self.dt)
+            for (interval, fields) in solutions:
+                (v_, v) = fields
+            results.append(v.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+
+    @fast
+    def test_preassembled_rhs(self):
+        """Test that the right-hand side by the preassembled matrix
+        gives the same results as the assembled right-hand side, also
+        when the time step changes."""
+        self.setUp()
+
+        results = []
+        for use_preassembled_rhs in (True, False):
+            self.time.assign(0.0)
+            params = MonodomainSolver.default_parameters()
+            params["linear_solver_type"] = "direct"
+            params["enable_adjoint"] = False
+            params["use_preassembled_rhs"] = use_preassembled_rhs
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=self.stimulus, params=params)
+            (v_, v) = solver.solution_fields()
+            for interval in ((0.0, 0.1), (0.1, 0.2), (0.2, 0.25)):
+                solver.step(interval)
+                v_.assign(v)
+            assert (solver._rhs_matrix is not None) == use_preassembled_rhs
+            results.append(v.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+
+    @fast
+    def test_operator_cache(self):
+        """Test that alternating timesteps reuse the cached operators
+        and give the same results as without the cache."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.15), (0.15, 0.25), (0.25, 0.3)]
+        results = []
+        for maximum_size in (1, 2):
+            self.time.assign(0.0)
+            params = MonodomainSolver.default_parameters()
+            params["linear_solver_type"] = "direct"
+            params["default_timestep"] = 0.1
+            params["operator_cache"]["maximum_size"] = maximum_size
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=self.stimulus, params=params)
+            (v_, v) = solver.solution_fields()
+            for interval in intervals:
+                solver.step(interval)
+                v_.assign(v)
+            results.append(v.vector().norm("l2"))
+            hits = solver._operator_cache.hits
+            assert hits == (0 if maximum_size == 1 else 2)
+
+        assert_almost_equal(results[0], results[1], 1e-12)
+
+    @fast
+    def test_operator_cache_default_timestep(self):
+        """Test that the operators of the default timestep are not
+        cached unless it is used."""
+        self.setUp()
+
+        params = MonodomainSolver.default_parameters()
+        params["linear_solver_type"] = "direct"
+        params["operator_cache"]["maximum_size"] = 2
+        solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                  I_s=self.stimulus, params=params)
+        assert len(solver._operator_cache) == 0
+        (v_, v) = solver.solution_fields()
+        for interval in [(0.0, 0.1), (0.1, 0.15), (0.15, 0.25),
+                         (0.25, 0.3)]:
+            solver.step(interval)
+            v_.assign(v)
+        assert len(solver._operator_cache) == 2
+        assert solver._operator_cache.get(1.0) is None
+        assert solver._operator_cache.hits == 2
+
+    @fast
+    def test_update_operators_by_axpy(self):
+        """Test that updating the operators by AXPY (in place or not)
+        gives the same results as assembling them."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.15), (0.15, 0.25)]
+        for solver_type in ("direct", "iterative"):
+            results = []
+            for (by_axpy, maximum_size) in ((False, 1), (True, 1), (True, 2)):
+                self.time.assign(0.0)
+                params = MonodomainSolver.default_parameters()
+                params["linear_solver_type"] = solver_type
+                params["krylov_solver"]["relative_tolerance"] = 1.e-12
+                params["enable_adjoint"] = False
+                params["default_timestep"] = 0.1
+                params["update_operators_by_axpy"] = by_axpy
+                params["operator_cache"]["maximum_size"] = maximum_size
+                solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                          I_s=self.stimulus, params=params)
+                (v_, v) = solver.solution_fields()
+                for interval in intervals:
+                    solver.step(interval)
+                    v_.assign(v)
+                results.append(v.vector().norm("l2"))
+
+            assert_almost_equal(results[0], results[1], 1e-10)
+            assert_almost_equal(results[0], results[2], 1e-10)
+
+    @fast
+    def test_preconditioner_reuse(self):
+        """Test that reusing the preconditioner across in place
+        operator updates gives comparable results."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.21), (0.21, 0.33), (0.33, 0.46)]
+        results = []
+        for policy in ("never", "iterations", "always"):
+            self.time.assign(0.0)
+            params = MonodomainSolver.default_parameters()
+            params["enable_adjoint"] = False
+            params["krylov_solver"]["relative_tolerance"] = 1.e-10
+            params["operator_cache"]["maximum_size"] = 1
+            params["preconditioner_reuse"]["policy"] = policy
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=self.stimulus, params=params)
+            (v_, v) = solver.solution_fields()
+            for interval in intervals:
+                solver.step(interval)
+                v_.assign(v)
+            assert len(solver.preconditioner_policy.iterations) == 4
+            results.append(v.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-6)
+        assert_almost_equal(results[0], results[2], 1e-6)
+
+    @fast
+    def test_preconditioner_reuse_timestep_change(self):
+        """Test that the preconditioner is rebuilt after the operators
+        are updated in place for a changed timestep, also with the
+        interval policy."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.2), (0.2, 0.25), (0.25, 0.3)]
+        results = []
+        for policy in ("never", "interval"):
+            self.time.assign(0.0)
+            params = MonodomainSolver.default_parameters()
+            params["enable_adjoint"] = False
+            params["default_timestep"] = 0.1
+            params["krylov_solver"]["relative_tolerance"] = 1.e-12
+            params["operator_cache"]["maximum_size"] = 1
+            params["preconditioner_reuse"]["policy"] = policy
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=self.stimulus, params=params)
+            (v_, v) = solver.solution_fields()
+            for interval in intervals:
+                solver.step(interval)
+                v_.assign(v)
+            results.append((v.vector().norm("l2"),
+                            solver.preconditioner_policy.iterations))
+
+        assert_almost_equal(results[0][0], results[1][0], 1e-10)
+        assert results[0][1] == results[1][1]
+
+    @fast
+    def test_initial_guess(self):
+        """Test that the extrapolated initial guesses give the same
+        solution, and reduce the residual of the previous solution."""
+        self.setUp()
+
+        intervals = [(0.0, 0.1), (0.1, 0.2), (0.2, 0.3), (0.3, 0.4)]
+        results = []
+        for method in ("previous", "linear", "quadratic", "pod"):
+            self.time.assign(0.0)
+            params = MonodomainSolver.default_parameters()
+            params["enable_adjoint"] = False
+            params["krylov_solver"]["relative_tolerance"] = 1.e-10
+            params["initial_guess"]["method"] = method
+            solver = MonodomainSolver(self.mesh, self.time, self.M_i,
+                                      I_s=self.stimulus, params=params)
+            (v_, v) = solver.solution_fields()
+            for interval in intervals:
+                solver.step(interval)
+                v_.assign(v)
+            reductions = solver.initial_guess.residual_reductions
+            assert len(reductions) == 3
+            if method != "previous":
+                assert reductions[-1] < 1.0
+            results.append(v.vector().norm("l2"))
+
+        for result in results[1:]:
+            assert_almost_equal(results[0], result, 1e-6)
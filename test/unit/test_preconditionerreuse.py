@@ -0,0 +1,65 @@
+"""
+Unit tests for the reuse policy of the preconditioners of the PDE
+solvers.
+"""
+
+__all__ = ["TestPreconditionerReusePolicy"]
+
+import pytest
+from testutils import fast
+
+from cbcbeat.utils import PreconditionerReusePolicy
+
+class TestPreconditionerReusePolicy(object):
+    "Test the decisions of the preconditioner reuse policies."
+
+    def _decisions(self, policy, iterations, **kwargs):
+        params = PreconditionerReusePolicy.default_parameters()
+        params["policy"] = policy
+        for (key, value) in kwargs.items():
+            params[key] = value
+        policy = PreconditionerReusePolicy(params)
+        decisions = []
+        for n in iterations:
+            decisions.append(policy.reuse())
+            policy.update(n)
+        return (decisions, policy.rebuilds)
+
+    @fast
+    def test_always_never(self):
+        "Test the trivial policies."
+        assert self._decisions("always", [5, 50, 500]) == ([True]*3, 0)
+        assert self._decisions("never", [5, 5, 5]) == ([False]*3, 0)
+
+    @fast
+    def test_interval(self):
+        "Test that the preconditioner is rebuilt every interval solves."
+        (decisions, rebuilds) = self._decisions("interval", [3]*7,
+                                                interval=3)
+        assert decisions == [True, True, True, False, True, True, False]
+        assert rebuilds == 2
+
+    @fast
+    def test_iterations(self):
+        """Test that the preconditioner is rebuilt when the iterations
+        grow past the factor of the baseline."""
+        (decisions, rebuilds) = self._decisions(
+            "iterations", [5, 6, 10, 11, 12, 20, 30], factor=2.0)
+        assert decisions == [True, True, True, True, False, True, True]
+        assert rebuilds == 1
+
+    @fast
+    def test_operator_changed(self):
+        """Test that the preconditioner is rebuilt after a change of
+        the operator, unless always reused."""
+        for (policy, reuse) in (("never", False), ("always", True),
+                                ("interval", False), ("iterations", False)):
+            params = PreconditionerReusePolicy.default_parameters()
+            params["policy"] = policy
+            policy = PreconditionerReusePolicy(params)
+            policy.reuse()
+            policy.update(5)
+            policy.operator_changed()
+            assert policy.reuse() == reuse
+            policy.update(5)
+            assert policy.reuse() == (policy.parameters["policy"] != "never")
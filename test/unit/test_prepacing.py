@@ -0,0 +1,73 @@
+"""
+Unit tests for the pre-pacing of single cells.
+"""
+
+__all__ = ["TestSingleCellPrePacer"]
+
+import numpy
+import pytest
+from testutils import medium, assert_almost_equal
+
+import cbcbeat.kernelcache
+from cbcbeat.kernelcache import KernelCache
+from cbcbeat.prepacing import SingleCellPrePacer, prepace
+from cbcbeat.cellmodels import Beeler_reuter_1977
+
+class TestSingleCellPrePacer(object):
+    "Test the pre-pacing to the periodic steady state."
+
+    def _params(self, accelerator):
+        params = SingleCellPrePacer.default_parameters()
+        params["bcl"] = 400.0
+        params["relative_tolerance"] = 1.e-5
+        params["accelerator"] = accelerator
+        params["newton"]["start"] = 1
+        return params
+
+    @medium
+    def test_accelerators(self, tmpdir, monkeypatch):
+        "Test that the accelerated pacing converges to the same states."
+        monkeypatch.setattr(cbcbeat.kernelcache, "_kernel_cache",
+                            KernelCache(path=str(tmpdir)))
+        (states, beats) = ({}, {})
+        for accelerator in ("none", "newton"):
+            params = self._params(accelerator)
+            params["use_cache"] = False
+            pacer = SingleCellPrePacer(Beeler_reuter_1977(), params=params)
+            states[accelerator] = pacer.solve()
+            assert pacer.statistics["converged"]
+            beats[accelerator] = pacer.statistics["beats"]
+
+            # The periodic steady state is a fixed point of the beat
+            y = states[accelerator].copy()
+            pacer.beat(y[:, None])
+            assert_almost_equal(y/states[accelerator], 1.0, 1.e-4)
+
+        assert_almost_equal(states["newton"]/states["none"], 1.0, 1.e-3)
+        assert beats["newton"] < beats["none"]
+
+    @medium
+    def test_cache(self, tmpdir, monkeypatch):
+        "Test that paced states are read from the cache."
+        monkeypatch.setattr(cbcbeat.kernelcache, "_kernel_cache",
+                            KernelCache(path=str(tmpdir)))
+        model = Beeler_reuter_1977()
+        statistics = prepace(model, self._params("newton"))
+        assert statistics["converged"] and not statistics["cached"]
+
+        cached = Beeler_reuter_1977()
+        statistics = prepace(cached, self._params("newton"))
+        assert statistics["cached"]
+        assert model._initial_conditions == cached._initial_conditions
+
+        # Different parameters are paced again
+        model = Beeler_reuter_1977(params={"g_s": 0.08})
+        pacer = SingleCellPrePacer(model, params=self._params("newton"))
+        assert cbcbeat.kernelcache.kernel_cache().get(pacer._key()) is None
+
+        # So are different parameters of the ArrayODESolver
+        params = self._params("newton")
+        params["ArrayODESolver"]["use_lookup_table"] = \
+            not params["ArrayODESolver"]["use_lookup_table"]
+        pacer = SingleCellPrePacer(cached, params=params)
+        assert cbcbeat.kernelcache.kernel_cache().get(pacer._key()) is None
@@ -10,7 +10,7 @@ from testutils import assert_almost_equal, medium, parametrize
 from dolfin import info, set_log_level, WARNING
 from cbcbeat import CardiacModel, \
         BasicSplittingSolver, SplittingSolver, BasicCardiacODESolver, \
-        FitzHughNagumoManual, \
+        FitzHughNagumoManual, SeparableStimulus, \
         Constant, Expression, UnitCubeMesh, \
         dolfin_adjoint, adj_reset
 
@@ -106,3 +106,32 @@ class TestSplittingSolver(object):
         # solves.
         assert_almost_equal(a, b, tolerance=1.)
         assert_almost_equal(c, d, tolerance=1.)
+
+    @medium
+    @parametrize(("engine"), ["PointIntegralSolver", "ArrayODESolver"])
+    def test_separable_stimulus(self, engine):
+        """Test that a separable stimulus applied in the cell model
+        step gives the same results as the equivalent expression."""
+
+        results = []
+        for stimulus in (Expression("2.0*t", t=self.time, degree=1),
+                         SeparableStimulus([2.0*self.time],
+                                           [Constant(1.0)])):
+            self.time.assign(0.0)
+            cardiac_model = CardiacModel(self.mesh, self.time,
+                                         self.M_i, self.M_e,
+                                         self.cell_model, stimulus,
+                                         self.applied_current)
+            params = SplittingSolver.default_parameters()
+            params["enable_adjoint"] = False
+            params["apply_stimulus_current_to_pde"] = False
+            params["CardiacODESolver"]["engine"] = engine
+            solver = SplittingSolver(cardiac_model, params=params)
+
+            (vs_, vs, vur) = solver.solution_fields()
+            vs_.assign(self.ics)
+            for (interval, fields) in solver.solve((self.t0, self.T), 0.1):
+                (vs_, vs, vur) = fields
+            results.append(vs.vector().norm("l2"))
+
+        assert_almost_equal(results[0], results[1], 1e-10)
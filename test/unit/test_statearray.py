@@ -0,0 +1,78 @@
+"""
+Unit tests for the structure-of-arrays state container.
+"""
+
+__all__ = ["TestStateArray"]
+
+import numpy
+import pytest
+from testutils import fast, assert_almost_equal
+
+from dolfin import UnitSquareMesh, VectorFunctionSpace, FunctionSpace, \
+    Function, Expression, interpolate, FunctionAssigner, has_petsc4py
+from cbcbeat.statearray import StateArray
+
+class TestStateArray(object):
+    "Test the gather, scatter and views of the StateArray."
+
+    def setup(self):
+        mesh = UnitSquareMesh(4, 4)
+        self.VS = VectorFunctionSpace(mesh, "CG", 1, dim=3)
+        self.V = FunctionSpace(mesh, "CG", 1)
+        self.vs = interpolate(Expression(("x[0]", "x[1]", "x[0]*x[1]"),
+                                         degree=1), self.VS)
+
+    @fast
+    def test_gather_scatter(self):
+        "Test that gathering and scattering reproduces the field."
+        self.setup()
+        states = StateArray(self.VS, ["V", "s", "r"])
+        states.gather(self.vs)
+        assert states.values.flags["C_CONTIGUOUS"]
+        assert states.values.shape == (3, states.num_vertices)
+
+        vs = Function(self.VS)
+        states.scatter(vs)
+        assert_almost_equal(vs.vector().get_local(),
+                            self.vs.vector().get_local(), 1.e-12)
+
+    @fast
+    def test_views(self):
+        "Test that the states are views and agree with the components."
+        self.setup()
+        states = StateArray(self.VS, ["V", "s", "r"])
+        states.gather(self.vs)
+        states["s"][:] = 2.0
+        assert_almost_equal(states.values[1], 2.0, 1.e-12)
+
+        # Compare the membrane potential with the assigned component
+        v = Function(self.V)
+        FunctionAssigner(self.V, self.VS.sub(0)).assign(v, self.vs.sub(0))
+        u = Function(self.V)
+        states.scatter_state("V", u)
+        assert_almost_equal(u.vector().get_local(), v.vector().get_local(),
+                            1.e-12)
+
+        # Copy a scalar field into a single state
+        states.gather_state(2, v)
+        assert_almost_equal(states.values[2], states.v, 1.e-12)
+
+    @fast
+    @pytest.mark.skipif(not has_petsc4py(), reason="Requires petsc4py")
+    def test_synchronized(self):
+        "Test that modifications of the synchronized field are detected."
+        self.setup()
+        states = StateArray(self.VS)
+        states.gather(self.vs)
+        assert states.is_synchronized(self.vs)
+
+        vs = Function(self.VS)
+        assert not states.is_synchronized(vs)
+        states.scatter(vs)
+        assert states.is_synchronized(vs)
+        assert not states.is_synchronized(self.vs)
+
+        vs.vector()[:] = 1.0
+        assert not states.is_synchronized(vs)
+        states.scatter(vs, 0)
+        assert not states.is_synchronized(vs)
@@ -0,0 +1,84 @@
+"""
+Unit tests for the library of stimulus protocols.
+"""
+
+__all__ = ["TestStimulus"]
+
+import pytest
+from testutils import fast, medium, assert_almost_equal
+
+from cbcbeat import Constant, UnitSquareMesh, CellFunction, \
+    CompiledSubDomain, assemble, dx
+from cbcbeat.stimulus import region_indicator, single_pulse, pulse_train, \
+    s1s2, multi_site
+from cbcbeat.ufl2numpy import NumPyCodeGenerator, compile_kernel
+
+class TestStimulus(object):
+    "Test the stimulus protocols."
+
+    def _evaluate(self, stimulus, time, constants):
+        "Return the values of the (spatially constant) stimulus at times."
+        symbols = dict((c, repr(value)) for (c, value) in constants.items())
+        symbols[time] = "time"
+        (lines, codes) = NumPyCodeGenerator(symbols).generate([stimulus])
+        (kernel, source) = compile_kernel("stimulus", ("time",),
+                                          lines + ["return " + codes[0]])
+        return lambda t: float(kernel(t))
+
+    @fast
+    def test_pulse_train(self):
+        "Test the pulses of a pulse train."
+        time = Constant(0.0)
+        bcl = Constant(100.0)
+        stimulus = self._evaluate(pulse_train(time, 2.0, 1.0, 3.0, bcl, 7),
+                                  time, {bcl: 100.0})
+        for k in range(7):
+            assert stimulus(1.0 + k*100.0) == 2.0
+            assert stimulus(3.5 + k*100.0) == 2.0
+            assert stimulus(4.0 + k*100.0) == 0.0
+            assert stimulus(50.0 + k*100.0) == 0.0
+        assert stimulus(0.5) == 0.0
+        assert stimulus(701.0) == 0.0
+
+        # A single pulse is a train of one pulse
+        pulse = self._evaluate(single_pulse(time, 2.0, 1.0, 3.0), time, {})
+        assert [pulse(t) for t in (0.5, 1.0, 3.5, 4.0, 101.0)] == \
+            [0.0, 2.0, 2.0, 0.0, 0.0]
+
+    @fast
+    def test_s1s2(self):
+        "Test that the S2 pulse follows the coupling interval."
+        time = Constant(0.0)
+        coupling_interval = Constant(260.0)
+        for interval in (260.0, 180.0):
+            stimulus = self._evaluate(s1s2(time, 5.0, 2.0, 500.0, 3,
+                                           coupling_interval),
+                                      time, {coupling_interval: interval})
+            assert [stimulus(t) for t in (0.0, 500.0, 1000.0)] == [5.0]*3
+            assert stimulus(1000.0 + interval - 0.5) == 0.0
+            assert stimulus(1000.0 + interval + 1.0) == 5.0
+            assert stimulus(1000.0 + interval + 2.0) == 0.0
+
+    @fast
+    def test_multi_site(self):
+        "Test that each site is stimulated at its own time."
+        time = Constant(0.0)
+        stimulus = multi_site(time, 1.0, 2.0, [(1.0, 3.0), (2.0, 10.0)])
+        stimulus = self._evaluate(stimulus, time, {})
+        assert [stimulus(t) for t in (0.0, 3.0, 5.0, 10.0, 12.0)] == \
+            [0.0, 1.0, 0.0, 2.0, 0.0]
+
+    @medium
+    def test_region_indicator(self):
+        "Test the indicator function of a marked region."
+        mesh = UnitSquareMesh(4, 4)
+        markers = CellFunction("size_t", mesh, 0)
+        CompiledSubDomain("x[0] <= 0.5 + DOLFIN_EPS").mark(markers, 1)
+        region = region_indicator(markers, 1)
+        assert_almost_equal(assemble(region*dx), 0.5, 1.e-12)
+
+        time = Constant(2.0)
+        stimulus = single_pulse(time, 3.0, 1.0, 2.0, region=region)
+        assert_almost_equal(assemble(stimulus*dx(domain=mesh)), 1.5, 1.e-12)
+        time.assign(3.5)
+        assert_almost_equal(assemble(stimulus*dx(domain=mesh)), 0.0, 1.e-12)
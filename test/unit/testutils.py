@@ -7,6 +7,7 @@ import numpy.linalg
 import pytest
 from cbcbeat.cellmodels import *
 from cbcbeat.utils import state_space
+import cbcbeat.kernelcache
 
 # Marks
 fast = pytest.mark.fast
@@ -60,3 +61,10 @@ def ode_test_form(request):
     rhs = inner(model.F(v, s), r) + inner(- model.I(v, s), w)
     form = rhs*dP
     return form
+
+@pytest.fixture
+def temporary_kernel_cache(tmpdir, monkeypatch):
+    "Use a kernel cache in a temporary directory."
+    cache = cbcbeat.kernelcache.KernelCache(path=str(tmpdir.join("kernels")))
+    monkeypatch.setattr(cbcbeat.kernelcache, "_kernel_cache", cache)
+    return cache